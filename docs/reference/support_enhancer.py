@@ -19,6 +19,9 @@ from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import random
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'scripts'))
+from exercise_corpus import iter_raw_items, load_pack
+
 
 class KindvriendelijkeUitlegGenerator:
     """Genereert uitleg zoals een echte juf/meester - warm, begrijpelijk en bemoedigend"""
@@ -566,11 +569,10 @@ class SupportFileEnhancer:
         print(f"📝 Bewerk: {support_file.name}")
         print(f"{'='*70}")
 
-        # Laad files
+        # Laad files (core alleen lezen, support wordt bewerkt)
         try:
-            with open(core_file, 'r', encoding='utf-8') as f:
-                core_data = json.load(f)
-            with open(support_file, 'r', encoding='utf-8') as f:
+            pack = load_pack(core_file)
+            with open(support_file, 'r', encoding='utf-8-sig') as f:
                 support_data = json.load(f)
         except Exception as e:
             print(f"❌ Fout bij laden: {e}")
@@ -578,9 +580,8 @@ class SupportFileEnhancer:
             return
 
         # Extract metadata
-        meta = core_data.get('metadata', {})
-        groep = meta.get('grade', 3)
-        niveau = meta.get('level', 'M')
+        groep = pack.grade or 3
+        niveau = pack.level or 'M'
         if isinstance(niveau, str):
             niveau = niveau[0].upper()
 
@@ -592,37 +593,29 @@ class SupportFileEnhancer:
         # Initialiseer de kindvriendelijke uitleg generator
         generator = KindvriendelijkeUitlegGenerator(groep, niveau)
 
-        # Verwerk items
-        core_items = core_data.get('items', [])
-        support_items = support_data.get('items', [])
-
-        # Maak dictionary van support items
-        support_dict = {item.get('item_id'): item for item in support_items}
+        # Maak dictionary van support items (items[], exercises[].items, problems[].items)
+        support_dict = {item.get('item_id'): item for item in iter_raw_items(support_data)}
 
         enhanced_count = 0
 
-        for core_item in core_items:
-            item_id = core_item.get('id')
-            question_text = core_item.get('question', {}).get('text', '')
+        for core_item in pack.items:
+            item_id = core_item.id
+            question_text = core_item.question
 
             # DEBUG: Print vraag
             vraag_preview = question_text[:60].replace('\n', ' ') + ('...' if len(question_text) > 60 else '')
             print(f"\n  📝 Item {item_id}: {vraag_preview}")
 
             # Vind correct antwoord en foute antwoorden
-            options = core_item.get('options', [])
-            answer_data = core_item.get('answer', {})
-            correct_idx = answer_data.get('correct_index', 0)
+            correct_idx = core_item.correct_index if core_item.correct_index is not None else 0
 
             correct_answer = ""
             foute_antwoorden = []
-            if options:
-                for idx, opt in enumerate(options):
-                    text = opt.get('text') if isinstance(opt, dict) else str(opt)
-                    if idx == correct_idx:
-                        correct_answer = str(text)
-                    else:
-                        foute_antwoorden.append(str(text))
+            for idx, text in enumerate(core_item.options):
+                if idx == correct_idx:
+                    correct_answer = text
+                else:
+                    foute_antwoorden.append(text)
 
             # Analyseer vraag
             analyse = generator.analyseer_vraag(question_text)
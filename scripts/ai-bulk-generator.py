@@ -42,7 +42,6 @@ Features:
 
 import json
 import csv
-import os
 import sys
 import argparse
 import re
@@ -51,20 +50,16 @@ from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 import time
 
-# Try to import Anthropic SDK
-try:
-    from anthropic import Anthropic
-    HAS_ANTHROPIC = True
-except ImportError:
-    HAS_ANTHROPIC = False
+# SDKs are imported when the client is first used (see lazy_cli.py), so
+# --help, --dry-run and friends start without them
+from lazy_cli import LazyClient, module_available
+
+HAS_ANTHROPIC = module_available("anthropic")
+if not HAS_ANTHROPIC:
     print("⚠️  Anthropic SDK not installed. Install with: pip install anthropic")
+HAS_OPENAI = module_available("openai")
 
-# Try to import OpenAI SDK
-try:
-    from openai import OpenAI
-    HAS_OPENAI = True
-except ImportError:
-    HAS_OPENAI = False
+from model_client import make_client, needs_api_key
 
 # API models and costs (per million tokens)
 MODELS = {
@@ -129,13 +124,15 @@ class GenerationResult:
 class AIExerciseGenerator:
     """Generates exercises using AI from prompt templates"""
 
-    def __init__(self, model: str = DEFAULT_MODEL, api_key: Optional[str] = None):
+    def __init__(self, model: str = DEFAULT_MODEL, api_key: Optional[str] = None,
+                 base_url: Optional[str] = None):
         """
         Initialize generator
 
         Args:
             model: AI model to use (see MODELS dict)
             api_key: API key (or set ANTHROPIC_API_KEY / OPENAI_API_KEY env var)
+            base_url: Endpoint root instead of the real API (or set MODEL_BASE_URL)
         """
         self.model = model
         self.model_config = MODELS.get(model)
@@ -145,15 +142,12 @@ class AIExerciseGenerator:
 
         provider = self.model_config["provider"]
 
-        # Initialize API client
-        if provider == "anthropic":
-            if not HAS_ANTHROPIC:
-                raise ImportError("Anthropic SDK not installed. Run: pip install anthropic")
-            self.client = Anthropic(api_key=api_key or os.environ.get("ANTHROPIC_API_KEY"))
-        elif provider == "openai":
-            if not HAS_OPENAI:
-                raise ImportError("OpenAI SDK not installed. Run: pip install openai")
-            self.client = OpenAI(api_key=api_key or os.environ.get("OPENAI_API_KEY"))
+        # Initialize API client (base_url / MODEL_BASE_URL: e.g. scripts/fake_model_server.py)
+        if provider == "anthropic" and not HAS_ANTHROPIC:
+            raise ImportError("Anthropic SDK not installed. Run: pip install anthropic")
+        if provider == "openai" and not HAS_OPENAI:
+            raise ImportError("OpenAI SDK not installed. Run: pip install openai")
+        self.client = LazyClient(lambda: make_client(provider, api_key=api_key, url=base_url))
 
         self.provider = provider
         self.total_tokens = {"input": 0, "output": 0}
@@ -660,6 +654,10 @@ def main():
     parser.add_argument('--output', default='data-v2-draft/exercises',
                        help='Output directory (default: data-v2-draft/exercises)')
 
+    parser.add_argument('--model-base-url', default=None,
+                       help='API endpoint root, e.g. http://127.0.0.1:8808 for scripts/fake_model_server.py '
+                            '(default: $MODEL_BASE_URL, else the real API)')
+
     # Validation
     parser.add_argument('--validate', action='store_true', help='Run validation after generation')
     parser.add_argument('--skip-validation-failures', action='store_true',
@@ -671,10 +669,11 @@ def main():
     model_provider = MODELS[args.model]["provider"]
     api_key_env = "ANTHROPIC_API_KEY" if model_provider == "anthropic" else "OPENAI_API_KEY"
 
-    if not os.environ.get(api_key_env):
+    if needs_api_key(model_provider, args.model_base_url):
         print(f"❌ Error: {api_key_env} environment variable not set")
         print(f"\nSet it with:")
         print(f"  export {api_key_env}='your-api-key-here'")
+        print("\nOr run offline against scripts/fake_model_server.py with --model-base-url")
         return 1
 
     # Load tasks
@@ -699,7 +698,7 @@ def main():
 
     # Initialize generator
     print(f"\n🤖 Initializing AI generator with {args.model}...")
-    generator = AIExerciseGenerator(model=args.model)
+    generator = AIExerciseGenerator(model=args.model, base_url=args.model_base_url)
 
     # Generate
     results = []
@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+"""
+Answer Event Store
+==================
+
+Append-only columnar store for anonymised answer events, with the
+aggregation queries used to review data-v2 items: option pick rates
+(dead distractors), hint effectiveness and correct-rate per answer
+position.
+
+Layout (one typed .npy array per column, daily partitions):
+
+    state/events/
+      dictionary.json                  item / level / option code tables
+      day=2026-10-19/part-<n>/         one directory per ingest batch and day
+        ts.npy        int64  epoch milliseconds
+        item.npy      int32  code into dictionary["item"]  ("<pack id>#<item id>")
+        level.npy     int16  code into dictionary["level"]
+        option.npy    int32  code into dictionary["option"] (-1 = no answer)
+        selected.npy  int8   selected option index (-1 = unknown / open answer)
+        correct.npy   int8   1 = correct
+        latency.npy   int32  time to answer in ms (-1 = unknown)
+        hints.npy     int8   number of hints opened
+        learner.npy   uint32 crc32 of the anonymised learner id
+
+Dictionary codes are never reassigned, so partitions written earlier stay
+valid. Queries memory-map only the columns they need and aggregate each
+partition with np.bincount, so memory stays flat as the store grows.
+
+Event format (JSONL, one event per line; same stand-in as calibrate_difficulty.py):
+    {"ts": "2026-10-19T09:12:03", "learner": "a1f3", "item": "gb_groep4_m4_core#12",
+     "level": "M4", "selected": 2, "correct": false, "latency_ms": 5400, "hints_used": 1}
+
+Usage:
+    python3 scripts/answer_events.py ingest logs/answers-*.jsonl
+    python3 scripts/answer_events.py summary
+    python3 scripts/answer_events.py options --min-responses 100 --dead-below 0.03
+    python3 scripts/answer_events.py hints
+    python3 scripts/answer_events.py positions --since 2026-09-01
+
+Requires numpy (pip install -r scripts/requirements-analysis.txt).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+from itertools import islice
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+sys.path.insert(0, str(Path(__file__).parent))
+from exercise_corpus import open_corpus
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_STORE = ROOT / "state" / "events"
+DEFAULT_EXERCISES_DIR = ROOT / "data-v2" / "exercises"
+
+# column -> numpy dtype name
+COLUMNS = {
+    "ts": "int64",
+    "item": "int32",
+    "level": "int16",
+    "option": "int32",
+    "selected": "int8",
+    "correct": "int8",
+    "latency": "int32",
+    "hints": "int8",
+    "learner": "uint32",
+}
+
+MAX_OPTIONS = 8        # selected indexes above this are treated as unknown
+MAX_HINT_LEVEL = 5     # hint counts are clipped here (5 = "5 or more")
+BATCH_ROWS = 1_000_000
+DAY_MS = 86_400_000
+
+
+def require_numpy():
+    if np is None:
+        print("❌ numpy is required: pip install -r scripts/requirements-analysis.txt")
+        sys.exit(2)
+
+
+# ----------------------------
+# Dictionary encoding
+# ----------------------------
+
+class Dictionary:
+    """Append-only string -> code tables, persisted as dictionary.json"""
+
+    KINDS = ("item", "level", "option")
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.values: Dict[str, List[str]] = {kind: [] for kind in self.KINDS}
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            for kind in self.KINDS:
+                self.values[kind] = list(stored.get(kind, []))
+        self._codes = {kind: {v: i for i, v in enumerate(vals)} for kind, vals in self.values.items()}
+
+    def encode(self, kind: str, value: str) -> int:
+        codes = self._codes[kind]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.values[kind])
+            self.values[kind].append(value)
+        return code
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.values, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+# ----------------------------
+# Ingestion
+# ----------------------------
+
+def _parse_ts(value, default_ms: int) -> int:
+    if value is None or value == "":
+        return default_ms
+    if isinstance(value, (int, float)):
+        # epoch seconds or milliseconds
+        return int(value * 1000) if value < 1e11 else int(value)
+    dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def _parse_selected(value) -> int:
+    if isinstance(value, bool) or value is None:
+        return -1
+    if isinstance(value, int):
+        return value if 0 <= value < MAX_OPTIONS else -1
+    text = str(value).strip()
+    if text.isdigit():
+        return int(text) if int(text) < MAX_OPTIONS else -1
+    if len(text) == 1 and "A" <= text.upper() <= "H":
+        return ord(text.upper()) - ord("A")
+    return -1
+
+
+def _next_part(day_dir: Path) -> Path:
+    existing = [int(p.name.split("-", 1)[1]) for p in day_dir.glob("part-*") if p.name.split("-", 1)[1].isdigit()]
+    return day_dir / f"part-{max(existing, default=0) + 1:06d}"
+
+
+def _flush(store: Path, batch: Dict[str, list]) -> int:
+    """Write one batch, split into per-day partitions"""
+    if not len(batch["ts"]):
+        return 0
+    arrays = {col: np.asarray(batch[col], dtype=dtype) for col, dtype in COLUMNS.items()}
+    days = arrays["ts"] // DAY_MS
+    for day in np.unique(days):
+        mask = days == day
+        label = datetime.fromtimestamp(int(day) * 86400, tz=timezone.utc).strftime("%Y-%m-%d")
+        day_dir = store / f"day={label}"
+        day_dir.mkdir(parents=True, exist_ok=True)
+        part = _next_part(day_dir)
+        tmp = part.with_name(part.name + ".tmp")
+        tmp.mkdir()
+        for col, arr in arrays.items():
+            np.save(tmp / f"{col}.npy", arr[mask])
+        # rename last: readers never see a half-written part
+        os.replace(tmp, part)
+    return len(batch["ts"])
+
+
+def _parse_lines(lines: List[str]) -> Tuple[List[Dict], int]:
+    """Parse a batch of JSONL lines in one json.loads call; per line only if the batch is malformed"""
+    lines = [line for line in lines if line.strip()]
+    try:
+        return json.loads("[" + ",".join(lines) + "]"), 0
+    except ValueError:
+        events, skipped = [], 0
+        for line in lines:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                skipped += 1
+        return events, skipped
+
+
+def _by_distinct(values: list, fn) -> list:
+    """Apply fn once per distinct value (ids repeat heavily within a batch)"""
+    mapping = {v: fn(v) for v in dict.fromkeys(values)}
+    return list(map(mapping.__getitem__, values))
+
+
+def _timestamps(values: list, now_ms: int) -> "np.ndarray":
+    try:
+        # fast path: numeric epoch seconds / milliseconds throughout
+        ts = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.asarray([_parse_ts(v, now_ms) for v in values], dtype=np.int64)
+    ms = np.where(ts < 1e11, ts * 1000, ts)
+    # events without ts come through as NaN: ingest time, as in _parse_ts
+    return np.where(np.isfinite(ms), ms, now_ms).astype(np.int64)
+
+
+def _encode_batch(events: List[Dict], dictionary: Dictionary, now_ms: int) -> Dict[str, list]:
+    """Turn parsed events into column lists; ids are encoded per distinct value"""
+    encode = dictionary.encode
+    item = [ev.get("item") or f"{ev.get('exercise_id')}#{ev.get('item_id')}" for ev in events]
+    selected = [ev.get("selected", ev.get("option")) for ev in events]
+    latency = [ev.get("latency_ms", ev.get("duration_ms")) for ev in events]
+    return {
+        "ts": _timestamps([ev.get("ts", ev.get("timestamp")) for ev in events], now_ms),
+        "item": _by_distinct(item, lambda v: encode("item", v)),
+        "level": _by_distinct([ev.get("level") for ev in events], lambda v: encode("level", str(v or "all"))),
+        "option": _by_distinct(selected, lambda v: -1 if v is None else encode("option", str(v))),
+        "selected": _by_distinct(selected, _parse_selected),
+        "correct": _by_distinct([ev.get("correct") for ev in events],
+                                lambda v: 1 if v in (True, 1, "1", "true") else 0),
+        "latency": [-1 if lat is None else int(lat) for lat in latency],
+        "hints": _by_distinct([ev.get("hints_used", ev.get("hints")) for ev in events],
+                              lambda v: min(int(v or 0), MAX_HINT_LEVEL)),
+        "learner": _by_distinct([ev.get("learner", "") for ev in events],
+                                lambda v: zlib.crc32(str(v).encode("utf-8"))),
+    }
+
+
+def ingest(paths: List[str], store: Path, batch_rows: int = BATCH_ROWS) -> int:
+    """Append JSONL events to the store; returns the number of rows written"""
+    dictionary = Dictionary(store / "dictionary.json")
+    now_ms = int(time.time() * 1000)
+    written = skipped = 0
+
+    for path in paths:
+        with open(path, "r", encoding="utf-8-sig") as f:
+            while True:
+                lines = list(islice(f, batch_rows))
+                if not lines:
+                    break
+                events, bad = _parse_lines(lines)
+                skipped += bad
+                batch = _encode_batch(events, dictionary, now_ms)
+                # dictionary first: parts may only reference saved codes
+                dictionary.save()
+                written += _flush(store, batch)
+
+    if skipped:
+        print(f"⚠️  {skipped} unparseable line(s) skipped")
+    return written
+
+
+# ----------------------------
+# Reading
+# ----------------------------
+
+class EventStore:
+    """Read side: partition pruning by day and per-column memory maps"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.dictionary = Dictionary(self.root / "dictionary.json")
+
+    def partitions(self, since: Optional[str] = None, until: Optional[str] = None) -> List[Path]:
+        parts = []
+        for day_dir in sorted(self.root.glob("day=*")):
+            day = day_dir.name[4:]
+            if (since and day < since) or (until and day > until):
+                continue
+            parts.extend(p for p in sorted(day_dir.glob("part-*")) if not p.name.endswith(".tmp"))
+        return parts
+
+    def scan(self, columns: List[str], since: Optional[str] = None,
+             until: Optional[str] = None) -> Iterator[Dict[str, "np.ndarray"]]:
+        """Yield {column: memmapped array} per partition, loading only the requested columns"""
+        for part in self.partitions(since, until):
+            yield {col: np.load(part / f"{col}.npy", mmap_mode="r") for col in columns}
+
+
+def corpus_lookup(exercises_dir: Path, item_keys: List[str]):
+    """Per item code: correct_index (-1 if unknown) and option count (0 if unknown)"""
+    correct_index = np.full(len(item_keys), -1, dtype=np.int16)
+    n_options = np.zeros(len(item_keys), dtype=np.int16)
+    codes = {key: i for i, key in enumerate(item_keys)}
+    for pack, item in open_corpus(exercises_dir).items():
+        code = codes.get(f"{pack.id}#{item.id}")
+        if code is None:
+            continue
+        if item.correct_index is not None:
+            correct_index[code] = item.correct_index
+        n_options[code] = len(item.options or [])
+    return correct_index, n_options
+
+
+# ----------------------------
+# Queries
+# ----------------------------
+
+def query_summary(store: EventStore, since=None, until=None) -> Dict:
+    rows = correct = 0
+    per_day: Dict[str, int] = {}
+    latencies = []
+    for part, cols in zip(store.partitions(since, until), store.scan(["correct", "latency"], since, until)):
+        n = len(cols["correct"])
+        rows += n
+        correct += int(cols["correct"].sum(dtype=np.int64))
+        day = part.parent.name[4:]
+        per_day[day] = per_day.get(day, 0) + n
+        lat = cols["latency"]
+        latencies.append(np.asarray(lat[lat >= 0]))
+
+    lat = np.concatenate(latencies) if latencies else np.empty(0, dtype=np.int32)
+    return {
+        "rows": rows,
+        "days": len(per_day),
+        "items": len(store.dictionary.values["item"]),
+        "correct_rate": correct / rows if rows else None,
+        "latency_ms": {
+            "p50": float(np.percentile(lat, 50)) if len(lat) else None,
+            "p90": float(np.percentile(lat, 90)) if len(lat) else None,
+        },
+        "per_day": per_day,
+    }
+
+
+def query_options(store: EventStore, exercises_dir: Path, min_responses: int = 50,
+                  dead_below: float = 0.05, since=None, until=None) -> Dict:
+    """Pick rate per option; distractors picked less than dead_below are reported as dead"""
+    n_items = len(store.dictionary.values["item"])
+    counts = np.zeros(n_items * MAX_OPTIONS, dtype=np.int64)
+    for cols in store.scan(["item", "selected"], since, until):
+        sel = cols["selected"]
+        known = sel >= 0
+        cell = cols["item"][known].astype(np.int64) * MAX_OPTIONS + sel[known]
+        counts += np.bincount(cell, minlength=len(counts))
+    counts = counts.reshape(n_items, MAX_OPTIONS)
+
+    correct_index, n_options = corpus_lookup(exercises_dir, store.dictionary.values["item"])
+    totals = counts.sum(axis=1)
+    dead = []
+    for code in np.nonzero(totals >= min_responses)[0]:
+        options = int(n_options[code]) or int(np.nonzero(counts[code])[0].max(initial=-1)) + 1
+        rates = counts[code, :options] / totals[code]
+        for idx in range(options):
+            if idx != correct_index[code] and rates[idx] < dead_below:
+                dead.append({
+                    "item": store.dictionary.values["item"][code],
+                    "option": idx,
+                    "pick_rate": round(float(rates[idx]), 4),
+                    "responses": int(totals[code]),
+                })
+    dead.sort(key=lambda d: (d["pick_rate"], -d["responses"], d["item"], d["option"]))
+    return {
+        "items_analysed": int((totals >= min_responses).sum()),
+        "dead_below": dead_below,
+        "dead_distractors": dead,
+    }
+
+
+def query_hints(store: EventStore, since=None, until=None) -> Dict:
+    """
+    Correct rate per number of hints opened
+
+    lift compares each hint level against 0 hints within the same items
+    (response-weighted), so hard items drawing more hints do not mask the
+    effect.
+    """
+    n_items = len(store.dictionary.values["item"])
+    levels = MAX_HINT_LEVEL + 1
+    n = np.zeros(n_items * levels, dtype=np.int64)
+    s = np.zeros(n_items * levels, dtype=np.int64)
+    for cols in store.scan(["item", "hints", "correct"], since, until):
+        cell = cols["item"].astype(np.int64) * levels + np.clip(cols["hints"], 0, MAX_HINT_LEVEL)
+        n += np.bincount(cell, minlength=len(n))
+        s += np.bincount(cell, weights=cols["correct"], minlength=len(s)).astype(np.int64)
+    n = n.reshape(n_items, levels)
+    s = s.reshape(n_items, levels)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rate = s / n
+    rows = []
+    for h in range(levels):
+        total = int(n[:, h].sum())
+        if not total:
+            continue
+        both = (n[:, h] > 0) & (n[:, 0] > 0)
+        lift = None
+        if h and both.any():
+            weights = n[both, h]
+            lift = float(((rate[both, h] - rate[both, 0]) * weights).sum() / weights.sum())
+        rows.append({
+            "hints": f"{h}+" if h == MAX_HINT_LEVEL else str(h),
+            "responses": total,
+            "correct_rate": round(float(s[:, h].sum() / total), 4),
+            "lift_vs_no_hint": None if lift is None else round(lift, 4),
+        })
+    return {"levels": rows}
+
+
+def query_positions(store: EventStore, exercises_dir: Path, since=None, until=None) -> Dict:
+    """Correct rate grouped by the position (correct_index) of the right answer"""
+    n_items = len(store.dictionary.values["item"])
+    n = np.zeros(n_items, dtype=np.int64)
+    s = np.zeros(n_items, dtype=np.int64)
+    for cols in store.scan(["item", "correct"], since, until):
+        n += np.bincount(cols["item"], minlength=n_items)
+        s += np.bincount(cols["item"], weights=cols["correct"], minlength=n_items).astype(np.int64)
+
+    correct_index, _ = corpus_lookup(exercises_dir, store.dictionary.values["item"])
+    known = correct_index >= 0
+    pos_n = np.bincount(correct_index[known], weights=n[known])
+    pos_s = np.bincount(correct_index[known], weights=s[known])
+    pos_items = np.bincount(correct_index[known], weights=(n[known] > 0))
+    rows = [{
+        "position": int(p),
+        "items": int(pos_items[p]),
+        "responses": int(pos_n[p]),
+        "correct_rate": round(float(pos_s[p] / pos_n[p]), 4),
+    } for p in range(len(pos_n)) if pos_n[p]]
+    return {"positions": rows, "unmatched_responses": int(n[~known].sum())}
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+
+def _print_result(name: str, result: Dict, limit: int):
+    if name == "summary":
+        print(f"📦 {result['rows']} event(s) over {result['days']} day(s), {result['items']} item(s)")
+        if result["rows"]:
+            lat = result["latency_ms"]
+            timing = f", latency p50 {lat['p50']:.0f} ms / p90 {lat['p90']:.0f} ms" if lat["p50"] is not None else ""
+            print(f"   correct rate {result['correct_rate']:.1%}{timing}")
+    elif name == "options":
+        dead = result["dead_distractors"]
+        print(f"🎯 {result['items_analysed']} item(s) analysed, {len(dead)} dead distractor(s) "
+              f"(picked < {result['dead_below']:.0%})")
+        for d in dead[:limit]:
+            print(f"  - {d['item']} option {d['option']}: {d['pick_rate']:.1%} of {d['responses']}")
+        if len(dead) > limit:
+            print(f"  ... and {len(dead) - limit} more")
+    elif name == "hints":
+        print("💡 Hints opened  responses  correct  lift vs 0")
+        for r in result["levels"]:
+            lift = "" if r["lift_vs_no_hint"] is None else f"{r['lift_vs_no_hint']:+.1%}"
+            print(f"   {r['hints']:>12}  {r['responses']:>9}  {r['correct_rate']:>6.1%}  {lift:>9}")
+    elif name == "positions":
+        print("📍 Correct position  items  responses  correct")
+        for r in result["positions"]:
+            print(f"   {r['position']:>16}  {r['items']:>5}  {r['responses']:>9}  {r['correct_rate']:>6.1%}")
+        if result["unmatched_responses"]:
+            print(f"   ({result['unmatched_responses']} response(s) on items not found in the corpus)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar answer-event store and item analysis queries")
+    parser.add_argument("--store", default=str(DEFAULT_STORE), help="Store directory (default: state/events)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    ing = sub.add_parser("ingest", help="Append JSONL answer events")
+    ing.add_argument("events", nargs="+")
+    ing.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+
+    for name, help_text in (("summary", "Row counts, correct rate and latency"),
+                            ("options", "Option pick rates / dead distractors"),
+                            ("hints", "Correct rate per number of hints opened"),
+                            ("positions", "Correct rate per correct_index position")):
+        q = sub.add_parser(name, help=help_text)
+        q.add_argument("--since", help="First day to include (YYYY-MM-DD)")
+        q.add_argument("--until", help="Last day to include (YYYY-MM-DD)")
+        q.add_argument("--json", action="store_true", help="Print the result as JSON")
+        if name in ("options", "positions"):
+            q.add_argument("--directory", "-d", default=str(DEFAULT_EXERCISES_DIR))
+        if name == "options":
+            q.add_argument("--min-responses", type=int, default=50)
+            q.add_argument("--dead-below", type=float, default=0.05)
+            q.add_argument("--limit", type=int, default=25)
+
+    args = parser.parse_args()
+    require_numpy()
+    store_dir = Path(args.store)
+
+    if args.cmd == "ingest":
+        t0 = time.perf_counter()
+        rows = ingest(args.events, store_dir, args.batch_rows)
+        print(f"✅ Ingested {rows} event(s) into {store_dir} in {time.perf_counter() - t0:.1f}s")
+        return
+
+    store = EventStore(store_dir)
+    t0 = time.perf_counter()
+    if args.cmd == "summary":
+        result = query_summary(store, args.since, args.until)
+    elif args.cmd == "options":
+        result = query_options(store, Path(args.directory), args.min_responses, args.dead_below,
+                               args.since, args.until)
+    elif args.cmd == "hints":
+        result = query_hints(store, args.since, args.until)
+    else:
+        result = query_positions(store, Path(args.directory), args.since, args.until)
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        _print_result(args.cmd, result, getattr(args, "limit", 25))
+        print(f"\n⏱️  {time.perf_counter() - t0:.2f}s over {len(store.partitions(args.since, args.until))} partition(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,15 +20,21 @@ Features:
 - Extracts metadata (id, category, grade, level, etc.)
 - Generates sortable, searchable index
 - Validates JSON syntax before indexing
+- Refreshes the item-level Merkle manifest (merkle.json, see corpus_merkle.py)
 """
 
 import json
+import os
 import sys
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict
 import argparse
 
+sys.path.insert(0, str(Path(__file__).parent))
+from exercise_corpus import load_pack
+from corpus_merkle import MANIFEST_FILE, compute_manifest
+
 
 def build_index(exercises_dir: str, output_path: str = None) -> Dict:
     """
@@ -65,9 +71,9 @@ def build_index(exercises_dir: str, output_path: str = None) -> Dict:
 
     for idx, core_file in enumerate(core_files, 1):
         try:
-            # Read and parse core file
-            with open(core_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            # Read, parse and normalise core file
+            pack = load_pack(core_file)
+            data = pack.raw
 
             metadata = data.get('metadata', {})
 
@@ -79,15 +85,6 @@ def build_index(exercises_dir: str, output_path: str = None) -> Dict:
             support_file = core_file.parent / core_file.name.replace('_core.json', '_support.json')
             has_support = support_file.exists()
 
-            # Extract item count
-            items = data.get('items', [])
-            if not items:
-                # Try BL structure
-                exercises_data = data.get('exercises', [])
-                items = []
-                for ex in exercises_data:
-                    items.extend(ex.get('items', []))
-
             # Create index entry
             exercise_entry = {
                 'id': metadata.get('id', core_file.stem.replace('_core', '')),
@@ -97,7 +94,7 @@ def build_index(exercises_dir: str, output_path: str = None) -> Dict:
                 'grade': metadata.get('grade'),
                 'level': metadata.get('level', ''),
                 'difficulty': metadata.get('difficulty', 'medium'),
-                'item_count': len(items),
+                'item_count': len(pack.items),
                 'has_support': has_support,
                 'language': metadata.get('language', 'nl-NL'),
                 'paths': {
@@ -106,6 +103,10 @@ def build_index(exercises_dir: str, output_path: str = None) -> Dict:
                 }
             }
 
+            # Carry fitted difficulty (scripts/calibrate_difficulty.py) if present
+            if 'calibration' in metadata:
+                exercise_entry['calibrated_difficulty'] = metadata['calibration'].get('mean_b')
+
             # Add SLO alignment if present
             if 'slo_alignment' in metadata:
                 exercise_entry['slo_alignment'] = metadata['slo_alignment']
@@ -161,9 +162,16 @@ def build_index(exercises_dir: str, output_path: str = None) -> Dict:
 
     index_data['statistics'] = stats
 
-    # Write index
-    with open(output_path, 'w', encoding='utf-8') as f:
+    # Write index (replace, never rewrite in place: published generations share inodes)
+    tmp_path = output_path.with_name(output_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
         json.dump(index_data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, output_path)
+
+    # Item-level Merkle manifest next to the site index (incremental)
+    manifest = None
+    if output_path.parent.resolve() == exercises_path.resolve():
+        manifest, _ = compute_manifest(exercises_path)
 
     # Print summary
     print(f"\n{'='*80}")
@@ -187,6 +195,8 @@ def build_index(exercises_dir: str, output_path: str = None) -> Dict:
             print(f"  ... and {len(errors) - 5} more")
 
     print(f"\n📄 Index saved to: {output_path}")
+    if manifest:
+        print(f"🌳 Merkle manifest: {exercises_path / MANIFEST_FILE} (root {manifest['root'][:12]})")
     print(f"{'='*80}")
 
     return index_data
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Difficulty Calibration (Rasch / 1PL)
+====================================
+
+Fits item difficulties and per-level abilities from anonymised answer
+events and writes them back into the core files and index.json, so
+metadata.difficulty and the support "adaptive" routing are backed by data
+instead of the static "medium" default.
+
+Model:
+    P(correct | item j, level l) = sigmoid(theta_l - b_j)
+
+Events are aggregated into (item, level) cells first, so every iteration
+costs O(cells) rather than O(responses). Each iteration does one damped
+Newton step for all b (vectorised with np.bincount) and one for all theta.
+Weak Gaussian priors keep all-correct / all-wrong items finite, and
+difficulties are centred on mean 0.
+
+Input formats (auto-detected per file):
+- JSONL stand-in, one event per line:
+    {"learner": "a1f3...", "item": "gb_groep4_m4_core#12", "correct": true, "level": "M4"}
+  ("exercise_id" + "item_id" may replace "item"; "level" is optional)
+- Storage export: a JSON object of localStorage key -> value (or a list of
+  them, one per anonymised learner). The app's "pausedQuiz" snapshot is
+  turned into events: every question before currentQuestionIndex counts
+  as correct unless it is in wrongAnswers. Questions are matched to corpus
+  items by normalised question text.
+
+Usage:
+    # Fit and show the result (no writes)
+    python3 scripts/calibrate_difficulty.py fit state/answer-events.jsonl --dry-run
+
+    # Fit and write back (core metadata.calibration + index.json)
+    python3 scripts/calibrate_difficulty.py fit state/answer-events.jsonl exports/*.json
+
+    # Synthetic events with known parameters (for checking the fit)
+    python3 scripts/calibrate_difficulty.py simulate --responses 2000000 -o /tmp/events.jsonl
+
+Requires numpy (pip install -r scripts/requirements-analysis.txt).
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+sys.path.insert(0, str(Path(__file__).parent))
+from exercise_corpus import load_pack, open_corpus
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_EXERCISES_DIR = ROOT / "data-v2" / "exercises"
+
+MODEL_NAME = "rasch-1pl"
+
+# metadata.difficulty label from the mean calibrated b of a file
+EASY_BELOW = -0.5
+HARD_ABOVE = 0.5
+
+_SPACES = re.compile(r"\s+")
+
+
+def require_numpy():
+    if np is None:
+        print("❌ numpy is required: pip install -r scripts/requirements-analysis.txt")
+        sys.exit(2)
+
+
+def _norm_question(text: str) -> str:
+    return _SPACES.sub(" ", str(text).lower()).strip()
+
+
+# ----------------------------
+# Ingestion
+# ----------------------------
+
+def _storage_events(storage: Dict, by_text: Dict[str, str]) -> Iterator[Tuple[str, str, int]]:
+    """Events from one localStorage export (key -> value, values possibly JSON strings)"""
+    for key, value in storage.items():
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                continue
+        if key not in ("pausedQuiz", "quizState") or not isinstance(value, dict):
+            continue
+
+        questions = value.get("randomizedQuestions") or []
+        answered = int(value.get("currentQuestionIndex") or 0)
+        wrong = {_norm_question((wa.get("question") or {}).get("question", ""))
+                 for wa in value.get("wrongAnswers") or [] if isinstance(wa, dict)}
+        level = str(value.get("level") or value.get("subject") or "all")
+
+        for q in questions[:answered]:
+            text = _norm_question(q.get("question", "")) if isinstance(q, dict) else ""
+            item_key = by_text.get(text)
+            if item_key:
+                yield item_key, level, 0 if text in wrong else 1
+
+
+def read_events(paths: List[str], exercises_dir: Path) -> Tuple[List[str], List[str], List[int]]:
+    """
+    Read all event files into parallel lists (item key, level, correct)
+
+    Storage exports need the corpus to map question texts to item keys; it
+    is only loaded when such a file is present.
+    """
+    items: List[str] = []
+    levels: List[str] = []
+    correct: List[int] = []
+    by_text: Optional[Dict[str, str]] = None
+
+    for path in paths:
+        with open(path, "r", encoding="utf-8-sig") as f:
+            head = f.read(1)
+            f.seek(0)
+            if head == "{" and not path.endswith(".jsonl"):
+                exports = [json.load(f)]
+            elif head == "[":
+                exports = json.load(f)
+            else:
+                exports = None
+
+            if exports is None:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    ev = json.loads(line)
+                    key = ev.get("item") or f"{ev.get('exercise_id')}#{ev.get('item_id')}"
+                    items.append(key)
+                    levels.append(str(ev.get("level") or "all"))
+                    correct.append(1 if ev.get("correct") in (True, 1, "1", "true") else 0)
+                continue
+
+        if by_text is None:
+            by_text = {}
+            for pack, item in open_corpus(exercises_dir).items():
+                by_text.setdefault(_norm_question(item.question), f"{pack.id}#{item.id}")
+
+        for export in exports:
+            storage = export.get("storage", export) if isinstance(export, dict) else {}
+            for key, level, ok in _storage_events(storage, by_text):
+                items.append(key)
+                levels.append(level)
+                correct.append(ok)
+
+    return items, levels, correct
+
+
+# ----------------------------
+# Fitting
+# ----------------------------
+
+def aggregate(item_keys: List[str], level_keys: List[str], correct: List[int]):
+    """Collapse responses into (item, level) cells: counts n and successes s"""
+    item_names, item_idx = np.unique(np.asarray(item_keys), return_inverse=True)
+    level_names, level_idx = np.unique(np.asarray(level_keys), return_inverse=True)
+    y = np.asarray(correct, dtype=np.float64)
+
+    cell = item_idx.astype(np.int64) * len(level_names) + level_idx
+    cells, cell_idx = np.unique(cell, return_inverse=True)
+    n = np.bincount(cell_idx).astype(np.float64)
+    s = np.bincount(cell_idx, weights=y)
+    return item_names, level_names, cells // len(level_names), cells % len(level_names), n, s
+
+
+def fit_rasch(cell_item, cell_level, n, s, n_items: int, n_levels: int,
+              prior_sd_b: float = 2.0, prior_sd_theta: float = 2.0,
+              max_iter: int = 200, tol: float = 1e-6) -> Dict:
+    """
+    MAP fit of b (items) and theta (levels) with alternating Newton steps
+
+    Returns:
+        Dict with b, se_b, theta, se_theta, iterations, converged
+    """
+    b = np.zeros(n_items)
+    theta = np.zeros(n_levels)
+    inv_var_b = 1.0 / prior_sd_b ** 2
+    inv_var_t = 1.0 / prior_sd_theta ** 2
+
+    prev_b, prev_theta = b.copy(), theta.copy()
+    converged = False
+    it = 0
+    for it in range(1, max_iter + 1):
+        p = 1.0 / (1.0 + np.exp(-(theta[cell_level] - b[cell_item])))
+        r = s - n * p
+        w = n * p * (1.0 - p)
+        step_b = (np.bincount(cell_item, r, n_items) + b * inv_var_b) / (np.bincount(cell_item, w, n_items) + inv_var_b)
+        b = b - np.clip(step_b, -1.0, 1.0)
+
+        p = 1.0 / (1.0 + np.exp(-(theta[cell_level] - b[cell_item])))
+        r = s - n * p
+        w = n * p * (1.0 - p)
+        step_t = (np.bincount(cell_level, r, n_levels) - theta * inv_var_t) / (np.bincount(cell_level, w, n_levels) + inv_var_t)
+        theta = theta + np.clip(step_t, -1.0, 1.0)
+
+        # identification: mean item difficulty 0
+        shift = b.mean()
+        b -= shift
+        theta -= shift
+
+        change = max(np.abs(b - prev_b).max(initial=0.0), np.abs(theta - prev_theta).max(initial=0.0))
+        prev_b, prev_theta = b.copy(), theta.copy()
+        if change < tol:
+            converged = True
+            break
+
+    p = 1.0 / (1.0 + np.exp(-(theta[cell_level] - b[cell_item])))
+    w = n * p * (1.0 - p)
+    return {
+        "b": b,
+        "se_b": 1.0 / np.sqrt(np.bincount(cell_item, w, n_items) + inv_var_b),
+        "theta": theta,
+        "se_theta": 1.0 / np.sqrt(np.bincount(cell_level, w, n_levels) + inv_var_t),
+        "n_item": np.bincount(cell_item, n, n_items),
+        "iterations": it,
+        "converged": converged,
+    }
+
+
+def difficulty_label(mean_b: float) -> str:
+    if mean_b < EASY_BELOW:
+        return "easy"
+    if mean_b > HARD_ABOVE:
+        return "hard"
+    return "medium"
+
+
+# ----------------------------
+# Write-back
+# ----------------------------
+
+def _write_json(path: Path, data):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def write_back(exercises_dir: Path, per_pack: Dict[str, Dict], dry_run: bool) -> int:
+    """Update metadata.calibration/difficulty in core files and matching index.json entries"""
+    updated: Dict[str, Dict] = {}
+    for pack in open_corpus(exercises_dir).packs():
+        calib = per_pack.get(pack.id)
+        if calib is None:
+            continue
+        # corpus packs are shared read-only; edit a private parse
+        pack = load_pack(pack.path, use_cache=False)
+        meta = pack.raw.setdefault("metadata", {})
+        meta["calibration"] = calib
+        meta["difficulty"] = difficulty_label(calib["mean_b"])
+        updated[pack.id] = {"difficulty": meta["difficulty"], "calibrated_difficulty": calib["mean_b"]}
+        print(f"  {'(dry-run) ' if dry_run else ''}{pack.id}: difficulty={meta['difficulty']} "
+              f"mean_b={calib['mean_b']:+.2f} ({calib['responses']} responses)")
+        if not dry_run:
+            _write_json(Path(pack.path), pack.raw)
+
+    index_path = exercises_dir / "index.json"
+    if updated and index_path.exists() and not dry_run:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        for entry in index.get("exercises", []):
+            if entry.get("id") in updated:
+                entry.update(updated[entry["id"]])
+        _write_json(index_path, index)
+    return len(updated)
+
+
+def cmd_fit(args) -> int:
+    require_numpy()
+    exercises_dir = Path(args.directory)
+    t0 = time.perf_counter()
+    item_keys, level_keys, correct = read_events(args.events, exercises_dir)
+    if not item_keys:
+        print("❌ No answer events found")
+        return 1
+    print(f"📥 {len(item_keys)} response(s) read in {time.perf_counter() - t0:.1f}s")
+
+    item_names, level_names, cell_item, cell_level, n, s = aggregate(item_keys, level_keys, correct)
+    fit = fit_rasch(cell_item, cell_level, n, s, len(item_names), len(level_names),
+                    args.prior_sd, args.prior_sd, args.max_iter)
+    status = "converged" if fit["converged"] else "NOT converged"
+    print(f"📐 {len(item_names)} item(s), {len(level_names)} level(s), {len(n)} cell(s): "
+          f"{status} after {fit['iterations']} iteration(s) ({time.perf_counter() - t0:.1f}s)")
+
+    print("\nLevel abilities (theta):")
+    for name, th, se in zip(level_names, fit["theta"], fit["se_theta"]):
+        print(f"  {name:>10}: {th:+.2f} ± {se:.2f}")
+
+    per_pack: Dict[str, Dict] = defaultdict(lambda: {"items": {}})
+    fitted_at = datetime.now().isoformat(timespec="seconds")
+    for key, b, se, cnt in zip(item_names, fit["b"], fit["se_b"], fit["n_item"]):
+        if cnt < args.min_responses:
+            continue
+        pack_id, _, item_id = str(key).rpartition("#")
+        per_pack[pack_id]["items"][item_id] = {"b": round(float(b), 3), "se": round(float(se), 3), "n": int(cnt)}
+
+    for calib in per_pack.values():
+        bs = [v["b"] for v in calib["items"].values()]
+        calib.update({
+            "model": MODEL_NAME,
+            "fitted_at": fitted_at,
+            "responses": sum(v["n"] for v in calib["items"].values()),
+            "mean_b": round(sum(bs) / len(bs), 3),
+        })
+
+    print(f"\n✍️  Writing calibration for {len(per_pack)} exercise file(s)")
+    write_back(exercises_dir, per_pack, args.dry_run)
+    return 0
+
+
+def cmd_simulate(args) -> int:
+    """Write synthetic JSONL events for real corpus items with known b/theta"""
+    require_numpy()
+    rng = np.random.default_rng(args.seed)
+    keys = [f"{pack.id}#{item.id}" for pack, item in open_corpus(args.directory).items()]
+    if args.items:
+        keys = keys[:args.items]
+    b_true = rng.normal(0, 1, len(keys))
+    levels = [f"{lv}{g}" for g in range(3, 9) for lv in ("M", "E")]
+    theta_true = np.linspace(-1.5, 1.5, len(levels))
+
+    item_idx = rng.integers(0, len(keys), args.responses)
+    level_idx = rng.integers(0, len(levels), args.responses)
+    p = 1.0 / (1.0 + np.exp(-(theta_true[level_idx] - b_true[item_idx])))
+    y = rng.random(args.responses) < p
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        for i, l, ok in zip(item_idx, level_idx, y):
+            f.write(json.dumps({"item": keys[i], "level": levels[l], "correct": bool(ok)}) + "\n")
+    truth = {"b": dict(zip(keys, map(float, b_true))), "theta": dict(zip(levels, map(float, theta_true)))}
+    with open(args.output + ".truth.json", "w", encoding="utf-8") as f:
+        json.dump(truth, f)
+    print(f"🧪 Wrote {args.responses} event(s) for {len(keys)} item(s) to {args.output}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate item difficulty from answer events (Rasch/1PL)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    f = sub.add_parser("fit", help="Fit difficulties and write them back")
+    f.add_argument("events", nargs="+", help="JSONL event files and/or storage export JSON files")
+    f.add_argument("--directory", "-d", default=str(DEFAULT_EXERCISES_DIR))
+    f.add_argument("--min-responses", type=int, default=30, help="Skip items with fewer responses (default 30)")
+    f.add_argument("--prior-sd", type=float, default=2.0, help="SD of the Gaussian priors on b and theta")
+    f.add_argument("--max-iter", type=int, default=200)
+    f.add_argument("--dry-run", action="store_true", help="Fit and report, write nothing")
+
+    s = sub.add_parser("simulate", help="Generate synthetic JSONL events with known parameters")
+    s.add_argument("--directory", "-d", default=str(DEFAULT_EXERCISES_DIR))
+    s.add_argument("--responses", type=int, default=100000)
+    s.add_argument("--items", type=int, default=0, help="Limit to the first N corpus items (0 = all)")
+    s.add_argument("--seed", type=int, default=7)
+    s.add_argument("--output", "-o", required=True)
+
+    args = parser.parse_args()
+    sys.exit(cmd_fit(args) if args.cmd == "fit" else cmd_simulate(args))
+
+
+if __name__ == "__main__":
+    main()
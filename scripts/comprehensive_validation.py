@@ -15,15 +15,23 @@ Usage:
     python scripts/comprehensive_validation.py --category bl
     python scripts/comprehensive_validation.py --file data-v2/exercises/gb/gb_groep4_m4_core.json
     python scripts/comprehensive_validation.py --all --report validation-report.html
+    python scripts/comprehensive_validation.py --all --ndjson reports/issues.ndjson
+    python scripts/comprehensive_validation.py --all --no-cache
+
+Results are cached in .cache/validation-cache.json keyed by file content hash,
+so unchanged files are not revalidated (see validation_cache.py).
+Results are streamed into the summary and report as they are produced
+(see validation_report.py), so memory does not grow with the corpus.
 """
 
+import hashlib
 import json
 import os
 import sys
 import argparse
 import re
 from pathlib import Path
-from typing import Dict, List, Tuple, Any
+from typing import Dict, Iterator, List, Tuple, Any
 from dataclasses import dataclass, field
 from enum import Enum
 
@@ -36,6 +44,27 @@ except ImportError:
     print("⚠️  textstat not installed. Install with: pip install textstat")
     print("   Readability checks will be skipped.\n")
 
+sys.path.insert(0, str(Path(__file__).parent))
+from validation_cache import ValidationCache, sha256_file
+from exercise_corpus import iter_raw_items
+from validation_report import ReportSink, ReportSummary
+
+# Modules whose code decides a validation result; their hash is part of the
+# cache key, so editing a check (or how items are read) never reuses results
+# computed by the old code, even if RULESET_VERSION was not bumped
+RULE_SOURCES = ("comprehensive_validation.py", "exercise_corpus.py")
+_rules_hash = None
+
+
+def rules_source_hash() -> str:
+    """Short combined sha256 of RULE_SOURCES (computed once per process)"""
+    global _rules_hash
+    if _rules_hash is None:
+        here = Path(__file__).resolve().parent
+        digests = [sha256_file(str(here / name)) for name in RULE_SOURCES]
+        _rules_hash = hashlib.sha256("".join(digests).encode()).hexdigest()[:12]
+    return _rules_hash
+
 
 class Severity(Enum):
     """Issue severity levels"""
@@ -69,6 +98,25 @@ class ValidationIssue:
             msg += f"\n   💡 Suggestion: {self.suggestion}"
         return msg
 
+    def to_dict(self) -> Dict:
+        return {
+            'severity': self.severity.value,
+            'category': self.category,
+            'message': self.message,
+            'location': self.location,
+            'suggestion': self.suggestion,
+        }
+
+    @staticmethod
+    def from_dict(d: Dict) -> "ValidationIssue":
+        return ValidationIssue(
+            severity=Severity(d['severity']),
+            category=d['category'],
+            message=d['message'],
+            location=d.get('location', ''),
+            suggestion=d.get('suggestion', ''),
+        )
+
 
 @dataclass
 class ValidationResult:
@@ -88,10 +136,33 @@ class ValidationResult:
     def warning_count(self) -> int:
         return sum(1 for i in self.issues if i.severity == Severity.WARNING)
 
+    def to_dict(self) -> Dict:
+        return {
+            'file_path': self.file_path,
+            'exercise_id': self.exercise_id,
+            'passed': self.passed,
+            'issues': [i.to_dict() for i in self.issues],
+            'quality_score': self.quality_score,
+        }
+
+    @staticmethod
+    def from_dict(d: Dict) -> "ValidationResult":
+        return ValidationResult(
+            file_path=d['file_path'],
+            exercise_id=d['exercise_id'],
+            passed=d['passed'],
+            issues=[ValidationIssue.from_dict(i) for i in d.get('issues', [])],
+            quality_score=d.get('quality_score', 0.0),
+        )
+
 
 class ExerciseValidator:
     """Validates exercise files against quality standards"""
 
+    # Bump whenever a check, severity or the quality score formula changes,
+    # so cached results from older rules are not reused
+    RULESET_VERSION = "2.0.0-r2"
+
     # Grade-level readability thresholds (Flesch Reading Ease for Dutch)
     READABILITY_THRESHOLDS = {
         3: 80,  # Very easy
@@ -102,17 +173,26 @@ class ExerciseValidator:
         8: 55,  # Difficult
     }
 
-    def __init__(self, strict_mode: bool = False):
+    def __init__(self, strict_mode: bool = False, cache: ValidationCache = None):
         """
         Args:
             strict_mode: If True, warnings become errors
+            cache: Optional ValidationCache to reuse results of unchanged files
         """
         self.strict_mode = strict_mode
+        self.cache = cache
+
+    def ruleset_version(self) -> str:
+        """Ruleset identifier used in cache keys (readability checks depend on textstat)"""
+        textstat_flag = 'textstat' if HAS_TEXTSTAT else 'no-textstat'
+        return f"{self.RULESET_VERSION}-{rules_source_hash()}+{textstat_flag}"
 
     def validate_file(self, core_path: str, support_path: str = None) -> ValidationResult:
         """
         Validate an exercise file (core + optional support)
 
+        Uses the result cache when configured; a hit skips all checks.
+
         Args:
             core_path: Path to core JSON file
             support_path: Optional path to support JSON file
@@ -120,6 +200,22 @@ class ExerciseValidator:
         Returns:
             ValidationResult with all issues found
         """
+        if self.cache is None or not os.path.exists(core_path):
+            return self._validate_file_uncached(core_path, support_path)
+
+        key = self.cache.make_key(core_path, support_path, self.ruleset_version(), self.strict_mode)
+        cached = self.cache.get(key)
+        if cached is not None:
+            result = ValidationResult.from_dict(cached)
+            result.file_path = core_path
+            return result
+
+        result = self._validate_file_uncached(core_path, support_path)
+        self.cache.put(key, result.to_dict())
+        return result
+
+    def _validate_file_uncached(self, core_path: str, support_path: str = None) -> ValidationResult:
+        """Run all checks on a core/support pair"""
         issues = []
 
         # Load core file
@@ -642,28 +738,11 @@ class ExerciseValidator:
 
         items = {}
 
-        # Simple structure: items[]
-        if 'items' in data:
-            for item in data['items']:
-                item_id = item.get('id') or item.get('item_id')
-                if item_id:
-                    items[item_id] = item
-
-        # BL structure: exercises[].items[]
-        elif 'exercises' in data:
-            for exercise in data['exercises']:
-                for item in exercise.get('items', []):
-                    item_id = item.get('id') or item.get('item_id')
-                    if item_id:
-                        items[item_id] = item
-
-        # VS structure: problems[].items[]
-        elif 'problems' in data:
-            for problem in data['problems']:
-                for item in problem.get('items', []):
-                    item_id = item.get('id') or item.get('item_id')
-                    if item_id:
-                        items[item_id] = item
+        # items[] / BL exercises[].items[] / VS problems[].items[]
+        for item in iter_raw_items(data):
+            item_id = item.get('id') or item.get('item_id')
+            if item_id:
+                items[item_id] = item
 
         return items
 
@@ -733,14 +812,13 @@ class ExerciseValidator:
         return max(0.0, min(100.0, score))
 
 
-def validate_directory(directory: str, validator: ExerciseValidator) -> List[ValidationResult]:
-    """Validate all exercises in a directory"""
-    results = []
+def validate_directory(directory: str, validator: ExerciseValidator) -> Iterator[ValidationResult]:
+    """Validate all exercises in a directory, yielding each result as it is produced"""
     directory_path = Path(directory)
 
     if not directory_path.exists():
         print(f"❌ Directory not found: {directory}")
-        return results
+        return
 
     # Find all core files
     core_files = list(directory_path.glob("**/*_core.json"))
@@ -751,200 +829,50 @@ def validate_directory(directory: str, validator: ExerciseValidator) -> List[Val
         # Find corresponding support file
         support_path = core_path.parent / core_path.name.replace('_core.json', '_support.json')
 
-        result = validator.validate_file(
+        yield validator.validate_file(
             str(core_path),
             str(support_path) if support_path.exists() else None
         )
-        results.append(result)
-
-    return results
 
 
-def print_summary(results: List[ValidationResult]):
+def print_summary(summary: ReportSummary):
     """Print validation summary"""
-    total = len(results)
-    passed = sum(1 for r in results if r.passed)
-    failed = total - passed
-
-    total_critical = sum(r.critical_count() for r in results)
-    total_errors = sum(r.error_count() for r in results)
-    total_warnings = sum(r.warning_count() for r in results)
-
-    avg_quality = sum(r.quality_score for r in results) / total if total > 0 else 0
-
     print("\n" + "=" * 80)
     print("VALIDATION SUMMARY")
     print("=" * 80)
-    print(f"Total exercises:     {total}")
-    print(f"Passed:              {passed} ✅")
-    print(f"Failed:              {failed} ❌")
+    print(f"Total exercises:     {summary.total}")
+    print(f"Passed:              {summary.passed} ✅")
+    print(f"Failed:              {summary.failed} ❌")
     print(f"\nIssue counts:")
-    print(f"  Critical:          {total_critical} 🔴")
-    print(f"  Errors:            {total_errors} 🟠")
-    print(f"  Warnings:          {total_warnings} 🟡")
-    print(f"\nAverage quality score: {avg_quality:.1f}%")
+    print(f"  Critical:          {summary.severity_counts['critical']} 🔴")
+    print(f"  Errors:            {summary.severity_counts['error']} 🟠")
+    print(f"  Warnings:          {summary.severity_counts['warning']} 🟡")
+    print(f"\nAverage quality score: {summary.avg_quality:.1f}%")
     print("=" * 80)
 
 
-def generate_html_report(results: List[ValidationResult], output_path: str):
-    """Generate HTML validation report"""
-    html = """<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Exercise Validation Report</title>
-    <style>
-        body { font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
-               padding: 20px; background: #f5f5f5; }
-        .container { max-width: 1200px; margin: 0 auto; background: white; padding: 30px;
-                    border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
-        h1 { color: #333; }
-        .summary { background: #f8f9fa; padding: 20px; border-radius: 6px; margin: 20px 0; }
-        .summary-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-                       gap: 15px; margin-top: 15px; }
-        .summary-card { background: white; padding: 15px; border-radius: 6px; border-left: 4px solid #007bff; }
-        .summary-card.passed { border-left-color: #28a745; }
-        .summary-card.failed { border-left-color: #dc3545; }
-        .summary-card h3 { margin: 0 0 10px 0; font-size: 14px; color: #666; }
-        .summary-card .value { font-size: 28px; font-weight: bold; color: #333; }
-
-        .exercise { border: 1px solid #dee2e6; border-radius: 6px; margin: 15px 0; overflow: hidden; }
-        .exercise-header { background: #f8f9fa; padding: 15px; cursor: pointer; }
-        .exercise-header:hover { background: #e9ecef; }
-        .exercise-header.passed { border-left: 4px solid #28a745; }
-        .exercise-header.failed { border-left: 4px solid #dc3545; }
-        .exercise-id { font-weight: bold; font-size: 16px; }
-        .quality-score { float: right; font-weight: bold; }
-        .quality-high { color: #28a745; }
-        .quality-medium { color: #ffc107; }
-        .quality-low { color: #dc3545; }
-
-        .exercise-body { padding: 15px; background: white; }
-        .issue { padding: 10px; margin: 8px 0; border-radius: 4px; border-left: 4px solid; }
-        .issue.critical { background: #f8d7da; border-left-color: #dc3545; }
-        .issue.error { background: #fff3cd; border-left-color: #ffc107; }
-        .issue.warning { background: #fff8e1; border-left-color: #ff9800; }
-        .issue.info { background: #e7f3ff; border-left-color: #2196f3; }
-        .issue-header { font-weight: bold; margin-bottom: 5px; }
-        .issue-location { color: #666; font-size: 14px; }
-        .issue-suggestion { margin-top: 8px; padding: 8px; background: rgba(255,255,255,0.5);
-                          border-radius: 4px; font-style: italic; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>📊 Exercise Validation Report</h1>
-"""
-
-    # Summary
-    total = len(results)
-    passed = sum(1 for r in results if r.passed)
-    failed = total - passed
-    total_critical = sum(r.critical_count() for r in results)
-    total_errors = sum(r.error_count() for r in results)
-    total_warnings = sum(r.warning_count() for r in results)
-    avg_quality = sum(r.quality_score for r in results) / total if total > 0 else 0
-
-    html += f"""
-        <div class="summary">
-            <h2>Summary</h2>
-            <div class="summary-grid">
-                <div class="summary-card">
-                    <h3>Total Exercises</h3>
-                    <div class="value">{total}</div>
-                </div>
-                <div class="summary-card passed">
-                    <h3>Passed ✅</h3>
-                    <div class="value">{passed}</div>
-                </div>
-                <div class="summary-card failed">
-                    <h3>Failed ❌</h3>
-                    <div class="value">{failed}</div>
-                </div>
-                <div class="summary-card">
-                    <h3>Avg Quality</h3>
-                    <div class="value">{avg_quality:.1f}%</div>
-                </div>
-                <div class="summary-card">
-                    <h3>Critical 🔴</h3>
-                    <div class="value">{total_critical}</div>
-                </div>
-                <div class="summary-card">
-                    <h3>Errors 🟠</h3>
-                    <div class="value">{total_errors}</div>
-                </div>
-                <div class="summary-card">
-                    <h3>Warnings 🟡</h3>
-                    <div class="value">{total_warnings}</div>
-                </div>
-            </div>
-        </div>
-
-        <h2>Exercise Details</h2>
-"""
-
-    # Individual exercises
-    for result in sorted(results, key=lambda r: r.quality_score):
-        status_class = "passed" if result.passed else "failed"
-        quality_class = "quality-high" if result.quality_score >= 70 else "quality-medium" if result.quality_score >= 40 else "quality-low"
-
-        html += f"""
-        <div class="exercise">
-            <div class="exercise-header {status_class}">
-                <span class="exercise-id">{result.exercise_id}</span>
-                <span class="quality-score {quality_class}">{result.quality_score:.1f}%</span>
-                <div style="clear:both; font-size: 12px; color: #666; margin-top: 5px;">
-                    {result.file_path}
-                </div>
-            </div>
-"""
-
-        if result.issues:
-            html += '<div class="exercise-body">'
-            for issue in result.issues:
-                html += f"""
-                <div class="issue {issue.severity.value}">
-                    <div class="issue-header">{issue.category.upper()}: {issue.message}</div>
-                    <div class="issue-location">Location: {issue.location}</div>
-"""
-                if issue.suggestion:
-                    html += f'<div class="issue-suggestion">💡 {issue.suggestion}</div>'
-                html += '</div>'
-            html += '</div>'
-
-        html += '</div>'
-
-    html += """
-    </div>
-</body>
-</html>
-"""
-
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html)
-
-    print(f"\n📄 HTML report saved to: {output_path}")
-
-
 def main():
     parser = argparse.ArgumentParser(description='Comprehensive exercise validation')
     parser.add_argument('--all', action='store_true', help='Validate all exercises in data-v2/exercises/')
     parser.add_argument('--category', help='Validate specific category (e.g., bl, gb, sp)')
     parser.add_argument('--file', help='Validate single file')
     parser.add_argument('--directory', help='Validate all files in directory')
-    parser.add_argument('--report', help='Generate HTML report (specify output path)')
+    parser.add_argument('--report', help='Generate paged HTML report (specify output path)')
+    parser.add_argument('--ndjson', help='Stream issues as NDJSON to this path while validating')
     parser.add_argument('--strict', action='store_true', help='Strict mode: warnings become errors')
+    parser.add_argument('--no-cache', action='store_true', help='Ignore and do not update the validation result cache')
+    parser.add_argument('--cache-file', help='Validation cache path (default: .cache/validation-cache.json)')
 
     args = parser.parse_args()
 
-    validator = ExerciseValidator(strict_mode=args.strict)
-    results = []
+    cache = None if args.no_cache else ValidationCache(args.cache_file)
+    validator = ExerciseValidator(strict_mode=args.strict, cache=cache)
 
     if args.file:
         # Validate single file
         support_path = args.file.replace('_core.json', '_support.json')
         result = validator.validate_file(args.file, support_path if os.path.exists(support_path) else None)
-        results = [result]
+        results = iter([result])
 
         # Print issues
         if result.issues:
@@ -956,8 +884,7 @@ def main():
 
     elif args.category:
         # Validate category
-        directory = f"data-v2/exercises/{args.category}"
-        results = validate_directory(directory, validator)
+        results = validate_directory(f"data-v2/exercises/{args.category}", validator)
 
     elif args.directory:
         # Validate directory
@@ -970,37 +897,47 @@ def main():
             print("❌ data-v2/exercises/ directory not found")
             return 1
 
-        categories = [d for d in base_dir.iterdir() if d.is_dir()]
-        for category_dir in sorted(categories):
-            print(f"\n📁 Validating {category_dir.name}...")
-            results.extend(validate_directory(str(category_dir), validator))
+        def validate_all():
+            for category_dir in sorted(d for d in base_dir.iterdir() if d.is_dir()):
+                print(f"\n📁 Validating {category_dir.name}...")
+                yield from validate_directory(str(category_dir), validator)
+        results = validate_all()
 
     else:
         parser.print_help()
         return 1
 
+    # Results are streamed into the sink; none are kept here
+    with ReportSink(html_path=args.report, ndjson_path=args.ndjson) as sink:
+        for result in results:
+            sink.add(result)
+    summary = sink.summary
+
+    if cache:
+        cache.save()
+        print(f"\n{cache.stats_line()}")
+
     # Print summary
-    if results:
-        print_summary(results)
+    if summary.total:
+        print_summary(summary)
 
         # Show failed exercises
-        failed = [r for r in results if not r.passed]
-        if failed:
-            print(f"\n❌ Failed exercises ({len(failed)}):")
-            for result in failed[:10]:  # Show first 10
-                print(f"\n  {result.exercise_id} ({result.quality_score:.1f}%):")
-                critical = [i for i in result.issues if i.severity == Severity.CRITICAL]
-                for issue in critical[:3]:  # Show first 3 critical
-                    print(f"    {issue}")
-            if len(failed) > 10:
-                print(f"\n  ... and {len(failed) - 10} more")
-
-        # Generate HTML report if requested
+        if summary.failed:
+            print(f"\n❌ Failed exercises ({summary.failed}):")
+            for failed in summary.failed_preview:
+                print(f"\n  {failed['exercise_id']} ({failed['quality_score']:.1f}%):")
+                for issue in failed['critical']:
+                    print(f"    {ValidationIssue.from_dict(issue)}")
+            if summary.failed > len(summary.failed_preview):
+                print(f"\n  ... and {summary.failed - len(summary.failed_preview)} more")
+
         if args.report:
-            generate_html_report(results, args.report)
+            print(f"\n📄 HTML report saved to: {args.report} (data in {sink.data_dir})")
+        if args.ndjson:
+            print(f"📄 Issues streamed to: {args.ndjson}")
 
         # Exit code
-        return 0 if all(r.passed for r in results) else 1
+        return 0 if summary.all_passed else 1
 
     return 0
 
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Corpus Merkle Manifest
+======================
+
+Stable per-item content hashes for a data-v2 exercise tree, aggregated into
+a Merkle tree (items -> files -> categories -> root) that is stored next to
+index.json:
+
+    data-v2/exercises/
+        index.json
+        merkle.json              root hash + one hash per category
+        merkle/<category>.json   per file: hash, meta hash, item hashes, stat
+
+An item hash covers the canonical JSON of the core item plus the matching
+support item, so a feedback-only edit is a modified item too. Everything in
+a file that is not an item (metadata, display, reading passages) is hashed
+into the file's "meta" leaf.
+
+Comparing two generations descends only into categories, files and items
+whose hashes differ, and only reads the category shards that changed.
+
+Building is incremental: a file whose core and support (size, mtime, inode)
+match the previous manifest keeps its hashes without being read. Published
+generations hardlink unchanged files, so a publish rehashes only what it
+copied.
+
+Usage:
+    # (Re)build the manifest of the production tree
+    python3 scripts/corpus_merkle.py build
+
+    # What changed between two trees or generation ids
+    python3 scripts/corpus_merkle.py diff 20261019-101500-3fa2 data-v2/exercises
+    python3 scripts/corpus_merkle.py diff data-v2/exercises data-v2-draft/exercises --json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+from exercise_corpus import iter_raw_items
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_EXERCISES_DIR = ROOT / "data-v2" / "exercises"
+
+MANIFEST_FILE = "merkle.json"
+SHARD_DIR = "merkle"
+
+# Bump when hashing rules change: old manifests are then rebuilt in full
+MANIFEST_FORMAT_VERSION = 1
+
+# Keys that hold the item lists (see iter_raw_items)
+_ITEM_KEYS = ("items", "exercises", "problems")
+
+
+# ----------------------------
+# Hashing
+# ----------------------------
+
+def canonical_hash(value) -> str:
+    """sha256 of canonical JSON: sorted keys, no whitespace, unicode kept"""
+    text = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def node_hash(children: Dict[str, str]) -> str:
+    """Hash of an inner node from its named child hashes (order independent)"""
+    h = hashlib.sha256()
+    for name in sorted(children):
+        h.update(f"{name}:{children[name]}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _item_key(raw: Dict, position: int, seen: Dict[str, int]) -> str:
+    key = raw.get("id", raw.get("item_id"))
+    key = f"@{position}" if key is None else str(key)
+    # duplicate ids inside one file still get distinct, stable keys
+    seen[key] = seen.get(key, 0) + 1
+    return key if seen[key] == 1 else f"{key}~{seen[key]}"
+
+
+def _keyed_items(data) -> Dict[str, Dict]:
+    seen: Dict[str, int] = {}
+    return {_item_key(raw, n, seen): raw for n, raw in enumerate(iter_raw_items(data))}
+
+
+def _without_items(data):
+    """Everything in a file except its items (blocks keep their non-item fields)"""
+    if not isinstance(data, dict):
+        return None
+    rest = {k: v for k, v in data.items() if k not in _ITEM_KEYS}
+    for key in ("exercises", "problems"):
+        if key in data and "items" not in data:
+            rest[key] = [{k: v for k, v in block.items() if k != "items"}
+                         for block in data[key] if isinstance(block, dict)]
+    return rest
+
+
+def _read_json(path: Path):
+    with open(path, "r", encoding="utf-8-sig") as f:
+        return json.load(f)
+
+
+def hash_pair(core_path: Path, support_path: Optional[Path]) -> Dict:
+    """Meta hash, item hashes and file hash for one core (+ support) file"""
+    core = _read_json(core_path)
+    support = _read_json(support_path) if support_path else None
+
+    core_items = _keyed_items(core)
+    support_items = _keyed_items(support) if support is not None else {}
+
+    items = {key: canonical_hash([raw, support_items.get(key)]) for key, raw in core_items.items()}
+    meta = canonical_hash([_without_items(core), _without_items(support)])
+    return {
+        "hash": node_hash({"@meta": meta, **{f"item:{k}": h for k, h in items.items()}}),
+        "meta": meta,
+        "items": items,
+    }
+
+
+def _stat_key(core_path: Path, support_path: Optional[Path]) -> List[int]:
+    key = []
+    for path in (core_path, support_path):
+        if path is None:
+            key.extend([-1, -1, -1])
+        else:
+            st = path.stat()
+            key.extend([st.st_size, st.st_mtime_ns, st.st_ino])
+    return key
+
+
+# ----------------------------
+# Manifest
+# ----------------------------
+
+def _category_of(rel: str) -> str:
+    return rel.split("/", 1)[0] if "/" in rel else "_root"
+
+
+def _write_json(path: Path, data):
+    # replace, never rewrite in place: published generations share inodes
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def load_manifest(tree: Path) -> Optional[Dict]:
+    """Top-level manifest of a tree, or None if missing / from another format version"""
+    path = Path(tree) / MANIFEST_FILE
+    if not path.exists():
+        return None
+    manifest = _read_json(path)
+    if manifest.get("format") != MANIFEST_FORMAT_VERSION:
+        return None
+    return manifest
+
+
+def load_shard(tree: Path, category: str, manifest: Optional[Dict] = None) -> Dict:
+    """Per-file entries of one category ({} if the shard is missing)"""
+    if manifest is not None and "_shards" in manifest:
+        # in-memory manifest (compute_manifest(..., write=False))
+        return manifest["_shards"].get(category, {})
+    path = Path(tree) / SHARD_DIR / f"{category}.json"
+    return _read_json(path).get("files", {}) if path.exists() else {}
+
+
+def compute_manifest(tree: Path, full: bool = False, write: bool = True) -> Tuple[Dict, Dict]:
+    """
+    Hash a tree, reusing entries of unchanged files from its current manifest
+
+    Args:
+        tree: Exercise directory (holding index.json)
+        full: Ignore the previous manifest and rehash every file
+        write: Store merkle.json + shards in the tree; otherwise the shards
+               are kept in memory under manifest["_shards"]
+
+    Returns:
+        (manifest, stats) - stats counts hashed / reused files
+    """
+    tree = Path(tree)
+    previous = None if full else load_manifest(tree)
+    old_shards: Dict[str, Dict] = {}
+
+    shards: Dict[str, Dict[str, Dict]] = {}
+    stats = {"files": 0, "hashed": 0, "reused": 0, "errors": []}
+    dirty = set()
+
+    for core_path in sorted(tree.rglob("*_core.json")):
+        rel = core_path.relative_to(tree).as_posix()
+        category = _category_of(rel)
+        support_path = core_path.with_name(core_path.name.replace("_core.json", "_support.json"))
+        support_path = support_path if support_path.exists() else None
+
+        stat = _stat_key(core_path, support_path)
+        if previous is not None and category not in old_shards:
+            old_shards[category] = load_shard(tree, category)
+        old = old_shards.get(category, {}).get(rel)
+
+        stats["files"] += 1
+        if old is not None and old.get("stat") == stat:
+            entry = old
+            stats["reused"] += 1
+        else:
+            try:
+                entry = {**hash_pair(core_path, support_path), "stat": stat}
+            except (OSError, ValueError) as e:
+                stats["errors"].append(f"{rel}: {e}")
+                continue
+            stats["hashed"] += 1
+            dirty.add(category)
+        shards.setdefault(category, {})[rel] = entry
+
+    categories = {}
+    for category, files in shards.items():
+        categories[category] = {
+            "hash": node_hash({rel: e["hash"] for rel, e in files.items()}),
+            "files": len(files),
+            "items": sum(len(e["items"]) for e in files.values()),
+        }
+
+    manifest = {
+        "format": MANIFEST_FORMAT_VERSION,
+        "generated_at": datetime.now().isoformat(),
+        "root": node_hash({c: info["hash"] for c, info in categories.items()}),
+        "categories": categories,
+    }
+
+    if not write:
+        manifest["_shards"] = shards
+        return manifest, stats
+
+    previous_categories = (previous or {}).get("categories", {})
+    for category, files in shards.items():
+        # untouched categories keep their shard file (and inode)
+        if category in dirty or previous_categories.get(category, {}).get("files") != len(files) \
+                or not (tree / SHARD_DIR / f"{category}.json").exists():
+            _write_json(tree / SHARD_DIR / f"{category}.json",
+                        {"category": category, "hash": categories[category]["hash"], "files": files})
+    for category in set(previous_categories) - set(categories):
+        stale = tree / SHARD_DIR / f"{category}.json"
+        if stale.exists():
+            stale.unlink()
+    _write_json(tree / MANIFEST_FILE, manifest)
+    return manifest, stats
+
+
+# ----------------------------
+# Diff
+# ----------------------------
+
+def diff_trees(old_tree: Path, new_tree: Path, old: Optional[Dict] = None, new: Optional[Dict] = None) -> Dict:
+    """
+    Item-level changes from old_tree to new_tree
+
+    A stored merkle.json is not trusted as is: both trees are re-checked in
+    memory (nothing is written into them), reusing stored entries only for
+    files whose size, mtime and inode still match. A copied or hand-edited
+    tree with a stale manifest is therefore rehashed where it differs.
+
+    Returns:
+        Dict with added / removed / modified item refs ("<core path>#<item>"),
+        meta_changed and files_added / files_removed core paths
+    """
+    old = old or compute_manifest(old_tree, write=False)[0]
+    new = new or compute_manifest(new_tree, write=False)[0]
+
+    changes = {"added": [], "removed": [], "modified": [], "meta_changed": [],
+               "files_added": [], "files_removed": []}
+    if old["root"] == new["root"]:
+        return changes
+
+    old_cats, new_cats = old["categories"], new["categories"]
+    for category in sorted(set(old_cats) | set(new_cats)):
+        if old_cats.get(category, {}).get("hash") == new_cats.get(category, {}).get("hash"):
+            continue
+        old_files = load_shard(old_tree, category, old) if category in old_cats else {}
+        new_files = load_shard(new_tree, category, new) if category in new_cats else {}
+
+        for rel in sorted(set(old_files) | set(new_files)):
+            before, after = old_files.get(rel), new_files.get(rel)
+            if before is not None and after is not None and before["hash"] == after["hash"]:
+                continue
+            if before is None:
+                changes["files_added"].append(rel)
+            elif after is None:
+                changes["files_removed"].append(rel)
+            elif before["meta"] != after["meta"]:
+                changes["meta_changed"].append(rel)
+
+            old_items = before["items"] if before else {}
+            new_items = after["items"] if after else {}
+            for key in new_items:
+                if key not in old_items:
+                    changes["added"].append(f"{rel}#{key}")
+                elif old_items[key] != new_items[key]:
+                    changes["modified"].append(f"{rel}#{key}")
+            changes["removed"].extend(f"{rel}#{key}" for key in old_items if key not in new_items)
+    return changes
+
+
+def summarize(changes: Dict) -> Dict[str, int]:
+    return {key: len(values) for key, values in changes.items()}
+
+
+def resolve_tree(spec: str, production: Path = DEFAULT_EXERCISES_DIR) -> Path:
+    """A directory path, or a generation id of the production tree (see publish_transaction.py)"""
+    path = Path(spec)
+    if path.is_dir():
+        return path
+    # same layout as publish_transaction.GenerationStore (not imported: it pulls in the validator)
+    production = Path(production)
+    candidate = production.parent / ".generations" / production.name / spec
+    if candidate.is_dir():
+        return candidate
+    raise ValueError(f"Not a directory or generation id: {spec}")
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Item-level Merkle manifest and diff for exercise trees")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    b = sub.add_parser("build", help="Build or refresh merkle.json next to index.json")
+    b.add_argument("--directory", "-d", default=str(DEFAULT_EXERCISES_DIR))
+    b.add_argument("--full", action="store_true", help="Rehash every file")
+
+    d = sub.add_parser("diff", help="List added / removed / modified items between two trees")
+    d.add_argument("old", help="Directory or generation id")
+    d.add_argument("new", help="Directory or generation id")
+    d.add_argument("--production", default=str(DEFAULT_EXERCISES_DIR),
+                   help="Production tree whose generations ids refer to")
+    d.add_argument("--json", action="store_true", help="Print the full change set as JSON")
+    d.add_argument("--limit", type=int, default=50, help="Entries shown per change type")
+
+    args = parser.parse_args()
+
+    if args.cmd == "build":
+        tree = Path(args.directory)
+        if not tree.exists():
+            print(f"❌ Directory not found: {tree}")
+            sys.exit(1)
+        manifest, stats = compute_manifest(tree, full=args.full)
+        items = sum(c["items"] for c in manifest["categories"].values())
+        print(f"🌳 {tree / MANIFEST_FILE}: root {manifest['root'][:12]}, "
+              f"{stats['files']} file(s), {items} item(s)")
+        print(f"   {stats['hashed']} hashed, {stats['reused']} reused")
+        for error in stats["errors"]:
+            print(f"  ⚠️  Skipped {error}")
+        return
+
+    try:
+        old_tree = resolve_tree(args.old, Path(args.production))
+        new_tree = resolve_tree(args.new, Path(args.production))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    changes = diff_trees(old_tree, new_tree)
+    if args.json:
+        print(json.dumps(changes, ensure_ascii=False, indent=2))
+        return
+
+    counts = summarize(changes)
+    if not any(counts.values()):
+        print("✅ No changes")
+        return
+    print(f"🔍 {old_tree} → {new_tree}")
+    for key, label in (("files_added", "Files added"), ("files_removed", "Files removed"),
+                       ("meta_changed", "File metadata changed"), ("added", "Items added"),
+                       ("removed", "Items removed"), ("modified", "Items modified")):
+        if not counts[key]:
+            continue
+        print(f"\n{label}: {counts[key]}")
+        for ref in changes[key][:args.limit]:
+            print(f"  - {ref}")
+        if counts[key] > args.limit:
+            print(f"  ... and {counts[key] - args.limit} more")
+
+
+if __name__ == "__main__":
+    main()
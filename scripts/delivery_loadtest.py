@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+delivery_loadtest.py — load test for delivery_server.py
+
+Opens --connections keep-alive connections (one per simulated browser) and
+sends requests back to back for --duration seconds, in a mix that resembles
+a morning start of lessons:
+
+  slice   60%  /packs/<id>?items=a-b   (session start, 10 items)
+  reval   20%  same slice with If-None-Match (returning pupil -> 304)
+  index   10%  /index.json with If-None-Match
+  file    10%  a whole _core.json file (older clients)
+
+All requests send Accept-Encoding: gzip, br. Reports throughput and
+p50/p90/p99/max latency per kind.
+
+  python scripts/delivery_server.py --port 8080 &
+  python scripts/delivery_loadtest.py --url http://127.0.0.1:8080 --connections 200 --duration 20
+  python scripts/delivery_loadtest.py ... --json reports/delivery-loadtest.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+SLICE_SIZE = 10
+MIX = (("slice", 60), ("reval", 20), ("index", 10), ("file", 10))
+
+
+# ----------------------------
+# Minimal HTTP/1.1 client
+# ----------------------------
+
+class Connection:
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, path: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f"GET {path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                 "Accept-Encoding: gzip, br"] + [f"{k}: {v}" for k, v in headers.items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed")
+        status = int(status_line.split()[1])
+        resp: Dict[str, str] = {}
+        while True:
+            h = await self.reader.readline()
+            if h in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = h.decode("latin-1").partition(":")
+            resp[name.strip().lower()] = value.strip()
+        body = await self.reader.readexactly(int(resp.get("content-length", "0")))
+        if resp.get("connection", "").lower() == "close":
+            await self.close()
+        return status, resp, body
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+# ----------------------------
+# Load test
+# ----------------------------
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(p / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+async def discover(host: str, port: int) -> Tuple[List[Tuple[str, int]], List[str]]:
+    """(pack id, item count) for every pack, and the core file URLs, from /index.json"""
+    conn = Connection(host, port)
+    status, _, body = await conn.request("/index.json", {"Accept-Encoding": "identity"})
+    if status != 200:
+        raise SystemExit(f"❌ /index.json returned {status}")
+    files = []
+    for entry in json.loads(body).get("exercises", []):
+        core = (entry.get("paths") or {}).get("core") if isinstance(entry, dict) else None
+        if isinstance(core, str) and core.endswith("_core.json"):
+            files.append(core)
+
+    packs = []
+    for core in files:
+        pack_id = Path(core).name[: -len("_core.json")]
+        status, _, body = await conn.request(f"/packs/{pack_id}?items=1", {"Accept-Encoding": "identity"})
+        if status == 200:
+            packs.append((pack_id, json.loads(body)["total"]))
+    await conn.close()
+    return packs, ["/data-v2/exercises/" + core for core in files]
+
+
+async def worker(host: str, port: int, deadline: float, packs: List[Tuple[str, int]], files: List[str],
+                 samples: Dict[str, List[float]], counters: Dict[str, int], rng: random.Random) -> None:
+    conn = Connection(host, port)
+    etags: Dict[str, str] = {}
+    kinds = [k for k, _ in MIX]
+    weights = [w for _, w in MIX]
+    while time.perf_counter() < deadline:
+        kind = rng.choices(kinds, weights)[0]
+        headers: Dict[str, str] = {}
+        if kind in ("slice", "reval"):
+            pack_id, total = rng.choice(packs)
+            start = rng.randrange(0, max(1, total - SLICE_SIZE + 1), SLICE_SIZE) + 1
+            path = f"/packs/{pack_id}?items={start}-{start + SLICE_SIZE - 1}"
+        elif kind == "index":
+            path = "/index.json"
+        else:
+            if not files:
+                continue
+            path = rng.choice(files)
+        if kind in ("reval", "index") and path in etags:
+            headers["If-None-Match"] = etags[path]
+
+        t0 = time.perf_counter()
+        try:
+            status, resp, body = await conn.request(path, headers)
+        except (OSError, ValueError, asyncio.IncompleteReadError):
+            counters["errors"] += 1
+            await conn.close()
+            continue
+        samples[kind].append(time.perf_counter() - t0)
+        counters[str(status)] = counters.get(str(status), 0) + 1
+        counters["bytes"] += len(body)
+        if "etag" in resp:
+            etags[path] = resp["etag"]
+    await conn.close()
+
+
+async def run(url: str, connections: int, duration: float, seed: int) -> Dict:
+    parts = urlsplit(url)
+    host, port = parts.hostname or "127.0.0.1", parts.port or 80
+    packs, files = await discover(host, port)
+    if not packs:
+        raise SystemExit("❌ Server has no packs")
+    print(f"🎯 {len(packs)} pack(s), {connections} connection(s), {duration:.0f}s")
+
+    samples: Dict[str, List[float]] = {k: [] for k, _ in MIX}
+    counters: Dict[str, int] = {"errors": 0, "bytes": 0}
+    t0 = time.perf_counter()
+    deadline = t0 + duration
+    await asyncio.gather(*(worker(host, port, deadline, packs, files, samples, counters,
+                                  random.Random(seed + i)) for i in range(connections)))
+    elapsed = time.perf_counter() - t0
+
+    everything = sorted(x for v in samples.values() for x in v)
+    result = {"url": url, "connections": connections, "duration_s": round(elapsed, 2),
+              "requests": len(everything), "rps": round(len(everything) / elapsed, 1),
+              "mb_per_s": round(counters["bytes"] / elapsed / 1e6, 2),
+              "status": {k: v for k, v in counters.items() if k.isdigit()},
+              "errors": counters["errors"], "latency_ms": {}}
+    for kind, values in list(samples.items()) + [("all", everything)]:
+        values = sorted(values)
+        result["latency_ms"][kind] = {
+            "n": len(values),
+            "p50": round(percentile(values, 50) * 1000, 2),
+            "p90": round(percentile(values, 90) * 1000, 2),
+            "p99": round(percentile(values, 99) * 1000, 2),
+            "max": round((values[-1] if values else 0) * 1000, 2),
+        }
+    return result
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Load test for delivery_server.py")
+    ap.add_argument("--url", default="http://127.0.0.1:8080")
+    ap.add_argument("--connections", type=int, default=100)
+    ap.add_argument("--duration", type=float, default=10.0, help="Seconds")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--json", metavar="PATH", help="Also write the result as JSON")
+    args = ap.parse_args()
+
+    result = asyncio.run(run(args.url, args.connections, args.duration, args.seed))
+
+    print(f"\n📊 {result['requests']} requests in {result['duration_s']}s = {result['rps']} req/s, "
+          f"{result['mb_per_s']} MB/s, {result['errors']} error(s)")
+    print(f"   status: {result['status']}")
+    print(f"   {'kind':<7} {'n':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}  (ms)")
+    for kind, lat in result["latency_ms"].items():
+        print(f"   {kind:<7} {lat['n']:>8} {lat['p50']:>8} {lat['p90']:>8} {lat['p99']:>8} {lat['max']:>8}")
+
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 {args.json}")
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+delivery_server.py — reference backend for serving data-v2 exercises
+
+Serves the published exercise tree (data-v2/exercises) from memory with the
+Python standard library only (asyncio), so one small VM can carry a whole
+district's morning peak:
+
+- every JSON file is loaded once, minified and precompressed (gzip, and
+  brotli when the optional `brotli` package is installed); requests pick the
+  best encoding from Accept-Encoding, nothing is compressed per request
+- strong ETags from the content hash (one per encoding); If-None-Match gives
+  304 without a body
+- /packs/<id>?items=a-b returns items a..b (1-based, inclusive) with their
+  support record joined in, built from a preloaded compact store: per item
+  the minified core and support JSON bytes, concatenated on request. A child
+  starting a session downloads ~10 items instead of a 350-550 KB core plus
+  support file. Slices are cached (LRU) with their compressed bodies.
+
+Routes:
+  GET /index.json, /data-v2/exercises/index.json     site index
+  GET /data-v2/exercises/<cat>/<file>.json          any file of the tree (same URLs as the static site)
+  GET /packs/<id>                                   whole pack, core + support joined
+  GET /packs/<id>?items=a-b                         item slice (or items=a for one item)
+  GET /packs/<id>?plan=k                            items of session plan k (session_plans.py)
+  GET /health, /stats
+
+  python scripts/delivery_server.py --port 8080
+  python scripts/delivery_server.py --port 8080 --workers 4     (fork, shared listening socket; not on Windows)
+  kill -HUP <pid>                                               reload after a publish
+
+Load test: scripts/delivery_loadtest.py.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import collections
+import gzip
+import hashlib
+import json
+import os
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+sys.path.insert(0, str(Path(__file__).parent))
+from exercise_corpus import iter_raw_items
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+DEFAULT_ROOT = "data-v2/exercises"
+DEFAULT_PORT = 8080
+DEFAULT_MAX_AGE = 60
+STATIC_PREFIX = "/data-v2/exercises/"
+SESSIONS_PREFIX = "sessions/"
+
+GZIP_LEVEL = 9            # precomputed once at load
+GZIP_LEVEL_SLICE = 6      # slices are compressed when first requested
+BROTLI_QUALITY = 11
+BROTLI_QUALITY_SLICE = 5
+MIN_COMPRESS_BYTES = 512
+SLICE_CACHE_SIZE = 4096
+MAX_SLICE_ITEMS = 200
+IDLE_TIMEOUT = 15.0
+MAX_HEADER_LINES = 100
+
+JSON_TYPE = "application/json; charset=utf-8"
+
+
+# ----------------------------
+# In-memory store
+# ----------------------------
+
+def minify(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class Asset:
+    """One response body in every encoding, plus its validators"""
+
+    __slots__ = ("body", "gzip", "br", "etag", "content_type")
+
+    def __init__(self, body: bytes, content_type: str = JSON_TYPE, gzip_level: int = GZIP_LEVEL,
+                 brotli_quality: int = BROTLI_QUALITY):
+        self.body = body
+        self.content_type = content_type
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        compress = len(body) >= MIN_COMPRESS_BYTES
+        self.gzip = gzip.compress(body, gzip_level, mtime=0) if compress else None
+        self.br = brotli.compress(body, quality=brotli_quality) if compress and HAS_BROTLI else None
+
+    def variant(self, accept_encoding: str) -> Tuple[bytes, Optional[str], str]:
+        """(body, content-encoding, etag) for a request's Accept-Encoding"""
+        accepted = _accepted_encodings(accept_encoding)
+        if self.br is not None and "br" in accepted:
+            return self.br, "br", f'"{self.etag}-br"'
+        if self.gzip is not None and "gzip" in accepted:
+            return self.gzip, "gzip", f'"{self.etag}-gz"'
+        return self.body, None, f'"{self.etag}"'
+
+    def matches(self, if_none_match: str) -> bool:
+        """If-None-Match against any encoding of this body"""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            tag = tag.strip('"')
+            if tag.split("-", 1)[0] == self.etag:
+                return True
+        return False
+
+    def size(self) -> int:
+        return len(self.body) + len(self.gzip or b"") + len(self.br or b"")
+
+
+def _accepted_encodings(header: str) -> set:
+    out = set()
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        params = params.replace(" ", "")
+        if token and params not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            out.add(token.lower())
+    return out
+
+
+class PackStore:
+    """Compact per-item bytes of one core/support pair for slicing"""
+
+    __slots__ = ("id", "header", "items", "blocks", "etag", "plans")
+
+    def __init__(self, pack_id: str, core: Dict[str, Any], support: Optional[Dict[str, Any]],
+                 core_etag: str, support_etag: str):
+        self.id = pack_id
+        container = next((k for k in ("items", "exercises", "problems") if k in core), "items")
+
+        # everything except the item container goes into every response
+        self.header = minify({k: v for k, v in core.items() if k != container})[1:-1]
+        self.etag = hashlib.sha256(f"{core_etag}:{support_etag}".encode()).hexdigest()[:24]
+
+        support_by_id: Dict[str, bytes] = {}
+        if support is not None:
+            for raw in iter_raw_items(support):
+                sid = raw.get("item_id", raw.get("id"))
+                support_by_id[str(sid)] = minify({k: v for k, v in raw.items() if k != "item_id"})
+
+        # nested layouts (bl exercises[], vs problems[]): items keep a reference to
+        # their block, blocks (text, title, ...) are sent once per slice
+        self.blocks: Dict[str, bytes] = {}
+        self.items: List[Tuple[bytes, Optional[bytes], Optional[str]]] = []
+        self.plans: List[List[int]] = []   # session plans (1-based positions), see session_plans.py
+        if container == "items":
+            for raw in core.get("items", []):
+                if isinstance(raw, dict):
+                    self._add_item(raw, support_by_id, None)
+        else:
+            for block in core.get(container, []):
+                if not isinstance(block, dict):
+                    continue
+                block_id = str(block.get("id", len(self.blocks)))
+                self.blocks[block_id] = minify({k: v for k, v in block.items() if k != "items"})
+                for raw in block.get("items", []):
+                    if isinstance(raw, dict):
+                        self._add_item(raw, support_by_id, block_id)
+
+    def _add_item(self, raw: Dict[str, Any], support_by_id: Dict[str, bytes], block_id: Optional[str]) -> None:
+        item = dict(raw, _block=block_id) if block_id is not None else raw
+        # without the closing brace, so the support can be appended without re-encoding
+        self.items.append((minify(item)[:-1], support_by_id.get(str(raw.get("id"))), block_id))
+
+    def render(self, positions: Sequence[int], selector: bytes) -> bytes:
+        """
+        Items at 0-based positions joined with support, as one JSON object
+
+        Args:
+            positions: Item positions in response order
+            selector: JSON member naming the selection, e.g. b'"range":[1,10]'
+        """
+        parts: List[bytes] = []
+        used_blocks: List[str] = []
+        for pos in positions:
+            core_bytes, support_bytes, block_id = self.items[pos]
+            if support_bytes is not None:
+                parts.append(core_bytes + b',"support":' + support_bytes + b"}")
+            else:
+                parts.append(core_bytes + b"}")
+            if block_id is not None and block_id not in used_blocks:
+                used_blocks.append(block_id)
+        out = [b'{"pack":', minify(self.id), b',"total":', str(len(self.items)).encode(), b",", selector]
+        if self.header:
+            out += [b",", self.header]
+        if used_blocks:
+            out.append(b',"blocks":{')
+            out.append(b",".join(minify(b) + b":" + self.blocks[b] for b in used_blocks))
+            out.append(b"}")
+        out += [b',"items":[', b",".join(parts), b"]}"]
+        return b"".join(out)
+
+
+class DeliveryStore:
+    """All assets and pack stores of one exercises tree; rebuilt whole on reload"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.assets: Dict[str, Asset] = {}
+        self.packs: Dict[str, PackStore] = {}
+        self.slices: "collections.OrderedDict[Tuple[Any, ...], Asset]" = collections.OrderedDict()
+        self.loaded_at = 0.0
+        self.load_seconds = 0.0
+
+    def load(self) -> "DeliveryStore":
+        t0 = time.perf_counter()
+        parsed: Dict[str, Any] = {}
+        for path in sorted(self.root.rglob("*.json")):
+            rel = path.relative_to(self.root).as_posix()
+            if rel.startswith(".") or "/." in rel:
+                continue
+            try:
+                with open(path, "r", encoding="utf-8-sig") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Skipping {rel}: {e}")
+                continue
+            parsed[rel] = data
+            self.assets[STATIC_PREFIX + rel] = Asset(minify(data))
+        if STATIC_PREFIX + "index.json" in self.assets:
+            self.assets["/index.json"] = self.assets[STATIC_PREFIX + "index.json"]
+
+        for rel, data in parsed.items():
+            if not rel.endswith("_core.json") or not isinstance(data, dict):
+                continue
+            support_rel = rel[: -len("_core.json")] + "_support.json"
+            pack_id = Path(rel).name[: -len("_core.json")]
+            support = parsed.get(support_rel)
+            store = PackStore(pack_id, data, support if isinstance(support, dict) else None,
+                              self.assets[STATIC_PREFIX + rel].etag,
+                              self.assets[STATIC_PREFIX + support_rel].etag if support_rel in parsed else "")
+            self.packs[pack_id] = store
+
+        # session plans written by session_plans.py (sessions/<pack id>.json)
+        for rel, data in parsed.items():
+            if rel.startswith(SESSIONS_PREFIX) and isinstance(data, dict) and data.get("pack") in self.packs:
+                store = self.packs[data["pack"]]
+                total = len(store.items)
+                plans = data.get("plans", [])
+                if all(isinstance(p, int) and 1 <= p <= total for plan in plans for p in plan):
+                    store.plans = plans
+                else:
+                    print(f"⚠️  Ignoring {rel}: positions outside {data['pack']} (stale plans?)")
+        self.loaded_at = time.time()
+        self.load_seconds = time.perf_counter() - t0
+        return self
+
+    def pack_asset(self, pack_id: str, start: Optional[int] = None, end: Optional[int] = None) -> Optional[Asset]:
+        """Whole pack (start None) or items start..end, compressed on first use and cached"""
+        store = self.packs.get(pack_id)
+        if store is None:
+            return None
+        if start is None:
+            start, end = 0, len(store.items)
+        whole = start == 0 and end == len(store.items)
+        selector = f'"range":[{start + 1},{end}]'.encode()
+        return self._cached((pack_id, start, end), store, range(start, end), selector, whole)
+
+    def plan_asset(self, pack_id: str, plan: int) -> Optional[Asset]:
+        """The items of one precomputed session plan, in plan order"""
+        store = self.packs.get(pack_id)
+        if store is None or not 0 <= plan < len(store.plans):
+            return None
+        positions = [p - 1 for p in store.plans[plan]]
+        return self._cached((pack_id, "plan", plan), store, positions, f'"plan":{plan}'.encode(), False)
+
+    def _cached(self, key: Tuple[Any, ...], store: PackStore, positions: Sequence[int], selector: bytes,
+                whole: bool) -> Asset:
+        asset = self.slices.get(key)
+        if asset is not None:
+            self.slices.move_to_end(key)
+            return asset
+        asset = Asset(store.render(positions, selector),
+                      gzip_level=GZIP_LEVEL if whole else GZIP_LEVEL_SLICE,
+                      brotli_quality=BROTLI_QUALITY if whole else BROTLI_QUALITY_SLICE)
+        self.slices[key] = asset
+        if len(self.slices) > SLICE_CACHE_SIZE:
+            self.slices.popitem(last=False)
+        return asset
+
+    def summary(self) -> Dict[str, Any]:
+        raw = sum(len(a.body) for a in self.assets.values())
+        return {
+            "root": str(self.root),
+            "files": len(self.assets),
+            "packs": len(self.packs),
+            "packs_with_plans": sum(1 for p in self.packs.values() if p.plans),
+            "items": sum(len(p.items) for p in self.packs.values()),
+            "bytes_raw": raw,
+            "bytes_gzip": sum(len(a.gzip or a.body) for a in self.assets.values()),
+            "bytes_br": sum(len(a.br or a.body) for a in self.assets.values()) if HAS_BROTLI else None,
+            "slices_cached": len(self.slices),
+            "loaded_at": self.loaded_at,
+            "load_seconds": round(self.load_seconds, 2),
+        }
+
+
+# ----------------------------
+# HTTP
+# ----------------------------
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 416: "Range Not Satisfiable", 431: "Request Header Fields Too Large"}
+
+
+def parse_items(value: str, total: int) -> Optional[Tuple[int, int]]:
+    """'a-b' / 'a' (1-based, inclusive) -> (start, end) 0-based exclusive; None if invalid"""
+    a, sep, b = value.partition("-")
+    try:
+        first = int(a)
+        last = int(b) if sep and b else (total if sep else first)
+    except ValueError:
+        return None
+    if first < 1 or last < first or first > total:
+        return None
+    last = min(last, total, first + MAX_SLICE_ITEMS - 1)
+    return first - 1, last
+
+
+class DeliveryServer:
+    def __init__(self, store: DeliveryStore, max_age: int = DEFAULT_MAX_AGE):
+        self.store = store
+        self.max_age = max_age
+        self.stats: Dict[str, int] = collections.Counter()
+        self.started = time.time()
+
+    def reload(self) -> None:
+        t0 = time.perf_counter()
+        store = DeliveryStore(str(self.store.root)).load()
+        self.store = store   # swap: requests in flight keep the old one
+        print(f"🔄 Reloaded {len(store.assets)} file(s) in {time.perf_counter() - t0:.1f}s (pid {os.getpid()})")
+
+    def route(self, method: str, target: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        if method not in ("GET", "HEAD"):
+            return 405, {"Allow": "GET, HEAD"}, b""
+        url = urlsplit(target)
+        path = unquote(url.path)
+
+        if path == "/health":
+            return 200, {"Content-Type": JSON_TYPE, "Cache-Control": "no-store"}, b'{"ok":true}'
+        if path == "/stats":
+            body = minify({"pid": os.getpid(), "uptime_s": round(time.time() - self.started, 1),
+                           "requests": dict(self.stats), "store": self.store.summary(),
+                           "brotli": HAS_BROTLI})
+            return 200, {"Content-Type": JSON_TYPE, "Cache-Control": "no-store"}, body
+
+        store = self.store
+        if path.startswith("/packs/"):
+            pack_id = path[len("/packs/"):].strip("/")
+            pack = store.packs.get(pack_id)
+            if pack is None:
+                return 404, {"Content-Type": JSON_TYPE}, b'{"error":"unknown pack"}'
+            query = parse_qs(url.query)
+            items = query.get("items")
+            plan = query.get("plan")
+            if plan:
+                asset = store.plan_asset(pack_id, int(plan[0])) if plan[0].isdigit() else None
+                if asset is None:
+                    return 416, {"Content-Type": JSON_TYPE}, minify({"error": "unknown plan",
+                                                                     "plans": len(pack.plans)})
+            elif items:
+                window = parse_items(items[0], len(pack.items))
+                if window is None:
+                    return 416, {"Content-Type": JSON_TYPE}, minify({"error": "invalid items range",
+                                                                     "total": len(pack.items)})
+                asset = store.pack_asset(pack_id, *window)
+            else:
+                asset = store.pack_asset(pack_id)
+            self.stats["plan" if plan else "slice" if items else "pack"] += 1
+        else:
+            asset = store.assets.get(path)
+            if asset is None:
+                return 404, {"Content-Type": JSON_TYPE}, b'{"error":"not found"}'
+            self.stats["file"] += 1
+
+        body, encoding, etag = asset.variant(headers.get("accept-encoding", ""))
+        out = {
+            "Content-Type": asset.content_type,
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={self.max_age}" if self.max_age else "no-cache",
+            "Vary": "Accept-Encoding",
+            "Access-Control-Allow-Origin": "*",
+        }
+        if asset.matches(headers.get("if-none-match", "")):
+            return 304, out, b""
+        if encoding:
+            out["Content-Encoding"] = encoding
+        return 200, out, body
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                except (asyncio.TimeoutError, ValueError):
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                parts = line.decode("latin-1").split()
+                headers: Dict[str, str] = {}
+                too_many = False
+                for _ in range(MAX_HEADER_LINES + 1):
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = h.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                else:
+                    too_many = True
+
+                if too_many:
+                    status, out, body, version = 431, {}, b"", "HTTP/1.1"
+                    keep_alive = False
+                elif len(parts) != 3:
+                    status, out, body, version = 400, {}, b"", "HTTP/1.1"
+                    keep_alive = False
+                else:
+                    method, target, version = parts
+                    conn = headers.get("connection", "").lower()
+                    keep_alive = (version == "HTTP/1.1" and conn != "close") or conn == "keep-alive"
+                    status, out, body = self.route(method, target, headers)
+                    if method == "HEAD":
+                        out["Content-Length"] = str(len(body))
+                        body = b""
+
+                self.stats[str(status)] += 1
+                self.stats["bytes"] += len(body)
+                out.setdefault("Content-Length", str(len(body)))
+                out["Connection"] = "keep-alive" if keep_alive else "close"
+                head = f"{version} {status} {REASONS.get(status, 'OK')}\r\n" + \
+                    "".join(f"{k}: {v}\r\n" for k, v in out.items()) + "\r\n"
+                writer.write(head.encode("latin-1") + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+# ----------------------------
+# Main
+# ----------------------------
+
+async def serve_socket(server: DeliveryServer, sock: socket.socket) -> None:
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    if hasattr(signal, "SIGHUP"):
+        loop.add_signal_handler(signal.SIGHUP, lambda: loop.run_in_executor(None, server.reload))
+    for sig in (getattr(signal, "SIGTERM", None), getattr(signal, "SIGINT", None)):
+        if sig is not None:
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except NotImplementedError:   # Windows
+                pass
+    srv = await asyncio.start_server(server.handle, sock=sock, backlog=1024)
+    async with srv:
+        await stop.wait()
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Serve data-v2 exercises from memory")
+    ap.add_argument("--root", default=DEFAULT_ROOT, help=f"Exercises tree (default: {DEFAULT_ROOT})")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--workers", type=int, default=1, help="Processes sharing the listening socket (fork)")
+    ap.add_argument("--max-age", type=int, default=DEFAULT_MAX_AGE,
+                    help="Cache-Control max-age in seconds (0 = always revalidate via ETag)")
+    args = ap.parse_args()
+
+    if not os.path.isdir(args.root):
+        print(f"❌ Directory not found: {args.root}")
+        return 1
+
+    store = DeliveryStore(args.root).load()
+    s = store.summary()
+    print(f"📦 {s['files']} file(s), {s['packs']} pack(s), {s['items']} item(s) loaded in {s['load_seconds']}s")
+    print(f"   {s['bytes_raw'] / 1e6:.1f} MB minified, {s['bytes_gzip'] / 1e6:.1f} MB gzip"
+          + (f", {s['bytes_br'] / 1e6:.1f} MB brotli" if HAS_BROTLI else " (pip install brotli for br)"))
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(1024)
+    sock.setblocking(False)
+
+    workers = max(1, args.workers)
+    if workers > 1 and not hasattr(os, "fork"):
+        print("⚠️  --workers needs fork(); running one process")
+        workers = 1
+    print(f"🚀 http://{args.host}:{args.port}/ ({workers} worker(s))")
+
+    children: List[int] = []
+    for _ in range(workers - 1):
+        pid = os.fork()
+        if pid == 0:
+            # store is shared copy-on-write with the parent
+            asyncio.run(serve_socket(DeliveryServer(store, args.max_age), sock))
+            os._exit(0)
+        children.append(pid)
+    try:
+        asyncio.run(serve_socket(DeliveryServer(store, args.max_age), sock))
+    except KeyboardInterrupt:
+        pass
+    for pid in children:
+        try:
+            os.kill(pid, signal.SIGTERM)
+            os.waitpid(pid, 0)
+        except OSError:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -38,25 +38,25 @@ import os
 import sys
 import argparse
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 import time
 
-# Try to import Anthropic SDK
-try:
-    from anthropic import Anthropic
-    HAS_ANTHROPIC = True
-except ImportError:
-    HAS_ANTHROPIC = False
+# SDKs are imported when the client is first used (see lazy_cli.py), so
+# --help, --dry-run and friends start without them
+from lazy_cli import LazyClient, module_available
+
+HAS_ANTHROPIC = module_available("anthropic")
+if not HAS_ANTHROPIC:
     print("⚠️  Anthropic SDK not installed. Install with: pip install anthropic")
+HAS_OPENAI = module_available("openai")
 
-# Try to import OpenAI SDK
-try:
-    from openai import OpenAI
-    HAS_OPENAI = True
-except ImportError:
-    HAS_OPENAI = False
+from model_client import make_client
+from corpus_merkle import canonical_hash
+from exercise_corpus import KIND_V2, iter_raw_items, load_pack
 
 # API models and costs
 MODELS = {
@@ -82,6 +82,17 @@ MODELS = {
 
 DEFAULT_MODEL = "claude-3-haiku-20240307"  # Faster and cheaper for enrichment
 
+# Output tokens per support item (3 hints, per-option feedback, strategies, errors) incl. head room;
+# a chunk holds as many items as fit the model's max_tokens
+SUPPORT_TOKENS_PER_ITEM = 450
+PROMPT_OVERHEAD_TOKENS = 300
+
+DEFAULT_WORKERS = 4
+DEFAULT_REQUESTS_PER_MINUTE = 50
+# Per core file: item hashes + generated support items (checkpoint and change detection)
+DEFAULT_STATE_DIR = os.path.join("state", "enrichment")
+STATE_VERSION = 1
+
 
 @dataclass
 class EnrichmentResult:
@@ -97,11 +108,47 @@ class EnrichmentResult:
     error: Optional[str] = None
 
 
+class RateLimiter:
+    """Spaces requests evenly: at most `per_minute` starts per minute, across threads"""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class TruncatedResponse(Exception):
+    """The model stopped at max_tokens; the chunk has to be made smaller"""
+
+
 class ExerciseEnricher:
     """Enriches existing exercises with AI-generated pedagogical features"""
 
-    def __init__(self, model: str = DEFAULT_MODEL, api_key: Optional[str] = None):
-        """Initialize enricher with AI model"""
+    def __init__(self, model: str = DEFAULT_MODEL, api_key: Optional[str] = None,
+                 base_url: Optional[str] = None, workers: int = DEFAULT_WORKERS,
+                 requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+                 chunk_size: int = 0, state_dir: str = DEFAULT_STATE_DIR, force: bool = False):
+        """
+        Initialize enricher with AI model
+
+        Args:
+            base_url: Other endpoint, e.g. scripts/fake_model_server.py (or MODEL_BASE_URL)
+            workers: Chunk requests in flight at once (shared by all files)
+            requests_per_minute: Rate limit over all requests
+            chunk_size: Items per request (0 = as many as fit in max_tokens)
+            state_dir: Per-file checkpoints + item hashes (resume, incremental re-enrichment)
+            force: Re-enrich every item, also when a support file exists
+        """
         self.model = model
         self.model_config = MODELS.get(model)
 
@@ -110,24 +157,37 @@ class ExerciseEnricher:
 
         provider = self.model_config["provider"]
 
-        # Initialize API client
-        if provider == "anthropic":
-            if not HAS_ANTHROPIC:
-                raise ImportError("Anthropic SDK not installed. Run: pip install anthropic")
-            self.client = Anthropic(api_key=api_key or os.environ.get("ANTHROPIC_API_KEY"))
-        elif provider == "openai":
-            if not HAS_OPENAI:
-                raise ImportError("OpenAI SDK not installed. Run: pip install openai")
-            self.client = OpenAI(api_key=api_key or os.environ.get("OPENAI_API_KEY"))
+        # Initialize API client (base_url / MODEL_BASE_URL: e.g. scripts/fake_model_server.py)
+        if provider == "anthropic" and not HAS_ANTHROPIC:
+            raise ImportError("Anthropic SDK not installed. Run: pip install anthropic")
+        if provider == "openai" and not HAS_OPENAI:
+            raise ImportError("OpenAI SDK not installed. Run: pip install openai")
+        # 429s are retried (with backoff) by the SDK
+        self.client = LazyClient(lambda: make_client(provider, api_key=api_key, url=base_url, max_retries=5))
 
         self.provider = provider
         self.total_tokens = {"input": 0, "output": 0}
         self.total_cost = 0.0
 
+        self.chunk_size = chunk_size
+        self.state_dir = Path(state_dir)
+        self.force = force
+        self.limiter = RateLimiter(requests_per_minute)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
     def enrich_exercise(self, core_path: str, output_dir: str = "data-v2-draft/exercises") -> EnrichmentResult:
         """
         Enrich an exercise by generating support file
 
+        Items are sent in chunks that fit the model's max_tokens, concurrently.
+        Every finished chunk is checkpointed in the state file together with
+        the hash of each item's core content, so a rerun resumes after a
+        crash and later runs re-enrich only items whose core changed.
+
         Args:
             core_path: Path to existing core exercise file
             output_dir: Where to save enriched support file
@@ -144,23 +204,33 @@ class ExerciseEnricher:
                 error=f"File not found: {core_path}"
             )
 
-        # Load existing core file
+        # Load existing core file (shared parse: read-only here)
         try:
-            with open(core_path, 'r', encoding='utf-8') as f:
-                core_data = json.load(f)
+            pack = load_pack(core_path)
         except Exception as e:
             return EnrichmentResult(
                 exercise_id=core_path.stem,
                 success=False,
                 error=f"Failed to load JSON: {e}"
             )
+        if pack.kind != KIND_V2:
+            return EnrichmentResult(
+                exercise_id=core_path.stem,
+                success=False,
+                error=f"Not a v2 core file ({pack.kind})"
+            )
+        core_data = pack.raw
 
         exercise_id = core_data.get('metadata', {}).get('id', core_path.stem)
-        print(f"\n📝 Enriching: {exercise_id}")
+        category = core_data.get('metadata', {}).get('category', 'unknown')
+        support_path = Path(output_dir) / category / (core_path.stem.replace('_core', '_support') + '.json')
+        state_path = self.state_dir / category / f"{core_path.stem}.json"
+        state = self._load_state(state_path)
 
-        # Check if support file already exists
+        # Check if support file already exists (without state we cannot tell what changed)
         existing_support = self._find_existing_support(core_path)
-        if existing_support and existing_support.exists():
+        if existing_support and existing_support.exists() and not state["items"] and not self.force:
+            print(f"\n📝 {exercise_id}")
             print(f"   ⚠️  Support file already exists: {existing_support}")
             print(f"   Skipping (use --force to overwrite)")
             return EnrichmentResult(
@@ -169,40 +239,80 @@ class ExerciseEnricher:
                 error="Support file already exists"
             )
 
+        # Which items still need (re-)enrichment
+        keyed = self._keyed_items(core_data)
+        hashes = {str(item_id): canonical_hash(item) for item_id, item in keyed}
+        todo = [(item_id, item) for item_id, item in keyed
+                if self.force or state["items"].get(str(item_id), {}).get("hash") != hashes[str(item_id)]]
+        if self.force:
+            state["items"] = {}
+
+        print(f"\n📝 Enriching: {exercise_id} ({len(todo)} of {len(keyed)} item(s) to do)")
+        if not todo and support_path.exists():
+            print(f"   ✅ Up to date: {support_path}")
+            return EnrichmentResult(exercise_id=exercise_id, success=True, support_path=str(support_path),
+                                    tokens_used={"input": 0, "output": 0})
+
         # Build prompt
         system_prompt = self._build_system_prompt()
-        user_prompt = self._build_user_prompt(core_data)
-
-        # Call AI
-        try:
-            support_data, tokens = self._call_ai(system_prompt, user_prompt)
-        except Exception as e:
-            return EnrichmentResult(
-                exercise_id=exercise_id,
-                success=False,
-                error=str(e)
-            )
+        chunks = self._plan_chunks(todo)
+        tokens = {"input": 0, "output": 0}
+        failures: List[str] = []
+
+        def checkpoint(done: Dict[str, Dict]):
+            with self._lock:
+                for item_id, support_item in done.items():
+                    state["items"][item_id] = {"hash": hashes[item_id], "support": support_item}
+                self._write_json(state_path, state)
+
+        futures = [self._pool.submit(self._enrich_chunk, system_prompt, core_data, chunk, n)
+                   for n, chunk in enumerate(chunks, 1)]
+        for future in as_completed(futures):
+            try:
+                done, chunk_tokens, missing = future.result()
+            except Exception as e:
+                failures.append(str(e))
+                continue
+            checkpoint(done)
+            tokens["input"] += chunk_tokens["input"]
+            tokens["output"] += chunk_tokens["output"]
+            if missing:
+                failures.append(f"no support returned for item(s) {', '.join(missing[:10])}")
 
         # Calculate cost
         cost = self._calculate_cost(tokens)
-        self.total_tokens["input"] += tokens["input"]
-        self.total_tokens["output"] += tokens["output"]
-        self.total_cost += cost
+        with self._lock:
+            self.total_tokens["input"] += tokens["input"]
+            self.total_tokens["output"] += tokens["output"]
+            self.total_cost += cost
 
-        print(f"   Tokens: {tokens['input']:,} in + {tokens['output']:,} out = ${cost:.4f}")
+        print(f"   Tokens ({exercise_id}, {len(chunks)} chunk(s)): {tokens['input']:,} in + {tokens['output']:,} out = ${cost:.4f}")
 
-        # Determine output path
-        category = core_data.get('metadata', {}).get('category', 'unknown')
-        category_dir = Path(output_dir) / category
-        category_dir.mkdir(parents=True, exist_ok=True)
+        if failures:
+            return EnrichmentResult(
+                exercise_id=exercise_id,
+                success=False,
+                tokens_used=tokens,
+                cost_usd=cost,
+                error=f"{len(failures)} chunk problem(s), checkpoint kept in {state_path} (rerun resumes): {failures[0]}"
+            )
 
-        # Generate support filename
-        support_filename = core_path.stem.replace('_core', '_support') + '.json'
-        support_path = category_dir / support_filename
+        # Merge: one support item per current core item, in core order (items removed from core drop out)
+        metadata = {"id": exercise_id, "exercise_id": exercise_id, "category": category}
+        for key in ("grade", "level"):
+            if core_data.get('metadata', {}).get(key) not in (None, ""):
+                metadata[key] = core_data['metadata'][key]
+        support_data = {
+            "schema_version": "2.0.0",
+            "metadata": metadata,
+            "support_items": [state["items"][item_id]["support"] for item_id in hashes],
+        }
+        state["items"] = {item_id: state["items"][item_id] for item_id in hashes}
 
         # Write support file
-        with open(support_path, 'w', encoding='utf-8') as f:
-            json.dump(support_data, f, ensure_ascii=False, indent=2)
+        support_path.parent.mkdir(parents=True, exist_ok=True)
+        self._write_json(support_path, support_data, indent=2)
+        self._write_json(state_path, state)
 
         print(f"   ✅ Saved support to {support_path}")
 
@@ -214,6 +324,85 @@ class ExerciseEnricher:
             cost_usd=cost
         )
 
+    # ----------------------------
+    # Chunking
+    # ----------------------------
+
+    @staticmethod
+    def _keyed_items(core_data: Dict) -> List[Tuple[Any, Dict]]:
+        """
+        (item_id, item) in file order; items without an id are numbered by position
+
+        Covers items[] as well as the nested exercises[].items (BL) and
+        problems[].items (VS) layouts.
+        """
+        items = list(iter_raw_items(core_data))
+        return [(item.get('id', n), item) for n, item in enumerate(items, 1)]
+
+    def _plan_chunks(self, items: List[Tuple[Any, Dict]]) -> List[List[Tuple[Any, Dict]]]:
+        """Consecutive slices that fit the model's max_tokens (or --chunk-size)"""
+        if self.chunk_size > 0:
+            size = self.chunk_size
+        else:
+            size = max(1, (self.model_config["max_tokens"] - PROMPT_OVERHEAD_TOKENS) // SUPPORT_TOKENS_PER_ITEM)
+        return [items[i:i + size] for i in range(0, len(items), size)]
+
+    def _enrich_chunk(self, system_prompt: str, core_data: Dict, chunk: List[Tuple[Any, Dict]],
+                      chunk_no: int) -> Tuple[Dict[str, Dict], Dict[str, int], List[str]]:
+        """
+        Returns:
+            ({item_id: support_item}, tokens, item ids the model left out).
+            A truncated reply is retried as two halves.
+        """
+        self.limiter.wait()
+        user_prompt = self._build_user_prompt(core_data, chunk)
+        try:
+            support_data, tokens = self._call_ai(system_prompt, user_prompt)
+        except TruncatedResponse as e:
+            if len(chunk) == 1:
+                raise ValueError(f"Chunk {chunk_no}: one item does not fit max_tokens")
+            half = len(chunk) // 2
+            done, tokens, missing = self._enrich_chunk(system_prompt, core_data, chunk[:half], chunk_no)
+            done2, tokens2, missing2 = self._enrich_chunk(system_prompt, core_data, chunk[half:], chunk_no)
+            done.update(done2)
+            wasted = e.args[0] if e.args else {"input": 0, "output": 0}
+            return (done,
+                    {k: tokens[k] + tokens2[k] + wasted.get(k, 0) for k in ("input", "output")},
+                    missing + missing2)
+
+        wanted = {str(item_id): item_id for item_id, _ in chunk}
+        done = {}
+        for support_item in support_data.get('support_items', []):
+            key = str(support_item.get('item_id')) if isinstance(support_item, dict) else None
+            if key in wanted:
+                support_item['item_id'] = wanted[key]
+                done[key] = support_item
+        return done, tokens, [key for key in wanted if key not in done]
+
+    # ----------------------------
+    # State
+    # ----------------------------
+
+    def _load_state(self, state_path: Path) -> Dict:
+        if state_path.exists():
+            try:
+                with open(state_path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                if state.get("version") == STATE_VERSION:
+                    return state
+            except (OSError, ValueError):
+                pass
+        return {"version": STATE_VERSION, "model": self.model, "items": {}}
+
+    @staticmethod
+    def _write_json(path: Path, data: Dict, indent: Optional[int] = None):
+        """Atomic write (tmp + replace): a crash never leaves a half-written checkpoint"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+        os.replace(tmp, path)
+
     def _find_existing_support(self, core_path: Path) -> Optional[Path]:
         """Find existing support file for core exercise"""
         support_path = Path(str(core_path).replace('_core.json', '_support.json'))
@@ -255,10 +444,10 @@ Je krijgt een oefening met vragen en antwoorden, en jouw taak is om toe te voege
 Genereer ALLEEN het support JSON object (schema v2.0.0).
 Geen tekst ervoor of erna, alleen valide JSON."""
 
-    def _build_user_prompt(self, core_data: Dict) -> str:
-        """Build user prompt from existing exercise"""
+    def _build_user_prompt(self, core_data: Dict, chunk: Optional[List[Tuple[Any, Dict]]] = None) -> str:
+        """Build user prompt from existing exercise (only the (item_id, item) pairs of `chunk` if given)"""
         metadata = core_data.get('metadata', {})
-        items = core_data.get('items', [])
+        chunk = chunk if chunk is not None else self._keyed_items(core_data)
 
         # Extract key info
         exercise_id = metadata.get('id', 'unknown')
@@ -269,7 +458,7 @@ Geen tekst ervoor of erna, alleen valide JSON."""
 
         # Format items for prompt
         items_text = ""
-        for i, item in enumerate(items, 1):
+        for i, item in chunk:
             question = item.get('question', {}).get('text', '')
             options = item.get('options', [])
             answer = item.get('answer', {})
@@ -309,7 +498,7 @@ Een support JSON object met deze structuur:
   }},
   "support_items": [
     {{
-      "item_id": 1,
+      "item_id": {chunk[0][0] if chunk else 1},
       "hints": [
         {{ "level": 1, "text": "...", "cost_points": 0 }},
         {{ "level": 2, "text": "...", "cost_points": 1 }},
@@ -333,12 +522,17 @@ Een support JSON object met deze structuur:
   ]
 }}
 
-Genereer voor ALLE items in de oefening (items 1 t/m {len(items)}).
+Genereer voor ALLE {len(chunk)} items hierboven, met item_id gelijk aan het itemnummer ({', '.join(str(i) for i, _ in chunk)}).
 
 Begin nu met het JSON object:"""
 
     def _call_ai(self, system_prompt: str, user_prompt: str) -> Tuple[Dict, Dict]:
-        """Call AI API and parse response"""
+        """
+        Call AI API and parse response
+
+        Raises:
+            TruncatedResponse: reply hit max_tokens (carries the tokens spent)
+        """
         if self.provider == "anthropic":
             response = self.client.messages.create(
                 model=self.model,
@@ -354,6 +548,7 @@ Begin nu met het JSON object:"""
                 "input": response.usage.input_tokens,
                 "output": response.usage.output_tokens
             }
+            truncated = response.stop_reason == "max_tokens"
 
         elif self.provider == "openai":
             response = self.client.chat.completions.create(
@@ -371,6 +566,10 @@ Begin nu met het JSON object:"""
                 "input": response.usage.prompt_tokens,
                 "output": response.usage.completion_tokens
             }
+            truncated = response.choices[0].finish_reason == "length"
+
+        if truncated:
+            raise TruncatedResponse(tokens)
 
         # Parse JSON from response
         support_data = self._parse_ai_response(content)
@@ -404,16 +603,20 @@ Begin nu met het JSON object:"""
         return input_cost + output_cost
 
 
-def find_exercises_to_enrich(base_dir: str = "data-v2/exercises", category: Optional[str] = None) -> List[Path]:
+def find_exercises_to_enrich(base_dir: str = "data-v2/exercises", category: Optional[str] = None,
+                             state_dir: Optional[str] = DEFAULT_STATE_DIR) -> List[Path]:
     """
-    Find all core exercises that don't have support files
+    Find all core exercises that don't have support files, plus those enriched
+    earlier by this tool (state file present: changed items are re-enriched,
+    unchanged files are skipped cheaply)
 
     Args:
         base_dir: Base directory containing exercises
         category: Filter by category (e.g., 'gb', 'bl')
+        state_dir: Enrichment state directory (None = ignore state)
 
     Returns:
-        List of paths to core files without support
+        List of paths to core files to enrich
     """
     base_path = Path(base_dir)
     core_files = []
@@ -428,7 +631,8 @@ def find_exercises_to_enrich(base_dir: str = "data-v2/exercises", category: Opti
         # Check if support file exists
         support_file = Path(str(core_file).replace('_core.json', '_support.json'))
 
-        if not support_file.exists():
+        has_state = state_dir and (Path(state_dir) / core_file.parent.name / f"{core_file.stem}.json").exists()
+        if not support_file.exists() or has_state:
             core_files.append(core_file)
 
     return sorted(core_files)
@@ -454,6 +658,21 @@ def main():
     parser.add_argument('--model', type=str, default=DEFAULT_MODEL,
                         choices=list(MODELS.keys()),
                         help=f'AI model to use (default: {DEFAULT_MODEL})')
+    parser.add_argument('--model-base-url', type=str, default=None,
+                        help='API endpoint root, e.g. http://127.0.0.1:8808 for scripts/fake_model_server.py '
+                             '(default: $MODEL_BASE_URL, else the real API)')
+
+    # Throughput
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Concurrent chunk requests (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--file-workers', type=int, default=2,
+                        help='Files enriched at the same time (default: 2)')
+    parser.add_argument('--rpm', type=float, default=DEFAULT_REQUESTS_PER_MINUTE,
+                        help=f'Max requests per minute over all workers (default: {DEFAULT_REQUESTS_PER_MINUTE}, 0 = no limit)')
+    parser.add_argument('--chunk-size', type=int, default=0,
+                        help='Items per request (default: as many as fit the model max_tokens)')
+    parser.add_argument('--state-dir', type=str, default=DEFAULT_STATE_DIR,
+                        help=f'Checkpoints + item hashes for resume/incremental runs (default: {DEFAULT_STATE_DIR})')
 
     # Validation
     parser.add_argument('--validate', action='store_true',
@@ -463,7 +682,7 @@ def main():
     parser.add_argument('--dry-run', action='store_true',
                         help='Show what would be enriched without actually doing it')
     parser.add_argument('--force', action='store_true',
-                        help='Overwrite existing support files')
+                        help='Overwrite existing support files (re-enrich every item)')
     parser.add_argument('--limit', type=int, help='Limit number of exercises to enrich')
 
     args = parser.parse_args()
@@ -472,9 +691,9 @@ def main():
     if args.file:
         files_to_enrich = [Path(args.file)]
     elif args.category:
-        files_to_enrich = find_exercises_to_enrich(category=args.category)
+        files_to_enrich = find_exercises_to_enrich(category=args.category, state_dir=args.state_dir)
     elif args.all:
-        files_to_enrich = find_exercises_to_enrich()
+        files_to_enrich = find_exercises_to_enrich(state_dir=args.state_dir)
     else:
         parser.error("Must specify --file, --category, or --all")
 
@@ -498,22 +717,26 @@ def main():
 
     # Initialize enricher
     try:
-        enricher = ExerciseEnricher(model=args.model)
+        enricher = ExerciseEnricher(model=args.model, base_url=args.model_base_url, workers=args.workers,
+                                    requests_per_minute=args.rpm, chunk_size=args.chunk_size,
+                                    state_dir=args.state_dir, force=args.force)
     except Exception as e:
         print(f"\n❌ Failed to initialize enricher: {e}")
         return 1
 
-    # Enrich exercises
+    # Enrich exercises (chunks of all files share the enricher's worker pool and rate limiter)
     results = []
-    for i, core_file in enumerate(files_to_enrich, 1):
-        print(f"\n[{i}/{len(files_to_enrich)}]", end=" ")
-        result = enricher.enrich_exercise(core_file, args.output_dir)
-        results.append(result)
-
-        if not result.success and "already exists" not in result.error:
-            print(f"   ❌ Error: {result.error}")
-
-        time.sleep(0.5)  # Rate limiting
+    with ThreadPoolExecutor(max_workers=max(1, args.file_workers)) as files_pool:
+        futures = {files_pool.submit(enricher.enrich_exercise, core_file, args.output_dir): core_file
+                   for core_file in files_to_enrich}
+        for i, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results.append(result)
+            print(f"   [{i}/{len(files_to_enrich)}] {result.exercise_id}: {'✅' if result.success else '—'}")
+
+            if not result.success and "already exists" not in result.error:
+                print(f"   ❌ Error: {result.error}")
+    enricher.close()
 
     # Summary
     successful = [r for r in results if r.success]
@@ -0,0 +1,542 @@
+#!/usr/bin/env python3
+"""
+Exercise Corpus
+===============
+
+Shared, read-only object model for exercise files, so tools stop
+re-implementing "load JSON, then find the item list" for every shape:
+
+- v2 core:        {metadata, items[]} / {exercises[].items[]} (BL) / {problems[].items[]} (VS)
+- v2 support:     same three layouts, items keyed by item_id
+- legacy blocks:  [{id, theme, questions[]}]            (data/exercises/gb, bl, verhaaltjessommen)
+- legacy flat:    [{id, question, options, correct}]    (data/exercises/wo, ws)
+- spelling set:   {set, items[]}                        (data/exercises/sp)
+- content packs:  [{id, prompt, interaction, solution}] (content/nl-NL/**/exercises.json)
+
+Records use __slots__ and keep a reference to the raw dict instead of a
+copy, so a loaded corpus costs little more than the parsed JSON itself.
+Support files are only read when a tool asks for them, and parsed packs
+are cached per path (invalidated by size + mtime), so chained tools in one
+process share a single parse.
+
+Because of that sharing, packs from load_pack() / open_corpus() and their
+.raw dicts are READ-ONLY: an edit would show up in every other caller of
+the same file and would not match the file on disk. Tools that modify a
+file load a private parse with load_pack(path, use_cache=False), edit
+pack.raw (or the dicts from iter_raw_items(pack.raw)) and write it back.
+
+Usage:
+    from exercise_corpus import open_corpus, load_pack
+
+    corpus = open_corpus('data-v2/exercises')
+    for pack in corpus.packs():
+        for item in pack.items:
+            print(pack.id, item.id, item.question, item.correct_option)
+            hints = pack.support_for(item).hints   # support loaded on first use
+
+    pack = load_pack('data/exercises/gb/gb_groep4_m4.json')
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Shape tags returned in Pack.kind
+KIND_V2 = 'v2'
+KIND_LEGACY_BLOCKS = 'legacy-blocks'
+KIND_LEGACY_FLAT = 'legacy-flat'
+KIND_SPELLING_SET = 'spelling-set'
+KIND_CONTENT_PACK = 'content-pack'
+KIND_UNKNOWN = 'unknown'
+
+
+class Item:
+    """One question, whatever file shape it came from"""
+
+    __slots__ = ('id', 'type', 'theme', 'question', 'options', 'correct_index',
+                 'correct_value', 'raw')
+
+    def __init__(self, id, type: str, theme: str, question: str,
+                 options: Tuple[str, ...] = (), correct_index: Optional[int] = None,
+                 correct_value: Any = None, raw: Optional[Dict] = None):
+        self.id = id
+        self.type = type
+        self.theme = theme
+        self.question = question
+        self.options = options
+        self.correct_index = correct_index
+        self.correct_value = correct_value
+        self.raw = raw
+
+    @property
+    def correct_option(self) -> Optional[str]:
+        """Text of the correct option, or the expected value for open items"""
+        if self.correct_index is not None and 0 <= self.correct_index < len(self.options):
+            return self.options[self.correct_index]
+        return None if self.correct_value is None else str(self.correct_value)
+
+    def __repr__(self):
+        return f"Item({self.id!r}, {self.type!r}, {self.question[:40]!r})"
+
+
+class Support:
+    """Support data (hints, feedback) for one item"""
+
+    __slots__ = ('item_id', 'hints', 'feedback', 'raw')
+
+    def __init__(self, item_id, hints: List, feedback: Dict, raw: Optional[Dict] = None):
+        self.item_id = item_id
+        self.hints = hints
+        self.feedback = feedback
+        self.raw = raw
+
+    def __repr__(self):
+        return f"Support({self.item_id!r}, {len(self.hints)} hint(s))"
+
+
+_EMPTY_SUPPORT = Support(None, [], {})
+
+
+class Pack:
+    """One exercise file: metadata plus its items; support is loaded lazily"""
+
+    __slots__ = ('id', 'path', 'kind', 'category', 'grade', 'level', 'title',
+                 'items', 'support_path', 'raw', '_support')
+
+    def __init__(self, id: str, path: Optional[str], kind: str, items: List[Item],
+                 category: str = '', grade: Optional[int] = None, level: str = '',
+                 title: str = '', support_path: Optional[str] = None, raw: Any = None):
+        self.id = id
+        self.path = path
+        self.kind = kind
+        self.category = category
+        self.grade = grade
+        self.level = level
+        self.title = title
+        self.items = items
+        self.support_path = support_path
+        self.raw = raw
+        self._support: Optional[Dict[Any, Support]] = None
+
+    @property
+    def has_support(self) -> bool:
+        return bool(self.support_path) and os.path.exists(self.support_path)
+
+    def support(self) -> Dict[Any, Support]:
+        """Support records keyed by item id (read from disk on first call)"""
+        if self._support is None:
+            self._support = load_support(self.support_path) if self.has_support else {}
+        return self._support
+
+    def support_for(self, item: Item) -> Support:
+        """Support for one item; an empty record when there is none"""
+        support = self.support()
+        found = support.get(item.id)
+        if found is None and not isinstance(item.id, str):
+            found = support.get(str(item.id))
+        return found or _EMPTY_SUPPORT
+
+    def __len__(self):
+        return len(self.items)
+
+    def __repr__(self):
+        return f"Pack({self.id!r}, kind={self.kind!r}, items={len(self.items)})"
+
+
+# ----------------------------
+# Normalisation
+# ----------------------------
+
+def _text(value) -> str:
+    """Question/option text from either a plain string or a {text: ...} dict"""
+    if isinstance(value, dict):
+        return str(value.get('text', ''))
+    return '' if value is None else str(value)
+
+
+def _options(raw_options) -> Tuple[Tuple[str, ...], Optional[int]]:
+    """Option texts plus the index flagged is_correct (legacy BL style), if any"""
+    if not isinstance(raw_options, list):
+        return (), None
+    texts = []
+    flagged = None
+    for idx, opt in enumerate(raw_options):
+        text = _text(opt)
+        # short option texts ("12", "A", "ja") repeat across thousands of items
+        texts.append(sys.intern(text) if len(text) < 32 else text)
+        if isinstance(opt, dict) and opt.get('is_correct') is True and flagged is None:
+            flagged = idx
+    return tuple(texts), flagged
+
+
+def iter_raw_items(data: Any) -> Iterator[Dict]:
+    """
+    Yield the raw item dicts of any supported shape, in file order.
+
+    The dicts are the ones inside `data`, not copies. Only edit them when
+    `data` is your own parse (json.load, load_pack(..., use_cache=False)),
+    never the .raw of a cached Pack.
+    """
+    if isinstance(data, dict):
+        # v2 core/support: items[] takes precedence over the nested layouts
+        if 'items' in data:
+            yield from (i for i in data['items'] if isinstance(i, dict))
+        elif 'exercises' in data:
+            for block in data['exercises']:
+                yield from (i for i in block.get('items', []) if isinstance(i, dict))
+        elif 'problems' in data:
+            for block in data['problems']:
+                yield from (i for i in block.get('items', []) if isinstance(i, dict))
+    elif isinstance(data, list):
+        for entry in data:
+            if not isinstance(entry, dict):
+                continue
+            if isinstance(entry.get('questions'), list):
+                yield from (q for q in entry['questions'] if isinstance(q, dict))
+            else:
+                yield entry
+
+
+def detect_kind(data: Any) -> str:
+    """Which of the known file shapes `data` is"""
+    if isinstance(data, dict):
+        if 'set' in data and 'items' in data:
+            return KIND_SPELLING_SET
+        if any(k in data for k in ('items', 'exercises', 'problems')):
+            return KIND_V2
+        return KIND_UNKNOWN
+    if isinstance(data, list):
+        first = next((e for e in data if isinstance(e, dict)), None)
+        if first is None:
+            return KIND_UNKNOWN
+        if 'questions' in first:
+            return KIND_LEGACY_BLOCKS
+        if 'schemaVersion' in first or 'interaction' in first or 'prompt' in first:
+            return KIND_CONTENT_PACK
+        if 'question' in first:
+            return KIND_LEGACY_FLAT
+    return KIND_UNKNOWN
+
+
+def _v2_items(data: Dict) -> List[Item]:
+    items = []
+    default_type = data.get('metadata', {}).get('type', 'multiple_choice')
+    for raw in iter_raw_items(data):
+        options, flagged = _options(raw.get('options'))
+        answer = raw.get('answer') if isinstance(raw.get('answer'), dict) else {}
+        correct_index = answer.get('correct_index', flagged)
+        items.append(Item(
+            id=raw.get('id', raw.get('item_id')),
+            type=sys.intern(str(raw.get('type', default_type))),
+            theme=sys.intern(str(raw.get('theme', ''))),
+            question=_text(raw.get('question')),
+            options=options,
+            correct_index=correct_index if isinstance(correct_index, int) else None,
+            correct_value=answer.get('correct_value'),
+            raw=raw,
+        ))
+    return items
+
+
+def _legacy_block_items(data: List) -> List[Item]:
+    items = []
+    for block in data:
+        if not isinstance(block, dict):
+            continue
+        theme = sys.intern(str(block.get('theme', '')))
+        for n, raw in enumerate(block.get('questions', []), 1):
+            if not isinstance(raw, dict):
+                continue
+            options, flagged = _options(raw.get('options'))
+            correct = raw.get('correct', flagged)
+            items.append(Item(
+                id=raw.get('item_id', f"{block.get('id')}.{n}"),
+                type='multiple_choice' if options else 'open',
+                theme=theme,
+                question=_text(raw.get('question')),
+                options=options,
+                correct_index=correct if isinstance(correct, int) else None,
+                correct_value=None if isinstance(correct, int) else correct,
+                raw=raw,
+            ))
+    return items
+
+
+def _legacy_flat_items(data: List) -> List[Item]:
+    items = []
+    for raw in data:
+        if not isinstance(raw, dict):
+            continue
+        options, flagged = _options(raw.get('options'))
+        correct = raw.get('correct', flagged)
+        items.append(Item(
+            id=raw.get('id'),
+            type='multiple_choice' if options else 'open',
+            theme=sys.intern(str(raw.get('theme', ''))),
+            question=_text(raw.get('question')),
+            options=options,
+            correct_index=correct if isinstance(correct, int) else None,
+            raw=raw,
+        ))
+    return items
+
+
+def _spelling_items(data: Dict) -> List[Item]:
+    items = []
+    for raw in data.get('items', []):
+        if not isinstance(raw, dict):
+            continue
+        prompt = raw.get('prompt', {})
+        target = raw.get('target', {})
+        items.append(Item(
+            id=raw.get('id'),
+            type='spelling',
+            theme=sys.intern(','.join(raw.get('tags', []))),
+            question=_text(prompt.get('sentence') if isinstance(prompt, dict) else prompt),
+            correct_value=target.get('answer') if isinstance(target, dict) else None,
+            raw=raw,
+        ))
+    return items
+
+
+def _content_items(data: List) -> List[Item]:
+    items = []
+    for raw in data:
+        if not isinstance(raw, dict):
+            continue
+        interaction = raw.get('interaction') if isinstance(raw.get('interaction'), dict) else {}
+        # Older packs put question/solution inside interaction, or use "question" for the prompt
+        prompt = raw.get('prompt', raw.get('question', interaction.get('question')))
+        solution = raw.get('solution', interaction.get('solution'))
+        if not isinstance(solution, dict):
+            solution = {'value': solution} if solution is not None else {}
+        options, _ = _options(raw.get('options', interaction.get('options')))
+        index = solution.get('index')
+        items.append(Item(
+            id=raw.get('id'),
+            type=sys.intern(str(interaction.get('type', 'numeric'))),
+            theme=sys.intern(str(raw.get('topic', ''))),
+            question=_text(prompt),
+            options=options,
+            correct_index=index if isinstance(index, int) else None,
+            correct_value=solution.get('value'),
+            raw=raw,
+        ))
+    return items
+
+
+def _content_pack_location(path: Optional[Path]) -> Dict[str, Any]:
+    """domain/grade/level/topic from <domain>/groep-<g>/<level>/topics/<topic>/exercises.json"""
+    if path is None or len(path.parts) < 6 or path.parts[-3] != 'topics':
+        return {}
+    grade = path.parts[-5].replace('groep-', '')
+    return {
+        'domain': path.parts[-6],
+        'grade': int(grade) if grade.isdigit() else None,
+        'level': path.parts[-4],
+        'topic': path.parts[-2],
+    }
+
+
+def normalize(data: Any, path: Optional[str] = None) -> Pack:
+    """
+    Turn parsed JSON of any supported shape into a Pack
+
+    Args:
+        data: Parsed JSON (dict or list)
+        path: Source path; used for ids, category and the support file location
+
+    Returns:
+        Pack (kind 'unknown' with no items for unrecognised shapes)
+    """
+    kind = detect_kind(data)
+    p = Path(path) if path else None
+    stem = p.stem if p else ''
+    category = p.parent.name if p else ''
+    support_path = None
+
+    if kind == KIND_UNKNOWN and data == [] and _content_pack_location(p):
+        # freshly scaffolded topic folder: empty exercises.json
+        kind = KIND_CONTENT_PACK
+
+    if kind == KIND_V2:
+        meta = data.get('metadata', {})
+        if p and p.name.endswith('_core.json'):
+            stem = p.name[:-len('_core.json')]
+            support_path = str(p.with_name(stem + '_support.json'))
+        return Pack(
+            id=meta.get('id', stem),
+            path=path,
+            kind=kind,
+            items=_v2_items(data),
+            category=meta.get('category', category),
+            grade=meta.get('grade'),
+            level=meta.get('level', ''),
+            title=data.get('display', {}).get('title', ''),
+            support_path=support_path,
+            raw=data,
+        )
+
+    if kind == KIND_SPELLING_SET:
+        meta = data.get('set', {})
+        return Pack(id=stem, path=path, kind=kind, items=_spelling_items(data),
+                    category=category, grade=meta.get('grade'), level=meta.get('level', ''),
+                    title=meta.get('mode', ''), raw=data)
+
+    if kind == KIND_CONTENT_PACK:
+        # the pack location is authoritative; item fields are missing in older packs
+        first = next((e for e in data if isinstance(e, dict)), {})
+        loc = _content_pack_location(p)
+        domain = loc.get('domain', first.get('domain', ''))
+        level = loc.get('level', first.get('level', ''))
+        topic = loc.get('topic', first.get('topic', stem))
+        grade = loc.get('grade', first.get('grade'))
+        return Pack(id=f"{domain}/groep-{grade}/{level}/{topic}", path=path, kind=kind,
+                    items=_content_items(data), category=domain, grade=grade, level=level,
+                    title=topic, raw=data)
+
+    if kind == KIND_LEGACY_BLOCKS:
+        return Pack(id=stem, path=path, kind=kind, items=_legacy_block_items(data),
+                    category=category, raw=data)
+
+    if kind == KIND_LEGACY_FLAT:
+        return Pack(id=stem, path=path, kind=kind, items=_legacy_flat_items(data),
+                    category=category, raw=data)
+
+    return Pack(id=stem, path=path, kind=KIND_UNKNOWN, items=[], category=category, raw=data)
+
+
+def load_support(path: str) -> Dict[Any, Support]:
+    """Read a v2 support file into Support records keyed by item id"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        data = json.load(f)
+
+    records = {}
+    for raw in iter_raw_items(data):
+        item_id = raw.get('item_id', raw.get('id'))
+        feedback = raw.get('feedback') if isinstance(raw.get('feedback'), dict) else {}
+        records[item_id] = Support(item_id, raw.get('hints') or [], feedback, raw)
+    return records
+
+
+# ----------------------------
+# Cached loading
+# ----------------------------
+
+# abspath -> (size, mtime_ns, Pack)
+_PACK_CACHE: Dict[str, Tuple[int, int, Pack]] = {}
+_CORPORA: Dict[str, 'Corpus'] = {}
+
+
+def load_pack(path, use_cache: bool = True) -> Pack:
+    """
+    Load and normalise one exercise file
+
+    Args:
+        path: File path (core, legacy or content pack)
+        use_cache: Reuse an earlier parse when size and mtime are unchanged;
+                   False gives a private Pack that may be edited
+
+    Returns:
+        Pack (shared and read-only when use_cache is True)
+
+    Raises:
+        OSError, json.JSONDecodeError: Unreadable or invalid file
+    """
+    abs_path = os.path.abspath(str(path))
+    st = os.stat(abs_path)
+    if use_cache:
+        cached = _PACK_CACHE.get(abs_path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+
+    with open(abs_path, 'r', encoding='utf-8-sig') as f:
+        data = json.load(f)
+    pack = normalize(data, abs_path)
+
+    if use_cache:
+        _PACK_CACHE[abs_path] = (st.st_size, st.st_mtime_ns, pack)
+    return pack
+
+
+def clear_cache():
+    """Drop all cached packs and corpus handles"""
+    _PACK_CACHE.clear()
+    _CORPORA.clear()
+
+
+class Corpus:
+    """A directory of exercise files, parsed on demand and cached"""
+
+    def __init__(self, root, pattern: str = '**/*_core.json'):
+        """
+        Args:
+            root: Directory to scan (e.g. data-v2/exercises, content/nl-NL)
+            pattern: Glob relative to root; content packs use '**/exercises.json'
+        """
+        self.root = Path(root)
+        self.pattern = pattern
+        self.errors: Dict[str, str] = {}
+
+    def files(self) -> List[Path]:
+        return sorted(self.root.glob(self.pattern))
+
+    def packs(self) -> Iterator[Pack]:
+        """Yield every readable pack; parse errors are collected in self.errors"""
+        for path in self.files():
+            try:
+                yield load_pack(path)
+            except (OSError, ValueError) as e:
+                self.errors[str(path)] = str(e)
+
+    def items(self) -> Iterator[Tuple[Pack, Item]]:
+        for pack in self.packs():
+            for item in pack.items:
+                yield pack, item
+
+    def get(self, pack_id: str) -> Optional[Pack]:
+        for pack in self.packs():
+            if pack.id == pack_id:
+                return pack
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        by_category: Dict[str, int] = {}
+        packs = items = 0
+        for pack in self.packs():
+            packs += 1
+            items += len(pack.items)
+            by_category[pack.category] = by_category.get(pack.category, 0) + len(pack.items)
+        return {'packs': packs, 'items': items, 'by_category': by_category,
+                'errors': len(self.errors)}
+
+
+def open_corpus(root, pattern: str = '**/*_core.json') -> Corpus:
+    """Shared Corpus handle per (root, pattern) for in-process reuse across tools"""
+    key = f"{os.path.abspath(str(root))}::{pattern}"
+    corpus = _CORPORA.get(key)
+    if corpus is None:
+        corpus = _CORPORA[key] = Corpus(root, pattern)
+    return corpus
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Summarise an exercise directory via the shared corpus model')
+    parser.add_argument('--directory', '-d', default='data-v2/exercises')
+    parser.add_argument('--pattern', default='**/*_core.json',
+                        help="Glob relative to directory (content packs: '**/exercises.json')")
+    args = parser.parse_args()
+
+    corpus = open_corpus(args.directory, args.pattern)
+    stats = corpus.stats()
+    print(f"📁 {args.directory}: {stats['packs']} pack(s), {stats['items']} item(s)")
+    for cat, count in sorted(stats['by_category'].items()):
+        print(f"  {cat or '-'}: {count}")
+    if corpus.errors:
+        print(f"\n⚠️  {len(corpus.errors)} unreadable file(s):")
+        for path, err in list(corpus.errors.items())[:5]:
+            print(f"  - {Path(path).name}: {err}")
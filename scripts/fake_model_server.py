@@ -0,0 +1,647 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+fake_model_server.py — local OpenAI/Anthropic-compatible endpoint for offline benchmarks
+
+Serves POST /v1/chat/completions (OpenAI) and POST /v1/messages (Anthropic)
+so run_prompt_packs.py, ai-bulk-generator.py and enrich-exercises.py can run
+against it through scripts/model_client.py (--model-base-url /
+MODEL_BASE_URL) without spending tokens.
+
+Responses, per request:
+  1. replay: recorded completions keyed by prompt hash (system + user text,
+     see prompt_key). Several recordings for one key are served in turn.
+  2. synthesis (replay miss or no recordings), by prompt shape:
+       - prompt packs: a JSON array of schema-valid items generated from
+         content/nl-NL/_shared/schemas/ExerciseSchema.json, with domain,
+         grade, level, topic, interaction type, taskForm, id pattern and
+         misconcept keys taken from the prompt; honours chunk windows
+         ("ids numbered 018-034")
+       - ai-bulk-generator: CORE ---SPLIT--- SUPPORT (schema 2.0.0)
+       - enrich-exercises: a support object for the items in the prompt
+
+Load shaping (all seeded, --seed):
+  --latency lognormal:800,0.5 | fixed:500 | uniform:200,2000   (ms before the body)
+  --ms-per-token 2                                              (plus per output token)
+  --rate-429 0.05      share of requests answered 429 (retry-after header set)
+  --truncate 0.02      share of completions cut off (finish_reason=length /
+                       stop_reason=max_tokens); max_tokens is always honoured
+
+Prompt caching is emulated: a system prompt seen before is reported as
+cached input (OpenAI: from 1024 tokens, in 128-token steps; Anthropic: only
+with cache_control, as cache_read/cache_creation tokens).
+
+Recording real completions for later replay (forwards auth headers):
+  python scripts/fake_model_server.py --record state/recordings.ndjson
+
+  python scripts/fake_model_server.py --port 8808 --replay state/recordings.ndjson --rate-429 0.05
+  curl -s http://127.0.0.1:8808/stats
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from token_budget import DEFAULT_CHARS_PER_TOKEN
+
+SCHEMA_PATH = os.path.join("content", "nl-NL", "_shared", "schemas", "ExerciseSchema.json")
+
+UPSTREAMS = {"openai": "https://api.openai.com", "anthropic": "https://api.anthropic.com"}
+
+# OpenAI caches prompts from this many tokens, in steps of CACHE_STEP
+CACHE_MIN_TOKENS = 1024
+CACHE_STEP = 128
+
+
+def count_tokens(text: str) -> int:
+    return max(1, int(math.ceil(len(text) / DEFAULT_CHARS_PER_TOKEN))) if text else 0
+
+
+def _text(content: Any) -> str:
+    """Message content as text: a string or a list of content blocks"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(b.get("text", "") for b in content if isinstance(b, dict))
+    return ""
+
+
+def prompt_key(system: str, user: str) -> str:
+    """Replay key: hash of the system and user text (model and sampling settings excluded)"""
+    payload = json.dumps([system, user], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ----------------------------
+# Latency / failure model
+# ----------------------------
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """'fixed:ms' | 'uniform:lo,hi' | 'lognormal:median_ms,sigma' -> sampler returning seconds"""
+    kind, _, args = spec.partition(":")
+    try:
+        vals = [float(v) for v in args.split(",")] if args else []
+        if kind == "fixed":
+            return lambda rng: vals[0] / 1000.0
+        if kind == "uniform":
+            return lambda rng: rng.uniform(vals[0], vals[1]) / 1000.0
+        if kind == "lognormal":
+            mu = math.log(vals[0])
+            return lambda rng: rng.lognormvariate(mu, vals[1]) / 1000.0
+    except (ValueError, IndexError):
+        pass
+    raise ValueError(f"Bad latency spec: {spec!r} (fixed:ms | uniform:lo,hi | lognormal:median_ms,sigma)")
+
+
+# ----------------------------
+# Synthesis
+# ----------------------------
+
+class SchemaSynth:
+    """Minimal instances of a JSON Schema ($ref, allOf, oneOf/anyOf, const, enum, types)"""
+
+    def __init__(self, schema: Dict[str, Any]):
+        self.schema = schema
+
+    def resolve(self, node: Dict[str, Any]) -> Dict[str, Any]:
+        while isinstance(node, dict) and "$ref" in node:
+            ref = node["$ref"]
+            target: Any = self.schema
+            for part in ref.lstrip("#/").split("/"):
+                target = target[part]
+            rest = {k: v for k, v in node.items() if k != "$ref"}
+            node = self.merge(target, rest) if rest else target
+        return node
+
+    def merge(self, a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
+        out = dict(self.resolve(a))
+        b = self.resolve(b)
+        for k, v in b.items():
+            if k == "properties":
+                props = dict(out.get("properties", {}))
+                for name, sub in v.items():
+                    props[name] = self.merge(props[name], sub) if name in props else sub
+                out["properties"] = props
+            elif k == "required":
+                out["required"] = list(dict.fromkeys(list(out.get("required", [])) + list(v)))
+            else:
+                out[k] = v
+        return out
+
+    def flatten(self, node: Dict[str, Any], choose: Callable[[List[Dict[str, Any]]], Dict[str, Any]]) -> Dict[str, Any]:
+        node = self.resolve(node)
+        if "allOf" in node:
+            merged: Dict[str, Any] = {k: v for k, v in node.items() if k != "allOf"}
+            for part in node["allOf"]:
+                merged = self.merge(merged, self.flatten(part, choose))
+            node = merged
+        for key in ("oneOf", "anyOf"):
+            if key in node:
+                branches = [self.flatten(b, choose) for b in node[key]]
+                rest = {k: v for k, v in node.items() if k != key}
+                node = self.merge(rest, choose(branches)) if rest else choose(branches)
+        return node
+
+    def instance(self, node: Dict[str, Any], hints: Dict[str, Any],
+                 choose: Callable[[List[Dict[str, Any]]], Dict[str, Any]], name: str = "") -> Any:
+        node = self.flatten(node, choose)
+        if name in hints:
+            return copy.deepcopy(hints[name])
+        if "const" in node:
+            return node["const"]
+        if "enum" in node:
+            return node["enum"][0]
+        kind = node.get("type")
+        if kind == "object" or "properties" in node:
+            props = node.get("properties", {})
+            out = {}
+            for prop in node.get("required", []):
+                out[prop] = self.instance(props.get(prop, {}), hints, choose, prop)
+            if not out and node.get("minProperties"):
+                out["value"] = 1
+            return out
+        if kind == "array":
+            n = max(1, int(node.get("minItems", 1)))
+            return [self.instance(node.get("items", {}), hints, choose) for _ in range(n)]
+        if kind == "integer":
+            return int(node.get("minimum", 1))
+        if kind == "number":
+            return 1
+        if kind == "string":
+            return "tekst"
+        return "tekst"
+
+
+def _grab(patterns: List[str], text: str) -> str:
+    for pat in patterns:
+        m = re.search(pat, text, re.IGNORECASE)
+        if m:
+            return m.group(1)
+    return ""
+
+
+class Synthesizer:
+    """Fake completions for the three prompt shapes the generation scripts send"""
+
+    def __init__(self, schema_path: str = SCHEMA_PATH, seed: int = 0):
+        self.seed = seed
+        self.schema: Dict[str, Any] = {}
+        if os.path.exists(schema_path):
+            with open(schema_path, "r", encoding="utf-8-sig") as f:
+                self.schema = json.load(f)
+        self.synth = SchemaSynth(self.schema)
+        defs = self.schema.get("$defs", {})
+        self.interaction_types = defs.get("InteractionType", {}).get("enum", [])
+        self.task_forms = defs.get("TaskForm", {}).get("enum", [])
+
+    def complete(self, system: str, user: str) -> str:
+        # same prompt -> same output; different chunks/repairs differ
+        rng = random.Random(f"{self.seed}:{prompt_key(system, user)}")
+        if "---SPLIT---" in user:
+            return self.core_support(user, rng)
+        if "support_items" in user:
+            return json.dumps(self.support(user, rng), ensure_ascii=False, indent=2)
+        return json.dumps(self.exercises(user, rng), ensure_ascii=False, indent=2)
+
+    # -- prompt packs (run_prompt_packs.py) --
+
+    def exercises(self, prompt: str, rng: random.Random) -> List[Dict[str, Any]]:
+        window = re.search(r"ids numbered (\d+)\s*-\s*(\d+)", prompt)
+        if window:
+            first, last = int(window.group(1)), int(window.group(2))
+        else:
+            count = int(_grab([r"EXACTLY\s+(\d+)\s+exercises", r"EXACT\s+(\d+)\s+oefeningen", r"EXACT\s+(\d+)"], prompt) or 10)
+            first, last = 1, count
+
+        interaction = next((t for t in self.interaction_types
+                            if re.search(r'"type"\s*:\s*"%s"' % re.escape(t), prompt)), "numeric")
+        task_form = next((t for t in self.task_forms if f'"{t}"' in prompt), None)
+        id_prefix = _grab([r'"([A-Z0-9]+(?:-[A-Z0-9]+)*-)#+"'], prompt) or "FAKE-"
+        misconcepts = list(dict.fromkeys(re.findall(r'"([A-Z]{2}-[A-Z0-9]+-[A-Z0-9]+-\d{2})"', prompt))) or ["GEN-00"]
+        meta = {
+            "domain": _grab([r'domain\s*[:=]\s*"([^"]+)"'], prompt) or "getal-en-bewerkingen",
+            "grade": int(_grab([r'grade\s*[:=]\s*"?(\d)'], prompt) or 5),
+            "level": _grab([r'level\s*[:=]\s*"(n[1-4])"'], prompt) or "n2",
+            "topic": _grab([r'topic\s*[:=]\s*"([^"]+)"'], prompt) or "onderwerp",
+        }
+
+        def choose(branches: List[Dict[str, Any]]) -> Dict[str, Any]:
+            for b in branches:
+                t = (b.get("properties", {}).get("interaction", {}).get("properties", {}).get("type", {}))
+                if self.synth.resolve(t).get("const") == interaction:
+                    return b
+            return branches[0]
+
+        items = []
+        for n in range(first, last + 1):
+            a, b = rng.randint(12, 99), rng.randint(2, 12)
+            hints: Dict[str, Any] = dict(meta)
+            hints.update({
+                "schemaVersion": "1.0.0",
+                "id": f"{id_prefix}{n:03d}",
+                "prompt": f"Bereken:\n\n{a} + {b} = __" if interaction != "mcq" else f"Hoeveel is {a} + {b}?",
+                "correct": "Goed zo!",
+                "incorrect": f"Kijk nog eens: {a} + {b}.",
+                "strategy": "Eerst de tientallen, dan de eenheden.",
+                "misconceptKeys": [rng.choice(misconcepts)],
+            })
+            if task_form:
+                hints["taskForm"] = task_form
+            if interaction == "mcq":
+                options = [str(a + b + d) for d in (0, 1, -1, 10)]
+                rng.shuffle(options)
+                hints["options"] = options
+                hints["solution"] = {"index": options.index(str(a + b))}
+            elif interaction == "fill_blanks":
+                hints["solution"] = {"value": [a + b]}
+            elif interaction == "numeric":
+                hints["solution"] = {"value": a + b}
+            item = self.synth.instance({"$ref": "#/$defs/Exercise"}, hints, choose) if self.schema else hints
+            items.append(item)
+        return items
+
+    # -- ai-bulk-generator.py --
+
+    def core_support(self, prompt: str, rng: random.Random) -> str:
+        count = int(_grab([r"PRECIES\s+(\d+)\s+items"], prompt) or 5)
+        ex_id = _grab([r"-\s*id:\s*(\S+)"], prompt) or "fake_groep4_m_code"
+        category = _grab([r"-\s*category:\s*(\S+)"], prompt) or "gb"
+        grade = int(_grab([r"-\s*grade:\s*(\d+)"], prompt) or 4)
+        level = _grab([r"-\s*level:\s*([ME])\b"], prompt) or "M"
+        code = _grab([r"leerdoel_code:\s*(\S+)"], prompt) or ex_id.rsplit("_", 1)[-1].upper()
+
+        items, support_items = [], []
+        for i in range(1, count + 1):
+            a, b = rng.randint(2, 50), rng.randint(2, 50)
+            options = [str(a + b + d) for d in (0, 1, -1, 10)]
+            rng.shuffle(options)
+            correct = options.index(str(a + b))
+            items.append({
+                "id": i,
+                "type": "multiple_choice",
+                "theme": "rekenen",
+                "question": {"text": f"Hoeveel is {a} + {b}?"},
+                "options": [{"text": o} for o in options],
+                "answer": {"type": "single", "correct_index": correct},
+            })
+            support_items.append(self._support_item(i, len(options), correct))
+
+        meta = {"id": ex_id, "category": category, "grade": grade, "level": level}
+        core = {
+            "schema_version": "2.0.0",
+            "metadata": dict(meta, type="multiple_choice", language="nl", title=f"Oefening {code}",
+                             description=f"Gegenereerde oefening {code}",
+                             slo_alignment={"kerndoel": "K28", "kerndoel_description": "Rekenen",
+                                            "inhoudslijn": "Getallen", "leerdoel_code": code,
+                                            "leerdoel_description": f"Leerdoel {code}"}),
+            "display": {"title": f"Oefening {code}"},
+            "content": {"instruction": "Bereken:"},
+            "items": items,
+        }
+        support = {"schema_version": "2.0.0", "metadata": dict(meta, exercise_id=ex_id), "support_items": support_items}
+        return (json.dumps(core, ensure_ascii=False, indent=2) + "\n---SPLIT---\n"
+                + json.dumps(support, ensure_ascii=False, indent=2))
+
+    # -- enrich-exercises.py --
+
+    def support(self, prompt: str, rng: random.Random) -> Dict[str, Any]:
+        ex_id = _grab([r"-\s*ID:\s*(\S+)"], prompt) or "unknown"
+        category = _grab([r"-\s*Categorie:\s*(\S+)"], prompt)
+        grade = _grab([r"-\s*Groep:\s*(\d+)"], prompt)
+        parts = re.split(r"\*\*Item (\S+?):\*\*", prompt)[1:]
+        support_items = []
+        for raw_id, block in zip(parts[0::2], parts[1::2]):
+            i: Any = int(raw_id) if raw_id.isdigit() else raw_id
+            options = re.findall(r"^\s+[a-z]\) ", block, re.MULTILINE)
+            correct = next((n for n, line in enumerate(re.findall(r"^\s+[a-z]\) .*$", block, re.MULTILINE))
+                            if "(CORRECT)" in line), 0)
+            support_items.append(self._support_item(i, len(options), correct))
+        meta: Dict[str, Any] = {"id": ex_id, "exercise_id": ex_id, "category": category}
+        if grade:
+            meta["grade"] = int(grade)
+        return {"schema_version": "2.0.0", "metadata": meta, "support_items": support_items}
+
+    @staticmethod
+    def _support_item(item_id: int, n_options: int, correct: int) -> Dict[str, Any]:
+        return {
+            "item_id": item_id,
+            "hints": [
+                {"level": 1, "text": "Lees de vraag goed.", "cost_points": 0},
+                {"level": 2, "text": "Splits de getallen in tientallen en eenheden.", "cost_points": 1},
+                {"level": 3, "text": "Tel eerst de tientallen op.", "cost_points": 2},
+            ],
+            "feedback": {
+                "correct": "Goed gedaan!",
+                "incorrect": [{"option_index": j, "text": "Kijk nog eens naar de eenheden."}
+                              for j in range(n_options) if j != correct],
+            },
+            "learning_strategies": {
+                "reading_strategy": {"name": "Vraag lezen", "description": "Wat wordt er gevraagd?"},
+                "math_strategy": {"name": "Splitsen", "description": "Tientallen en eenheden apart."},
+            },
+            "common_errors": [{"error": "Eenheden vergeten", "explanation": "Alleen de tientallen opgeteld."}],
+        }
+
+
+# ----------------------------
+# Server
+# ----------------------------
+
+class FakeModelBackend:
+    """Everything except HTTP: recordings, synthesis, load shaping, cache emulation, stats"""
+
+    def __init__(self, synthesizer: Synthesizer, latency: Callable[[random.Random], float],
+                 ms_per_token: float = 0.0, rate_429: float = 0.0, truncate: float = 0.0,
+                 replay_path: Optional[str] = None, replay_only: bool = False,
+                 record_path: Optional[str] = None, seed: int = 0):
+        self.synthesizer = synthesizer
+        self.latency = latency
+        self.ms_per_token = ms_per_token
+        self.rate_429 = rate_429
+        self.truncate = truncate
+        self.replay_only = replay_only
+        self.record_path = record_path
+        self.recordings: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._served: Dict[str, int] = defaultdict(int)
+        self._seen_prefixes: set = set()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = defaultdict(int)
+        if replay_path and os.path.exists(replay_path):
+            with open(replay_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        rec = json.loads(line)
+                        self.recordings[rec["key"]].append(rec)
+
+    def draw(self) -> Tuple[bool, bool, float]:
+        """(answer 429, truncate, seconds before the body) for one request"""
+        with self._lock:
+            return self._rng.random() < self.rate_429, self._rng.random() < self.truncate, self.latency(self._rng)
+
+    def content_for(self, system: str, user: str) -> Tuple[Optional[str], str]:
+        """(text, source) — text None on a replay miss with --replay-only"""
+        key = prompt_key(system, user)
+        with self._lock:
+            recs = self.recordings.get(key)
+            if recs:
+                rec = recs[self._served[key] % len(recs)]
+                self._served[key] += 1
+                self.stats["replay_hits"] += 1
+                return rec["content"], "replay"
+            self.stats["replay_misses"] += 1
+        if self.replay_only:
+            return None, "miss"
+        return self.synthesizer.complete(system, user), "synth"
+
+    def cached_tokens(self, system: str, provider: str, cache_marked: bool) -> Tuple[int, int]:
+        """(cache read tokens, cache write tokens) for the system prefix"""
+        tokens = count_tokens(system)
+        key = hashlib.sha256(system.encode("utf-8")).hexdigest()
+        with self._lock:
+            seen = key in self._seen_prefixes
+            if provider == "anthropic" and not cache_marked:
+                return 0, 0
+            self._seen_prefixes.add(key)
+        if provider == "openai":
+            if tokens < CACHE_MIN_TOKENS or not seen:
+                return 0, 0
+            return tokens // CACHE_STEP * CACHE_STEP, 0
+        return (tokens, 0) if seen else (0, tokens)
+
+    def record(self, system: str, user: str, model: str, content: str, usage: Dict[str, Any]) -> None:
+        if not self.record_path:
+            return
+        rec = {"key": prompt_key(system, user), "model": model, "content": content, "usage": usage, "ts": time.time()}
+        line = json.dumps(rec, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.record_path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self.stats["recorded"] += 1
+
+
+def _openai_prompt(body: Dict[str, Any]) -> Tuple[str, str]:
+    messages = body.get("messages") or []
+    system = "\n".join(_text(m.get("content")) for m in messages if m.get("role") in ("system", "developer"))
+    user = "\n".join(_text(m.get("content")) for m in messages if m.get("role") not in ("system", "developer"))
+    return system, user
+
+
+def _anthropic_prompt(body: Dict[str, Any]) -> Tuple[str, str, bool]:
+    system = body.get("system") or ""
+    marked = isinstance(system, list) and any(isinstance(b, dict) and b.get("cache_control") for b in system)
+    user = "\n".join(_text(m.get("content")) for m in body.get("messages") or [])
+    return _text(system), user, marked
+
+
+class Handler(BaseHTTPRequestHandler):
+    backend: FakeModelBackend
+    upstreams: Dict[str, str] = UPSTREAMS
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt: str, *args: Any) -> None:
+        pass
+
+    def _send(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") in ("/health", "/v1/health"):
+            self._send(200, {"ok": True})
+        elif self.path.rstrip("/") == "/stats":
+            with self.backend._lock:
+                self._send(200, dict(self.backend.stats))
+        else:
+            self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send(400, {"error": {"message": "Invalid JSON body"}})
+            return
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path.endswith("/chat/completions"):
+            self._complete("openai", body)
+        elif path.endswith("/messages"):
+            self._complete("anthropic", body)
+        else:
+            self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def _complete(self, provider: str, body: Dict[str, Any]) -> None:
+        b = self.backend
+        with b._lock:
+            b.stats["requests"] += 1
+        if provider == "openai":
+            system, user = _openai_prompt(body)
+            marked = True
+        else:
+            system, user, marked = _anthropic_prompt(body)
+
+        if b.record_path:
+            self._forward(provider, body, system, user)
+            return
+
+        rate_limited, truncate, wait = b.draw()
+        if rate_limited:
+            with b._lock:
+                b.stats["rate_limited"] += 1
+            time.sleep(min(wait, 0.05))
+            err = ({"error": {"message": "Rate limit reached (fake server)", "type": "requests", "code": "rate_limit_exceeded"}}
+                   if provider == "openai" else
+                   {"type": "error", "error": {"type": "rate_limit_error", "message": "Rate limit reached (fake server)"}})
+            self._send(429, err, {"retry-after": "1", "retry-after-ms": "200"})
+            return
+
+        content, source = b.content_for(system, user)
+        if content is None:
+            self._send(404, {"error": {"message": "No recording for this prompt (--replay-only)"}})
+            return
+
+        max_tokens = int(body.get("max_tokens") or body.get("max_completion_tokens") or 0)
+        out_tokens = count_tokens(content)
+        cut = False
+        if truncate:
+            keep = int(len(content) * 0.6)
+            content, cut = content[:keep], True
+        if max_tokens and count_tokens(content) > max_tokens:
+            content, cut = content[: int(max_tokens * DEFAULT_CHARS_PER_TOKEN)], True
+        if cut:
+            out_tokens = count_tokens(content)
+            with b._lock:
+                b.stats["truncated"] += 1
+
+        time.sleep(wait + out_tokens * b.ms_per_token / 1000.0)
+
+        in_tokens = count_tokens(system) + count_tokens(user)
+        read, write = b.cached_tokens(system, provider, marked)
+        with b._lock:
+            b.stats[f"source_{source}"] += 1
+            b.stats["cached_tokens"] += read
+            b.stats["prompt_tokens"] += in_tokens
+            b.stats["completion_tokens"] += out_tokens
+
+        model = body.get("model", "fake")
+        if provider == "openai":
+            self._send(200, {
+                "id": "chatcmpl-" + uuid.uuid4().hex[:24],
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": "length" if cut else "stop"}],
+                "usage": {"prompt_tokens": in_tokens, "completion_tokens": out_tokens,
+                          "total_tokens": in_tokens + out_tokens,
+                          "prompt_tokens_details": {"cached_tokens": read}},
+            })
+        else:
+            self._send(200, {
+                "id": "msg_" + uuid.uuid4().hex[:24],
+                "type": "message",
+                "role": "assistant",
+                "model": model,
+                "content": [{"type": "text", "text": content}],
+                "stop_reason": "max_tokens" if cut else "end_turn",
+                "stop_sequence": None,
+                "usage": {"input_tokens": in_tokens - read - write, "output_tokens": out_tokens,
+                          "cache_read_input_tokens": read, "cache_creation_input_tokens": write},
+            })
+
+    def _forward(self, provider: str, body: Dict[str, Any], system: str, user: str) -> None:
+        """Record mode: pass the request to the real API and store the completion"""
+        url = self.upstreams[provider] + self.path
+        headers = {k: v for k, v in self.headers.items()
+                   if k.lower() in ("authorization", "x-api-key", "anthropic-version", "anthropic-beta",
+                                    "openai-organization", "content-type")}
+        req = urllib.request.Request(url, data=json.dumps(body).encode("utf-8"), headers=headers, method="POST")
+        try:
+            with urllib.request.urlopen(req, timeout=600) as resp:
+                status, raw = resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            status, raw = e.code, e.read()
+        except OSError as e:
+            self._send(502, {"error": {"message": f"Upstream failed: {e}"}})
+            return
+        try:
+            payload = json.loads(raw or b"{}")
+        except ValueError:
+            payload = {"error": {"message": raw.decode("utf-8", "replace")[:500]}}
+        if status == 200:
+            if provider == "openai":
+                content = payload["choices"][0]["message"].get("content") or ""
+            else:
+                content = _text(payload.get("content"))
+            self.backend.record(system, user, body.get("model", ""), content, payload.get("usage") or {})
+        self._send(status, payload)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Local OpenAI/Anthropic-compatible fake model server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8808)
+    ap.add_argument("--replay", default=None, help="NDJSON recordings to serve by prompt hash")
+    ap.add_argument("--replay-only", action="store_true", help="404 instead of synthesising on a replay miss")
+    ap.add_argument("--record", default=None, help="Forward to the real APIs and append completions to this NDJSON file")
+    ap.add_argument("--schema", default=SCHEMA_PATH, help=f"Schema for synthesised pack items (default: {SCHEMA_PATH})")
+    ap.add_argument("--latency", default="fixed:0", help="fixed:ms | uniform:lo,hi | lognormal:median_ms,sigma")
+    ap.add_argument("--ms-per-token", type=float, default=0.0, help="Extra latency per output token")
+    ap.add_argument("--rate-429", type=float, default=0.0, help="Share of requests answered 429")
+    ap.add_argument("--truncate", type=float, default=0.0, help="Share of completions cut off")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    backend = FakeModelBackend(
+        Synthesizer(args.schema, seed=args.seed),
+        latency=parse_latency(args.latency),
+        ms_per_token=args.ms_per_token,
+        rate_429=args.rate_429,
+        truncate=args.truncate,
+        replay_path=args.replay,
+        replay_only=args.replay_only,
+        record_path=args.record,
+        seed=args.seed,
+    )
+    Handler.backend = backend
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    server.daemon_threads = True
+
+    n_rec = sum(len(v) for v in backend.recordings.values())
+    mode = "record" if args.record else f"replay ({n_rec} recording(s)) + synth" if n_rec else "synth"
+    print(f"🤖 Fake model server on http://{args.host}:{args.port} [{mode}]")
+    print(f"   use: --model-base-url http://{args.host}:{args.port}  (or MODEL_BASE_URL)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"📊 {json.dumps(dict(backend.stats))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+lazy_cli.py — deferred imports and clients for command-line tools
+
+The generation and validation tools run hundreds of times per generation
+run, mostly for short jobs (one pack, one file, --help). Importing the
+model SDKs or jsonschema and constructing an API client at module load
+costs more than such a job itself, so these tools use:
+
+  jsonschema = lazy_module("jsonschema", "pip install jsonschema referencing")
+      module proxy; the import happens on first attribute access
+
+  module_available("anthropic")
+      True/False without importing (importlib.util.find_spec)
+
+  client = LazyClient(lambda: make_client("openai"))
+      built on first attribute access (thread-safe), so runs that never
+      call the model never construct one
+
+scripts/startup_budget.py checks that it stays that way.
+"""
+
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import threading
+from typing import Any, Callable, Optional
+
+
+def module_available(name: str) -> bool:
+    """True if `name` can be imported, without importing it (for "a.b", `a` is imported)"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        # parent package missing, or a broken __spec__
+        return False
+
+
+class LazyModule:
+    """Stands in for a module until an attribute is used"""
+
+    def __init__(self, name: str, install_hint: Optional[str] = None):
+        self._name = name
+        self._install_hint = install_hint
+        self._module: Any = None
+
+    def _load(self) -> Any:
+        if self._module is None:
+            try:
+                self._module = importlib.import_module(self._name)
+            except ImportError as e:
+                hint = f" Install with: {self._install_hint}" if self._install_hint else ""
+                raise ImportError(f"{self._name} is not installed.{hint}") from e
+        return self._module
+
+    @property
+    def available(self) -> bool:
+        return self._module is not None or module_available(self._name)
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_module(name: str, install_hint: Optional[str] = None) -> LazyModule:
+    return LazyModule(name, install_hint)
+
+
+class LazyClient:
+    """Builds a client with `factory` on first attribute access; one instance, thread-safe"""
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._client: Any = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    @property
+    def constructed(self) -> bool:
+        return self._client is not None
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.get(), attr)
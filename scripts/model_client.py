@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+model_client.py — one place where the generation scripts get an API client
+
+run_prompt_packs.py, ai-bulk-generator.py and enrich-exercises.py ask
+make_client() for an OpenAI or Anthropic client instead of constructing one
+themselves, so all three can be pointed at another endpoint, typically
+scripts/fake_model_server.py for offline benchmarks:
+
+  python scripts/fake_model_server.py --port 8808 &
+  python scripts/run_prompt_packs.py --model-base-url http://127.0.0.1:8808 ...
+  MODEL_BASE_URL=http://127.0.0.1:8808 python scripts/enrich-exercises.py --category gb
+
+With a base URL and no API key in the environment a dummy key is used (the
+fake server ignores it). The SDKs are imported on first use only.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Optional
+
+BASE_URL_ENV = "MODEL_BASE_URL"
+API_KEY_ENV = {"openai": "OPENAI_API_KEY", "anthropic": "ANTHROPIC_API_KEY"}
+OFFLINE_API_KEY = "offline"
+
+
+def base_url(explicit: Optional[str] = None) -> Optional[str]:
+    """--model-base-url if given, else $MODEL_BASE_URL, else None (real API)"""
+    url = explicit or os.environ.get(BASE_URL_ENV) or None
+    return url.rstrip("/") if url else None
+
+
+def needs_api_key(provider: str, explicit_base_url: Optional[str] = None) -> bool:
+    """True if the real API is used and its key is not set"""
+    return base_url(explicit_base_url) is None and not os.environ.get(API_KEY_ENV[provider])
+
+
+def make_client(provider: str, api_key: Optional[str] = None, url: Optional[str] = None,
+                max_retries: Optional[int] = None) -> Any:
+    """
+    Args:
+        provider: "openai" or "anthropic"
+        api_key: Key to use (default: provider env var; dummy for a base URL)
+        url: Endpoint root, e.g. http://127.0.0.1:8808 (default: $MODEL_BASE_URL)
+        max_retries: SDK retry count for 429/5xx (default: SDK default)
+
+    Raises:
+        ImportError: SDK for the provider not installed
+        ValueError: Unknown provider
+    """
+    if provider not in API_KEY_ENV:
+        raise ValueError(f"Unknown provider: {provider}")
+    root = base_url(url)
+    key = api_key or os.environ.get(API_KEY_ENV[provider]) or (OFFLINE_API_KEY if root else None)
+    kwargs: dict = {"api_key": key}
+    if max_retries is not None:
+        kwargs["max_retries"] = max_retries
+
+    if provider == "anthropic":
+        try:
+            from anthropic import Anthropic
+        except ImportError:
+            raise ImportError("Anthropic SDK not installed. Run: pip install anthropic")
+        if root:
+            # the SDK appends /v1/messages itself
+            kwargs["base_url"] = root
+        return Anthropic(**kwargs)
+
+    try:
+        from openai import OpenAI
+    except ImportError:
+        raise ImportError("OpenAI SDK not installed. Run: pip install openai")
+    if root:
+        # the SDK appends /chat/completions to a base URL that includes /v1
+        kwargs["base_url"] = root + "/v1"
+    return OpenAI(**kwargs)
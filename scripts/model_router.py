@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+model_router.py — history-based model choice for run_prompt_packs.py
+
+Instead of always spending 1 + max_repairs calls on the primary model
+before trying the fallback, each pack gets a route: which models, in which
+order, with how many calls each. The route minimises
+
+    expected cost ($) + time_weight * expected time (s) + fail_penalty * P(no passing pack)
+
+using per-call success rate, latency and token cost learned per
+(phase, model, domain, level, topic). Sparse contexts are shrunk towards
+(phase, model, domain, level) and then (phase, model).
+
+Exploration: on at most --explore of the packs the route is planned with a
+Thompson draw of the success rates instead of their means, so a model that
+looks bad on little evidence still gets tried now and then.
+
+Sources:
+  - telemetry: model_result events (one per model block of a pack: ok,
+    calls, dur_ms) and model_call spans (tokens per call; cached input
+    tokens are priced at the provider's cached rate)
+  - phase state files for packs without telemetry (model_info/last_error)
+  - run_prompt_packs.py updates the model after every pack
+
+  python scripts/model_router.py learn --telemetry state/telemetry.ndjson --state state/phase1.state.json
+  python scripts/model_router.py route getal-en-bewerkingen n2 delen-met-rest --phase 1
+  python scripts/model_router.py show
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_ROUTER_FILE = os.path.join("state", "model_router.json")
+
+# USD per 1M tokens (input, cached input, output)
+MODEL_PRICES: Dict[str, Tuple[float, float, float]] = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+}
+UNKNOWN_PRICE = (2.50, 1.25, 10.00)
+
+# Used until tokens/latency have been observed for a model
+DEFAULT_PROMPT_TOKENS = 3000
+DEFAULT_COMPLETION_TOKENS = 8000
+DEFAULT_CALL_SECONDS = 60.0
+
+# Shrinkage weight (in calls) towards the parent context; prior success rate
+PRIOR_CALLS = 8
+PRIOR_SUCCESS = 0.5
+# Below this many observed blocks for the candidates, keep the legacy route
+MIN_HISTORY_BLOCKS = 5
+
+DEFAULT_TIME_WEIGHT = 0.0005   # $ per second of wall-clock (~1.80 $/h)
+DEFAULT_FAIL_PENALTY = 0.50    # $ for a pack that still fails (rerun + attention)
+
+
+@dataclasses.dataclass
+class Route:
+    """Models in order with the number of calls each may use"""
+    steps: List[Tuple[str, int]]
+    explored: bool = False
+    expected_cost: float = 0.0
+    expected_seconds: float = 0.0
+    p_fail: float = 0.0
+    reason: str = ""
+
+    def describe(self) -> str:
+        steps = ", ".join(f"{m}x{c}" for m, c in self.steps)
+        tail = " (explore)" if self.explored else ""
+        return f"{steps} ~${self.expected_cost:.3f} ~{self.expected_seconds:.0f}s p_fail={self.p_fail:.2f}{tail}"
+
+
+def _ctx(phase: int, model: str, domain: str = "", level: str = "", topic: str = "") -> str:
+    return "|".join([str(phase), model, domain, level, topic])
+
+
+def _empty() -> Dict[str, float]:
+    return {"blocks": 0, "ok": 0, "calls": 0, "dur_ms": 0.0,
+            "token_calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+
+
+def call_cost(model: str, prompt_tokens: float, cached_tokens: float, completion_tokens: float) -> float:
+    """$ for one call; cached_tokens is the part of prompt_tokens read from the provider cache"""
+    price_in, price_cached, price_out = MODEL_PRICES.get(model, UNKNOWN_PRICE)
+    cached_tokens = min(cached_tokens, prompt_tokens)
+    return ((prompt_tokens - cached_tokens) * price_in + cached_tokens * price_cached
+            + completion_tokens * price_out) / 1_000_000
+
+
+class ModelRouter:
+    """Per-context outcome statistics and the route optimiser"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_ROUTER_FILE, explore: float = 0.1,
+                 time_weight: float = DEFAULT_TIME_WEIGHT, fail_penalty: float = DEFAULT_FAIL_PENALTY,
+                 seed: Optional[int] = None):
+        self.path = path
+        self.explore = explore
+        self.time_weight = time_weight
+        self.fail_penalty = fail_penalty
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self.routed = 0
+        self.explored = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.stats = json.load(f).get("stats", {})
+            except (OSError, ValueError):
+                self.stats = {}
+
+    # ----------------------------
+    # Observations
+    # ----------------------------
+
+    def observe(self, phase: int, model: str, domain: str, level: str, topic: str,
+                ok: bool, calls: int, dur_ms: float = 0.0) -> None:
+        """One model block of one pack: `calls` calls, ending in a pass (ok) or not"""
+        if calls <= 0:
+            return
+        with self._lock:
+            s = self.stats.setdefault(_ctx(phase, model, domain, level, topic), _empty())
+            s["blocks"] += 1
+            s["ok"] += 1 if ok else 0
+            s["calls"] += calls
+            s["dur_ms"] += dur_ms
+
+    def observe_tokens(self, phase: int, model: str, domain: str, level: str, topic: str,
+                       calls: int, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> None:
+        with self._lock:
+            s = self.stats.setdefault(_ctx(phase, model, domain, level, topic), _empty())
+            s["token_calls"] += calls
+            s["prompt_tokens"] += prompt_tokens
+            s["cached_tokens"] = s.get("cached_tokens", 0) + cached_tokens
+            s["completion_tokens"] += completion_tokens
+
+    def learn_from_telemetry(self, records: Iterable[Dict[str, Any]]) -> set:
+        """Returns the pack names (prompt file basenames) that were covered"""
+        tokens: Dict[Tuple[str, str, str], List[int]] = defaultdict(lambda: [0, 0, 0, 0])
+        results: List[Tuple[Tuple[str, str], Dict[str, Any], int]] = []
+        for rec in records:
+            attrs = rec.get("attrs") or {}
+            where = (rec.get("run", ""), rec.get("pack", ""))
+            if rec.get("name") == "model_call" and isinstance(attrs.get("completion_tokens"), int):
+                t = tokens[where + (attrs.get("model", ""),)]
+                t[0] += 1
+                t[1] += attrs.get("prompt_tokens") or 0
+                t[2] += attrs["completion_tokens"]
+                t[3] += attrs.get("cached_tokens") or 0
+            elif rec.get("name") == "model_result":
+                results.append((where, attrs, int(rec.get("phase") or attrs.get("phase") or 1)))
+
+        covered = set()
+        contexts: Dict[Tuple[str, str, str], Tuple] = {}
+        for where, a, phase in results:
+            self.observe(phase, a.get("model", ""), a.get("domain", ""), a.get("level", ""), a.get("topic", ""),
+                         bool(a.get("ok")), int(a.get("calls") or 0), float(a.get("dur_ms") or 0.0))
+            contexts[where + (a.get("model", ""),)] = (phase, a.get("domain", ""), a.get("level", ""), a.get("topic", ""))
+            covered.add(where[1])
+        for key, (n, p_tok, c_tok, cached) in tokens.items():
+            if key in contexts:
+                phase, domain, level, topic = contexts[key]
+                self.observe_tokens(phase, key[2], domain, level, topic, n, p_tok, c_tok, cached)
+        return covered
+
+    def learn_from_state(self, state: Dict[str, Dict[str, Any]], phase: int, models: List[str],
+                         max_repairs: int, skip_packs: set) -> int:
+        """
+        Reconstruct model blocks from PackState entries: "... after repair r
+        (model=X)" means X passed on call r+1 and every model before X used
+        all of its calls; a failed pack failed on every model.
+        """
+        learned = 0
+        calls_per_block = (1 + max_repairs) if phase == 1 else max_repairs
+        for entry in state.values():
+            out_file = (entry.get("out_file") or "").replace("\\", "/").split("/")
+            name = os.path.basename((entry.get("prompt_path") or "").replace("\\", "/"))
+            if name in skip_packs or "topics" not in out_file or entry.get("status") not in ("ok", "fail"):
+                continue
+            t = out_file.index("topics")
+            domain, level, topic = out_file[t - 3], out_file[t - 1], out_file[t + 1]
+
+            info = entry.get("model_info") or ""
+            m = re.search(r"model=([^)\s]+)\)", info)
+            if entry["status"] == "ok" and not m:
+                continue  # passed without a model call (e.g. phase 2 gates already ok)
+            winner = m.group(1) if m else None
+            r = re.search(r"after (?:repair|rewrite) (\d+)", info)
+            winning_calls = (int(r.group(1)) + (1 if phase == 1 else 0)) if r else 1
+            for model in models:
+                if model == winner:
+                    self.observe(phase, model, domain, level, topic, True, winning_calls)
+                    break
+                self.observe(phase, model, domain, level, topic, False, calls_per_block)
+            learned += 1
+        return learned
+
+    # ----------------------------
+    # Estimates
+    # ----------------------------
+
+    def _pooled(self, prefix: str) -> Dict[str, float]:
+        total = _empty()
+        for key, s in self.stats.items():
+            if key.startswith(prefix):
+                for k in total:
+                    total[k] += s.get(k, 0)
+        return total
+
+    def estimate(self, phase: int, model: str, domain: str, level: str, topic: str) -> Dict[str, float]:
+        """Shrunk per-call success (with Beta parameters), seconds and $ per call"""
+        with self._lock:
+            levels = [
+                self._pooled(f"{phase}|{model}|"),
+                self._pooled(f"{phase}|{model}|{domain}|{level}|"),
+                self.stats.get(_ctx(phase, model, domain, level, topic), _empty()),
+            ]
+        q = PRIOR_SUCCESS
+        alpha, beta = q * PRIOR_CALLS, (1 - q) * PRIOR_CALLS
+        for s in levels:
+            alpha = s["ok"] + q * PRIOR_CALLS
+            beta = (s["calls"] - s["ok"]) + (1 - q) * PRIOR_CALLS
+            q = alpha / (alpha + beta)
+
+        seconds = DEFAULT_CALL_SECONDS
+        prompt_tokens, completion_tokens = DEFAULT_PROMPT_TOKENS, DEFAULT_COMPLETION_TOKENS
+        cached_tokens = 0.0
+        # most specific level with data wins
+        for s in levels:
+            if s["calls"] and s["dur_ms"]:
+                seconds = s["dur_ms"] / 1000.0 / s["calls"]
+            if s["token_calls"]:
+                prompt_tokens = s["prompt_tokens"] / s["token_calls"]
+                cached_tokens = s.get("cached_tokens", 0) / s["token_calls"]
+                completion_tokens = s["completion_tokens"] / s["token_calls"]
+        return {
+            "q": q,
+            "alpha": alpha,
+            "beta": beta,
+            "seconds": seconds,
+            "cost": call_cost(model, prompt_tokens, cached_tokens, completion_tokens),
+            "cached_share": cached_tokens / prompt_tokens if prompt_tokens else 0.0,
+            "history": levels[0]["blocks"],
+        }
+
+    # ----------------------------
+    # Routing
+    # ----------------------------
+
+    def _evaluate(self, steps: List[Tuple[str, int]], est: Dict[str, Dict[str, float]],
+                  q: Dict[str, float]) -> Tuple[float, float, float, float]:
+        """(objective, expected $, expected s, P(fail)) of one route"""
+        reach = 1.0
+        cost = seconds = 0.0
+        for model, calls in steps:
+            e, miss = est[model], 1.0 - q[model]
+            # expected number of calls used: sum_{j<calls} miss^j
+            used = sum(miss ** j for j in range(calls))
+            cost += reach * used * e["cost"]
+            seconds += reach * used * e["seconds"]
+            reach *= miss ** calls
+        objective = cost + self.time_weight * seconds + self.fail_penalty * reach
+        return objective, cost, seconds, reach
+
+    def route(self, phase: int, models: List[str], max_calls: int,
+              domain: str, level: str, topic: str) -> Route:
+        """
+        Args:
+            models: Candidate models in legacy order (primary, fallback, ...)
+            max_calls: Most calls one model may get (phase 1: 1 + max_repairs)
+        """
+        legacy = Route(steps=[(m, max_calls) for m in models], reason="legacy (too little history)")
+        est = {m: self.estimate(phase, m, domain, level, topic) for m in models}
+        if sum(e["history"] for e in est.values()) < MIN_HISTORY_BLOCKS or max_calls <= 0:
+            return legacy
+
+        with self._lock:
+            self.routed += 1
+            explore = self.explored < self.explore * self.routed
+            if explore:
+                self.explored += 1
+                q = {m: self._rng.betavariate(e["alpha"], e["beta"]) for m, e in est.items()}
+            else:
+                q = {m: e["q"] for m, e in est.items()}
+
+        best: Optional[Tuple[float, List[Tuple[str, int]], Tuple]] = None
+        for order in itertools.permutations(models):
+            for budget in itertools.product(range(max_calls + 1), repeat=len(order)):
+                if not any(budget):
+                    continue
+                steps = [(m, c) for m, c in zip(order, budget) if c > 0]
+                scored = self._evaluate(steps, est, q)
+                if best is None or scored[0] < best[0] - 1e-12:
+                    best = (scored[0], steps, scored)
+
+        _, steps, (_, cost, seconds, p_fail) = best
+        return Route(steps=steps, explored=explore, expected_cost=cost, expected_seconds=seconds,
+                     p_fail=p_fail, reason="thompson draw" if explore else "expected value")
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            payload = {"version": 1, "stats": self.stats}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="History-based model router for run_prompt_packs.py")
+    ap.add_argument("--router", default=DEFAULT_ROUTER_FILE, help=f"Model file (default: {DEFAULT_ROUTER_FILE})")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    lp = sub.add_parser("learn", help="Rebuild the statistics from telemetry and phase state files")
+    lp.add_argument("--telemetry", default=None)
+    lp.add_argument("--state", action="append", default=[], help="Phase state file (repeatable, phase from its content)")
+    lp.add_argument("--models", default="gpt-4o-mini,gpt-4o", help="Model order used by those runs")
+    lp.add_argument("--max-repairs", type=int, default=3, help="--max-repairs used by those runs")
+
+    rp = sub.add_parser("route", help="Show the route for one pack")
+    rp.add_argument("domain")
+    rp.add_argument("level")
+    rp.add_argument("topic")
+    rp.add_argument("--phase", type=int, choices=[1, 2], default=1)
+    rp.add_argument("--models", default="gpt-4o-mini,gpt-4o")
+    rp.add_argument("--max-repairs", type=int, default=3)
+
+    sub.add_parser("show", help="Print per-context statistics")
+
+    args = ap.parse_args()
+    router = ModelRouter(args.router, explore=0.0)
+
+    if args.cmd == "learn":
+        router.stats = {}
+        covered: set = set()
+        if args.telemetry and os.path.exists(args.telemetry):
+            from run_telemetry import read_records
+            covered = router.learn_from_telemetry(read_records(args.telemetry))
+        n_state = 0
+        for path in args.state:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            phases = {e.get("phase", 1) for e in state.values()}
+            for phase in phases:
+                n_state += router.learn_from_state({k: v for k, v in state.items() if v.get("phase", 1) == phase},
+                                                   phase, args.models.split(","), args.max_repairs, covered)
+        router.save()
+        print(f"Learned from telemetry ({len(covered)} pack(s)) and {n_state} state entr(y/ies) -> {args.router}")
+        return 0
+
+    if args.cmd == "route":
+        models = args.models.split(",")
+        max_calls = (1 + args.max_repairs) if args.phase == 1 else args.max_repairs
+        for m in models:
+            e = router.estimate(args.phase, m, args.domain, args.level, args.topic)
+            print(f"  {m:14} q={e['q']:.2f} {e['seconds']:.0f}s/call ${e['cost']:.4f}/call "
+                  f"(cached {e['cached_share']:.0%}) ({e['history']} block(s))")
+        r = router.route(args.phase, models, max_calls, args.domain, args.level, args.topic)
+        print(f"route: {r.describe()} [{r.reason}]")
+        return 0
+
+    for key, s in sorted(router.stats.items()):
+        rate = s["ok"] / s["calls"] if s["calls"] else 0.0
+        print(f"  {key:70} blocks={s['blocks']:<4} ok={s['ok']:<4} calls={s['calls']:<4} per-call={rate:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,21 @@
 param(
-  [Parameter(Mandatory=$true)]
-  [string]$PromptFile
+  [string]$PromptFile,
+  [switch]$All
 )
 
 $env:PYTHONIOENCODING = "utf-8"
 
+if ($All) {
+  # One interpreter for every pack; writes state/preflight.report.json
+  py -3.13 tools/new/preflight_prompt_checks.py --all
+  exit $LASTEXITCODE
+}
+
+if (-not $PromptFile) {
+  Write-Host "❌ Pass -PromptFile <path> or -All"
+  exit 2
+}
+
 if (!(Test-Path $PromptFile)) {
   Write-Host "❌ Prompt file not found: $PromptFile"
   exit 2
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+prompt_assembly.py — cache-friendly message layout for run_prompt_packs.py
+
+Providers cache the longest byte-identical prefix of a request (OpenAI:
+automatically from 1024 tokens, billed at the cached input price; Anthropic:
+up to a block marked with cache_control). So every request is laid out
+stable-first:
+
+  system  = generator instructions
+            + prompts/contracts/prompt-contract-nl.md
+            + prompts/contracts/overrides-<level>.md (if present)
+            + ExerciseSchema.json (minified)
+            -> identical for every pack and repair of a level
+  user    = pack prompt (identical across the repairs/rewrites of one pack)
+            + variable tail (chunk window, validator issues, output snippet)
+
+The shared prefix is opt-in (shared_prefix=True, run_prompt_packs.py
+--shared-prefix): contract + schema add ~2.2k input tokens to every request,
+which only pays off where the provider actually serves them from cache. By
+default the system message is the generator instructions alone.
+
+The prefix is marked for caching: OpenAI gets a prompt_cache_key (hash of
+the prefix) so requests land on the same cache shard, Anthropic requests get
+cache_control on the system block.
+
+usage_tokens() reads prompt / cached / completion tokens from either
+provider's usage object, for telemetry and the cost model in model_router.py.
+
+  python scripts/prompt_assembly.py show --level n2     (prefix size + hash per level)
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import hashlib
+import json
+import os
+import sys
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+CONTRACT_PATH = os.path.join("prompts", "contracts", "prompt-contract-nl.md")
+OVERRIDES_PATTERN = os.path.join("prompts", "contracts", "overrides-{level}.md")
+SCHEMA_PATH = os.path.join("content", "nl-NL", "_shared", "schemas", "ExerciseSchema.json")
+
+SYSTEM_INSTRUCTIONS = (
+    "You are a strict exercise generator.\n"
+    "Return ONLY the JSON array the user asks for.\n"
+    "No markdown. No explanations. No extra wrapper keys.\n"
+    "All required fields must be present and correctly placed.\n"
+)
+
+# Between pack prompt and variable tail; part of neither, so both stay byte-stable
+TAIL_SEPARATOR = "\n\n"
+
+
+@dataclasses.dataclass
+class AssembledPrompt:
+    """One request: cacheable system prefix + user message (stable head, variable tail)"""
+    system: str
+    user: str
+    cache_key: str
+
+    def openai_messages(self) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": self.user},
+        ]
+
+    def openai_kwargs(self) -> Dict[str, Any]:
+        """Extra create() arguments; extra_body keeps older SDKs working"""
+        if not self.cache_key:
+            return {}
+        return {"extra_body": {"prompt_cache_key": self.cache_key}}
+
+    def anthropic_request(self) -> Dict[str, Any]:
+        """system/messages for the Messages API with the prefix marked for caching"""
+        system: Dict[str, Any] = {"type": "text", "text": self.system}
+        if self.cache_key:
+            system["cache_control"] = {"type": "ephemeral"}
+        return {"system": [system], "messages": [{"role": "user", "content": self.user}]}
+
+
+class PromptAssembler:
+    """Builds (and memoises) the per-level shared prefix"""
+
+    def __init__(self, root: str = ".", shared_prefix: bool = False):
+        """
+        Args:
+            root: Repo root the contract/schema paths are relative to
+            shared_prefix: True = send contract, level overrides and schema
+                as cached system prefix; False = only the generator
+                instructions as system message
+        """
+        self.root = root
+        self.shared_prefix = shared_prefix
+        self._prefixes: Dict[str, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def _read(self, rel: str) -> str:
+        path = os.path.join(self.root, rel)
+        if not os.path.exists(path):
+            return ""
+        with open(path, "r", encoding="utf-8-sig") as f:
+            # normalise line endings: a checkout with CRLF must not change the prefix bytes
+            return f.read().replace("\r\n", "\n").strip()
+
+    def _schema_excerpt(self) -> str:
+        raw = self._read(SCHEMA_PATH)
+        if not raw:
+            return ""
+        try:
+            return json.dumps(json.loads(raw), ensure_ascii=False, separators=(",", ":"))
+        except ValueError:
+            return raw
+
+    def prefix(self, level: str = "") -> Tuple[str, str]:
+        """(system text, cache key) for a level; the key is empty without shared prefix"""
+        if not self.shared_prefix:
+            return SYSTEM_INSTRUCTIONS, ""
+        with self._lock:
+            cached = self._prefixes.get(level)
+            if cached is not None:
+                return cached
+
+            sections = [SYSTEM_INSTRUCTIONS.strip()]
+            contract = self._read(CONTRACT_PATH)
+            if contract:
+                sections.append("BINDING PROMPT CONTRACT:\n" + contract)
+            overrides = self._read(OVERRIDES_PATTERN.format(level=level)) if level else ""
+            if overrides:
+                sections.append(f"LEVEL OVERRIDES ({level}):\n" + overrides)
+            schema = self._schema_excerpt()
+            if schema:
+                sections.append("EXERCISE SCHEMA (JSON Schema for the output array):\n" + schema)
+            text = "\n\n".join(sections) + "\n"
+
+            key = "packs-" + hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+            self._prefixes[level] = (text, key)
+            return text, key
+
+    def assemble(self, prompt_text: str, level: str = "", tail: str = "") -> AssembledPrompt:
+        """
+        Args:
+            prompt_text: Pack prompt (or any user text that starts with it)
+            level: Pack level (selects the override section of the prefix)
+            tail: Variable instructions that follow the pack prompt
+        """
+        system, key = self.prefix(level)
+        user = prompt_text + (TAIL_SEPARATOR + tail.strip() if tail else "")
+        return AssembledPrompt(system=system, user=user, cache_key=key)
+
+
+def usage_tokens(usage: Any) -> Dict[str, Optional[int]]:
+    """
+    prompt_tokens (all input), cached_tokens (input read from cache) and
+    completion_tokens from an OpenAI or Anthropic usage object (or dict).
+    """
+    def get(obj: Any, name: str) -> Any:
+        if obj is None:
+            return None
+        if isinstance(obj, dict):
+            return obj.get(name)
+        return getattr(obj, name, None)
+
+    if get(usage, "input_tokens") is not None and get(usage, "prompt_tokens") is None:
+        # Anthropic: input_tokens excludes cache reads/writes
+        cached = get(usage, "cache_read_input_tokens") or 0
+        written = get(usage, "cache_creation_input_tokens") or 0
+        return {
+            "prompt_tokens": get(usage, "input_tokens") + cached + written,
+            "cached_tokens": cached,
+            "completion_tokens": get(usage, "output_tokens"),
+        }
+    details = get(usage, "prompt_tokens_details")
+    cached = get(details, "cached_tokens")
+    return {
+        "prompt_tokens": get(usage, "prompt_tokens"),
+        "cached_tokens": cached if isinstance(cached, int) else (0 if details is not None else None),
+        "completion_tokens": get(usage, "completion_tokens"),
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Inspect the shared prompt prefix")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sp = sub.add_parser("show", help="Prefix size and cache key per level")
+    sp.add_argument("--level", action="append", default=[], help="Level (repeatable; default n1..n4)")
+    sp.add_argument("--print", action="store_true", help="Print the prefix text as well")
+
+    args = ap.parse_args()
+    assembler = PromptAssembler(shared_prefix=True)
+    for level in args.level or ["n1", "n2", "n3", "n4"]:
+        text, key = assembler.prefix(level)
+        print(f"{level}: {len(text.encode('utf-8'))} bytes, ~{len(text) // 4} tokens, key={key}")
+        if args.print:
+            print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -27,11 +27,23 @@ Usage:
         --to data-v2/exercises/gb/ \\
         --dry-run
 
+    # Atomic publish: parallel validation, staged generation, one switch
+    python3 scripts/publish-approved.py \\
+        --from data-v2-draft/exercises/gb/ \\
+        --to data-v2/exercises/gb/ \\
+        --atomic --jobs 8
+
+    # Roll back to the previous generation
+    python3 scripts/publish-approved.py --to data-v2/exercises/ --rollback
+
 Features:
-- Validates exercises before publishing
+- Validates exercises before publishing (results cached by content hash,
+  so unchanged files are not revalidated; disable with --no-cache)
 - Creates backups of existing files
 - Updates index.json automatically
 - Generates publish report
+- Atomic mode (--atomic): generation-based publish with O(1) rollback,
+  index.json patched incrementally (see publish_transaction.py)
 - Safe defaults (won't overwrite without confirmation)
 """
 
@@ -49,16 +61,25 @@ import hashlib
 try:
     sys.path.insert(0, str(Path(__file__).parent))
     from comprehensive_validation import ExerciseValidator
+    from validation_cache import ValidationCache
     HAS_VALIDATOR = True
 except ImportError:
     HAS_VALIDATOR = False
     print("⚠️  Validator not available. Use --skip-validation to proceed anyway.")
 
+# Generation-based publishing (--atomic, --rollback) and the publish gate
+try:
+    from publish_transaction import PublishTransaction, evaluate_result, rollback
+    HAS_TRANSACTION = True
+except ImportError:
+    HAS_TRANSACTION = False
+
 
 class PublishManager:
     """Manages publishing exercises from draft to production"""
 
-    def __init__(self, validate: bool = True, backup: bool = True, dry_run: bool = False):
+    def __init__(self, validate: bool = True, backup: bool = True, dry_run: bool = False,
+                 use_cache: bool = True, cache_file: str = None):
         """
         Initialize publish manager
 
@@ -66,11 +87,14 @@ class PublishManager:
             validate: Run validation before publishing
             backup: Create backups of existing files
             dry_run: Preview changes without actually moving files
+            use_cache: Reuse validation results of unchanged files
+            cache_file: Optional validation cache path
         """
         self.validate = validate
         self.backup = backup
         self.dry_run = dry_run
-        self.validator = ExerciseValidator() if validate and HAS_VALIDATOR else None
+        self.cache = ValidationCache(cache_file) if validate and use_cache and HAS_VALIDATOR else None
+        self.validator = ExerciseValidator(cache=self.cache) if validate and HAS_VALIDATOR else None
 
         # Stats
         self.published_count = 0
@@ -107,13 +131,9 @@ class PublishManager:
 
                 result = self.validator.validate_file(str(source), support_path)
 
-                if not result.passed:
-                    critical_count = result.critical_count()
-                    error_count = result.error_count()
-                    return False, f"Validation failed: {critical_count} critical, {error_count} errors (quality: {result.quality_score:.1f}%)"
-
-                if result.quality_score < 60:
-                    return False, f"Quality score too low: {result.quality_score:.1f}% (minimum: 60%)"
+                ok, message = evaluate_result(result)
+                if not ok:
+                    return False, message
 
         # Create destination directory if needed
         if not self.dry_run:
@@ -209,6 +229,71 @@ class PublishManager:
         self.results.extend(results)
         return results
 
+    def publish_directory_atomic(self, source_dir: str, dest_dir: str, pattern: str = "*_core.json",
+                                 workers: int = None, keep_generations: int = 5,
+                                 require_all: bool = False) -> List[Dict]:
+        """
+        Publish all matching files from a directory as one transaction
+
+        Candidates are validated in parallel, staged as a new generation of the
+        production tree (hardlinks for unchanged files) and switched live at once.
+
+        Args:
+            source_dir: Source directory
+            dest_dir: Destination directory
+            pattern: File pattern to match
+            workers: Validation processes (default: CPU count)
+            keep_generations: Old generations kept for rollback
+            require_all: Publish nothing if any file fails
+
+        Returns:
+            List of results
+        """
+        source_path = Path(source_dir)
+
+        if not source_path.exists():
+            print(f"❌ Source directory not found: {source_dir}")
+            return []
+
+        core_files = sorted(source_path.glob(pattern))
+
+        if not core_files:
+            print(f"⚠️  No files matching {pattern} found in {source_dir}")
+            return []
+
+        print(f"\n📁 Found {len(core_files)} files to publish (atomic)")
+        print(f"   Source: {source_dir}")
+        print(f"   Destination: {dest_dir}")
+
+        if self.dry_run:
+            print("\n🔍 DRY RUN MODE - No files will be moved\n")
+
+        transaction = PublishTransaction(
+            dest_dir,
+            validate=self.validate and self.validator is not None,
+            cache=self.cache,
+            workers=workers,
+            keep_generations=keep_generations,
+            require_all=require_all,
+            dry_run=self.dry_run
+        )
+        results = transaction.run(core_files)
+
+        for result in results:
+            print(f"\n📄 {result['file']}")
+            if result['success']:
+                print(f"   ✅ {result['message']}")
+                if result['message'].startswith("Published"):
+                    self.published_count += 1
+                else:
+                    self.skipped_count += 1
+            else:
+                print(f"   ❌ {result['message']}")
+                self.failed_count += 1
+
+        self.results.extend(results)
+        return results
+
     def _create_backup(self, file_path: Path) -> Path:
         """
         Create backup of existing file
@@ -332,9 +417,11 @@ def update_index(exercises_dir: str = "data-v2/exercises"):
         'exercises': sorted(exercises, key=lambda x: (x['category'], x['grade'] or 0, x['id']))
     }
 
-    # Write index
-    with open(index_path, 'w', encoding='utf-8') as f:
+    # Write index (replace, never rewrite in place: generations share inodes)
+    tmp_path = index_path.with_name(index_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
         json.dump(index_data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, index_path)
 
     print(f"   ✅ Index updated with {len(exercises)} exercises")
     print(f"   📄 {index_path}")
@@ -360,16 +447,48 @@ def main():
     parser.add_argument('--update-index', action='store_true',
                        help='Update index.json after publishing')
     parser.add_argument('--report', help='Save report to file')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Revalidate every file instead of reusing cached results')
+    parser.add_argument('--cache-file',
+                       help='Validation cache path (default: .cache/validation-cache.json)')
+
+    # Atomic publishing
+    parser.add_argument('--atomic', action='store_true',
+                       help='Publish directory as one transaction (staged generation + atomic switch)')
+    parser.add_argument('--jobs', type=int, default=None,
+                       help='Parallel validation processes for --atomic (default: CPU count)')
+    parser.add_argument('--keep-generations', type=int, default=5,
+                       help='Old generations kept for rollback (default: 5)')
+    parser.add_argument('--require-all', action='store_true',
+                       help='With --atomic: publish nothing if any file fails validation')
+    parser.add_argument('--rollback', nargs='?', const='', metavar='GENERATION',
+                       help='Switch --to back to the previous (or given) generation and exit')
 
     args = parser.parse_args()
 
+    if (args.rollback is not None or args.atomic) and not HAS_TRANSACTION:
+        print("❌ publish_transaction.py not available; --atomic and --rollback need it")
+        return 1
+
+    if args.rollback is not None:
+        if not args.to_dir:
+            print("❌ --to directory is required when using --rollback")
+            return 1
+        try:
+            generation = rollback(args.to_dir, args.rollback or None)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+        print(f"⏪ Rolled back {args.to_dir} to generation {generation}")
+        return 0
+
     # Validation
     if args.skip_validation:
         validate = False
     else:
         validate = args.validate
 
-    if validate and not HAS_VALIDATOR:
+    if validate and not (HAS_VALIDATOR and HAS_TRANSACTION):
         print("❌ Validator not available but --validate was requested")
         print("   Install dependencies: pip install textstat")
         print("   Or use --skip-validation (not recommended)")
@@ -379,7 +498,9 @@ def main():
     manager = PublishManager(
         validate=validate,
         backup=not args.no_backup,
-        dry_run=args.dry_run
+        dry_run=args.dry_run,
+        use_cache=not args.no_cache,
+        cache_file=args.cache_file
     )
 
     print("=" * 80)
@@ -395,6 +516,8 @@ def main():
 
         dest_path = Path(args.to_dir) / Path(args.file).name
         success, message = manager.publish_file(args.file, str(dest_path))
+        if manager.cache:
+            manager.cache.save()
 
         if success:
             print(f"✅ {message}")
@@ -404,12 +527,24 @@ def main():
 
     elif args.from_dir and args.to_dir:
         # Directory
-        manager.publish_directory(args.from_dir, args.to_dir)
+        if args.atomic:
+            manager.publish_directory_atomic(
+                args.from_dir, args.to_dir,
+                workers=args.jobs,
+                keep_generations=args.keep_generations,
+                require_all=args.require_all
+            )
+        else:
+            manager.publish_directory(args.from_dir, args.to_dir)
 
     else:
         parser.print_help()
         return 1
 
+    # Persist validation results (also in dry-run: they only depend on file content)
+    if manager.cache:
+        manager.cache.save()
+
     # Print summary
     print("\n" + "=" * 80)
     print("SUMMARY")
@@ -419,12 +554,14 @@ def main():
         print(f"Failed:    {manager.failed_count} files ❌")
     if manager.backed_up_count > 0:
         print(f"Backed up: {manager.backed_up_count} files 📦")
+    if manager.cache:
+        print(manager.cache.stats_line())
     if args.dry_run:
         print("\n🔍 DRY RUN - No changes were made")
     print("=" * 80)
 
-    # Update index if requested
-    if args.update_index and not args.dry_run:
+    # Update index if requested (atomic mode already patched it)
+    if args.update_index and not args.dry_run and not args.atomic:
         update_index(args.to_dir)
 
     # Generate report
@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Publish Transaction
+===================
+
+Atomic, generation-based publishing for publish-approved.py (--atomic).
+
+A transaction:
+- validates all candidate core files in parallel (process pool, with the
+  shared validation cache so unchanged files are not revalidated)
+- stages a complete new generation of the production tree, hardlinking every
+  file that does not change and copying only new/changed files
+- patches index.json in the staged tree from the metadata of the published
+  core files only (no rescan of production)
+- refreshes the staged Merkle manifest (corpus_merkle.py) and records the
+  item-level change counts in history.json
+- switches production with one atomic symlink replace
+
+Layout (production root = parent of --to if it holds index.json, else --to):
+
+    data-v2/exercises                 -> symlink to the live generation
+    data-v2/.generations/exercises/
+        20261019-101500-3fa2/         full tree of one generation
+        history.json                  ordered generations + current
+
+Rolling back repoints the symlink to the generation that was live before
+the current one, which is O(1). history.json keeps those ids as a stack
+("previous"), so publish(bad) -> rollback -> publish(new) -> rollback lands
+on the last good generation, not on the bad one.
+
+The first atomic publish converts a real production directory into a
+generation (one rename + symlink). Where symlinks are unavailable (e.g.
+Windows without developer mode) generations are swapped with two renames;
+that fallback is NOT atomic: between the two renames production does not
+exist, and a crash there leaves it missing (restore it by renaming the
+generation named in history.json "current" back into place).
+
+Because generations share inodes, never rewrite a production file in place;
+write a temp file and os.replace() it (build-index.py and update_index do).
+"""
+
+import json
+import os
+import secrets
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from comprehensive_validation import ExerciseValidator, ValidationResult
+from corpus_merkle import compute_manifest, diff_trees, load_manifest, summarize
+from validation_cache import ValidationCache, sha256_file
+
+# Minimum quality score a core file needs to be published
+MIN_QUALITY_SCORE = 60
+
+HISTORY_FILE = "history.json"
+
+
+def evaluate_result(result: ValidationResult) -> Tuple[bool, str]:
+    """
+    Decide whether a validation result allows publishing
+
+    Returns:
+        (ok, message) - message explains a rejection
+    """
+    if not result.passed:
+        return False, (f"Validation failed: {result.critical_count()} critical, "
+                       f"{result.error_count()} errors (quality: {result.quality_score:.1f}%)")
+
+    if result.quality_score < MIN_QUALITY_SCORE:
+        return False, f"Quality score too low: {result.quality_score:.1f}% (minimum: {MIN_QUALITY_SCORE}%)"
+
+    return True, f"Validated (quality: {result.quality_score:.1f}%)"
+
+
+def _validate_worker(core_path: str, support_path: Optional[str], strict_mode: bool) -> Dict:
+    """Process-pool entry point: validate one pair without cache"""
+    validator = ExerciseValidator(strict_mode=strict_mode)
+    return validator.validate_file(core_path, support_path).to_dict()
+
+
+def find_production_root(dest_dir: str) -> Path:
+    """
+    Directory that is switched as a whole
+
+    data-v2/exercises/gb publishes into data-v2/exercises (which holds the
+    site index.json); a directory without an indexed parent is its own root.
+    """
+    dest = Path(os.path.abspath(dest_dir))
+    if (dest.parent / "index.json").exists():
+        return dest.parent
+    return dest
+
+
+def _hardlink_tree(src: Path, dst: Path) -> int:
+    """Recreate src under dst using hardlinks (copy when linking is impossible)"""
+    linked = 0
+    for dirpath, dirnames, filenames in os.walk(src):
+        rel = Path(dirpath).relative_to(src)
+        target_dir = dst / rel
+        target_dir.mkdir(parents=True, exist_ok=True)
+        for name in filenames:
+            source_file = Path(dirpath) / name
+            target_file = target_dir / name
+            try:
+                os.link(source_file, target_file)
+            except OSError:
+                shutil.copy2(source_file, target_file)
+            linked += 1
+    return linked
+
+
+def build_index_entry(core_data: Dict, rel_path: str) -> Dict:
+    """Index entry fields derived from a core file (same shape as update_index)"""
+    metadata = core_data.get('metadata', {})
+    category = rel_path.split('/')[0] if '/' in rel_path else 'unknown'
+    return {
+        'id': metadata.get('id', Path(rel_path).stem.replace('_core', '')),
+        'category': metadata.get('category', category),
+        'type': metadata.get('type', 'multiple_choice'),
+        'title': core_data.get('display', {}).get('title', ''),
+        'grade': metadata.get('grade'),
+        'level': metadata.get('level', ''),
+        'difficulty': metadata.get('difficulty', 'medium'),
+        'paths': {
+            'core': rel_path,
+            'support': rel_path.replace('_core.json', '_support.json')
+        }
+    }
+
+
+def patch_index(index_path: Path, entries: List[Dict], removed: List[str] = ()) -> int:
+    """
+    Merge entries into index.json, matching on paths.core
+
+    Entries whose paths.core is in `removed` are dropped (deleted core files).
+
+    Fields not produced by build_index_entry (stats, features, ...) are kept.
+    The file is replaced atomically so hardlinked generations stay intact.
+
+    Returns:
+        Number of entries added, updated or removed
+    """
+    if index_path.exists():
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index_data = json.load(f)
+    else:
+        index_data = {'schema_version': '2.0.0', 'exercises': []}
+
+    by_core = {e.get('paths', {}).get('core'): e for e in index_data.get('exercises', [])}
+    for entry in entries:
+        core = entry['paths']['core']
+        by_core[core] = {**by_core.get(core, {}), **entry}
+    for core in removed:
+        by_core.pop(core, None)
+
+    exercises = sorted(by_core.values(),
+                       key=lambda x: (x.get('category', ''), x.get('grade') or 0, str(x.get('id', ''))))
+    index_data['generated_at'] = datetime.now().isoformat()
+    index_data['total_exercises'] = len(exercises)
+    index_data['exercises'] = exercises
+
+    tmp_path = index_path.with_name(index_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index_data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, index_path)
+    return len(entries) + len(removed)
+
+
+class GenerationStore:
+    """Generations of one production root and the pointer to the live one"""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.generations_dir = root.parent / ".generations" / root.name
+        self.history_path = self.generations_dir / HISTORY_FILE
+        self.history = self._load_history()
+
+    def _load_history(self) -> Dict:
+        if self.history_path.exists():
+            with open(self.history_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {'current': None, 'mode': None, 'previous': [], 'generations': []}
+
+    def _save_history(self):
+        self.generations_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.history_path.with_name(HISTORY_FILE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.history, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.history_path)
+
+    def live_dir(self) -> Path:
+        """Directory currently served as production"""
+        return Path(os.path.realpath(self.root))
+
+    def path_of(self, gen_id: str) -> Path:
+        return self.generations_dir / gen_id
+
+    def new_id(self) -> str:
+        return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(2)}"
+
+    def _symlink_swap(self, target: Path) -> bool:
+        """Atomically point root at target. Returns False if symlinks are unsupported."""
+        tmp_link = self.root.with_name(f".{self.root.name}.swap-{os.getpid()}")
+        try:
+            os.symlink(os.path.relpath(target, self.root.parent), tmp_link, target_is_directory=True)
+        except (OSError, NotImplementedError):
+            return False
+
+        if self.root.exists() and not self.root.is_symlink():
+            # One-time migration: the real directory becomes a generation
+            os.rename(self.root, self.path_of(self._record_migrated()))
+        os.replace(tmp_link, self.root)
+        return True
+
+    def _rename_swap(self, target: Path, previous_id: Optional[str]):
+        """Fallback switch: move the live tree aside and the target into place (not atomic)"""
+        if self.root.exists():
+            os.rename(self.root, self.path_of(previous_id or self._record_migrated()))
+        os.rename(target, self.root)
+
+    def _record_migrated(self) -> str:
+        """Register the pre-existing production tree as the oldest generation (and as live)"""
+        initial_id = self.new_id()
+        self.history['generations'].insert(0, {
+            'id': initial_id,
+            'created_at': datetime.now().isoformat(),
+            'note': 'initial tree (migrated)',
+        })
+        self.history['current'] = initial_id
+        return initial_id
+
+    def activate(self, gen_id: str, rollback: bool = False):
+        """
+        Make gen_id the live generation
+
+        The generation that was live is pushed onto history["previous"]; a
+        rollback pops it again instead.
+        """
+        mode = self.history.get('mode')
+
+        if mode != 'rename' and self._symlink_swap(self.path_of(gen_id)):
+            self.history['mode'] = 'symlink'
+        else:
+            self.history['mode'] = 'rename'
+            self._rename_swap(self.path_of(gen_id), self.history.get('current'))
+
+        # read after the swap: a migrated production tree was just registered as current
+        previous_id = self.history.get('current')
+        stack = self.history.setdefault('previous', [])
+        if rollback:
+            if stack and stack[-1] == gen_id:
+                stack.pop()
+        elif previous_id and previous_id != gen_id:
+            stack.append(previous_id)
+
+        self.history['current'] = gen_id
+        self._save_history()
+
+    def add(self, gen_id: str, info: Dict):
+        self.history['generations'].append({'id': gen_id, 'created_at': datetime.now().isoformat(), **info})
+
+    def previous_id(self) -> Optional[str]:
+        """Generation that was live before the current one"""
+        stack = self.history.get('previous')
+        if stack is not None:
+            return stack[-1] if stack else None
+        # history.json written before "previous" was recorded: history order
+        ids = [g['id'] for g in self.history['generations']]
+        current = self.history.get('current')
+        if current not in ids:
+            return ids[-1] if ids else None
+        pos = ids.index(current)
+        return ids[pos - 1] if pos > 0 else None
+
+    def prune(self, keep: int):
+        """Delete the oldest generations, never the live one"""
+        gens = self.history['generations']
+        current = self.history.get('current')
+        removable = [g for g in gens if g['id'] != current]
+        for g in removable[:max(0, len(removable) - keep)]:
+            shutil.rmtree(self.path_of(g['id']), ignore_errors=True)
+            gens.remove(g)
+        kept = {g['id'] for g in gens}
+        if 'previous' in self.history:
+            self.history['previous'] = [i for i in self.history['previous'] if i in kept]
+        self._save_history()
+
+
+class PublishTransaction:
+    """Validate, stage and atomically switch a set of core/support files"""
+
+    def __init__(self, dest_dir: str, validate: bool = True, strict_mode: bool = False,
+                 cache: ValidationCache = None, workers: int = None,
+                 keep_generations: int = 5, require_all: bool = False, dry_run: bool = False):
+        """
+        Args:
+            dest_dir: Destination directory (e.g. data-v2/exercises/gb)
+            validate: Validate core files before staging
+            strict_mode: Validator strict mode
+            cache: Optional validation cache (consulted before the process pool)
+            workers: Process pool size (default: os.cpu_count())
+            keep_generations: Old generations kept for rollback
+            require_all: Abort the whole transaction if any candidate fails
+            dry_run: Validate and plan only
+        """
+        self.dest_dir = Path(os.path.abspath(dest_dir))
+        self.root = find_production_root(dest_dir)
+        self.store = GenerationStore(self.root)
+        self.validate = validate
+        self.strict_mode = strict_mode
+        self.cache = cache
+        self.workers = workers
+        self.keep_generations = keep_generations
+        self.require_all = require_all
+        self.dry_run = dry_run
+
+        self.results: List[Dict] = []
+
+    def _validate_all(self, pairs: List[Tuple[Path, Optional[Path]]]) -> Dict[Path, ValidationResult]:
+        """Validate all pairs: cache hits inline, misses in a process pool"""
+        results: Dict[Path, ValidationResult] = {}
+        pending = []
+        ruleset = ExerciseValidator(strict_mode=self.strict_mode).ruleset_version()
+
+        for core, support in pairs:
+            support_str = str(support) if support else None
+            if self.cache:
+                key = self.cache.make_key(str(core), support_str, ruleset, self.strict_mode)
+                cached = self.cache.get(key)
+                if cached is not None:
+                    result = ValidationResult.from_dict(cached)
+                    result.file_path = str(core)
+                    results[core] = result
+                    continue
+            else:
+                key = None
+            pending.append((core, support_str, key))
+
+        if pending:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = [(core, key, pool.submit(_validate_worker, str(core), support, self.strict_mode))
+                           for core, support, key in pending]
+                for core, key, future in futures:
+                    result_dict = future.result()
+                    if self.cache and key:
+                        self.cache.put(key, result_dict)
+                    results[core] = ValidationResult.from_dict(result_dict)
+
+        return results
+
+    def run(self, core_files: List[Path]) -> List[Dict]:
+        """
+        Publish core files (and their support files) in one generation
+
+        Returns:
+            Per-file result dicts (file, source, destination, success, message)
+        """
+        pairs = []
+        for core in core_files:
+            support = core.parent / core.name.replace('_core.json', '_support.json')
+            pairs.append((core, support if support.exists() else None))
+
+        validation = self._validate_all(pairs) if self.validate else {}
+
+        live = self.store.live_dir()
+        rel_dest = self.dest_dir.relative_to(self.root)
+
+        accepted = []
+        for core, support in pairs:
+            dest_file = self.root / rel_dest / core.name
+            ok, message = True, "Ready"
+            if core in validation:
+                ok, message = evaluate_result(validation[core])
+
+            files = [core] + ([support] if support else [])
+            changed = [f for f in files
+                       if not (live / rel_dest / f.name).exists()
+                       or sha256_file(str(f)) != sha256_file(str(live / rel_dest / f.name))]
+
+            if ok and not changed:
+                message = "Unchanged (already in production)"
+            self.results.append({
+                'file': core.name,
+                'source': str(core),
+                'destination': str(dest_file),
+                'success': ok,
+                'message': message,
+            })
+            if ok and changed:
+                accepted.append((core, changed))
+
+        failed = [r for r in self.results if not r['success']]
+        if self.require_all and failed:
+            for r in self.results:
+                if r['success']:
+                    r['success'] = False
+                    r['message'] = "Aborted: other files in the transaction failed"
+            return self.results
+
+        if self.dry_run or not accepted:
+            return self.results
+
+        gen_id = self.store.new_id()
+        stage = self.store.generations_dir / f".staging-{gen_id}"
+        self.store.generations_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            if live.exists():
+                _hardlink_tree(live, stage)
+            (stage / rel_dest).mkdir(parents=True, exist_ok=True)
+
+            staged_cores = []
+            for core, changed in accepted:
+                for f in changed:
+                    target = stage / rel_dest / f.name
+                    if target.exists():
+                        # Break the hardlink instead of writing through it
+                        target.unlink()
+                    shutil.copy2(f, target)
+                with open(core, 'r', encoding='utf-8') as fh:
+                    staged_cores.append((core, json.load(fh)))
+
+            # Patch the site index and, if present, the per-category index
+            for index_dir in {Path(), rel_dest}:
+                index_path = stage / index_dir / "index.json"
+                if index_path.exists():
+                    patch_index(index_path, [
+                        build_index_entry(data, (rel_dest / core.name).relative_to(index_dir).as_posix())
+                        for core, data in staged_cores
+                    ])
+
+            # Item-level manifest: hardlinked files are reused, only copies are hashed
+            changes = None
+            if (stage / "index.json").exists():
+                manifest, _ = compute_manifest(stage)
+                if live.exists() and load_manifest(live):
+                    changes = summarize(diff_trees(live, stage, new=manifest))
+
+            os.rename(stage, self.store.path_of(gen_id))
+        except Exception:
+            shutil.rmtree(stage, ignore_errors=True)
+            raise
+
+        info = {'published': [c.name for c, _ in accepted]}
+        if changes is not None:
+            info['changes'] = changes
+        self.store.add(gen_id, info)
+        self.store.activate(gen_id)
+        self.store.prune(self.keep_generations)
+
+        published = {c.name for c, _ in accepted}
+        for r in self.results:
+            if r['file'] in published:
+                r['message'] = f"Published to {r['destination']} (generation {gen_id})"
+        return self.results
+
+
+def rollback(dest_dir: str, to_generation: str = None) -> str:
+    """
+    Point production back at the previous (or given) generation
+
+    Returns:
+        The generation id that is now live
+    """
+    store = GenerationStore(find_production_root(dest_dir))
+    target = to_generation or store.previous_id()
+    if not target or not store.path_of(target).exists():
+        raise ValueError("No earlier generation available to roll back to")
+    store.activate(target, rollback=not to_generation)
+    return target
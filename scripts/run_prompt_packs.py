@@ -28,13 +28,47 @@ Resumable:
   - State file tracks per-pack status per phase.
   - --resume continues; --force reruns.
 
+Telemetry:
+  - Per-pack spans (model calls with tokens/attempt, JSON parse, validation,
+    gates, state writes) are appended to state/telemetry.ndjson.
+  - Inspect with scripts/run_telemetry.py (summary p50/p95, Chrome trace export).
+
+Token budget:
+  - max_tokens per pack is planned from learned tokens/item per domain/topic
+    (scripts/token_budget.py, state/token_budget.json).
+  - Packs that do not fit one completion are generated as parallel chunks of
+    k items, merged with in-pack dedupe (+ top-up) before validation.
+  - --no-token-plan restores one completion with the global --max-tokens.
+
+Model routing:
+  - Per pack, scripts/model_router.py picks the model order and calls per
+    model from learned success rate, latency and cost per
+    (phase, model, domain, level, topic) (state/model_router.json), with an
+    exploration budget (--explore). Too little history -> legacy order.
+  - --no-router always tries --model with all repairs, then --fallback.
+
+Prompt caching:
+  - Requests are laid out stable-first (scripts/prompt_assembly.py): system =
+    instructions, user = pack prompt, then the per-attempt tail (chunk
+    window, repair/rewrite issues); model_call spans record prompt_tokens
+    and cached_tokens.
+  - --shared-prefix also sends prompt contract + level overrides + schema in
+    the system message (identical for every pack of a level, marked for the
+    provider's prompt cache). Costs ~2.2k input tokens per request, so only
+    worth it where those are read from cache.
+
+Preflight:
+  - `py -3.13 tools/new/preflight_prompt_checks.py --all` writes state/preflight.report.json.
+  - --preflight-report skips packs whose (unchanged) prompt was rejected there.
+
 Defaults:
   - Primary model:  gpt-4o-mini
   - Fallback model: gpt-4o
 
 Requires:
-  - OPENAI_API_KEY set
-  - tools/new/validate_one_exercises_file.py
+  - OPENAI_API_KEY set (not needed with --model-base-url, e.g. the offline
+    scripts/fake_model_server.py)
+  - tools/new/validate_one_exercises_file.py (imported in-process, needs jsonschema)
   - tools/new/quality_pack_checks.py (optional but recommended)
   - tools/new/hard_duplicate_gate.py (optional)
 """
@@ -43,16 +77,24 @@ from __future__ import annotations
 
 import argparse
 import dataclasses
+import hashlib
 import json
 import os
 import random
 import re
 import subprocess
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional, Tuple
 
-from openai import OpenAI
+from run_telemetry import Telemetry
+from lazy_cli import LazyClient, module_available
+from model_client import make_client, needs_api_key
+from model_router import DEFAULT_ROUTER_FILE, ModelRouter, Route
+from prompt_assembly import TAIL_SEPARATOR, PromptAssembler, usage_tokens
+from token_budget import DEFAULT_BUDGET_FILE, Plan, TokenBudget
 
 # ----------------------------
 # Repo paths
@@ -64,6 +106,7 @@ CONTENT_ROOT = os.path.join("content", "nl-NL")
 SCHEMA_PATH = os.path.join("content", "nl-NL", "_shared", "schemas", "ExerciseSchema.json")
 TASKFORMS_PATH = os.path.join("docs", "new", "taskvormen-canon.json")
 
+VALIDATOR_DIR = os.path.join("tools", "new")
 QUALITY_SCRIPT = os.path.join("tools", "new", "quality_pack_checks.py")
 
 DUP_SCRIPT = os.path.join("tools", "new", "hard_duplicate_gate.py")
@@ -74,8 +117,33 @@ STAGING_ROOT = os.path.join("staging", "nl-NL")
 STATE_DIR = "state"
 DEFAULT_STATE_PHASE1 = os.path.join(STATE_DIR, "phase1.state.json")
 DEFAULT_STATE_PHASE2 = os.path.join(STATE_DIR, "phase2.state.json")
+DEFAULT_TELEMETRY = os.path.join(STATE_DIR, "telemetry.ndjson")
+PREFLIGHT_REPORT = os.path.join(STATE_DIR, "preflight.report.json")
+
+# Built on the first model call, so --help, dry runs and phase-2 runs without
+# repairs never import the SDK; __main__ swaps in one with --model-base-url
+client = LazyClient(lambda: make_client("openai"))
+
+# Replaced in __main__ when telemetry is enabled; a disabled instance is a no-op
+TELEMETRY = Telemetry(None)
+
+# Replaced in __main__ unless --no-token-plan; None = one completion per request
+BUDGET: Optional[TokenBudget] = None
+CHUNK_WORKERS = 4
+# Extra rounds for items lost to chunk failures or in-pack dedupe
+MAX_TOPUP_ROUNDS = 2
 
-client = OpenAI()
+# Replaced in __main__ with --shared-prefix (contract + schema as cached system prefix)
+ASSEMBLER = PromptAssembler()
+
+# Replaced in __main__ unless --no-router; None = primary then fallback, full budget each
+ROUTER: Optional[ModelRouter] = None
+
+# Usage of the live model calls per model since its block started:
+# [calls, prompt, completion, cached]; chunk workers add to it concurrently,
+# record_model_result hands it to the router's cost model
+_BLOCK_TOKENS: Dict[str, List[int]] = {}
+_BLOCK_TOKENS_LOCK = threading.Lock()
 
 # Robustly remove JSON fences
 _JSON_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE | re.MULTILINE)
@@ -124,6 +192,29 @@ def find_prompt_packs() -> List[str]:
     return sorted(paths)
 
 
+def load_preflight_report(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Packs section of a report written by
+    `tools/new/preflight_prompt_checks.py --all`, keyed by repo-relative path.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    return report.get("packs", {})
+
+
+def preflight_failure(report: Dict[str, Dict[str, Any]], prompt_path: str, prompt_text: str) -> Optional[str]:
+    """
+    Failing rule codes when the report rejected this exact prompt text, else None.
+    Entries for an edited prompt (different sha256) are ignored.
+    """
+    entry = report.get(_norm_slashes(os.path.relpath(os.path.abspath(prompt_path))))
+    if not entry or entry.get("verdict") != "fail":
+        return None
+    if entry.get("sha256") != hashlib.sha256(prompt_text.encode("utf-8")).hexdigest():
+        return None
+    return ", ".join(e.get("code", "?") for e in entry.get("fails", [])) or "preflight"
+
+
 def extract_meta(prompt_text: str) -> Tuple[str, int, str, str]:
     """
     Extract domain/grade/level/topic from a prompt pack.
@@ -219,43 +310,97 @@ def clean_json_array(raw: str) -> List[Any]:
     return data
 
 
-def call_model(prompt_text: str, model: str, max_tokens: int, temperature: float) -> str:
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are a strict exercise generator.\n"
-                    "Return ONLY the JSON array the user asks for.\n"
-                    "No markdown. No explanations. No extra wrapper keys.\n"
-                    "All required fields must be present and correctly placed.\n"
-                ),
-            },
-            {"role": "user", "content": prompt_text},
-        ],
-        max_tokens=max_tokens,
-        temperature=temperature,
-    )
-    return resp.choices[0].message.content or ""
+def call_model(
+    prompt_text: str,
+    model: str,
+    max_tokens: int,
+    temperature: float,
+    attempt: int = 1,
+    info: Optional[Dict[str, Any]] = None,
+    chunk: Optional[int] = None,
+    level: str = "",
+) -> str:
+    """
+    One chat completion: shared contract/schema prefix of `level` as system
+    message, prompt_text as user message. `info`, if given, receives
+    completion_tokens and finish_reason (for the token budget).
+    """
+    attrs: Dict[str, Any] = {"model": model, "attempt": attempt, "max_tokens": max_tokens}
+    if chunk is not None:
+        attrs["chunk"] = chunk
+    prompt = ASSEMBLER.assemble(prompt_text, level)
+    with TELEMETRY.span("model_call", **attrs) as span:
+        resp = client.chat.completions.create(
+            model=model,
+            messages=prompt.openai_messages(),
+            max_tokens=max_tokens,
+            temperature=temperature,
+            **prompt.openai_kwargs(),
+        )
+        usage = getattr(resp, "usage", None)
+        if usage is not None:
+            tokens = usage_tokens(usage)
+            span.update(tokens)
+            _add_block_tokens(model, tokens)
+        span["prefix"] = prompt.cache_key
+        span["finish_reason"] = resp.choices[0].finish_reason
+        if info is not None:
+            info["completion_tokens"] = span.get("completion_tokens")
+            info["finish_reason"] = span["finish_reason"]
+        return resp.choices[0].message.content or ""
 
 
 # ----------------------------
 # Validation + external checks
 # ----------------------------
 
+# tools/new/validate_one_exercises_file imported on first use; False when jsonschema is missing here
+_VALIDATE_ONE: Any = None
+
+
+def _validate_one_module() -> Any:
+    global _VALIDATE_ONE
+    if _VALIDATE_ONE is None:
+        if not (module_available("jsonschema") and module_available("referencing")):
+            _VALIDATE_ONE = False
+        else:
+            sys.path.insert(0, os.path.abspath(VALIDATOR_DIR))
+            import validate_one_exercises_file
+            _VALIDATE_ONE = validate_one_exercises_file
+    return _VALIDATE_ONE or None
+
+
 def validate_exercises_file(path: str) -> Tuple[bool, str]:
+    """
+    Schema + taskForm validation of one exercises.json. Runs in-process against
+    the canon registry (schema/canon compiled once per run, see
+    tools/new/validators/canon_registry.py), so each repair attempt only pays
+    for the validation itself; falls back to the validator subprocess when
+    jsonschema is not importable from this interpreter.
+    """
+    mod = _validate_one_module()
+    if mod is not None:
+        with TELEMETRY.span("validate", mode="inprocess") as span:
+            try:
+                code, lines = mod.validate_file(path, mod.load_registry(SCHEMA_PATH, TASKFORMS_PATH))
+            except Exception as e:
+                code, lines = 2, [f"ERROR: cannot load schema: {SCHEMA_PATH}\n  {e}"]
+            span["returncode"] = code
+        return code == 0, "\n".join(lines).strip()
+
     cmd = [
         "py",
         "-3.13",
-        "tools/new/validate_one_exercises_file.py",
+        os.path.join(VALIDATOR_DIR, "validate_one_exercises_file.py"),
         path,
         "--schema",
         SCHEMA_PATH,
         "--taskforms",
         TASKFORMS_PATH,
     ]
-    proc = subprocess.run(cmd, capture_output=True, text=True)
+    with TELEMETRY.span("validate", mode="subprocess") as span:
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        span["returncode"] = proc.returncode
     ok = (proc.returncode == 0)
     out = (proc.stdout or "") + (proc.stderr or "")
     return ok, out.strip()
@@ -271,7 +416,9 @@ def run_quality_checks_for_pack(content_root: str, out_file: str) -> Tuple[bool,
         return True, []
 
     cmd = ["py", "-3.13", QUALITY_SCRIPT, "--content-root", content_root]
-    proc = subprocess.run(cmd, capture_output=True, text=True)
+    with TELEMETRY.span("quality_gate") as span:
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        span["returncode"] = proc.returncode
     out = (proc.stdout or "") + (proc.stderr or "")
 
     target = _norm_slashes(out_file)
@@ -304,7 +451,9 @@ def run_duplicate_gate_for_pack(content_root: str, out_file: str) -> Tuple[bool,
         "--overrides",
         DUP_OVERRIDES,
     ]
-    proc = subprocess.run(cmd, capture_output=True, text=True)
+    with TELEMETRY.span("duplicate_gate") as span:
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        span["returncode"] = proc.returncode
     out = (proc.stdout or "") + (proc.stderr or "")
 
     rel: List[str] = []
@@ -331,17 +480,18 @@ def run_duplicate_gate_for_pack(content_root: str, out_file: str) -> Tuple[bool,
 # ----------------------------
 
 def build_phase1_repair_prompt(original_prompt: str, issues: str, last_output_snippet: str, required_count: int) -> str:
+    """
+    Pack prompt first, verbatim (shared, cacheable prefix across attempts),
+    then the repair instructions that change per attempt.
+    """
     snippet = (last_output_snippet or "").strip()
     if len(snippet) > 2500:
         snippet = snippet[:2500] + "\n...<truncated>..."
 
-    return f"""
-You previously generated an INVALID exercise JSON array.
-
-ORIGINAL PROMPT PACK (do not change requirements):
-----------------
-{original_prompt}
-----------------
+    tail = f"""
+REPAIR REQUEST:
+You previously generated an INVALID exercise JSON array for the prompt pack above
+(do not change its requirements).
 
 VALIDATION ISSUES (must be fixed):
 ----------------
@@ -361,6 +511,7 @@ YOUR TASK:
 
 GENERATE NOW.
 """.strip()
+    return original_prompt + TAIL_SEPARATOR + tail
 
 
 def build_phase2_rewrite_prompt(
@@ -369,19 +520,17 @@ def build_phase2_rewrite_prompt(
     issues: str,
     required_count: int,
 ) -> str:
+    """Pack prompt first, verbatim; the per-rewrite issues and anchor follow it"""
     # keep small snippet of the current JSON to anchor structure without bloating tokens
     snippet_obj = current_json[:2] if isinstance(current_json, list) else []
     snippet = json.dumps(snippet_obj, ensure_ascii=False, indent=2)
     if len(snippet) > 2500:
         snippet = snippet[:2500] + "\n...<truncated>..."
 
-    return f"""
-You are improving an already-VALID exercises.json pack.
-
-ORIGINAL PROMPT PACK (requirements are binding):
-----------------
-{original_prompt}
-----------------
+    tail = f"""
+REWRITE REQUEST:
+You are improving an already-VALID exercises.json pack for the prompt pack above
+(its requirements are binding).
 
 CURRENT PROBLEMS TO FIX (quality/duplicates):
 ----------------
@@ -405,23 +554,213 @@ HARD RULES (do not violate):
 
 REWRITE NOW.
 """.strip()
+    return original_prompt + TAIL_SEPARATOR + tail
 
 
 # ----------------------------
 # Core generation + write
 # ----------------------------
 
-def try_generate_and_write_json(prompt_text: str, out_path: str, model: str, max_tokens: int, temperature: float, required_count: int) -> Tuple[List[Any], str]:
-    raw = call_model(prompt_text, model=model, max_tokens=max_tokens, temperature=temperature)
-    data = clean_json_array(raw)
+def _item_fingerprint(item: Any) -> str:
+    """In-pack duplicate key: normalised prompt text + solution"""
+    if not isinstance(item, dict):
+        return json.dumps(item, sort_keys=True, ensure_ascii=False)
+    prompt = item.get("prompt") or item.get("question") or ""
+    if isinstance(prompt, dict):
+        prompt = prompt.get("text", "")
+    text = re.sub(r"\s+", " ", str(prompt)).strip().lower()
+    return text + "|" + json.dumps(item.get("solution"), sort_keys=True, ensure_ascii=False)
+
+
+_ID_NUM_RE = re.compile(r"^(.*?)(\d+)$")
+
+
+def merge_chunks(parts: List[List[Any]]) -> List[Any]:
+    """
+    Concatenate chunk outputs, drop in-pack duplicates, and renumber ids of
+    the form PREFIX-### so chunks that reused numbers stay unique.
+    """
+    merged: List[Any] = []
+    seen = set()
+    for part in parts:
+        for item in part:
+            fp = _item_fingerprint(item)
+            if fp in seen:
+                continue
+            seen.add(fp)
+            merged.append(item)
+
+    ids = [it.get("id") for it in merged if isinstance(it, dict)]
+    matches = [_ID_NUM_RE.match(i) if isinstance(i, str) else None for i in ids]
+    if ids and len(ids) == len(merged) and all(matches) and len({m.group(1) for m in matches}) == 1:
+        prefix = matches[0].group(1)
+        width = max(len(m.group(2)) for m in matches)
+        for n, item in enumerate(merged, 1):
+            item["id"] = f"{prefix}{n:0{width}d}"
+    return merged
+
+
+def _chunk_prompt(prompt_text: str, part: str, first: int, size: int, total: int,
+                  avoid: Optional[List[str]] = None) -> str:
+    last = first + size - 1
+    lines = [
+        "",
+        "",
+        "CHUNK (overrides the total count above):",
+        f"- This request is {part} of one pack of {total} exercises.",
+        f"- Output ONLY exercises {first:03d} to {last:03d}: EXACTLY {size} exercises, ids numbered {first:03d}-{last:03d}.",
+        "- Keep the mix of taskForms / prompt forms of the full pack, in proportion.",
+        f"- Output MUST be ONE JSON ARRAY of EXACTLY {size} exercises. No markdown.",
+    ]
+    if avoid:
+        lines.append("- These prompts already exist in the pack; do NOT repeat them:")
+        lines.extend(f"  * {a[:100]}" for a in avoid[:40])
+    return prompt_text + "\n".join(lines)
+
+
+def _generate_chunk(prompt_text: str, model: str, max_tokens: int, temperature: float,
+                    attempt: int, chunk: int, level: str = "") -> Tuple[List[Any], str, Dict[str, Any]]:
+    info: Dict[str, Any] = {}
+    raw = call_model(prompt_text, model=model, max_tokens=max_tokens, temperature=temperature,
+                     attempt=attempt, info=info, chunk=chunk, level=level)
+    with TELEMETRY.span("json_parse", chars=len(raw), chunk=chunk) as span:
+        data = clean_json_array(raw)
+        span["items"] = len(data)
+    return data, raw, info
+
+
+def generate_chunked(prompt_text: str, model: str, plan: Plan, temperature: float,
+                     attempt: int, domain: str, topic: str, level: str = "") -> Tuple[List[Any], str]:
+    """
+    Generate plan.chunks in parallel, merge with dedupe, then top up missing
+    items (bounded). Failed chunks count as missing items.
+    """
+    parts: List[List[Any]] = []
+    raws: List[str] = []
+    merged: List[Any] = []
+    sizes = list(plan.chunks)
+    chunk_no = 0
+
+    with TELEMETRY.span("chunked_generation", model=model, chunks=len(sizes), count=plan.count) as span:
+        for round_no in range(MAX_TOPUP_ROUNDS + 1):
+            jobs = []
+            if round_no == 0:
+                first, avoid = 1, None
+            else:
+                # ids continue after what we have; merge_chunks renumbers anyway
+                first = len(merged) + 1
+                avoid = [str(it.get("prompt", "")) for it in merged if isinstance(it, dict)]
+            for n, size in enumerate(sizes, 1):
+                chunk_no += 1
+                label = f"part {n} of {len(sizes)}" if round_no == 0 else f"top-up part {n} of {len(sizes)}"
+                jobs.append((chunk_no, _chunk_prompt(prompt_text, label, first, size, plan.count, avoid)))
+                first += size
+
+            with ThreadPoolExecutor(max_workers=max(1, min(CHUNK_WORKERS, len(jobs)))) as pool:
+                futures = [pool.submit(_generate_chunk, text, model, plan.max_tokens, temperature, attempt, no, level)
+                           for no, text in jobs]
+                for fut in futures:
+                    try:
+                        data, raw, info = fut.result()
+                    except Exception as e:
+                        raws.append(f"<chunk failed: {e}>")
+                        continue
+                    parts.append(data)
+                    raws.append(raw)
+                    if BUDGET is not None and info.get("finish_reason") == "stop":
+                        BUDGET.record(domain, topic, info.get("completion_tokens") or 0, len(data))
+
+            merged = merge_chunks(parts)
+            missing = plan.count - len(merged)
+            if missing <= 0:
+                break
+            # top-up round: the missing items, split like the plan
+            per_chunk = max(plan.chunks)
+            sizes = [min(per_chunk, missing - i) for i in range(0, missing, per_chunk)]
+
+        span["items"] = len(merged)
+        span["rounds"] = round_no + 1
+
+    return merge_chunks(parts)[:plan.count], "\n".join(raws)
+
+
+def try_generate_and_write_json(
+    prompt_text: str,
+    out_path: str,
+    model: str,
+    max_tokens: int,
+    temperature: float,
+    required_count: int,
+    attempt: int = 1,
+    plan: Optional[Plan] = None,
+    domain: str = "",
+    topic: str = "",
+    level: str = "",
+) -> Tuple[List[Any], str]:
+    if plan is not None and plan.chunked:
+        data, raw = generate_chunked(prompt_text, model, plan, temperature, attempt, domain, topic, level)
+    else:
+        info: Dict[str, Any] = {}
+        tokens = plan.max_tokens if plan is not None else max_tokens
+        raw = call_model(prompt_text, model=model, max_tokens=tokens, temperature=temperature,
+                         attempt=attempt, info=info, level=level)
+        with TELEMETRY.span("json_parse", chars=len(raw)) as span:
+            data = clean_json_array(raw)
+            span["items"] = len(data)
+        if BUDGET is not None and info.get("finish_reason") == "stop":
+            BUDGET.record(domain, topic, info.get("completion_tokens") or 0, len(data))
 
     if len(data) != required_count:
         raise ValueError(f"Wrong item count: got {len(data)}, expected {required_count}")
 
-    _atomic_write_json(out_path, data)
+    with TELEMETRY.span("write_output"):
+        _atomic_write_json(out_path, data)
     return data, raw
 
 
+# ----------------------------
+# Model routing
+# ----------------------------
+
+def route_steps(route: Optional[Route], models: List[str], calls_per_model: int) -> List[Tuple[str, int]]:
+    """(model, calls) in order; without a route every model gets the full budget"""
+    if route is not None:
+        return route.steps
+    return [(m, calls_per_model) for m in models]
+
+
+def _add_block_tokens(model: str, tokens: Dict[str, Optional[int]]) -> None:
+    with _BLOCK_TOKENS_LOCK:
+        t = _BLOCK_TOKENS.setdefault(model, [0, 0, 0, 0])
+        t[0] += 1
+        t[1] += tokens.get("prompt_tokens") or 0
+        t[2] += tokens.get("completion_tokens") or 0
+        t[3] += tokens.get("cached_tokens") or 0
+
+
+def _take_block_tokens(model: Optional[str] = None) -> List[int]:
+    """Usage collected for `model` (and reset it); None resets all models"""
+    with _BLOCK_TOKENS_LOCK:
+        if model is None:
+            _BLOCK_TOKENS.clear()
+            return [0, 0, 0, 0]
+        return _BLOCK_TOKENS.pop(model, [0, 0, 0, 0])
+
+
+def record_model_result(phase: int, model: str, ok: bool, calls: int, started: float,
+                        domain: str, level: str, topic: str) -> None:
+    """One model block of a pack, for the router (telemetry + live statistics incl. token usage)"""
+    dur_ms = round((time.perf_counter() - started) * 1000.0, 1)
+    TELEMETRY.event("model_result", phase=phase, model=model, ok=ok, calls=calls, dur_ms=dur_ms,
+                    domain=domain, level=level, topic=topic)
+    token_calls, prompt_tokens, completion_tokens, cached_tokens = _take_block_tokens(model)
+    if ROUTER is not None:
+        ROUTER.observe(phase, model, domain, level, topic, ok, calls, dur_ms)
+        if token_calls:
+            ROUTER.observe_tokens(phase, model, domain, level, topic, token_calls,
+                                  prompt_tokens, completion_tokens, cached_tokens)
+
+
 # ----------------------------
 # Phase 1: validity gate
 # ----------------------------
@@ -439,16 +778,21 @@ def run_phase1_for_pack(
     max_tokens: int,
     temperature: float,
     max_repairs: int,
+    plan: Optional[Plan] = None,
+    route: Optional[Route] = None,
 ) -> Tuple[bool, str]:
     out_content = output_path(domain, grade, level, topic)
     out_staging = staging_raw_path(domain, grade, level, topic)
 
-    models = [model_primary, model_fallback]
+    steps = route_steps(route, [model_primary, model_fallback], 1 + max_repairs)
     last_issue = ""
     last_raw = ""
+    attempt = 0
 
-    for model in models:
+    for model, calls in steps:
+        block_started = time.perf_counter()
         # 1) initial attempt
+        attempt += 1
         try:
             data, raw = try_generate_and_write_json(
                 prompt_text=prompt_text,
@@ -457,6 +801,11 @@ def run_phase1_for_pack(
                 max_tokens=max_tokens,
                 temperature=temperature,
                 required_count=required_count,
+                attempt=attempt,
+                plan=plan,
+                domain=domain,
+                topic=topic,
+                level=level,
             )
             last_raw = raw
 
@@ -464,6 +813,7 @@ def run_phase1_for_pack(
             if ok:
                 # promote to content
                 _atomic_write_json(out_content, data)
+                record_model_result(1, model, True, 1, block_started, domain, level, topic)
                 return True, f"PHASE1 OK (model={model}) -> promoted to {out_content}"
             last_issue = "VALIDATION FAIL:\n" + msg
 
@@ -475,13 +825,14 @@ def run_phase1_for_pack(
         issues = last_issue or "Unknown issue"
         snippet = last_raw or ""
 
-        for r in range(max_repairs):
+        for r in range(calls - 1):
             repair_prompt = build_phase1_repair_prompt(
                 original_prompt=prompt_text,
                 issues=issues,
                 last_output_snippet=snippet,
                 required_count=required_count,
             )
+            attempt += 1
             try:
                 data, raw = try_generate_and_write_json(
                     prompt_text=repair_prompt,
@@ -490,12 +841,18 @@ def run_phase1_for_pack(
                     max_tokens=max_tokens,
                     temperature=max(0.0, temperature - 0.05),
                     required_count=required_count,
+                    attempt=attempt,
+                    plan=plan,
+                    domain=domain,
+                    topic=topic,
+                    level=level,
                 )
                 snippet = raw
 
                 ok, msg = validate_exercises_file(out_staging)
                 if ok:
                     _atomic_write_json(out_content, data)
+                    record_model_result(1, model, True, r + 2, block_started, domain, level, topic)
                     return True, f"PHASE1 OK after repair {r+1} (model={model}) -> promoted to {out_content}"
 
                 issues = "VALIDATION FAIL:\n" + msg
@@ -504,6 +861,8 @@ def run_phase1_for_pack(
                 issues = f"REPAIR FAIL: {e}"
                 snippet = ""
 
+        record_model_result(1, model, False, calls, block_started, domain, level, topic)
+
     return False, last_issue or "Phase 1 failed across models/repairs"
 
 
@@ -527,6 +886,8 @@ def run_phase2_for_pack(
     quality_warn_limit: int,
     check_duplicates: bool,
     write_quality_staging: bool,
+    plan: Optional[Plan] = None,
+    route: Optional[Route] = None,
 ) -> Tuple[bool, str]:
     out_content = output_path(domain, grade, level, topic)
     out_quality = staging_quality_path(domain, grade, level, topic)
@@ -571,10 +932,13 @@ def run_phase2_for_pack(
         return True, f"PHASE2 OK (no rewrite needed) ({gate_msg})"
 
     last_issue = gate_msg
+    attempt = 0
 
     # Rewrite loop (bounded), switching models if needed
-    for model in [model_primary, model_fallback]:
-        for r in range(max_repairs):
+    for model, calls in route_steps(route, [model_primary, model_fallback], max_repairs):
+        block_started = time.perf_counter()
+        for r in range(calls):
+            attempt += 1
             # reload content each time (because previous loop may have updated it)
             try:
                 current = json.loads(_read_text(out_content))
@@ -598,6 +962,11 @@ def run_phase2_for_pack(
                     max_tokens=max_tokens,
                     temperature=max(0.0, temperature - 0.05),
                     required_count=required_count,
+                    attempt=attempt,
+                    plan=plan,
+                    domain=domain,
+                    topic=topic,
+                    level=level,
                 )
             except Exception as e:
                 last_issue = f"PHASE2 rewrite generation failed: {e}"
@@ -617,9 +986,12 @@ def run_phase2_for_pack(
             # Re-check gates
             ok2, gate_msg2 = check_gates()
             if ok2:
+                record_model_result(2, model, True, r + 1, block_started, domain, level, topic)
                 return True, f"PHASE2 OK after rewrite {r+1} (model={model})"
             last_issue = gate_msg2
 
+        record_model_result(2, model, False, calls, block_started, domain, level, topic)
+
     return False, f"PHASE2 failed after rewrites. Last issues:\n{last_issue}"
 
 
@@ -664,9 +1036,10 @@ def load_state(state_path: str) -> Dict[str, PackState]:
 
 
 def save_state(state_path: str, state: Dict[str, PackState]) -> None:
-    os.makedirs(os.path.dirname(os.path.abspath(state_path)) or ".", exist_ok=True)
-    payload = {k: v.to_dict() for k, v in state.items()}
-    _atomic_write_json(state_path, payload)
+    with TELEMETRY.span("state_write", packs=len(state)):
+        os.makedirs(os.path.dirname(os.path.abspath(state_path)) or ".", exist_ok=True)
+        payload = {k: v.to_dict() for k, v in state.items()}
+        _atomic_write_json(state_path, payload)
 
 
 # ----------------------------
@@ -691,6 +1064,8 @@ def run(
     sleep_s: float,
     shuffle: bool,
     write_quality_staging: bool,
+    preflight_report: Optional[str] = None,
+    chunk_size: int = 0,
 ) -> None:
     prompts = selected_prompts if selected_prompts else find_prompt_packs()
     prompts = [os.path.normpath(p) for p in prompts]
@@ -701,12 +1076,20 @@ def run(
     if resume:
         print(f"[resume] Loaded {len(state)} pack(s) from {state_path}")
 
+    preflight: Dict[str, Dict[str, Any]] = {}
+    if preflight_report:
+        preflight = load_preflight_report(preflight_report)
+        print(f"[preflight] Loaded {len(preflight)} verdict(s) from {preflight_report}")
+
     print(f"PHASE {phase} — Found {len(prompts)} prompt pack(s).")
     failures: List[str] = []
 
     for i, p in enumerate(prompts, 1):
         rel = os.path.relpath(p)
         prompt_text = _read_text(p)
+        TELEMETRY.set_pack(os.path.basename(p))
+        # usage of a block that ended without a result (early return) is not carried over
+        _take_block_tokens()
 
         try:
             domain, grade, level, topic = extract_meta(prompt_text)
@@ -730,9 +1113,31 @@ def run(
             print(f"  -> SKIP (already ok in state) -> {out_content}")
             continue
 
+        rejected = preflight_failure(preflight, p, prompt_text) if preflight else None
+        if rejected:
+            # No model calls for a prompt that preflight already rejected
+            print(f"[{i}/{len(prompts)}] {rel}")
+            print(f"  -> SKIP (preflight FAIL: {rejected})")
+            failures.append(f"{rel} (preflight)")
+            TELEMETRY.event("pack_done", status="preflight_fail", domain=domain, grade=grade,
+                            level=level, topic=topic, rules=rejected)
+            continue
+
         print(f"[{i}/{len(prompts)}] {rel}")
         ps.status = "pending"
         save_state(state_path, {**state, key: ps})
+        pack_started = time.perf_counter()
+
+        plan = BUDGET.plan(domain, topic, required_count, max_tokens, chunk_size) if BUDGET else None
+        if plan is not None:
+            print(f"  -> plan: {plan.chunks} item(s) per request, max_tokens={plan.max_tokens} "
+                  f"({plan.tokens_per_item} tokens/item, {plan.source})")
+
+        route = None
+        if ROUTER is not None:
+            max_calls = (1 + max_repairs) if phase == 1 else max_repairs
+            route = ROUTER.route(phase, [model_primary, model_fallback], max_calls, domain, level, topic)
+            print(f"  -> route: {route.describe()} [{route.reason}]")
 
         try:
             if phase == 1:
@@ -749,6 +1154,8 @@ def run(
                     max_tokens=max_tokens,
                     temperature=temperature,
                     max_repairs=max_repairs,
+                    plan=plan,
+                    route=route,
                 )
             else:
                 # Phase 2: ensure we still have the exact prompt text requirements
@@ -768,6 +1175,8 @@ def run(
                     quality_warn_limit=quality_warn_limit,
                     check_duplicates=check_duplicates,
                     write_quality_staging=write_quality_staging,
+                    plan=plan,
+                    route=route,
                 )
 
             ps.attempts += 1
@@ -792,8 +1201,22 @@ def run(
             failures.append(out_content)
             print(f"  -> ERROR: {e}")
 
+        TELEMETRY.event(
+            "pack_done",
+            status=ps.status,
+            domain=domain,
+            grade=grade,
+            level=level,
+            topic=topic,
+            elapsed_s=round(time.perf_counter() - pack_started, 3),
+        )
+
         state[key] = ps
         save_state(state_path, state)
+        if BUDGET is not None:
+            BUDGET.save()
+        if ROUTER is not None:
+            ROUTER.save()
 
         if sleep_s > 0:
             time.sleep(sleep_s)
@@ -823,7 +1246,12 @@ def parse_args() -> argparse.Namespace:
     ap.add_argument("--model", default="gpt-4o-mini", help="Primary model (default: gpt-4o-mini).")
     ap.add_argument("--fallback", default="gpt-4o", help="Fallback model (default: gpt-4o).")
 
-    ap.add_argument("--max-tokens", type=int, default=14000, help="max_tokens for completion.")
+    ap.add_argument(
+        "--max-tokens",
+        type=int,
+        default=14000,
+        help="max_tokens cap per completion (the token plan stays below it; with --no-token-plan it is used as is).",
+    )
     ap.add_argument("--temperature", type=float, default=0.25, help="Sampling temperature.")
     ap.add_argument("--count", type=int, default=50, help="Required number of exercises per pack.")
     ap.add_argument("--max-repairs", type=int, default=3, help="Max targeted repair loops per model.")
@@ -850,6 +1278,56 @@ def parse_args() -> argparse.Namespace:
         help="If set, phase 2 writes rewrite output to staging/.../exercises.quality.json first, then promotes to content.",
     )
 
+    ap.add_argument(
+        "--telemetry",
+        default=DEFAULT_TELEMETRY,
+        help=f"NDJSON telemetry log (default: {DEFAULT_TELEMETRY}). Inspect with scripts/run_telemetry.py.",
+    )
+    ap.add_argument("--no-telemetry", action="store_true", help="Disable the telemetry log.")
+
+    ap.add_argument(
+        "--token-budget",
+        default=DEFAULT_BUDGET_FILE,
+        help=f"Learned tokens/item model (default: {DEFAULT_BUDGET_FILE}). Rebuild with scripts/token_budget.py learn.",
+    )
+    ap.add_argument("--no-token-plan", action="store_true", help="One completion per request with the fixed --max-tokens.")
+    ap.add_argument("--chunk-size", type=int, default=0, help="Max items per sub-request (default: from the token budget).")
+    ap.add_argument("--chunk-workers", type=int, default=4, help="Parallel sub-requests per pack (default 4).")
+
+    ap.add_argument(
+        "--router-file",
+        default=DEFAULT_ROUTER_FILE,
+        help=f"Learned per-model statistics (default: {DEFAULT_ROUTER_FILE}). Rebuild with scripts/model_router.py learn.",
+    )
+    ap.add_argument("--no-router", action="store_true", help="Always --model with all repairs, then --fallback.")
+    ap.add_argument("--explore", type=float, default=0.1, help="Share of routed packs planned with a Thompson draw (default 0.1).")
+    ap.add_argument("--time-weight", type=float, default=0.0005, help="Router: $ per second of wall-clock time.")
+    ap.add_argument("--fail-penalty", type=float, default=0.5, help="Router: $ cost of a pack that still fails.")
+
+    ap.add_argument(
+        "--model-base-url",
+        default=None,
+        help="OpenAI-compatible endpoint root, e.g. http://127.0.0.1:8808 (scripts/fake_model_server.py). "
+             "Default: $MODEL_BASE_URL, else the OpenAI API.",
+    )
+
+    ap.add_argument(
+        "--shared-prefix",
+        action="store_true",
+        help="Send the prompt contract + schema as cached system prefix (~2.2k extra input tokens per request).",
+    )
+
+    ap.add_argument(
+        "--preflight-report",
+        nargs="?",
+        const=PREFLIGHT_REPORT,
+        default=None,
+        help=(
+            "Skip packs rejected by `tools/new/preflight_prompt_checks.py --all` "
+            f"(default report: {PREFLIGHT_REPORT}). Stale verdicts for edited prompts are ignored."
+        ),
+    )
+
     return ap.parse_args()
 
 
@@ -862,6 +1340,26 @@ if __name__ == "__main__":
     else:
         state_path = DEFAULT_STATE_PHASE1 if args.phase == 1 else DEFAULT_STATE_PHASE2
 
+    if needs_api_key("openai", args.model_base_url):
+        print("❌ OPENAI_API_KEY not set (or use --model-base-url for an offline endpoint)")
+        sys.exit(1)
+    client = LazyClient(lambda: make_client("openai", url=args.model_base_url))
+
+    if not args.no_telemetry:
+        TELEMETRY = Telemetry(args.telemetry, phase=args.phase)
+        print(f"[telemetry] run {TELEMETRY.run_id} -> {args.telemetry}")
+
+    if not args.no_token_plan:
+        BUDGET = TokenBudget(args.token_budget)
+        CHUNK_WORKERS = args.chunk_workers
+
+    if args.shared_prefix:
+        ASSEMBLER = PromptAssembler(shared_prefix=True)
+
+    if not args.no_router:
+        ROUTER = ModelRouter(args.router_file, explore=args.explore,
+                             time_weight=args.time_weight, fail_penalty=args.fail_penalty)
+
     run(
         phase=args.phase,
         selected_prompts=args.prompt,
@@ -880,4 +1378,6 @@ if __name__ == "__main__":
         sleep_s=args.sleep,
         shuffle=args.shuffle,
         write_quality_staging=args.write_quality_staging,
+        preflight_report=args.preflight_report,
+        chunk_size=args.chunk_size,
     )
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+run_telemetry.py — structured spans for run_prompt_packs.py
+
+Every timed stage of a pack run (model call, JSON parse, validation, quality
+and duplicate gates, state writes) is appended as one NDJSON line:
+
+  {"type": "span", "run": "...", "phase": 1, "pack": "GB4-....txt",
+   "name": "model_call", "ts": 1760860000.123, "dur_ms": 8123.4,
+   "status": "ok", "attrs": {"model": "gpt-4o-mini", "attempt": 2,
+                             "prompt_tokens": 5120, "cached_tokens": 3072,
+                             "completion_tokens": 9800}}
+
+The log can be turned into a Chrome trace / Perfetto file (one track per
+pack) or summarised as p50/p95 per stage (with tokens and $ for model calls,
+cached input tokens at the cached price):
+
+  python scripts/run_telemetry.py summary state/telemetry.ndjson
+  python scripts/run_telemetry.py trace state/telemetry.ndjson -o state/trace.json
+  python scripts/run_telemetry.py summary state/telemetry.ndjson --run 20261019-101500
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional
+
+from model_router import call_cost
+
+
+class Telemetry:
+    """
+    Append-only span writer. With path=None every call is a cheap no-op,
+    so instrumented code never needs to check whether telemetry is enabled.
+    """
+
+    def __init__(self, path: Optional[str] = None, phase: int = 0, run_id: Optional[str] = None):
+        self.path = path
+        self.phase = phase
+        self.run_id = run_id or time.strftime("%Y%m%d-%H%M%S")
+        self.pack = ""
+        self._fh = None
+        # chunked generation writes spans from worker threads
+        self._lock = threading.Lock()
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)) or ".", exist_ok=True)
+            self._fh = open(path, "a", encoding="utf-8")
+
+    @property
+    def enabled(self) -> bool:
+        return self._fh is not None
+
+    def set_pack(self, pack: str) -> None:
+        self.pack = pack
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        if not self._fh:
+            return
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._fh.write(line)
+            self._fh.flush()
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Time a block. The yielded dict can be updated with attributes that are
+        only known at the end (token counts, verdicts).
+        """
+        start_wall = time.time()
+        start = time.perf_counter()
+        status = "ok"
+        error = ""
+        try:
+            yield attrs
+        except BaseException as e:
+            status = "error"
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if self._fh:
+                record = {
+                    "type": "span",
+                    "run": self.run_id,
+                    "phase": self.phase,
+                    "pack": self.pack,
+                    "name": name,
+                    "ts": start_wall,
+                    "dur_ms": round((time.perf_counter() - start) * 1000.0, 3),
+                    "status": status,
+                    "attrs": attrs,
+                }
+                if error:
+                    record["error"] = error[:500]
+                self._write(record)
+
+    def event(self, name: str, **attrs: Any) -> None:
+        """Instant event (no duration), e.g. a pack verdict."""
+        self._write({
+            "type": "event",
+            "run": self.run_id,
+            "phase": self.phase,
+            "pack": self.pack,
+            "name": name,
+            "ts": time.time(),
+            "attrs": attrs,
+        })
+
+    def close(self) -> None:
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+
+
+# ----------------------------
+# Reading + export
+# ----------------------------
+
+def read_records(path: str, run_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    records: List[Dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                # a killed run can leave a partial last line
+                continue
+            if run_id and rec.get("run") != run_id:
+                continue
+            records.append(rec)
+    return records
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile on a non-empty list."""
+    s = sorted(values)
+    k = max(0, min(len(s) - 1, math.ceil(pct / 100.0 * len(s)) - 1))
+    return s[k]
+
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    by_stage: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    tokens: Dict[str, Dict[str, float]] = defaultdict(
+        lambda: {"prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0})
+
+    for rec in records:
+        if rec.get("type") != "span":
+            continue
+        name = rec["name"]
+        by_stage[name].append(float(rec.get("dur_ms", 0.0)))
+        if rec.get("status") != "ok":
+            errors[name] += 1
+        attrs = rec.get("attrs") or {}
+        if isinstance(attrs.get("completion_tokens"), int):
+            t = tokens[name]
+            for k in ("prompt_tokens", "cached_tokens", "completion_tokens"):
+                if isinstance(attrs.get(k), int):
+                    t[k] += attrs[k]
+            t["cost_usd"] += call_cost(attrs.get("model", ""), attrs.get("prompt_tokens") or 0,
+                                       attrs.get("cached_tokens") or 0, attrs["completion_tokens"])
+
+    out: Dict[str, Dict[str, float]] = {}
+    for name, durs in by_stage.items():
+        out[name] = {
+            "count": len(durs),
+            "errors": errors.get(name, 0),
+            "total_s": round(sum(durs) / 1000.0, 3),
+            "p50_ms": round(percentile(durs, 50), 1),
+            "p95_ms": round(percentile(durs, 95), 1),
+            "max_ms": round(max(durs), 1),
+        }
+        if name in tokens:
+            out[name].update(tokens[name])
+            out[name]["cost_usd"] = round(out[name]["cost_usd"], 4)
+    return out
+
+
+def to_chrome_trace(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Chrome trace event format (loads in chrome://tracing and ui.perfetto.dev).
+    pid = phase, tid = pack (in order of first appearance).
+    """
+    events: List[Dict[str, Any]] = []
+    tids: Dict[str, int] = {}
+
+    for rec in records:
+        pack = rec.get("pack") or "<runner>"
+        pid = int(rec.get("phase") or 0)
+        if pack not in tids:
+            tids[pack] = len(tids) + 1
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tids[pack],
+                           "args": {"name": pack}})
+        args = dict(rec.get("attrs") or {})
+        if rec.get("error"):
+            args["error"] = rec["error"]
+
+        ev: Dict[str, Any] = {
+            "name": rec["name"],
+            "cat": rec.get("status", "event"),
+            "pid": pid,
+            "tid": tids[pack],
+            "ts": int(float(rec["ts"]) * 1_000_000),
+            "args": args,
+        }
+        if rec.get("type") == "span":
+            ev["ph"] = "X"
+            ev["dur"] = int(float(rec.get("dur_ms", 0.0)) * 1000)
+        else:
+            ev["ph"] = "i"
+            ev["s"] = "t"
+        events.append(ev)
+
+    for phase in sorted({e["pid"] for e in events}):
+        events.append({"name": "process_name", "ph": "M", "pid": phase, "tid": 0,
+                       "args": {"name": f"phase {phase}"}})
+
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def print_summary(summary: Dict[str, Dict[str, float]]) -> None:
+    print(f"{'stage':22} {'count':>6} {'err':>5} {'total_s':>9} {'p50_ms':>9} {'p95_ms':>9} {'max_ms':>9}")
+    for name, s in sorted(summary.items(), key=lambda kv: -kv[1]["total_s"]):
+        print(f"{name:22} {s['count']:>6} {s['errors']:>5} {s['total_s']:>9.1f} "
+              f"{s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['max_ms']:>9.1f}")
+        if "prompt_tokens" in s:
+            print(f"{'':22} tokens: prompt={s['prompt_tokens']} (cached {s['cached_tokens']}) "
+                  f"completion={s['completion_tokens']} ~${s['cost_usd']:.2f}")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Inspect run_prompt_packs telemetry (NDJSON).")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sp = sub.add_parser("summary", help="p50/p95 per stage")
+    sp.add_argument("log")
+    sp.add_argument("--run", default=None, help="Only this run id")
+    sp.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+
+    tp = sub.add_parser("trace", help="Export Chrome trace / Perfetto JSON")
+    tp.add_argument("log")
+    tp.add_argument("-o", "--out", required=True)
+    tp.add_argument("--run", default=None, help="Only this run id")
+
+    args = ap.parse_args()
+
+    if not os.path.exists(args.log):
+        print(f"ERROR: telemetry log not found: {args.log}")
+        return 2
+
+    records = read_records(args.log, args.run)
+
+    if args.cmd == "summary":
+        summary = summarize(records)
+        if args.json:
+            print(json.dumps(summary, indent=2))
+        else:
+            print_summary(summary)
+        return 0
+
+    trace = to_chrome_trace(records)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)) or ".", exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(trace, f)
+    print(f"Wrote {len(trace['traceEvents'])} trace event(s) to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,622 @@
+#!/usr/bin/env python3
+"""
+Session Plans
+=============
+
+Build-time planner for quiz sessions. For every data-v2 core file and
+content pack it precomputes many session plans: which items, in what order.
+A client (or delivery_server.py, /packs/<id>?plan=k) then needs one plan
+plus the referenced items instead of the whole 600-item pack.
+
+Each plan is balanced over:
+- theme      counts per theme within ±1 of the pack's own theme mix
+- difficulty calibrated b (metadata.calibration from calibrate_difficulty.py)
+             in terciles; without calibration the item's position within
+             its theme is used (packs are authored easy -> hard)
+- answer     correct_index positions spread evenly
+and consecutive plans share no items while the pack has enough of them.
+
+Method (systematic stratified sampling, vectorised with numpy): per round
+all units are sorted by (theme, difficulty, random), with the theme order
+shuffled per round, and dealt into S = units // per_session disjoint
+sessions, each taking every (units / per_session)-th unit of that order
+from its own offset. Answer positions are then evened out by swapping
+units of the same theme and difficulty between sessions, and the first
+session of a round is made disjoint from the last one of the round before.
+Items inside a session go from easy to hard. Reading and story packs (exercises[]/problems[])
+are planned per text block so a text always comes with all its questions.
+
+Output, compact JSON next to index.json / manifest.json:
+    <root>/sessions/index.json
+    <root>/sessions/<pack id>.json   {"plans": [[3, 41, 17, ...], ...], ...}
+Plan entries are 1-based item positions in file order (core items, or
+flattened exercises[].items for nested layouts), the same numbering as
+delivery_server.py's ?items=a-b.
+
+Usage:
+    # After a publish: rebuild plans of changed packs
+    python3 scripts/session_plans.py build
+
+    # Verify plans are current and balanced (CI)
+    python3 scripts/session_plans.py check
+
+    # Inspect one pack
+    python3 scripts/session_plans.py show gb_groep4_m4 --plan 0
+
+Requires numpy (pip install -r scripts/requirements-analysis.txt).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import zlib
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+sys.path.insert(0, str(Path(__file__).parent))
+from exercise_corpus import KIND_CONTENT_PACK, Pack, load_pack
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_EXERCISES_DIR = ROOT / "data-v2" / "exercises"
+DEFAULT_CONTENT_DIR = ROOT / "content" / "nl-NL"
+SESSIONS_DIRNAME = "sessions"
+
+PLANS_FORMAT_VERSION = 1
+DEFAULT_PLANS = 256
+DEFAULT_LENGTH = 20
+DEFAULT_SEED = 42
+
+# check: allowed distance from the pack's mix, in items per session. Packs with
+# room for fewer than BALANCE_MIN_SESSIONS disjoint sessions are exempt: their
+# plans are close to the whole pack or its complement, so the no-repeat rule
+# leaves almost no choice.
+MAX_THEME_DEVIATION = 3.0
+MAX_ANSWER_DEVIATION = 3.0
+BALANCE_MIN_SESSIONS = 3
+
+
+def require_numpy():
+    if np is None:
+        print("❌ numpy is required: pip install -r scripts/requirements-analysis.txt")
+        sys.exit(2)
+
+
+# ----------------------------
+# Units and features
+# ----------------------------
+
+def _calibrated_b(pack: Pack) -> Dict[str, float]:
+    raw = pack.raw if isinstance(pack.raw, dict) else {}
+    calib = raw.get("metadata", {}).get("calibration", {})
+    items = calib.get("items", {}) if isinstance(calib, dict) else {}
+    return {str(k): float(v["b"]) for k, v in items.items() if isinstance(v, dict) and "b" in v}
+
+
+def pack_units(pack: Pack) -> Tuple[List[List[int]], List[str], List[int]]:
+    """
+    Split a pack into planning units
+
+    Returns:
+        (units as lists of 0-based item positions, theme per unit, answer position per unit (-1 = none))
+    """
+    raw = pack.raw if isinstance(pack.raw, dict) else {}
+    blocks = None
+    if "items" not in raw:
+        blocks = raw.get("exercises") or raw.get("problems")
+
+    if not blocks:
+        units = [[i] for i in range(len(pack.items))]
+        themes = [item.theme for item in pack.items]
+        answers = [item.correct_index if item.correct_index is not None else -1 for item in pack.items]
+        return units, themes, answers
+
+    units, themes, answers = [], [], []
+    pos = 0
+    for block in blocks:
+        n = sum(1 for i in block.get("items", []) if isinstance(i, dict)) if isinstance(block, dict) else 0
+        if n == 0:
+            continue
+        units.append(list(range(pos, pos + n)))
+        themes.append(str(block.get("theme", "")))
+        # block answer key: the most common correct position among its questions
+        positions = [pack.items[i].correct_index for i in range(pos, pos + n)
+                     if pack.items[i].correct_index is not None]
+        answers.append(Counter(positions).most_common(1)[0][0] if positions else -1)
+        pos += n
+    return units, themes, answers
+
+
+def difficulty_bins(pack: Pack, units: List[List[int]], themes: List[str]) -> Tuple["np.ndarray", str]:
+    """Tercile (0 easy, 1, 2 hard) per unit and where it came from ('calibration' or 'order')"""
+    n = len(units)
+    calibrated = _calibrated_b(pack)
+    if calibrated:
+        values = np.empty(n)
+        median = float(np.median(list(calibrated.values())))
+        for u, positions in enumerate(units):
+            bs = [calibrated.get(str(pack.items[i].id), median) for i in positions]
+            values[u] = sum(bs) / len(bs)
+        source = "calibration"
+    else:
+        # relative position within the theme, 0..1
+        theme_codes = np.unique(np.asarray(themes, dtype=object).astype(str), return_inverse=True)[1]
+        counts = np.bincount(theme_codes)
+        order = np.argsort(theme_codes, kind="stable")
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        rank = np.empty(n)
+        rank[order] = np.arange(n) - starts[theme_codes[order]]
+        values = (rank + 0.5) / counts[theme_codes]
+        source = "order"
+    cuts = np.quantile(values, [1 / 3, 2 / 3]) if n >= 3 else np.array([np.inf, np.inf])
+    return np.searchsorted(cuts, values, side="right").astype(np.int8), source
+
+
+# ----------------------------
+# Planning (vectorised)
+# ----------------------------
+
+def plan_sessions(theme: "np.ndarray", diff: "np.ndarray", answer: "np.ndarray", per_session: int,
+                  n_plans: int, rng: "np.random.Generator") -> "np.ndarray":
+    """
+    Args:
+        theme, diff, answer: int codes per unit (length U)
+        per_session: units per session
+        n_plans: number of plans to return
+        rng: seeded generator
+
+    Returns:
+        int32 array (n_plans, per_session) of unit indices
+    """
+    n_units = len(theme)
+    k = max(1, min(per_session, n_units))
+    sessions_per_round = max(1, n_units // k)
+    rounds = -(-n_plans // sessions_per_round)
+
+    # per round a random order of the themes, so the rounding in favour of the
+    # first strata moves around
+    n_themes = int(theme.max()) + 1
+    theme_rank = rng.random((rounds, n_themes)).argsort(axis=1).argsort(axis=1)[:, theme]
+    diff_keys = np.broadcast_to(diff, (rounds, n_units))
+    order = np.lexsort((rng.random((rounds, n_units)), diff_keys, theme_rank), axis=-1)
+
+    # systematic sampling with step U/k: session s takes stratified positions
+    # floor(step * (j + (s + phase) / S)); sessions of a round are disjoint and
+    # the U - S*k units left out are spread over the order
+    step = n_units / k
+    phase = rng.random((rounds, 1, 1))
+    offsets = (np.arange(sessions_per_round)[None, :, None] + phase) / sessions_per_round
+    slots = np.floor(step * (np.arange(k)[None, None, :] + offsets)).astype(np.intp)
+    r_all = np.arange(rounds)[:, None, None]
+    used = order[r_all, slots]
+
+    # the units left out form one more row (padded with the dummy unit U), so
+    # a round with a single session still has a swap partner
+    left_out = n_units - sessions_per_round * k
+    if left_out:
+        taken = np.zeros((rounds, n_units), dtype=bool)
+        taken[r_all, slots] = True
+        pool = order[~taken].reshape(rounds, 1, left_out)
+        pad = np.full((rounds, 1, k - left_out), n_units)
+        used = np.concatenate([used, np.concatenate([pool, pad], axis=2)], axis=1)
+
+    # no repeats at round boundaries first; the answer swaps below keep it that
+    # way, trying theme and difficulty mates first, then theme only (small packs)
+    stratum = np.append(theme * 3 + diff, -1)
+    _separate_rounds(used, sessions_per_round, stratum, np.append(theme, -1), np.append(answer, -1))
+    _balance_answers(used, stratum, answer, sessions_per_round, rng)
+    _balance_answers(used, np.append(theme, -1), answer, sessions_per_round, rng)
+    used = np.ascontiguousarray(used[:, :sessions_per_round])
+
+    # easy -> hard within a session, random among equals
+    keys = diff[used] + rng.random(used.shape) * 0.5
+    used = np.take_along_axis(used, keys.argsort(axis=2), axis=2)
+    return used.reshape(-1, k)[:n_plans].astype(np.int32)
+
+
+def _balance_answers(used: "np.ndarray", stratum: "np.ndarray", answer: "np.ndarray", sessions: int,
+                     rng: "np.random.Generator", max_iter: int = 400) -> None:
+    """
+    Even out answer positions in place by swapping units of the same stratum
+    between two rows (sessions, or the left-out pool) of a round.
+
+    Every iteration pairs the rows of all rounds at random and applies, per
+    pair, the swap that lowers the summed squared deviation from the pack's
+    answer mix most. With D = count - target, swapping x (answer a) from A
+    with y (answer b) from B changes it by 2 * (D_B[a] - D_A[a] + D_A[b] - D_B[b]) + 4.
+    Index len(answer) is padding: stratum[-1] is -1 and it never moves.
+
+    Swaps never bring a unit of a round's last session into the next round's
+    first session or the other way round; even and odd rounds take turns so
+    neighbouring rounds never change at the same time.
+    """
+    rounds, rows, k = used.shape
+    n_pairs = rows // 2
+    if n_pairs == 0:
+        return
+    n_answers = int(answer.max()) + 2
+    answer = np.append(answer, n_answers - 1)
+    share = np.bincount(answer[:-1], minlength=n_answers) / (len(answer) - 1)
+    sizes = (used != len(answer) - 1).sum(axis=2)
+    dev = np.eye(n_answers)[answer[used]].sum(axis=2) - sizes[..., None] * share
+
+    r_all = np.arange(rounds)[:, None]
+    member = np.zeros((rounds, rows, len(answer)), dtype=bool)
+    member[np.arange(rounds)[:, None, None], np.arange(rows)[None, :, None], used] = True
+    guard = sessions > 1 and rounds > 1
+    stalled = 0
+    for it in range(max_iter):
+        pairs = rng.random((rounds, rows)).argsort(axis=1)[:, :2 * n_pairs].reshape(rounds, n_pairs, 2)
+        sa, sb = pairs[..., 0], pairs[..., 1]
+        ua, ub = used[r_all, sa], used[r_all, sb]
+        ans_a, ans_b = answer[ua], answer[ub]
+        da, db = dev[r_all, sa], dev[r_all, sb]
+
+        delta = 2 * ((np.take_along_axis(db, ans_a, axis=2) - np.take_along_axis(da, ans_a, axis=2))[..., :, None]
+                     + (np.take_along_axis(da, ans_b, axis=2) - np.take_along_axis(db, ans_b, axis=2))[..., None, :]) + 4
+        allowed = ((stratum[ua][..., :, None] == stratum[ub][..., None, :]) & (stratum[ua] >= 0)[..., :, None]
+                   & (ans_a[..., :, None] != ans_b[..., None, :]))
+        if guard:
+            # units a row may not take in: row 0 those of the previous round's last
+            # session, the last session those of the next round's first session
+            blocked = np.zeros_like(member)
+            blocked[1:, 0] = member[:-1, sessions - 1]
+            blocked[:-1, sessions - 1] |= member[1:, 0]
+            allowed &= ~np.take_along_axis(blocked[r_all, sa], ub, axis=2)[..., None, :]
+            allowed &= ~np.take_along_axis(blocked[r_all, sb], ua, axis=2)[..., :, None]
+            allowed &= (np.arange(rounds) % 2 == it % 2)[:, None, None, None]
+        delta = np.where(allowed, delta, 0).reshape(rounds, n_pairs, k * k)
+
+        best = delta.argmin(axis=2)
+        r_idx, p_idx = np.nonzero(np.take_along_axis(delta, best[..., None], axis=2)[..., 0] < -1e-9)
+        if len(r_idx) == 0:
+            stalled += 1
+            if stalled >= 6:
+                break
+            continue
+        stalled = 0
+        s1, s2 = sa[r_idx, p_idx], sb[r_idx, p_idx]
+        i, j = best[r_idx, p_idx] // k, best[r_idx, p_idx] % k
+        x, y = used[r_idx, s1, i], used[r_idx, s2, j]
+        used[r_idx, s1, i], used[r_idx, s2, j] = y, x
+        member[r_idx, s1, x] = member[r_idx, s2, y] = False
+        member[r_idx, s1, y] = member[r_idx, s2, x] = True
+        np.add.at(dev, (r_idx, s1, answer[x]), -1)
+        np.add.at(dev, (r_idx, s1, answer[y]), 1)
+        np.add.at(dev, (r_idx, s2, answer[y]), -1)
+        np.add.at(dev, (r_idx, s2, answer[x]), 1)
+
+
+def _separate_rounds(used: "np.ndarray", sessions: int, stratum: "np.ndarray", theme: "np.ndarray",
+                     answer: "np.ndarray") -> None:
+    """
+    Make the first session of each round share no units with the last session
+    of the round before, in place: start with the least overlapping session and
+    swap the remaining shared units with a later session or the left-out pool.
+    The swap partner is the closest match available: same stratum and answer,
+    same stratum, same theme, a theme the session lacks, any unit.
+    """
+    rounds = used.shape[0]
+    padding = len(stratum) - 1
+    if sessions < 2:
+        return
+    for r in range(1, rounds):
+        previous = used[r - 1, sessions - 1]
+        overlap = np.isin(used[r, :sessions], previous).sum(axis=1)
+        first = int(overlap.argmin())
+        if first:
+            used[r, [0, first]] = used[r, [first, 0]]
+        if overlap[first] == 0:
+            continue
+        rest = used[r, 1:]
+        free = ~np.isin(rest, previous) & (rest != padding)
+        for i in np.nonzero(np.isin(used[r, 0], previous))[0]:
+            x = used[r, 0, i]
+            same_stratum = free & (stratum[rest] == stratum[x])
+            new_theme = free & ~np.isin(theme[rest], theme[used[r, 0]])
+            for mates in (same_stratum & (answer[rest] == answer[x]), same_stratum,
+                          free & (theme[rest] == theme[x]), new_theme, free):
+                if mates.any():
+                    break
+            else:
+                continue
+            s, j = np.argwhere(mates)[0]
+            used[r, 0, i], rest[s, j] = rest[s, j], x
+            free[s, j] = False
+
+
+def plan_stats(plans: "np.ndarray", theme: "np.ndarray", diff: "np.ndarray", answer: "np.ndarray") -> Dict[str, Any]:
+    """Balance and repeat metrics over all plans at once"""
+    n_plans, k = plans.shape
+    n_units = len(theme)
+    member = np.zeros((n_plans, n_units), dtype=bool)
+    member[np.arange(n_plans)[:, None], plans] = True
+
+    def max_deviation(codes: "np.ndarray") -> "np.ndarray":
+        onehot = np.eye(int(codes.max()) + 1, dtype=np.int32)[codes]
+        counts = member.astype(np.int32) @ onehot
+        expected = k * onehot.mean(axis=0)
+        return np.abs(counts - expected).max(axis=1)
+
+    theme_dev = max_deviation(theme)
+    answer_dev = max_deviation(answer)
+    diff_dev = max_deviation(diff.astype(np.int64))
+    overlap = (member[1:] & member[:-1]).sum(axis=1) if n_plans > 1 else np.zeros(0, dtype=np.int64)
+    return {
+        "theme_deviation_max": round(float(theme_dev.max()), 2),
+        "theme_deviation_mean": round(float(theme_dev.mean()), 2),
+        "answer_deviation_max": round(float(answer_dev.max()), 2),
+        "difficulty_deviation_max": round(float(diff_dev.max()), 2),
+        "consecutive_overlap_max": int(overlap.max()) if len(overlap) else 0,
+        "coverage": round(float(member.any(axis=0).mean()), 3),
+    }
+
+
+def _codes(values: List[Any]) -> "np.ndarray":
+    return np.unique(np.asarray([str(v) for v in values]), return_inverse=True)[1].astype(np.int64)
+
+
+def build_pack_plans(pack: Pack, key: str, n_plans: int, length: int, seed: int) -> Optional[Dict[str, Any]]:
+    """Plans plus metadata for one pack; None when it has no items"""
+    if not pack.items:
+        return None
+    units, themes, answers = pack_units(pack)
+    if not units:
+        return None
+    theme = _codes(themes)
+    answer = _codes(answers)
+    diff, diff_source = difficulty_bins(pack, units, themes)
+
+    mean_unit = sum(len(u) for u in units) / len(units)
+    per_session = max(1, int(round(length / mean_unit)))
+    rng = np.random.default_rng([seed, zlib.crc32(key.encode("utf-8"))])
+    unit_plans = plan_sessions(theme, diff, answer, per_session, n_plans, rng)
+
+    plans = [[i + 1 for u in row for i in units[u]] for row in unit_plans.tolist()]
+    return {
+        "format_version": PLANS_FORMAT_VERSION,
+        "pack": key,
+        "items": len(pack.items),
+        "unit": "item" if mean_unit == 1 else "block",
+        "units": len(units),
+        "session_units": int(unit_plans.shape[1]),
+        "difficulty_source": diff_source,
+        "stats": plan_stats(unit_plans, theme, diff, answer),
+        "plans": plans,
+    }
+
+
+# ----------------------------
+# Files
+# ----------------------------
+
+def _sha256(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _write_compact(path: Path, data: Any):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _plan_path(sessions_dir: Path, pack_id: str) -> Path:
+    # content pack ids are domain/groep-g/level/topic
+    return sessions_dir.joinpath(*pack_id.split("/")).with_suffix(".json")
+
+
+def source_files(root: Path) -> List[Path]:
+    if (root / "manifest.json").exists() or any(root.glob("*/groep-*")):
+        return sorted(root.glob("**/topics/*/exercises.json"))
+    return sorted(p for p in root.glob("**/*_core.json") if SESSIONS_DIRNAME not in p.relative_to(root).parts)
+
+
+def plan_key(pack: Pack, path: Path) -> str:
+    """Plan name: the file stem for core files (gb_groep4_m4), the pack id for content packs"""
+    if pack.kind == KIND_CONTENT_PACK:
+        return pack.id
+    return path.name[:-len("_core.json")] if path.name.endswith("_core.json") else path.stem
+
+
+def _read_index(sessions_dir: Path) -> Dict[str, Any]:
+    try:
+        with open(sessions_dir / "index.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_tree(root: Path, n_plans: int, length: int, seed: int, force: bool) -> Tuple[int, int, int]:
+    """Build plans for every pack below root; returns (built, unchanged, skipped)"""
+    sessions_dir = root / SESSIONS_DIRNAME
+    previous = _read_index(sessions_dir).get("packs", {})
+    params = {"plans": n_plans, "length": length, "seed": seed}
+    entries: Dict[str, Dict[str, Any]] = {}
+    built = unchanged = skipped = 0
+
+    for path in source_files(root):
+        try:
+            pack = load_pack(path)
+        except (OSError, ValueError) as e:
+            print(f"  ⚠️  {path.relative_to(root)}: {e}")
+            skipped += 1
+            continue
+        key = plan_key(pack, path)
+        sha = _sha256(path)
+        prev = previous.get(key)
+        out = _plan_path(sessions_dir, key)
+        if not force and prev and prev.get("source_sha256") == sha and prev.get("params") == params and out.exists():
+            entries[key] = prev
+            unchanged += 1
+            continue
+
+        result = build_pack_plans(pack, key, n_plans, length, seed)
+        if result is None:
+            skipped += 1
+            continue
+        result["source"] = path.relative_to(root).as_posix()
+        result["source_sha256"] = sha
+        _write_compact(out, result)
+        entries[key] = {
+            "file": out.relative_to(root).as_posix(),
+            "source": result["source"],
+            "source_sha256": sha,
+            "params": params,
+            "plans": len(result["plans"]),
+            "unit": result["unit"],
+            "units": result["units"],
+            "session_units": result["session_units"],
+            "stats": result["stats"],
+        }
+        built += 1
+
+    # plan files of packs that no longer exist
+    for pack_id, entry in previous.items():
+        if pack_id not in entries:
+            stale = root / entry.get("file", "")
+            if stale.is_file():
+                stale.unlink()
+
+    index = {
+        "format_version": PLANS_FORMAT_VERSION,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "packs": dict(sorted(entries.items())),
+    }
+    _write_compact(sessions_dir / "index.json", index)
+    return built, unchanged, skipped
+
+
+def check_tree(root: Path) -> List[str]:
+    """Problems with the stored plans of one tree: stale, missing or unbalanced"""
+    problems = []
+    entries = _read_index(root / SESSIONS_DIRNAME).get("packs", {})
+    for path in source_files(root):
+        try:
+            pack = load_pack(path)
+        except (OSError, ValueError):
+            continue
+        if not pack.items:
+            continue
+        key = plan_key(pack, path)
+        entry = entries.get(key)
+        if entry is None:
+            problems.append(f"{key}: no session plans")
+            continue
+        if entry.get("source_sha256") != _sha256(path):
+            problems.append(f"{key}: plans are stale (pack changed since they were built)")
+            continue
+        stats = entry.get("stats", {})
+        sessions = entry.get("units", 0) // max(1, entry.get("session_units", 1))
+        if sessions < BALANCE_MIN_SESSIONS:
+            stats = {k: v for k, v in stats.items() if not k.endswith("_deviation_max")}
+        if stats.get("theme_deviation_max", 0) > MAX_THEME_DEVIATION:
+            problems.append(f"{key}: theme deviation {stats['theme_deviation_max']} > {MAX_THEME_DEVIATION}")
+        # a text block's answer positions come as a set, only item plans are held to this
+        if entry.get("unit") == "item" and stats.get("answer_deviation_max", 0) > MAX_ANSWER_DEVIATION:
+            problems.append(f"{key}: answer deviation {stats['answer_deviation_max']} > {MAX_ANSWER_DEVIATION}")
+        # only packs with room for two disjoint sessions can avoid repeats
+        if sessions >= 2 and stats.get("consecutive_overlap_max", 0):
+            problems.append(f"{key}: consecutive plans repeat {stats['consecutive_overlap_max']} unit(s)")
+    return problems
+
+
+# ----------------------------
+# Commands
+# ----------------------------
+
+def _roots(args) -> List[Path]:
+    roots = [Path(args.directory)]
+    if args.content and not args.no_content:
+        roots.append(Path(args.content))
+    return [r for r in roots if r.is_dir()]
+
+
+def cmd_build(args) -> int:
+    require_numpy()
+    for root in _roots(args):
+        t0 = time.perf_counter()
+        built, unchanged, skipped = build_tree(root, args.plans, args.length, args.seed, args.force)
+        print(f"🗓️  {root}: {built} pack(s) planned, {unchanged} unchanged, {skipped} skipped "
+              f"({time.perf_counter() - t0:.1f}s) -> {root / SESSIONS_DIRNAME}")
+    return 0
+
+
+def cmd_check(args) -> int:
+    problems = []
+    for root in _roots(args):
+        problems += check_tree(root)
+    for p in problems:
+        print(f"  ❌ {p}")
+    if problems:
+        print(f"\n❌ {len(problems)} problem(s); run: python3 scripts/session_plans.py build")
+        return 1
+    print("✅ Session plans are current and balanced")
+    return 0
+
+
+def cmd_show(args) -> int:
+    for root in _roots(args):
+        entry = _read_index(root / SESSIONS_DIRNAME).get("packs", {}).get(args.pack)
+        if entry is None:
+            continue
+        with open(root / entry["file"], "r", encoding="utf-8") as f:
+            data = json.load(f)
+        print(f"{args.pack}: {len(data['plans'])} plan(s) over {data['items']} item(s), "
+              f"unit={data['unit']}, difficulty from {data['difficulty_source']}")
+        for key, value in data["stats"].items():
+            print(f"  {key}: {value}")
+        if args.plan is not None:
+            pack = load_pack(root / data["source"])
+            for pos in data["plans"][args.plan]:
+                item = pack.items[pos - 1]
+                print(f"  {pos:>4}  [{item.theme or '-'}]  {item.question[:70]}")
+        return 0
+    print(f"❌ No plans for {args.pack}")
+    return 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute balanced quiz-session plans per pack")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_roots(p):
+        p.add_argument("--directory", "-d", default=str(DEFAULT_EXERCISES_DIR))
+        p.add_argument("--content", default=str(DEFAULT_CONTENT_DIR))
+        p.add_argument("--no-content", action="store_true", help="Skip content packs")
+
+    b = sub.add_parser("build", help="Build plans for new or changed packs")
+    add_roots(b)
+    b.add_argument("--plans", type=int, default=DEFAULT_PLANS, help="Plans per pack")
+    b.add_argument("--length", type=int, default=DEFAULT_LENGTH, help="Items per session (approximate for text blocks)")
+    b.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    b.add_argument("--force", action="store_true", help="Rebuild unchanged packs too")
+    b.set_defaults(func=cmd_build)
+
+    c = sub.add_parser("check", help="Fail when plans are missing, stale or unbalanced")
+    add_roots(c)
+    c.set_defaults(func=cmd_check)
+
+    s = sub.add_parser("show", help="Plan statistics of one pack")
+    add_roots(s)
+    s.add_argument("pack")
+    s.add_argument("--plan", type=int, help="Also list the items of this plan")
+    s.set_defaults(func=cmd_show)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
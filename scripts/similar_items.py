@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Similar Items (remediation neighbour graph)
+===========================================
+
+Offline job that finds, for every item in data-v2 and content/, the most
+similar items with the same theme at the same or a lower grade in other
+files: the
+candidates for remediation links (remedial_basis_id) and "try an easier
+one" hints.
+
+- Question texts are normalised (lower case, digits -> 0, so "47 + 28" and
+  "35 + 12" look alike) and turned into a sparse TF-IDF matrix of
+  character 3-5 grams.
+- Rows are L2-normalised, so cosine similarity is a sparse dot product.
+  Items are grouped by (category, theme); inside a group, blocks of rows
+  are multiplied against the group's transpose and the top-k per row is
+  taken with argpartition after masking the item's own file and higher
+  grades.
+- The graph is stored as one compressed .npz (keys, int32 neighbour
+  indices, float16 scores; -1 = no neighbour) next to a small JSON
+  manifest.
+
+Usage:
+    # Build the graph (default: state/item-neighbors.npz)
+    python3 scripts/similar_items.py build
+
+    # Only data-v2, 5 neighbours, strictly easier grades
+    python3 scripts/similar_items.py build --no-content --k 5 --strictly-lower
+
+    # Show neighbours of one item
+    python3 scripts/similar_items.py show "gb_groep4_m4_core#12"
+
+Requires numpy and scipy (pip install -r scripts/requirements-analysis.txt).
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = None
+    sparse = None
+
+sys.path.insert(0, str(Path(__file__).parent))
+from exercise_corpus import KIND_CONTENT_PACK, open_corpus
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_OUTPUT = ROOT / "state" / "item-neighbors.npz"
+GRAPH_FORMAT_VERSION = 1
+
+_DIGITS = re.compile(r"\d")
+_SPACES = re.compile(r"\s+")
+
+
+def require_numpy():
+    if np is None or sparse is None:
+        print("❌ numpy and scipy are required: pip install -r scripts/requirements-analysis.txt")
+        sys.exit(2)
+
+
+def normalize_text(text: str) -> str:
+    """Lower case, digits folded to 0, whitespace collapsed"""
+    return _SPACES.sub(" ", _DIGITS.sub("0", text.lower())).strip()
+
+
+def collect_items(exercises_dir: Optional[str], content_dir: Optional[str]) -> Dict[str, list]:
+    """
+    Flatten both corpora into parallel columns
+
+    Returns:
+        Dict with lists: keys, texts, groups, grades, paths
+    """
+    cols = {"keys": [], "texts": [], "groups": [], "grades": [], "paths": []}
+    sources = []
+    if exercises_dir:
+        sources.append(open_corpus(exercises_dir))
+    if content_dir:
+        sources.append(open_corpus(content_dir, "**/exercises.json"))
+
+    for corpus in sources:
+        for pack in corpus.packs():
+            rel_path = os.path.relpath(pack.path, ROOT).replace("\\", "/") if pack.path else ""
+            for item in pack.items:
+                if not item.question.strip():
+                    continue
+                # content packs: the topic is the theme; v2 falls back to the category
+                theme = pack.title if pack.kind == KIND_CONTENT_PACK else item.theme
+                cols["keys"].append(f"{pack.id}#{item.id}")
+                cols["texts"].append(normalize_text(item.question))
+                cols["groups"].append(f"{pack.category}/{theme.lower()}")
+                cols["grades"].append(pack.grade if isinstance(pack.grade, int) else -1)
+                cols["paths"].append(rel_path)
+    return cols
+
+
+def tfidf_char_ngrams(texts: List[str], n_min: int = 3, n_max: int = 5):
+    """
+    Sparse TF-IDF matrix (CSR, float32, L2-normalised rows) of character n-grams
+
+    Args:
+        texts: Normalised texts
+        n_min, n_max: n-gram length range
+
+    Returns:
+        (matrix, vocabulary size)
+    """
+    vocab: Dict[str, int] = {}
+    indptr = [0]
+    indices: List[int] = []
+    data: List[float] = []
+
+    for text in texts:
+        padded = f" {text} "
+        counts: Dict[int, int] = defaultdict(int)
+        for n in range(n_min, n_max + 1):
+            for i in range(len(padded) - n + 1):
+                col = vocab.setdefault(padded[i:i + n], len(vocab))
+                counts[col] += 1
+        indices.extend(counts.keys())
+        data.extend(counts.values())
+        indptr.append(len(indices))
+
+    X = sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(texts), len(vocab)),
+    )
+
+    # sublinear tf, smoothed idf
+    X.data = 1.0 + np.log(X.data)
+    df = np.bincount(X.indices, minlength=X.shape[1]).astype(np.float32)
+    idf = np.log((1.0 + X.shape[0]) / (1.0 + df)) + 1.0
+    X = X.multiply(idf.reshape(1, -1)).tocsr()
+
+    norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    X = sparse.diags((1.0 / norms).astype(np.float32)).dot(X).tocsr()
+    return X.astype(np.float32), len(vocab)
+
+
+def top_k_neighbors(X, groups: List[str], grades: "np.ndarray", packs: "np.ndarray", k: int, block: int,
+                    strictly_lower: bool, min_score: float,
+                    allow_same_pack: bool = False) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Blocked sparse X @ X.T inside each theme group
+
+    Returns:
+        (neighbors int32 [N, k], scores float32 [N, k]); -1 / 0 where absent
+    """
+    n = X.shape[0]
+    neighbors = np.full((n, k), -1, dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+
+    members: Dict[str, List[int]] = defaultdict(list)
+    for idx, g in enumerate(groups):
+        members[g].append(idx)
+
+    for rows in members.values():
+        if len(rows) < 2:
+            continue
+        rows_arr = np.asarray(rows, dtype=np.int64)
+        Xg = X[rows_arr]
+        XgT = Xg.T.tocsc()
+        g_grades = grades[rows_arr]
+        g_packs = packs[rows_arr]
+
+        for start in range(0, len(rows_arr), block):
+            stop = min(start + block, len(rows_arr))
+            S = (Xg[start:stop] @ XgT).toarray()
+
+            # no self links; only same/lower grade (unknown grade = -1 matches anything)
+            S[np.arange(stop - start), np.arange(start, stop)] = -1.0
+            own = g_grades[start:stop].reshape(-1, 1)
+            cand = g_grades.reshape(1, -1)
+            too_hard = (cand > own) if not strictly_lower else (cand >= own)
+            too_hard &= (own >= 0) & (cand >= 0)
+            S[too_hard] = -1.0
+            if not allow_same_pack:
+                # template siblings in the same file are not remediation
+                S[g_packs[start:stop].reshape(-1, 1) == g_packs.reshape(1, -1)] = -1.0
+            S[S < min_score] = -1.0
+
+            kk = min(k, S.shape[1])
+            part = np.argpartition(-S, kk - 1, axis=1)[:, :kk]
+            part_scores = np.take_along_axis(S, part, axis=1)
+            order = np.argsort(-part_scores, axis=1)
+            part = np.take_along_axis(part, order, axis=1)
+            part_scores = np.take_along_axis(part_scores, order, axis=1)
+
+            valid = part_scores > 0
+            global_idx = np.where(valid, rows_arr[part], -1)
+            neighbors[rows_arr[start:stop], :kk] = global_idx.astype(np.int32)
+            scores[rows_arr[start:stop], :kk] = np.where(valid, part_scores, 0.0)
+
+    return neighbors, scores
+
+
+def save_graph(output: Path, cols: Dict[str, list], neighbors, scores, params: Dict):
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(output.stem + ".tmp.npz")
+    np.savez_compressed(
+        tmp,
+        keys=np.asarray(cols["keys"]),
+        paths=np.asarray(cols["paths"]),
+        groups=np.asarray(cols["groups"]),
+        grades=np.asarray(cols["grades"], dtype=np.int8),
+        neighbors=neighbors,
+        scores=scores.astype(np.float16),
+    )
+    os.replace(tmp, output)
+
+    manifest = {
+        "format_version": GRAPH_FORMAT_VERSION,
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "items": len(cols["keys"]),
+        "params": params,
+        "arrays": "keys, paths, groups, grades, neighbors[int32 N x k, -1 = none], scores[float16]",
+    }
+    with open(output.with_suffix(".json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+class NeighborGraph:
+    """Read access to a stored graph for generators and support tooling"""
+
+    def __init__(self, path=DEFAULT_OUTPUT):
+        require_numpy()
+        with np.load(path, allow_pickle=False) as z:
+            self.keys = z["keys"]
+            self.paths = z["paths"]
+            self.neighbors = z["neighbors"]
+            self.scores = z["scores"].astype(np.float32)
+        self._index = {str(key): i for i, key in enumerate(self.keys)}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def neighbors_of(self, key: str) -> List[Tuple[str, float]]:
+        """(neighbour key, cosine score) pairs, best first"""
+        i = self._index.get(key)
+        if i is None:
+            return []
+        return [(str(self.keys[j]), float(s))
+                for j, s in zip(self.neighbors[i], self.scores[i]) if j >= 0]
+
+
+def cmd_build(args) -> int:
+    require_numpy()
+    t0 = time.perf_counter()
+    cols = collect_items(None if args.no_data_v2 else args.directory,
+                         None if args.no_content else args.content)
+    if not cols["keys"]:
+        print("❌ No items found")
+        return 1
+    print(f"📚 Items: {len(cols['keys'])} in {len(set(cols['groups']))} theme group(s)")
+
+    X, vocab_size = tfidf_char_ngrams(cols["texts"], args.ngram_min, args.ngram_max)
+    print(f"🔤 TF-IDF: {X.shape[0]} x {vocab_size} ({X.nnz} non-zeros) in {time.perf_counter() - t0:.1f}s")
+
+    grades = np.asarray(cols["grades"], dtype=np.int16)
+    pack_codes = {p: i for i, p in enumerate(dict.fromkeys(cols["paths"]))}
+    packs = np.asarray([pack_codes[p] for p in cols["paths"]], dtype=np.int32)
+    neighbors, scores = top_k_neighbors(X, cols["groups"], grades, packs, args.k, args.block,
+                                        args.strictly_lower, args.min_score, args.allow_same_pack)
+    linked = int((neighbors[:, 0] >= 0).sum())
+    print(f"🔗 {linked}/{len(cols['keys'])} item(s) have at least one neighbour")
+
+    params = {
+        "k": args.k,
+        "ngram_range": [args.ngram_min, args.ngram_max],
+        "strictly_lower": args.strictly_lower,
+        "allow_same_pack": args.allow_same_pack,
+        "min_score": args.min_score,
+        "sources": [s for s, off in (("data-v2", args.no_data_v2), ("content", args.no_content)) if not off],
+    }
+    save_graph(Path(args.output), cols, neighbors, scores, params)
+    print(f"💾 Saved: {args.output} ({time.perf_counter() - t0:.1f}s total)")
+    return 0
+
+
+def cmd_show(args) -> int:
+    graph = NeighborGraph(args.graph)
+    if args.key not in graph:
+        print(f"❌ Unknown item key: {args.key}")
+        return 1
+    for key, score in graph.neighbors_of(args.key):
+        print(f"  {score:.3f}  {key}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build / query the similar-item neighbour graph")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    b = sub.add_parser("build", help="Compute the neighbour graph")
+    b.add_argument("--directory", "-d", default=str(ROOT / "data-v2" / "exercises"))
+    b.add_argument("--content", default=str(ROOT / "content" / "nl-NL"))
+    b.add_argument("--no-data-v2", action="store_true", help="Skip data-v2 core files")
+    b.add_argument("--no-content", action="store_true", help="Skip content/ exercise packs")
+    b.add_argument("--output", "-o", default=str(DEFAULT_OUTPUT))
+    b.add_argument("--k", type=int, default=10, help="Neighbours per item (default 10)")
+    b.add_argument("--block", type=int, default=512, help="Rows per sparse product block")
+    b.add_argument("--ngram-min", type=int, default=3)
+    b.add_argument("--ngram-max", type=int, default=5)
+    b.add_argument("--min-score", type=float, default=0.2, help="Drop neighbours below this cosine score")
+    b.add_argument("--strictly-lower", action="store_true", help="Only neighbours from a lower grade")
+    b.add_argument("--allow-same-pack", action="store_true", help="Also link items within the same file")
+
+    s = sub.add_parser("show", help="Print the neighbours of one item")
+    s.add_argument("key", help="Item key: <pack id>#<item id>")
+    s.add_argument("--graph", default=str(DEFAULT_OUTPUT))
+
+    args = parser.parse_args()
+    sys.exit(cmd_build(args) if args.cmd == "build" else cmd_show(args))
+
+
+if __name__ == "__main__":
+    main()
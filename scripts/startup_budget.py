@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+startup_budget.py — cold-start budget for the command-line tools
+
+Runs each tool from the budget file as `python -X importtime <tool> --help`
+and fails when it imports a module it should only load on first use (model
+SDKs, jsonschema; see scripts/lazy_cli.py), or when its import time exceeds
+the budget. Import time is the cumulative time of the tool's own top-level
+imports, i.e. without what a bare interpreter imports anyway; the best of
+--repeat runs counts.
+
+The budget is relative: each tool is measured next to a fixed set of
+stdlib imports (REFERENCE_MODULES) and import_ratio limits tool / reference,
+so a slower or busier machine does not fail the check. The forbidden-module
+check is exact; CI gates on that alone (--forbid-only), the time budget is
+for local runs.
+
+Usage:
+  python scripts/startup_budget.py                  # check all tools
+  python scripts/startup_budget.py --forbid-only    # forbidden modules only (CI)
+  python scripts/startup_budget.py --tool run_prompt_packs
+  python scripts/startup_budget.py --update         # re-baseline (measured ratio x headroom)
+
+Exit codes:
+  0 = all tools within budget
+  1 = budget exceeded or forbidden module imported
+  2 = budget file / tool could not be run
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BUDGET_FILE = ROOT / "docs" / "new" / "startup_budget.json"
+DEFAULT_REPEAT = 5
+DEFAULT_HEADROOM = 1.5
+
+# Measured alongside every tool; stdlib only, none imported by a bare interpreter
+REFERENCE_MODULES = ("argparse", "json", "dataclasses", "typing", "subprocess",
+                     "concurrent.futures", "email.parser", "decimal")
+
+
+# ----------------------------
+# Measuring
+# ----------------------------
+
+@dataclass
+class Startup:
+    """One `-X importtime` run"""
+    import_us: int = 0                      # cumulative, top-level imports of the tool only
+    wall_ms: float = 0.0
+    modules: Set[str] = field(default_factory=set)
+    top: List[Tuple[int, str]] = field(default_factory=list)   # (cumulative us, module), slowest first
+
+
+def parse_importtime(stderr: str) -> List[Tuple[int, int, str]]:
+    """(depth, cumulative us, module) per line of -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative = int(parts[1])
+        except ValueError:
+            continue  # header line
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        rows.append((depth, cumulative, stripped))
+    return rows
+
+
+def run_importtime(argv: List[str]) -> Tuple[int, str, float]:
+    env = dict(os.environ, PYTHONIOENCODING="utf-8", PYTHONDONTWRITEBYTECODE="1")
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        cwd=ROOT, env=env, capture_output=True, text=True, encoding="utf-8", errors="replace",
+    )
+    wall_ms = (time.perf_counter() - t0) * 1000
+    return proc.returncode, proc.stderr, wall_ms
+
+
+def interpreter_modules() -> Set[str]:
+    """Top-level modules a bare interpreter imports (site, encodings, ...)"""
+    _, stderr, _ = run_importtime(["-c", "pass"])
+    return {name for depth, _, name in parse_importtime(stderr) if depth == 0}
+
+
+def measure(tool: str, args: List[str], baseline: Set[str]) -> Startup:
+    code, stderr, wall_ms = run_importtime([tool, *args])
+    if code != 0:
+        tail = "\n".join(l for l in stderr.splitlines() if not l.startswith("import time:"))[-500:]
+        raise RuntimeError(f"{tool} {' '.join(args)} exited with {code}\n{tail}")
+    rows = parse_importtime(stderr)
+    top = [(us, name) for depth, us, name in rows if depth == 0 and name not in baseline]
+    return Startup(
+        import_us=sum(us for us, _ in top),
+        wall_ms=wall_ms,
+        modules={name for _, _, name in rows},
+        top=sorted(top, reverse=True),
+    )
+
+
+def best_of(tool: str, args: List[str], baseline: Set[str], repeat: int) -> Startup:
+    runs = [measure(tool, args, baseline) for _ in range(max(1, repeat))]
+    best = min(runs, key=lambda r: r.import_us)
+    best.wall_ms = min(r.wall_ms for r in runs)
+    return best
+
+
+def best_reference(baseline: Set[str], repeat: int) -> Startup:
+    """Import time of REFERENCE_MODULES, measured the same way as a tool"""
+    return best_of("-c", ["import " + ", ".join(REFERENCE_MODULES)], baseline, repeat)
+
+
+def forbidden_loaded(modules: Set[str], forbid: List[str]) -> List[str]:
+    return sorted(f for f in forbid if any(m == f or m.startswith(f + ".") for m in modules))
+
+
+# ----------------------------
+# Budget file
+# ----------------------------
+
+def load_budget(path: Path) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        budget = json.load(f)
+    if not isinstance(budget.get("tools"), dict):
+        raise ValueError("budget file has no 'tools' object")
+    return budget
+
+
+def save_budget(path: Path, budget: dict) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(budget, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+
+def parse_args() -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Check the cold-start import budget of the CLI tools.")
+    ap.add_argument("--budget", type=Path, default=DEFAULT_BUDGET_FILE, help="Budget file (JSON)")
+    ap.add_argument("--tool", action="append", default=[],
+                    help="Only tools whose path contains this (repeatable)")
+    ap.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Runs per tool, best counts")
+    ap.add_argument("--update", action="store_true",
+                    help="Write measured import ratio x headroom as the new budget")
+    ap.add_argument("--forbid-only", action="store_true",
+                    help="Only check forbidden modules (one run per tool, no timing budget)")
+    ap.add_argument("--headroom", type=float, default=None,
+                    help=f"Factor for --update (default: budget file, else {DEFAULT_HEADROOM})")
+    ap.add_argument("--top", type=int, default=3, help="Slowest imports to show per tool")
+    return ap.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    try:
+        budget = load_budget(args.budget)
+    except (OSError, ValueError) as e:
+        print(f"❌ Cannot read budget file {args.budget}: {e}")
+        return 2
+
+    headroom = args.headroom or budget.get("headroom", DEFAULT_HEADROOM)
+    tools: Dict[str, dict] = budget["tools"]
+    selected = [t for t in tools if not args.tool or any(s in t for s in args.tool)]
+    if not selected:
+        print(f"❌ No tool in {args.budget} matches {args.tool}")
+        return 2
+
+    if args.forbid_only and args.update:
+        print("❌ --update needs the timing runs; drop --forbid-only")
+        return 2
+
+    baseline = interpreter_modules()
+    repeat = 1 if args.forbid_only else args.repeat
+    failures = 0
+    if args.forbid_only:
+        print(f"🚫 Forbidden startup imports: {len(selected)} tools (python -X importtime)\n")
+    else:
+        print(f"⏱️  Startup budget: {len(selected)} tools, best of {repeat}, "
+              f"relative to importing {', '.join(REFERENCE_MODULES)}\n")
+
+    for tool in selected:
+        spec = tools[tool]
+        tool_args = spec.get("args", ["--help"])
+        try:
+            result = best_of(tool, tool_args, baseline, repeat)
+            # measured right after the tool, so both see the same machine load
+            reference = None if args.forbid_only else best_reference(baseline, repeat)
+        except (OSError, RuntimeError) as e:
+            print(f"❌ {tool}: {e}")
+            return 2
+
+        import_ms = result.import_us / 1000
+        forbidden = forbidden_loaded(result.modules, spec.get("forbid", []))
+
+        if reference is None:
+            status = "✅"
+            timing = ""
+        else:
+            ratio = result.import_us / max(1, reference.import_us)
+            limit: Optional[float] = spec.get("import_ratio")
+            if args.update:
+                spec["import_ratio"] = math.ceil(ratio * headroom * 100) / 100
+                spec.pop("import_ms", None)
+                status = f"→ budget {spec['import_ratio']:.2f}x"
+            elif limit is not None and ratio > limit:
+                status = f"❌ over budget ({limit:.2f}x)"
+                failures += 1
+            else:
+                status = f"✅ (budget {limit:.2f}x)" if limit is not None else "✅ (no budget)"
+            timing = f"{ratio:5.2f}x ref ({reference.import_us / 1000:.1f} ms)  "
+        if forbidden:
+            status = ("" if reference is None else status + "  ") + f"❌ imports {', '.join(forbidden)} at startup"
+            failures += 1
+
+        print(f"  {tool:<52} {import_ms:7.1f} ms imports  {timing}{status}")
+        if reference is not None:
+            for us, name in result.top[:args.top]:
+                print(f"      {us / 1000:7.1f} ms  {name}")
+
+    if args.update:
+        budget["headroom"] = headroom
+        save_budget(args.budget, budget)
+        print(f"\n💾 Budget written to {args.budget}")
+        return 0
+
+    print()
+    if failures:
+        print(f"❌ {failures} startup budget violation(s)")
+        return 1
+    print("✅ No forbidden startup imports" if args.forbid_only else "✅ All tools within their startup budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,766 @@
+#!/usr/bin/env python3
+"""
+Text Index
+==========
+
+Full-text search over all exercise text in data/, data-v2/,
+data-v2-enhanced/ and content/, so authors and reviewers stop grepping
+tens of megabytes of JSON.
+
+Every item is one document with five fields:
+    question  question.text, prompt, instruction
+    option    options, answers, solutions
+    hint      hints, tips, extra_info (from the item and its support record)
+    feedback  feedback, explanations, remediation
+    text      reading texts and stories (exercises[]/problems[] blocks, one document per block)
+v2 core items are merged with their support record (hints, feedback) into
+one document.
+
+Normalisation (normalize_nl): ĳ ligature -> ij, diacritics removed
+(één -> een, reüne -> reune), lower case, apostrophes inside words dropped
+(auto's -> autos), numbers kept whole (3,5 / 1.000).
+
+Compounds: a query word also matches every indexed word that contains it
+(tabel -> verhoudingstabel, tafel -> tafelsom), found by a substring scan
+over the vocabulary, at half weight. Quoted phrases match exact words at
+consecutive positions within one field.
+
+Index file (.cache/text-index.bin): a JSON header followed by raw arrays,
+loaded with array.frombytes, so opening it takes milliseconds:
+    terms            sorted vocabulary, newline separated (in the header)
+    term_*           per term: first posting, document count, positions offset
+    post_doc/post_tf postings: document id and term frequency
+    positions        varint deltas per posting; field = position >> 16
+    doc_*            per document: file, length, line, byte offset, preview
+
+Query syntax:
+    tafel som            both words (AND), compounds included
+    "half uur"           phrase
+    hint:breuk           word in one field (question, option, hint, feedback, text)
+    -klok                exclude
+
+Usage:
+    python3 scripts/text_index.py build
+    python3 scripts/text_index.py search 'hint:"kijk naar" breuk' --grade 5
+    python3 scripts/text_index.py search verhoudingstabel --source data-v2 --json
+
+    from text_index import TextIndex
+    for hit in TextIndex.open().search('"half uur"', limit=20):
+        print(hit.path, hit.line, hit.item_id, hit.score)
+
+The index is rebuilt automatically by search when a source file changed
+(--no-refresh to skip the check).
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import time
+import unicodedata
+from array import array
+from bisect import bisect_right
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+from exercise_corpus import KIND_LEGACY_BLOCKS, KIND_UNKNOWN, iter_raw_items, normalize
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_INDEX_PATH = ROOT / ".cache" / "text-index.bin"
+DEFAULT_SOURCES = ("data/exercises", "data-v2/exercises", "data-v2-enhanced/exercises", "content/nl-NL")
+SKIP_DIRS = {"sessions", "templates", "_shared"}
+
+INDEX_FORMAT_VERSION = 1
+MAGIC = b"TXIX"
+
+FIELDS = ("question", "option", "hint", "feedback", "text")
+FIELD_QUESTION, FIELD_OPTION, FIELD_HINT, FIELD_FEEDBACK, FIELD_TEXT = range(len(FIELDS))
+FIELD_SHIFT = 16          # position = field << 16 | position within the field
+STRING_GAP = 4            # keeps phrases from spanning two strings of one field
+PREVIEW_CHARS = 90
+
+# BM25
+K1 = 1.2
+B = 0.75
+COMPOUND_WEIGHT = 0.5
+MAX_EXPANSIONS = 300
+
+# key -> field; keys not listed inherit the field of their parent
+FIELD_KEYS = {
+    "question": FIELD_QUESTION, "prompt": FIELD_QUESTION, "instruction": FIELD_QUESTION,
+    "vraag": FIELD_QUESTION, "stem": FIELD_QUESTION,
+    "options": FIELD_OPTION, "choices": FIELD_OPTION, "answer": FIELD_OPTION,
+    "solution": FIELD_OPTION, "correct_value": FIELD_OPTION, "accepted_answers": FIELD_OPTION,
+    "word": FIELD_OPTION,
+    "hint": FIELD_HINT, "hints": FIELD_HINT, "tip": FIELD_HINT, "tips": FIELD_HINT,
+    "extra_info": FIELD_HINT, "strategy": FIELD_HINT, "learning_strategy": FIELD_HINT,
+    "feedback": FIELD_FEEDBACK, "explanation": FIELD_FEEDBACK, "uitleg": FIELD_FEEDBACK,
+    "remediation": FIELD_FEEDBACK, "common_errors": FIELD_FEEDBACK, "misconceptions": FIELD_FEEDBACK,
+    "foutanalyse": FIELD_FEEDBACK, "reflectievraag": FIELD_FEEDBACK,
+    "content": FIELD_TEXT, "text": None, "story": FIELD_TEXT, "passage": FIELD_TEXT, "tekst": FIELD_TEXT,
+}
+# never text: ids, enums, media references
+SKIP_KEYS = {"id", "item_id", "type", "schemaVersion", "schema_version", "audio", "image", "src", "url",
+             "taskForm", "misconceptKey", "misconceptKeys", "error_type", "level", "difficulty", "language",
+             "label", "correct_index", "is_correct", "metadata", "adaptive", "display", "settings"}
+
+_APOSTROPHE = re.compile(r"(?<=\w)['’‘`](?=\w)")
+_TOKEN = re.compile(r"\d+(?:[.,]\d+)*|[^\W\d_]+")
+_QUERY = re.compile(r'(-?)(?:(\w+):)?(?:"([^"]*)"|(\S+))')
+
+
+# ----------------------------
+# Normalisation
+# ----------------------------
+
+def normalize_nl(text: str) -> str:
+    """Dutch search form: ĳ -> ij, no diacritics, lower case, no apostrophes inside words"""
+    if not text.isascii():
+        text = text.replace("ĳ", "ij").replace("Ĳ", "IJ")
+        text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    return _APOSTROPHE.sub("", text.lower())
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(normalize_nl(text))
+
+
+# ----------------------------
+# Documents
+# ----------------------------
+
+class _Doc:
+    __slots__ = ("item_id", "fields", "preview")
+
+    def __init__(self, item_id: str):
+        self.item_id = item_id
+        self.fields: List[List[str]] = [[] for _ in FIELDS]
+        self.preview = ""
+
+
+def _walk(value: Any, field: Optional[int], doc: _Doc) -> None:
+    if isinstance(value, str):
+        if field is not None and value.strip():
+            doc.fields[field].append(value)
+    elif isinstance(value, dict):
+        for key, sub in value.items():
+            if key in SKIP_KEYS:
+                continue
+            mapped = FIELD_KEYS.get(key, field)
+            # "text" is the question text inside question, the reading text in a block
+            if key == "text" and field is None:
+                mapped = FIELD_TEXT
+            _walk(sub, mapped if mapped is not None else field, doc)
+    elif isinstance(value, list):
+        for sub in value:
+            _walk(sub, field, doc)
+
+
+def _item_doc(raw: Dict, support: Optional[Dict]) -> _Doc:
+    doc = _Doc(str(raw.get("id", raw.get("item_id", ""))))
+    _walk(raw, None, doc)
+    if support is not None:
+        _walk(support, None, doc)
+    first = next((doc.fields[f] for f in (FIELD_QUESTION, FIELD_TEXT, FIELD_OPTION, FIELD_HINT, FIELD_FEEDBACK)
+                  if doc.fields[f]), [])
+    doc.preview = (first[0] if first else "").strip().replace("\n", " ")[:PREVIEW_CHARS]
+    return doc
+
+
+def _support_records(core_path: Path) -> Dict[str, Dict]:
+    support_path = core_path.with_name(core_path.name[:-len("_core.json")] + "_support.json")
+    if not support_path.exists():
+        return {}
+    with open(support_path, "r", encoding="utf-8-sig") as f:
+        data = json.load(f)
+    return {str(r.get("item_id", r.get("id"))): r for r in iter_raw_items(data)}
+
+
+def file_docs(path: Path) -> Tuple[Optional[Any], List[_Doc]]:
+    """(pack, documents) for one file; pack None when the file is not an exercise file"""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        data = json.load(f)
+    pack = normalize(data, str(path))
+    if pack.kind == KIND_UNKNOWN:
+        return None, []
+
+    support = _support_records(path) if path.name.endswith("_core.json") else {}
+    docs: List[_Doc] = []
+    blocks = None
+    if isinstance(data, dict) and "items" not in data:
+        blocks = data.get("exercises") or data.get("problems")
+    elif pack.kind == KIND_LEGACY_BLOCKS:
+        blocks = data
+
+    if blocks:
+        for block in blocks:
+            if not isinstance(block, dict):
+                continue
+            # the block's own text (reading text, story) is a document of its own
+            rest = {k: v for k, v in block.items() if k not in ("items", "questions")}
+            block_doc = _item_doc(rest, None)
+            block_doc.item_id = f"block:{block.get('id', '')}"
+            if any(block_doc.fields):
+                docs.append(block_doc)
+            for raw in block.get("items", block.get("questions", [])):
+                if isinstance(raw, dict):
+                    docs.append(_item_doc(raw, support.get(str(raw.get("id")))))
+    else:
+        for raw in iter_raw_items(data):
+            docs.append(_item_doc(raw, support.get(str(raw.get("id")))))
+    return pack, [d for d in docs if any(d.fields)]
+
+
+def _locate(text: str, docs: List[_Doc]) -> List[Tuple[int, int]]:
+    """(byte offset, line) of each document in the file text, searched in file order"""
+    out = []
+    newlines = [m.start() for m in re.finditer("\n", text)]
+    cursor = 0
+    for doc in docs:
+        needle = next((s for f in doc.fields for s in f), "")
+        pos = -1
+        for encoded in (json.dumps(needle, ensure_ascii=False)[1:-1], json.dumps(needle)[1:-1]):
+            pos = text.find(encoded, cursor)
+            if pos < 0:
+                pos = text.find(encoded)
+            if pos >= 0:
+                break
+        if pos < 0:
+            out.append((0, 0))
+            continue
+        cursor = pos
+        out.append((len(text[:pos].encode("utf-8")), bisect_right(newlines, pos) + 1))
+    return out
+
+
+def source_files(sources: Sequence[str]) -> List[Path]:
+    files = []
+    for src in sources:
+        root = ROOT / src if not os.path.isabs(src) else Path(src)
+        if not root.is_dir():
+            continue
+        for path in sorted(root.rglob("*.json")):
+            rel = path.relative_to(root).parts
+            if SKIP_DIRS.intersection(rel[:-1]) or path.name in ("index.json", "manifest.json"):
+                continue
+            # support files are merged into their core document
+            if path.name.endswith("_support.json") and path.with_name(
+                    path.name[:-len("_support.json")] + "_core.json").exists():
+                continue
+            files.append(path)
+    return files
+
+
+# ----------------------------
+# Build
+# ----------------------------
+
+def _varint(out: bytearray, n: int) -> None:
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def build_index(sources: Sequence[str] = DEFAULT_SOURCES, output: Path = DEFAULT_INDEX_PATH,
+                verbose: bool = True) -> Dict[str, Any]:
+    """
+    Index all exercise files below the sources and write the index file
+
+    Returns:
+        Header summary (files, documents, terms, bytes, seconds)
+    """
+    t0 = time.perf_counter()
+    files_meta: List[Dict[str, Any]] = []
+    doc_file, doc_len, doc_line, doc_offset = array("I"), array("I"), array("I"), array("I")
+    doc_items: List[str] = []
+    previews = bytearray()
+    preview_start = array("I")
+    # term -> (doc ids, positions), one entry per occurrence, docs ascending
+    occ_docs: Dict[str, array] = defaultdict(lambda: array("I"))
+    occ_pos: Dict[str, array] = defaultdict(lambda: array("I"))
+    scanned: Dict[str, List[int]] = {}
+    errors = 0
+
+    for path in source_files(sources):
+        st = path.stat()
+        scanned[path.relative_to(ROOT).as_posix()] = [st.st_size, st.st_mtime_ns]
+        try:
+            pack, docs = file_docs(path)
+            with open(path, "r", encoding="utf-8-sig") as f:
+                text = f.read()
+        except (OSError, ValueError) as e:
+            errors += 1
+            if verbose:
+                print(f"  ⚠️  {path.relative_to(ROOT)}: {e}")
+            continue
+        if pack is None or not docs:
+            continue
+        file_id = len(files_meta)
+        files_meta.append({
+            "path": path.relative_to(ROOT).as_posix(), "pack": pack.id, "kind": pack.kind,
+            "category": pack.category, "grade": pack.grade if isinstance(pack.grade, int) else None,
+        })
+        for doc, (offset, line) in zip(docs, _locate(text, docs)):
+            doc_id = len(doc_items)
+            length = 0
+            for field, strings in enumerate(doc.fields):
+                pos = 0
+                for s in strings:
+                    for term in tokenize(s):
+                        occ_docs[term].append(doc_id)
+                        occ_pos[term].append((field << FIELD_SHIFT) | min(pos, 0xFFFF))
+                        pos += 1
+                        length += 1
+                    pos += STRING_GAP
+            doc_items.append(doc.item_id)
+            doc_file.append(file_id)
+            doc_len.append(length)
+            doc_line.append(line)
+            doc_offset.append(offset)
+            preview_start.append(len(previews))
+            previews += doc.preview.encode("utf-8")
+    preview_start.append(len(previews))
+
+    terms = sorted(occ_docs)
+    term_doc_start, term_doc_count, term_pos_start = array("I"), array("I"), array("Q")
+    post_doc, post_tf = array("I"), array("I")
+    positions = bytearray()
+    for term in terms:
+        docs_arr, pos_arr = occ_docs[term], occ_pos[term]
+        term_doc_start.append(len(post_doc))
+        term_pos_start.append(len(positions))
+        last_doc, last_pos, tf = -1, 0, 0
+        for d, p in zip(docs_arr, pos_arr):
+            if d != last_doc:
+                if last_doc >= 0:
+                    post_tf.append(tf)
+                post_doc.append(d)
+                last_doc, last_pos, tf = d, 0, 0
+            _varint(positions, p - last_pos)
+            last_pos = p
+            tf += 1
+        post_tf.append(tf)
+        term_doc_count.append(len(post_doc) - term_doc_start[-1])
+    term_pos_start.append(len(positions))
+
+    sections = [
+        ("term_doc_start", term_doc_start), ("term_doc_count", term_doc_count), ("term_pos_start", term_pos_start),
+        ("post_doc", post_doc), ("post_tf", post_tf), ("positions", positions),
+        ("doc_file", doc_file), ("doc_len", doc_len), ("doc_line", doc_line), ("doc_offset", doc_offset),
+        ("preview_start", preview_start), ("previews", previews),
+    ]
+    layout: Dict[str, List[Any]] = {}
+    offset = 0
+    for name, data in sections:
+        nbytes = len(data) * data.itemsize if isinstance(data, array) else len(data)
+        layout[name] = [offset, nbytes, data.typecode if isinstance(data, array) else "B"]
+        offset += nbytes
+
+    header = {
+        "format_version": INDEX_FORMAT_VERSION,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "byteorder": sys.byteorder,
+        "sources": list(sources),
+        "fields": list(FIELDS),
+        "files": files_meta,
+        "scanned": scanned,
+        "doc_items": doc_items,
+        "avg_doc_len": (sum(doc_len) / len(doc_len)) if doc_len else 0.0,
+        "terms": "\n".join(terms),
+        "sections": layout,
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(output.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + len(header_bytes).to_bytes(8, "little"))
+        f.write(header_bytes)
+        for _, data in sections:
+            f.write(data.tobytes() if isinstance(data, array) else bytes(data))
+    os.replace(tmp, output)
+
+    summary = {"files": len(files_meta), "documents": len(doc_items), "terms": len(terms),
+               "postings": len(post_doc), "bytes": output.stat().st_size, "errors": errors,
+               "seconds": round(time.perf_counter() - t0, 2)}
+    return summary
+
+
+# ----------------------------
+# Search
+# ----------------------------
+
+class Hit:
+    __slots__ = ("doc", "score", "path", "pack", "item_id", "line", "offset", "preview")
+
+    def __init__(self, **kw):
+        for k, v in kw.items():
+            setattr(self, k, v)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: getattr(self, k) for k in self.__slots__ if k != "doc"}
+
+
+class _Clause:
+    __slots__ = ("negate", "field", "words", "phrase")
+
+    def __init__(self, negate: bool, field: Optional[int], words: List[str], phrase: bool):
+        self.negate = negate
+        self.field = field
+        self.words = words
+        self.phrase = phrase
+
+
+def parse_query(query: str, default_field: Optional[str] = None) -> List[_Clause]:
+    """Split a query into clauses; raises ValueError on an unknown field"""
+    clauses = []
+    for negate, field_name, phrase, word in _QUERY.findall(query):
+        field_name = field_name or default_field
+        if field_name and field_name not in FIELDS:
+            raise ValueError(f"unknown field '{field_name}' (fields: {', '.join(FIELDS)})")
+        field = FIELDS.index(field_name) if field_name else None
+        words = tokenize(phrase if phrase else word)
+        if not words:
+            continue
+        # a word that normalises to several tokens (zee-egel, 3:15) is a phrase too
+        clauses.append(_Clause(bool(negate), field, words, bool(phrase) or len(words) > 1))
+    return clauses
+
+
+class TextIndex:
+    """Read access to an index file; cheap to open, keeps the arrays in memory"""
+
+    def __init__(self, path: Path = DEFAULT_INDEX_PATH):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            blob = f.read()
+        if blob[:4] != MAGIC:
+            raise ValueError(f"{self.path} is not a text index")
+        header_len = int.from_bytes(blob[4:12], "little")
+        header = json.loads(blob[12:12 + header_len])
+        if header.get("format_version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"{self.path}: index format {header.get('format_version')}, expected {INDEX_FORMAT_VERSION}")
+        self.header = header
+        base = 12 + header_len
+        for name, (offset, nbytes, typecode) in header["sections"].items():
+            raw = blob[base + offset:base + offset + nbytes]
+            if name in ("positions", "previews"):
+                setattr(self, name, raw)
+                continue
+            arr = array(typecode)
+            arr.frombytes(raw)
+            if header["byteorder"] != sys.byteorder:
+                arr.byteswap()
+            setattr(self, name, arr)
+
+        self.files: List[Dict[str, Any]] = header["files"]
+        self.doc_items: List[str] = header["doc_items"]
+        self.avg_doc_len: float = header["avg_doc_len"] or 1.0
+        self._vocab: str = header["terms"]
+        self.terms: List[str] = self._vocab.split("\n") if self._vocab else []
+        self._term_ids = {t: i for i, t in enumerate(self.terms)}
+        # character offset of every term in the joined vocabulary, for substring lookups
+        self._vocab_starts = array("I")
+        pos = 0
+        for t in self.terms:
+            self._vocab_starts.append(pos)
+            pos += len(t) + 1
+
+    @classmethod
+    def open(cls, path: Path = DEFAULT_INDEX_PATH, refresh: bool = True,
+             sources: Sequence[str] = DEFAULT_SOURCES) -> "TextIndex":
+        """Open the index, building or rebuilding it first when missing or stale"""
+        path = Path(path)
+        if not path.exists():
+            build_index(sources, path, verbose=False)
+        index = cls(path)
+        if refresh and index.is_stale():
+            build_index(index.header["sources"], path, verbose=False)
+            index = cls(path)
+        return index
+
+    def is_stale(self) -> bool:
+        """True when a source file was added, removed or changed since the build"""
+        scanned = self.header["scanned"]
+        current = source_files(self.header["sources"])
+        if len(current) != len(scanned):
+            return True
+        for path in current:
+            st = path.stat()
+            if scanned.get(path.relative_to(ROOT).as_posix()) != [st.st_size, st.st_mtime_ns]:
+                return True
+        return False
+
+    # ---- term lookup
+
+    def expand(self, word: str, compounds: bool = True) -> List[Tuple[int, float]]:
+        """(term id, weight) for a query word: the exact term, plus compounds containing it"""
+        out = []
+        exact = self._term_ids.get(word)
+        if exact is not None:
+            out.append((exact, 1.0))
+        if compounds and len(word) >= 3:
+            found = set()
+            for m in re.finditer(re.escape(word), self._vocab):
+                tid = bisect_right(self._vocab_starts, m.start()) - 1
+                if tid != exact and tid not in found:
+                    found.add(tid)
+            ranked = sorted(found, key=lambda t: -self.term_doc_count[t])[:MAX_EXPANSIONS]
+            out.extend((t, COMPOUND_WEIGHT) for t in ranked)
+        return out
+
+    def postings(self, term_id: int) -> Tuple[Sequence[int], Sequence[int]]:
+        start = self.term_doc_start[term_id]
+        end = start + self.term_doc_count[term_id]
+        return self.post_doc[start:end], self.post_tf[start:end]
+
+    def positions_of(self, term_id: int) -> Dict[int, List[int]]:
+        """doc id -> positions (field << 16 | position) for one term"""
+        docs, tfs = self.postings(term_id)
+        data = self.positions
+        i = self.term_pos_start[term_id]
+        out: Dict[int, List[int]] = {}
+        for doc, tf in zip(docs, tfs):
+            pos = 0
+            plist = []
+            for _ in range(tf):
+                shift = value = 0
+                while True:
+                    b = data[i]
+                    i += 1
+                    value |= (b & 0x7F) << shift
+                    if b < 0x80:
+                        break
+                    shift += 7
+                pos += value
+                plist.append(pos)
+            out[doc] = plist
+        return out
+
+    # ---- scoring
+
+    def _bm25(self, term_id: int, weight: float, field: Optional[int]) -> Dict[int, float]:
+        n_docs = len(self.doc_items)
+        df = self.term_doc_count[term_id]
+        idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+        if field is None:
+            docs, tfs = self.postings(term_id)
+            pairs = zip(docs, tfs)
+        else:
+            pairs = ((d, sum(1 for p in plist if p >> FIELD_SHIFT == field))
+                     for d, plist in self.positions_of(term_id).items())
+        scores = {}
+        avg = self.avg_doc_len
+        lengths = self.doc_len
+        for d, tf in pairs:
+            if tf:
+                norm = K1 * (1 - B + B * lengths[d] / avg)
+                scores[d] = weight * idf * tf * (K1 + 1) / (tf + norm)
+        return scores
+
+    def _word_scores(self, word: str, field: Optional[int], compounds: bool) -> Dict[int, float]:
+        best: Dict[int, float] = {}
+        for term_id, weight in self.expand(word, compounds):
+            for d, s in self._bm25(term_id, weight, field).items():
+                if s > best.get(d, 0.0):
+                    best[d] = s
+        return best
+
+    def _phrase_scores(self, words: List[str], field: Optional[int]) -> Dict[int, float]:
+        ids = [self._term_ids.get(w) for w in words]
+        if any(t is None for t in ids):
+            return {}
+        # rarest term first to keep the candidate set small
+        order = sorted(range(len(ids)), key=lambda i: self.term_doc_count[ids[i]])
+        candidates: Optional[set] = None
+        for i in order:
+            docs = set(self.postings(ids[i])[0])
+            candidates = docs if candidates is None else candidates & docs
+            if not candidates:
+                return {}
+        positions = [self.positions_of(t) for t in ids]
+        scores = {}
+        for d in candidates:
+            starts = set(positions[0][d])
+            for offset, plist in enumerate(positions[1:], 1):
+                starts &= {p - offset for p in plist[d]}
+                if not starts:
+                    break
+            if field is not None:
+                starts = {p for p in starts if p >> FIELD_SHIFT == field}
+            if starts:
+                scores[d] = sum(self._bm25_single(t, d) for t in ids) * 1.5
+        return scores
+
+    def _bm25_single(self, term_id: int, doc: int) -> float:
+        docs, tfs = self.postings(term_id)
+        lo, hi = 0, len(docs)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if docs[mid] < doc:
+                lo = mid + 1
+            else:
+                hi = mid
+        tf = tfs[lo] if lo < len(docs) and docs[lo] == doc else 0
+        n_docs = len(self.doc_items)
+        df = self.term_doc_count[term_id]
+        idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+        norm = K1 * (1 - B + B * self.doc_len[doc] / self.avg_doc_len)
+        return idf * tf * (K1 + 1) / (tf + norm) if tf else 0.0
+
+    def search(self, query: str, limit: int = 20, field: Optional[str] = None, compounds: bool = True,
+               category: Optional[str] = None, grade: Optional[int] = None, source: Optional[str] = None,
+               path_contains: Optional[str] = None) -> List[Hit]:
+        """
+        Ranked documents for a query (all clauses must match)
+
+        Args:
+            query: Words, "phrases", field:word and -exclusions
+            limit: Maximum number of hits
+            field: Default field for clauses without one
+            compounds: Let words also match compounds that contain them
+            category, grade: Pack metadata filters
+            source: Top-level directory filter, e.g. 'data-v2' or 'content'
+            path_contains: Substring filter on the file path
+
+        Returns:
+            Hits, best first
+        """
+        clauses = parse_query(query, field)
+        scores: Optional[Dict[int, float]] = None
+        excluded: set = set()
+        for clause in clauses:
+            if clause.phrase:
+                found = self._phrase_scores(clause.words, clause.field)
+            else:
+                found = self._word_scores(clause.words[0], clause.field, compounds)
+            if clause.negate:
+                excluded.update(found)
+                continue
+            if scores is None:
+                scores = found
+            else:
+                scores = {d: s + found[d] for d, s in scores.items() if d in found}
+            if not scores:
+                return []
+        if not scores:
+            return []
+
+        allowed_files = None
+        if category or grade is not None or source or path_contains:
+            allowed_files = set()
+            for i, f in enumerate(self.files):
+                if category and f["category"] != category:
+                    continue
+                if grade is not None and f["grade"] != grade:
+                    continue
+                if source and f["path"].split("/", 1)[0] != source:
+                    continue
+                if path_contains and path_contains not in f["path"]:
+                    continue
+                allowed_files.add(i)
+
+        ranked = sorted(((s, d) for d, s in scores.items() if d not in excluded
+                         and (allowed_files is None or self.doc_file[d] in allowed_files)), reverse=True)
+        return [self.hit(d, s) for s, d in ranked[:limit]]
+
+    def hit(self, doc: int, score: float = 0.0) -> Hit:
+        f = self.files[self.doc_file[doc]]
+        preview = bytes(self.previews[self.preview_start[doc]:self.preview_start[doc + 1]]).decode("utf-8")
+        return Hit(doc=doc, score=round(score, 3), path=f["path"], pack=f["pack"], item_id=self.doc_items[doc],
+                   line=self.doc_line[doc], offset=self.doc_offset[doc], preview=preview)
+
+    def docs_with(self, word: str, compounds: bool = False) -> Iterator[Hit]:
+        """Every document containing a word (for dedupe/review/coverage tools)"""
+        seen = set()
+        for term_id, _ in self.expand(normalize_nl(word), compounds):
+            for d in self.postings(term_id)[0]:
+                if d not in seen:
+                    seen.add(d)
+                    yield self.hit(d)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"built_at": self.header["built_at"], "files": len(self.files), "documents": len(self.doc_items),
+                "terms": len(self.terms), "postings": len(self.post_doc), "bytes": self.path.stat().st_size}
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+
+def cmd_build(args) -> int:
+    summary = build_index(args.sources or DEFAULT_SOURCES, Path(args.index))
+    print(f"🔎 Indexed {summary['documents']} document(s) from {summary['files']} file(s): "
+          f"{summary['terms']} terms, {summary['bytes'] / 1e6:.1f} MB in {summary['seconds']}s -> {args.index}")
+    if summary["errors"]:
+        print(f"⚠️  {summary['errors']} file(s) could not be read and are not indexed")
+    return 0
+
+
+def cmd_search(args) -> int:
+    t0 = time.perf_counter()
+    index = TextIndex.open(Path(args.index), refresh=not args.no_refresh)
+    t_open = time.perf_counter() - t0
+    try:
+        hits = index.search(args.query, limit=args.limit, field=args.field, compounds=not args.exact,
+                            category=args.category, grade=args.grade, source=args.source, path_contains=args.path)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+    t_query = time.perf_counter() - t0 - t_open
+
+    if args.json:
+        print(json.dumps([h.to_dict() for h in hits], ensure_ascii=False, indent=2))
+        return 0 if hits else 1
+    for h in hits:
+        print(f"{h.score:>7.2f}  {h.path}:{h.line}  #{h.item_id}")
+        print(f"         {h.preview}")
+    print(f"\n{len(hits)} hit(s) (open {t_open * 1000:.0f} ms, query {t_query * 1000:.1f} ms)")
+    return 0 if hits else 1
+
+
+def cmd_stats(args) -> int:
+    index = TextIndex(Path(args.index))
+    for k, v in index.stats().items():
+        print(f"  {k}: {v}")
+    print(f"  stale: {index.is_stale()}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text index over all exercise text")
+    parser.add_argument("--index", default=str(DEFAULT_INDEX_PATH), help="Index file")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    b = sub.add_parser("build", help="(Re)build the index")
+    b.add_argument("sources", nargs="*", help=f"Directories (default: {' '.join(DEFAULT_SOURCES)})")
+    b.set_defaults(func=cmd_build)
+
+    s = sub.add_parser("search", help="Ranked search")
+    s.add_argument("query")
+    s.add_argument("--limit", "-n", type=int, default=20)
+    s.add_argument("--field", choices=FIELDS, help="Default field for the query words")
+    s.add_argument("--exact", action="store_true", help="No compound matches")
+    s.add_argument("--category")
+    s.add_argument("--grade", type=int)
+    s.add_argument("--source", help="data, data-v2, data-v2-enhanced or content")
+    s.add_argument("--path", help="Only files whose path contains this")
+    s.add_argument("--json", action="store_true")
+    s.add_argument("--no-refresh", action="store_true", help="Do not rebuild a stale index")
+    s.set_defaults(func=cmd_search)
+
+    st = sub.add_parser("stats", help="Index size and freshness")
+    st.set_defaults(func=cmd_stats)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+token_budget.py — output-token planning for run_prompt_packs.py
+
+Learns completion tokens per generated exercise for each (domain, topic)
+and turns it into a per-pack plan: max_tokens per request and, when a pack
+does not fit comfortably in one completion, a split into sub-requests of k
+items that run in parallel and are merged (with in-pack dedupe) before
+validation.
+
+Sources, most accurate first:
+  - telemetry: model_call spans (completion_tokens, finish_reason=stop)
+    paired with the json_parse span that follows them (items)
+  - phase state files: packs with status ok -> item sizes of their content
+    file, converted with the chars/token ratio measured from telemetry
+  - run_prompt_packs.py records every successful completion as it goes
+
+The model is kept in state/token_budget.json:
+
+  {"version": 1, "chars_per_token": 3.3,
+   "stats": {"getal-en-bewerkingen/delen-en-deeltafels": {"tokens": 81234, "items": 600, "samples": 12}}}
+
+  python scripts/token_budget.py learn --telemetry state/telemetry.ndjson --state state/phase1.state.json
+    (rebuilds the model from these sources; completions recorded during runs
+    are in the telemetry log as well)
+  python scripts/token_budget.py plan getal-en-bewerkingen delen-en-deeltafels --count 50
+  python scripts/token_budget.py show
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import json
+import math
+import os
+import sys
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_BUDGET_FILE = os.path.join("state", "token_budget.json")
+
+# Before anything is learned: ~500 chars per pretty-printed content item
+DEFAULT_TOKENS_PER_ITEM = 160.0
+DEFAULT_CHARS_PER_TOKEN = 3.2
+
+# Prior weight (in items) of the domain/global estimate for a sparse topic
+PRIOR_ITEMS = 20
+# Head room over the expected completion size, and fixed per-request overhead
+SAFETY_FACTOR = 1.3
+REQUEST_OVERHEAD_TOKENS = 120
+# A request planned above this share of the cap is split
+SPLIT_AT = 0.8
+
+
+@dataclasses.dataclass
+class Plan:
+    """How one pack is generated: chunk sizes (sum = count) and max_tokens per chunk"""
+    count: int
+    chunks: List[int]
+    max_tokens: int
+    tokens_per_item: float
+    source: str
+
+    @property
+    def chunked(self) -> bool:
+        return len(self.chunks) > 1
+
+
+def _key(domain: str, topic: str) -> str:
+    return f"{domain}/{topic}"
+
+
+class TokenBudget:
+    """Tokens-per-item estimates per (domain, topic), persisted as JSON"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_BUDGET_FILE):
+        self.path = path
+        self.chars_per_token = DEFAULT_CHARS_PER_TOKEN
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.chars_per_token = float(data.get("chars_per_token", DEFAULT_CHARS_PER_TOKEN))
+                self.stats = data.get("stats", {})
+            except (OSError, ValueError):
+                self.stats = {}
+
+    # ----------------------------
+    # Learning
+    # ----------------------------
+
+    def record(self, domain: str, topic: str, completion_tokens: int, items: int) -> None:
+        """One finished (not truncated) completion that produced `items` items"""
+        if not completion_tokens or not items:
+            return
+        with self._lock:
+            s = self.stats.setdefault(_key(domain, topic), {"tokens": 0, "items": 0, "samples": 0})
+            s["tokens"] += int(completion_tokens)
+            s["items"] += int(items)
+            s["samples"] += 1
+
+    def learn_from_telemetry(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Pair model_call spans with the json_parse that follows them (same run,
+        pack and chunk); domain/topic come from the pack_done event of that pack.
+        Returns the number of completions learned from.
+        """
+        pending: Dict[Tuple[str, str, Any], Dict[str, Any]] = {}
+        samples: Dict[Tuple[str, str], List[Tuple[int, int, int]]] = defaultdict(list)
+        meta: Dict[Tuple[str, str], Tuple[str, str]] = {}
+
+        for rec in records:
+            where = (rec.get("run", ""), rec.get("pack", ""))
+            attrs = rec.get("attrs") or {}
+            name = rec.get("name")
+            # parallel chunks of one pack interleave; their spans carry a chunk number
+            call_key = where + (attrs.get("chunk"),)
+            if name == "model_call" and rec.get("status") == "ok":
+                pending[call_key] = attrs
+            elif name == "json_parse" and call_key in pending:
+                call = pending.pop(call_key)
+                if rec.get("status") == "ok" and call.get("finish_reason") == "stop" \
+                        and isinstance(call.get("completion_tokens"), int) and attrs.get("items"):
+                    samples[where].append((call["completion_tokens"], int(attrs["items"]), int(attrs.get("chars") or 0)))
+            elif name == "pack_done" and attrs.get("domain") and attrs.get("topic"):
+                meta[where] = (attrs["domain"], attrs["topic"])
+
+        learned = 0
+        total_chars = total_tokens = 0
+        for where, entries in samples.items():
+            if where not in meta:
+                continue
+            for tokens, items, chars in entries:
+                self.record(meta[where][0], meta[where][1], tokens, items)
+                learned += 1
+                if chars:
+                    total_chars += chars
+                    total_tokens += tokens
+        if total_tokens:
+            self.chars_per_token = total_chars / total_tokens
+        return learned
+
+    def learn_from_content(self, domain: str, topic: str, items: List[Any]) -> None:
+        """Estimate from an accepted content file (no token counts available)"""
+        if not items:
+            return
+        chars = sum(len(json.dumps(it, ensure_ascii=False, indent=2)) for it in items)
+        self.record(domain, topic, int(chars / self.chars_per_token), len(items))
+
+    # ----------------------------
+    # Estimating + planning
+    # ----------------------------
+
+    def _pooled(self, keys: Iterable[str]) -> Tuple[float, float]:
+        tokens = items = 0.0
+        for k in keys:
+            s = self.stats[k]
+            tokens += s["tokens"]
+            items += s["items"]
+        return tokens, items
+
+    def tokens_per_item(self, domain: str, topic: str) -> Tuple[float, str]:
+        """
+        Smoothed estimate: the topic's own ratio shrunk towards its domain's
+        (and that towards the global one, then the default) by PRIOR_ITEMS.
+        """
+        with self._lock:
+            g_tok, g_items = self._pooled(self.stats)
+            global_tpi = (g_tok + DEFAULT_TOKENS_PER_ITEM * PRIOR_ITEMS) / (g_items + PRIOR_ITEMS)
+
+            d_tok, d_items = self._pooled(k for k in self.stats if k.startswith(domain + "/"))
+            domain_tpi = (d_tok + global_tpi * PRIOR_ITEMS) / (d_items + PRIOR_ITEMS)
+
+            s = self.stats.get(_key(domain, topic))
+            if s and s["items"]:
+                tpi = (s["tokens"] + domain_tpi * PRIOR_ITEMS) / (s["items"] + PRIOR_ITEMS)
+                return tpi, f"topic ({s['samples']} sample(s))"
+        if d_items:
+            return domain_tpi, "domain"
+        if g_items:
+            return global_tpi, "global"
+        return DEFAULT_TOKENS_PER_ITEM, "default"
+
+    def plan(self, domain: str, topic: str, count: int, max_tokens_cap: int,
+             chunk_size: int = 0) -> Plan:
+        """
+        Args:
+            count: Items the pack needs
+            max_tokens_cap: Highest max_tokens a single request may use
+            chunk_size: Force at most this many items per request (0 = by budget)
+        """
+        tpi, source = self.tokens_per_item(domain, topic)
+        per_item = tpi * SAFETY_FACTOR
+
+        fits = max(1, int((max_tokens_cap * SPLIT_AT - REQUEST_OVERHEAD_TOKENS) // per_item))
+        k = min(count, fits, chunk_size) if chunk_size > 0 else min(count, fits)
+        n_chunks = max(1, math.ceil(count / k))
+        # even split: 50 at k=20 -> 17/17/16 rather than 20/20/10
+        base, extra = divmod(count, n_chunks)
+        chunks = [base + (1 if i < extra else 0) for i in range(n_chunks)]
+
+        max_tokens = min(max_tokens_cap, int(math.ceil(max(chunks) * per_item + REQUEST_OVERHEAD_TOKENS)))
+        return Plan(count=count, chunks=chunks, max_tokens=max_tokens, tokens_per_item=round(tpi, 1), source=source)
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            payload = {"version": 1, "chars_per_token": round(self.chars_per_token, 3), "stats": self.stats}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+
+def learn_from_state_files(budget: TokenBudget, state_paths: List[str]) -> int:
+    """Add estimates for every ok pack of the given phase state files"""
+    learned = 0
+    for state_path in state_paths:
+        if not os.path.exists(state_path):
+            continue
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        for entry in state.values():
+            out_file = (entry.get("out_file") or "").replace("\\", "/")
+            if entry.get("status") != "ok" or not os.path.exists(out_file):
+                continue
+            parts = out_file.split("/")
+            try:
+                # content/nl-NL/<domain>/groep-<g>/<level>/topics/<topic>/exercises.json
+                domain, topic = parts[parts.index("topics") - 3], parts[parts.index("topics") + 1]
+                with open(out_file, "r", encoding="utf-8-sig") as f:
+                    items = json.load(f)
+            except (ValueError, IndexError, OSError):
+                continue
+            if isinstance(items, list):
+                budget.learn_from_content(domain, topic, items)
+                learned += 1
+    return learned
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Output-token budget model for run_prompt_packs.py")
+    ap.add_argument("--budget", default=DEFAULT_BUDGET_FILE, help=f"Model file (default: {DEFAULT_BUDGET_FILE})")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    lp = sub.add_parser("learn", help="Learn tokens/item from telemetry and phase state files")
+    lp.add_argument("--telemetry", default=None, help="NDJSON telemetry log")
+    lp.add_argument("--state", action="append", default=[], help="Phase state file (repeatable)")
+    lp.add_argument("--keep", action="store_true",
+                    help="Add to the current model instead of rebuilding it (sources would be counted twice)")
+
+    pp = sub.add_parser("plan", help="Show the plan for one pack")
+    pp.add_argument("domain")
+    pp.add_argument("topic")
+    pp.add_argument("--count", type=int, default=50)
+    pp.add_argument("--max-tokens", type=int, default=14000, help="Cap per request")
+    pp.add_argument("--chunk-size", type=int, default=0)
+
+    sub.add_parser("show", help="Print learned tokens/item per topic")
+
+    args = ap.parse_args()
+    budget = TokenBudget(args.budget)
+
+    if args.cmd == "learn":
+        if not args.keep:
+            budget.stats = {}
+        n_tel = n_state = 0
+        if args.telemetry and os.path.exists(args.telemetry):
+            from run_telemetry import read_records
+            n_tel = budget.learn_from_telemetry(read_records(args.telemetry))
+        n_state = learn_from_state_files(budget, args.state)
+        budget.save()
+        print(f"Learned from {n_tel} completion(s) and {n_state} accepted pack(s) -> {args.budget}")
+        return 0
+
+    if args.cmd == "plan":
+        plan = budget.plan(args.domain, args.topic, args.count, args.max_tokens, args.chunk_size)
+        print(f"{args.domain}/{args.topic}: {plan.tokens_per_item} tokens/item ({plan.source})")
+        print(f"  chunks={plan.chunks} max_tokens={plan.max_tokens}")
+        return 0
+
+    print(f"chars/token: {budget.chars_per_token:.2f}")
+    for key, s in sorted(budget.stats.items()):
+        print(f"  {key:60} {s['tokens'] / s['items']:7.1f} tokens/item  ({s['items']} items, {s['samples']} sample(s))")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
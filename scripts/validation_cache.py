@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Validation Result Cache
+=======================
+
+Persistent cache for ExerciseValidator results, shared by
+comprehensive_validation.py and publish-approved.py.
+
+Entries are keyed by:
+- sha256 of the core file
+- sha256 of the support file (or "-" when there is none)
+- validator ruleset version (RULESET_VERSION + hash of the validator source)
+- strict mode flag
+
+so an unchanged core/support pair is never validated twice, while any edit
+to either file, a ruleset bump or a different strictness produces a miss.
+
+File hashes are memoised by (size, mtime) so a warm run only stats files
+instead of re-reading them.
+
+Usage:
+    cache = ValidationCache()                 # default: .cache/validation-cache.json
+    validator = ExerciseValidator(cache=cache)
+    result = validator.validate_file(core, support)
+    cache.save()
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CACHE_PATH = ROOT / ".cache" / "validation-cache.json"
+
+# Bump when the on-disk layout of the cache file changes
+CACHE_FORMAT_VERSION = 1
+
+
+def sha256_file(path: str) -> str:
+    """Return the hex sha256 of a file, reading it in 1 MB chunks"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ValidationCache:
+    """Content-addressed store of serialised ValidationResult dicts"""
+
+    def __init__(self, cache_path: str = None, max_entries: int = 5000):
+        """
+        Args:
+            cache_path: Path to cache JSON file (default: .cache/validation-cache.json)
+            max_entries: Oldest entries beyond this count are dropped on save
+        """
+        self.cache_path = Path(cache_path) if cache_path else DEFAULT_CACHE_PATH
+        self.max_entries = max_entries
+
+        self.entries: Dict[str, Dict] = {}
+        self.file_hashes: Dict[str, Dict] = {}
+        self.dirty = False
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+
+        self._load()
+
+    def _load(self):
+        if not self.cache_path.exists():
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            # Corrupt or unreadable cache: start fresh, it is only a cache
+            return
+
+        if data.get('format_version') != CACHE_FORMAT_VERSION:
+            return
+
+        self.entries = data.get('entries', {})
+        self.file_hashes = data.get('file_hashes', {})
+
+    def file_hash(self, path: Optional[str]) -> str:
+        """Hash a file, reusing the stored digest when size and mtime are unchanged"""
+        if not path or not os.path.exists(path):
+            return "-"
+
+        abs_path = os.path.abspath(path)
+        st = os.stat(abs_path)
+        known = self.file_hashes.get(abs_path)
+        if known and known.get('size') == st.st_size and known.get('mtime_ns') == st.st_mtime_ns:
+            return known['sha256']
+
+        digest = sha256_file(abs_path)
+        self.file_hashes[abs_path] = {
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'sha256': digest,
+        }
+        self.dirty = True
+        return digest
+
+    def make_key(self, core_path: str, support_path: Optional[str],
+                 ruleset_version: str, strict_mode: bool) -> str:
+        """Build the cache key for a core/support pair"""
+        return ":".join([
+            self.file_hash(core_path),
+            self.file_hash(support_path),
+            ruleset_version,
+            "strict" if strict_mode else "default",
+        ])
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the stored result dict for key, or None"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        entry['last_used'] = datetime.now().isoformat()
+        self.dirty = True
+        return entry['result']
+
+    def put(self, key: str, result: Dict):
+        """Store a serialised ValidationResult"""
+        now = datetime.now().isoformat()
+        self.entries[key] = {
+            'result': result,
+            'stored_at': now,
+            'last_used': now,
+        }
+        self.dirty = True
+
+    def save(self):
+        """Write the cache to disk (atomic replace) if anything changed"""
+        if not self.dirty:
+            return
+
+        if len(self.entries) > self.max_entries:
+            keep = sorted(self.entries.items(), key=lambda kv: kv[1].get('last_used', ''),
+                          reverse=True)[:self.max_entries]
+            self.entries = dict(keep)
+
+        # Forget hashes of files that no longer exist
+        self.file_hashes = {p: h for p, h in self.file_hashes.items() if os.path.exists(p)}
+
+        payload = {
+            'format_version': CACHE_FORMAT_VERSION,
+            'saved_at': datetime.now().isoformat(),
+            'entries': self.entries,
+            'file_hashes': self.file_hashes,
+        }
+
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(self.cache_path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+        self.dirty = False
+
+    def stats_line(self) -> str:
+        """One-line hit/miss summary for CLI output"""
+        return f"Validation cache: {self.hits} hit(s), {self.misses} miss(es) ({self.cache_path})"
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+Streaming Validation Report
+===========================
+
+Report sink for comprehensive_validation.py. Results are added one at a
+time and nothing keeps the full result list, so memory stays flat however
+many files are validated:
+
+- issues go to an NDJSON file as they arrive (one line per issue)
+- the summary (totals, per exercise category, per issue category) is
+  kept as running counters
+- the HTML report is a small static page plus paged data files:
+      validation-report.html          summary + viewer (opens instantly)
+      validation-report-data/
+          summary.json
+          issues.ndjson
+          pages/<view>/<n>.js         one page of results, loaded on demand
+
+Views: all results (in validation order), the worst results by quality
+score, one per exercise category (bl, gb, ...) and one per severity
+(results that have at least one issue of that severity, showing only
+those issues). Pages are written as soon as they are full (PAGE_SIZE
+results or PAGE_ISSUES issues), so at most one page per view is buffered.
+
+Page files are JSON wrapped in a function call (JSONP) rather than plain
+.json, because browsers refuse fetch() on file:// URLs and the report is
+usually opened straight from disk.
+
+Usage:
+    sink = ReportSink(html_path="validation-report.html", ndjson_path=None)
+    for result in results:
+        sink.add(result)
+    sink.close()
+    summary = sink.summary
+"""
+
+import heapq
+import html
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO
+
+SEVERITIES = ("critical", "error", "warning", "info")
+PAGE_SIZE = 100           # results per page
+PAGE_ISSUES = 2000        # a page is also closed once it holds this many issues
+FAILED_PREVIEW = 10
+
+
+class ReportSummary:
+    """Running totals over validation results"""
+
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.quality_sum = 0.0
+        self.severity_counts = {s: 0 for s in SEVERITIES}
+        self.by_category: Dict[str, Dict[str, Any]] = {}
+        self.by_issue_category: Dict[str, Dict[str, int]] = {}
+        # first failed results, with their critical issues only, for the console
+        self.failed_preview: List[Dict[str, Any]] = []
+
+    @property
+    def failed(self) -> int:
+        return self.total - self.passed
+
+    @property
+    def avg_quality(self) -> float:
+        return self.quality_sum / self.total if self.total else 0.0
+
+    @property
+    def all_passed(self) -> bool:
+        return self.passed == self.total
+
+    def add(self, result: Dict[str, Any], category: str) -> None:
+        self.total += 1
+        self.passed += bool(result['passed'])
+        self.quality_sum += result['quality_score']
+
+        cat = self.by_category.setdefault(category, {
+            'total': 0, 'passed': 0, 'quality_sum': 0.0, **{s: 0 for s in SEVERITIES}})
+        cat['total'] += 1
+        cat['passed'] += bool(result['passed'])
+        cat['quality_sum'] += result['quality_score']
+
+        for issue in result['issues']:
+            sev = issue['severity']
+            self.severity_counts[sev] = self.severity_counts.get(sev, 0) + 1
+            cat[sev] = cat.get(sev, 0) + 1
+            per = self.by_issue_category.setdefault(issue['category'], {s: 0 for s in SEVERITIES})
+            per[sev] = per.get(sev, 0) + 1
+
+        if not result['passed'] and len(self.failed_preview) < FAILED_PREVIEW:
+            self.failed_preview.append({
+                **{k: result[k] for k in ('exercise_id', 'file_path', 'quality_score')},
+                'critical': [i for i in result['issues'] if i['severity'] == 'critical'][:3],
+            })
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'total': self.total,
+            'passed': self.passed,
+            'failed': self.failed,
+            'avg_quality': round(self.avg_quality, 1),
+            'severity_counts': self.severity_counts,
+            'by_category': {
+                name: {**{k: v for k, v in c.items() if k != 'quality_sum'},
+                       'avg_quality': round(c['quality_sum'] / c['total'], 1) if c['total'] else 0.0}
+                for name, c in sorted(self.by_category.items())
+            },
+            'by_issue_category': dict(sorted(self.by_issue_category.items())),
+        }
+
+
+def exercise_category(file_path: str) -> str:
+    """Category code of a result: the directory of its file (data-v2/exercises/<cat>/...)"""
+    parent = Path(file_path).parent.name
+    return parent or "-"
+
+
+class _PagedView:
+    """Buffers one page of a view and writes it when full"""
+
+    def __init__(self, directory: Path, name: str, page_size: int):
+        self.directory = directory / name
+        self.name = name
+        self.page_size = page_size
+        self.buffer: List[Dict[str, Any]] = []
+        self.buffered_issues = 0
+        self.pages = 0
+        self.count = 0
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        self.buffer.append(entry)
+        self.buffered_issues += len(entry['issues'])
+        self.count += 1
+        if len(self.buffer) >= self.page_size or self.buffered_issues >= PAGE_ISSUES:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.buffer:
+            return
+        write_page(self.directory, self.name, self.pages, self.buffer)
+        self.pages += 1
+        self.buffer = []
+        self.buffered_issues = 0
+
+
+def write_page(directory: Path, view: str, number: int, entries: List[Dict[str, Any]]) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    payload = json.dumps(entries, ensure_ascii=False, separators=(',', ':'))
+    with open(directory / f"{number}.js", 'w', encoding='utf-8') as f:
+        f.write(f"reportPage({json.dumps(view)},{number},{payload});\n")
+
+
+class ReportSink:
+    """Consumes ValidationResults one by one and writes NDJSON and/or a paged HTML report"""
+
+    def __init__(self, html_path: Optional[str] = None, ndjson_path: Optional[str] = None,
+                 page_size: int = PAGE_SIZE):
+        """
+        Args:
+            html_path: HTML report path; its data goes to <stem>-data/ next to it
+            ndjson_path: Extra NDJSON issue stream (the HTML report always has its own)
+            page_size: Results per page file
+        """
+        self.summary = ReportSummary()
+        self.page_size = page_size
+        self.html_path = Path(html_path) if html_path else None
+        self._streams: List[TextIO] = []
+        self._views: Dict[str, _PagedView] = {}
+        self._worst: List[Any] = []
+        self._seq = 0
+
+        if self.html_path:
+            self.data_dir = self.html_path.with_name(self.html_path.stem + "-data")
+            self._tmp_dir = self.data_dir.with_name(self.data_dir.name + ".tmp")
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+            (self._tmp_dir / "pages").mkdir(parents=True)
+            self._streams.append(open(self._tmp_dir / "issues.ndjson", 'w', encoding='utf-8'))
+        if ndjson_path:
+            Path(ndjson_path).parent.mkdir(parents=True, exist_ok=True)
+            self._streams.append(open(ndjson_path, 'w', encoding='utf-8'))
+
+    def __enter__(self) -> "ReportSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _view(self, name: str) -> _PagedView:
+        view = self._views.get(name)
+        if view is None:
+            view = self._views[name] = _PagedView(self._tmp_dir / "pages", name, self.page_size)
+        return view
+
+    def add(self, result) -> None:
+        """Record one ValidationResult"""
+        d = result.to_dict()
+        category = exercise_category(d['file_path'])
+        self.summary.add(d, category)
+
+        for stream in self._streams:
+            for issue in d['issues']:
+                stream.write(json.dumps({
+                    'exercise_id': d['exercise_id'], 'file_path': d['file_path'], 'category_code': category,
+                    'quality_score': d['quality_score'], 'passed': d['passed'], **issue,
+                }, ensure_ascii=False) + "\n")
+
+        if not self.html_path:
+            return
+        d['category_code'] = category
+        self._view('all').add(d)
+        self._view(f"cat-{category}").add(d)
+        for sev in SEVERITIES:
+            issues = [i for i in d['issues'] if i['severity'] == sev]
+            if issues:
+                self._view(f"sev-{sev}").add({**d, 'issues': issues})
+        # bounded max-heap on -score keeps the page_size lowest scores
+        self._seq += 1
+        item = (-d['quality_score'], self._seq, d)
+        if len(self._worst) < self.page_size:
+            heapq.heappush(self._worst, item)
+        elif item > self._worst[0]:
+            heapq.heapreplace(self._worst, item)
+
+    def close(self) -> None:
+        """Flush pages, write summary and HTML (atomically replacing an earlier report)"""
+        for stream in self._streams:
+            stream.close()
+        self._streams = []
+        if not self.html_path or not self._tmp_dir.exists():
+            return
+
+        for view in self._views.values():
+            view.flush()
+        worst = [d for _, _, d in sorted(self._worst, reverse=True)]
+        if worst:
+            write_page(self._tmp_dir / "pages" / "worst", "worst", 0, worst)
+
+        views = {name: {'pages': v.pages, 'count': v.count} for name, v in sorted(self._views.items())}
+        views['worst'] = {'pages': 1 if worst else 0, 'count': len(worst)}
+        summary = {**self.summary.to_dict(), 'generated_at': datetime.now().isoformat(timespec='seconds'),
+                   'page_size': self.page_size, 'views': views}
+        with open(self._tmp_dir / "summary.json", 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+        os.replace(self._tmp_dir, self.data_dir)
+        tmp = self.html_path.with_name(self.html_path.name + ".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(render_html(summary, self.data_dir.name))
+        os.replace(tmp, self.html_path)
+
+
+# ----------------------------
+# HTML
+# ----------------------------
+
+REPORT_CSS = """
+        body { font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
+               padding: 20px; background: #f5f5f5; }
+        .container { max-width: 1200px; margin: 0 auto; background: white; padding: 30px;
+                    border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
+        h1 { color: #333; }
+        .summary { background: #f8f9fa; padding: 20px; border-radius: 6px; margin: 20px 0; }
+        .summary-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+                       gap: 15px; margin-top: 15px; }
+        .summary-card { background: white; padding: 15px; border-radius: 6px; border-left: 4px solid #007bff; }
+        .summary-card.passed { border-left-color: #28a745; }
+        .summary-card.failed { border-left-color: #dc3545; }
+        .summary-card h3 { margin: 0 0 10px 0; font-size: 14px; color: #666; }
+        .summary-card .value { font-size: 28px; font-weight: bold; color: #333; }
+        table.categories { border-collapse: collapse; width: 100%; margin: 10px 0 20px 0; font-size: 14px; }
+        table.categories th, table.categories td { padding: 6px 10px; border-bottom: 1px solid #dee2e6; text-align: right; }
+        table.categories th:first-child, table.categories td:first-child { text-align: left; }
+        .controls { display: flex; gap: 10px; align-items: center; margin: 15px 0; flex-wrap: wrap; }
+        .controls select, .controls input, .controls button { padding: 6px 10px; font-size: 14px; }
+
+        .exercise { border: 1px solid #dee2e6; border-radius: 6px; margin: 15px 0; overflow: hidden; }
+        .exercise-header { background: #f8f9fa; padding: 15px; cursor: pointer; }
+        .exercise-header:hover { background: #e9ecef; }
+        .exercise-header.passed { border-left: 4px solid #28a745; }
+        .exercise-header.failed { border-left: 4px solid #dc3545; }
+        .exercise-id { font-weight: bold; font-size: 16px; }
+        .exercise-path { clear: both; font-size: 12px; color: #666; margin-top: 5px; }
+        .quality-score { float: right; font-weight: bold; }
+        .quality-high { color: #28a745; }
+        .quality-medium { color: #ffc107; }
+        .quality-low { color: #dc3545; }
+
+        .exercise-body { padding: 15px; background: white; }
+        .issue { padding: 10px; margin: 8px 0; border-radius: 4px; border-left: 4px solid; }
+        .issue.critical { background: #f8d7da; border-left-color: #dc3545; }
+        .issue.error { background: #fff3cd; border-left-color: #ffc107; }
+        .issue.warning { background: #fff8e1; border-left-color: #ff9800; }
+        .issue.info { background: #e7f3ff; border-left-color: #2196f3; }
+        .issue-header { font-weight: bold; margin-bottom: 5px; }
+        .issue-location { color: #666; font-size: 14px; }
+        .issue-suggestion { margin-top: 8px; padding: 8px; background: rgba(255,255,255,0.5);
+                          border-radius: 4px; font-style: italic; }
+"""
+
+REPORT_JS = """
+const SUMMARY = JSON.parse(document.getElementById('summary').textContent);
+const DATA = document.body.dataset.dir;
+const pages = {};
+let view = 'worst', page = 0;
+
+function reportPage(name, number, entries) {
+    pages[name + '/' + number] = entries;
+    if (name === view && number === page) render();
+}
+
+function el(tag, cls, text) {
+    const e = document.createElement(tag);
+    if (cls) e.className = cls;
+    if (text !== undefined) e.textContent = text;
+    return e;
+}
+
+function show() {
+    const key = view + '/' + page;
+    const info = SUMMARY.views[view] || {pages: 0, count: 0};
+    document.getElementById('pageinfo').textContent =
+        info.pages ? `page ${page + 1} of ${info.pages} (${info.count} results)` : 'no results';
+    if (!info.pages || pages[key]) { render(); return; }
+    document.getElementById('results').textContent = 'Loading…';
+    const s = document.createElement('script');
+    s.src = `${DATA}/pages/${view}/${page}.js`;
+    document.head.appendChild(s);
+}
+
+function render() {
+    const box = document.getElementById('results');
+    box.textContent = '';
+    const filter = document.getElementById('filter').value.toLowerCase();
+    for (const r of pages[view + '/' + page] || []) {
+        if (filter && !(r.exercise_id + ' ' + r.file_path + ' ' +
+                        r.issues.map(i => i.category + ' ' + i.message).join(' ')).toLowerCase().includes(filter)) continue;
+        const ex = el('div', 'exercise');
+        const head = el('div', 'exercise-header ' + (r.passed ? 'passed' : 'failed'));
+        const q = r.quality_score;
+        head.append(el('span', 'exercise-id', r.exercise_id),
+                    el('span', 'quality-score ' + (q >= 70 ? 'quality-high' : q >= 40 ? 'quality-medium' : 'quality-low'),
+                       q.toFixed(1) + '%'),
+                    el('div', 'exercise-path', r.file_path + ' · ' + r.issues.length + ' issue(s)'));
+        ex.append(head);
+        if (r.issues.length) {
+            const body = el('div', 'exercise-body');
+            body.hidden = !r.issues.some(i => i.severity === 'critical');
+            head.onclick = () => { body.hidden = !body.hidden; };
+            for (const i of r.issues) {
+                const d = el('div', 'issue ' + i.severity);
+                d.append(el('div', 'issue-header', i.category.toUpperCase() + ': ' + i.message),
+                         el('div', 'issue-location', 'Location: ' + i.location));
+                if (i.suggestion) d.append(el('div', 'issue-suggestion', '💡 ' + i.suggestion));
+                body.append(d);
+            }
+            ex.append(body);
+        }
+        box.append(ex);
+    }
+}
+
+function go(delta) {
+    const info = SUMMARY.views[view] || {pages: 0};
+    page = Math.min(Math.max(page + delta, 0), Math.max(info.pages - 1, 0));
+    show();
+}
+
+const select = document.getElementById('view');
+for (const [name, info] of Object.entries(SUMMARY.views)) {
+    const label = name === 'all' ? 'All results' : name === 'worst' ? `Lowest ${SUMMARY.page_size} quality scores`
+        : name.startsWith('cat-') ? 'Category ' + name.slice(4) : 'Has ' + name.slice(4) + ' issues';
+    select.add(new Option(`${label} (${info.count})`, name, false, name === view));
+}
+select.onchange = () => { view = select.value; page = 0; show(); };
+document.getElementById('filter').oninput = render;
+document.getElementById('prev').onclick = () => go(-1);
+document.getElementById('next').onclick = () => go(1);
+show();
+"""
+
+
+def render_html(summary: Dict[str, Any], data_dir: str) -> str:
+    """The report page: summary rendered inline, results loaded per page"""
+    sev = summary['severity_counts']
+    cards = [
+        ("", "Total Exercises", summary['total']),
+        ("passed", "Passed ✅", summary['passed']),
+        ("failed", "Failed ❌", summary['failed']),
+        ("", "Avg Quality", f"{summary['avg_quality']:.1f}%"),
+        ("", "Critical 🔴", sev['critical']),
+        ("", "Errors 🟠", sev['error']),
+        ("", "Warnings 🟡", sev['warning']),
+    ]
+    card_html = "".join(
+        f'<div class="summary-card {cls}"><h3>{title}</h3><div class="value">{value}</div></div>'
+        for cls, title, value in cards)
+    rows = "".join(
+        f"<tr><td>{html.escape(name)}</td><td>{c['total']}</td><td>{c['passed']}</td>"
+        f"<td>{c['critical']}</td><td>{c['error']}</td><td>{c['warning']}</td><td>{c['info']}</td>"
+        f"<td>{c['avg_quality']:.1f}%</td></tr>"
+        for name, c in summary['by_category'].items())
+    # </script> cannot occur in json.dumps output once "<" is escaped
+    summary_json = json.dumps(summary, ensure_ascii=False).replace("<", "\\u003c")
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>Exercise Validation Report</title>
+    <style>{REPORT_CSS}    </style>
+</head>
+<body data-dir="{html.escape(data_dir)}">
+    <div class="container">
+        <h1>📊 Exercise Validation Report</h1>
+        <div class="summary">
+            <h2>Summary</h2>
+            <div class="summary-grid">{card_html}</div>
+        </div>
+        <h2>Per Category</h2>
+        <table class="categories">
+            <tr><th>Category</th><th>Exercises</th><th>Passed</th><th>Critical</th><th>Errors</th>
+                <th>Warnings</th><th>Info</th><th>Avg Quality</th></tr>
+            {rows}
+        </table>
+        <h2>Exercise Details</h2>
+        <div class="controls">
+            <select id="view"></select>
+            <button id="prev">◀</button><span id="pageinfo"></span><button id="next">▶</button>
+            <input id="filter" placeholder="Filter this page…">
+            <a href="{html.escape(data_dir)}/issues.ndjson">issues.ndjson</a>
+        </div>
+        <div id="results"></div>
+        <p style="color:#666; font-size:12px">Generated {html.escape(summary['generated_at'])}</p>
+    </div>
+    <script type="application/json" id="summary">{summary_json}</script>
+    <script>{REPORT_JS}</script>
+</body>
+</html>
+"""
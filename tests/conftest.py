@@ -0,0 +1,16 @@
+"""
+Shared pytest setup: the scripts under scripts/ and tools/new/ are plain
+modules, not a package, so both directories go on sys.path.
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+for sub in ("scripts", "tools/new"):
+    path = str(ROOT / sub)
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,60 @@
+"""answer_events.py: ingest into the columnar store"""
+
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import answer_events  # noqa: E402
+
+
+def write_events(path, events):
+    path.write_text("".join(json.dumps(ev) + "\n" for ev in events), encoding="utf-8")
+
+
+def test_events_without_ts_use_ingest_time(tmp_path):
+    # calibrate_difficulty.py simulate writes events without "ts"
+    src = tmp_path / "events.jsonl"
+    write_events(src, [
+        {"item": "p#1", "level": "M4", "correct": True},
+        {"item": "p#2", "level": "M4", "correct": False, "ts": None},
+    ])
+    store = tmp_path / "store"
+
+    assert answer_events.ingest([str(src)], store) == 2
+
+    parts = answer_events.EventStore(store).partitions()
+    assert len(parts) == 1
+    ts = np.load(parts[0] / "ts.npy")
+    assert (ts > 1_600_000_000_000).all()
+
+
+def test_numeric_and_iso_timestamps_land_in_their_day(tmp_path):
+    src = tmp_path / "events.jsonl"
+    write_events(src, [
+        {"item": "p#1", "correct": True, "ts": 1760000000},         # epoch seconds
+        {"item": "p#1", "correct": True, "ts": 1760000000000},      # epoch ms
+        {"item": "p#2", "correct": False, "ts": "2026-10-19T09:12:03"},
+    ])
+    store = tmp_path / "store"
+
+    assert answer_events.ingest([str(src)], store) == 3
+
+    days = sorted(p.name for p in store.glob("day=*"))
+    assert days == ["day=2025-10-09", "day=2026-10-19"]
+
+
+def test_mixed_missing_and_iso_timestamps(tmp_path):
+    src = tmp_path / "events.jsonl"
+    write_events(src, [
+        {"item": "p#1", "correct": True, "ts": "2026-10-19T09:12:03Z"},
+        {"item": "p#1", "correct": True},
+    ])
+    store = tmp_path / "store"
+
+    assert answer_events.ingest([str(src)], store) == 2
+    summary = answer_events.query_summary(answer_events.EventStore(store))
+    assert summary["rows"] == 2
+    assert summary["correct_rate"] == 1.0
+    assert "2026-10-19" in summary["per_day"]
@@ -0,0 +1,81 @@
+"""validators/canon_registry.py: compiled canon lookups and the cache"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from validators import canon_registry
+from validators.canon_registry import CanonRegistry, extract_taskforms_from_canon
+
+ROOT = Path(__file__).resolve().parent.parent
+SCHEMA = ROOT / "docs" / "new" / "schemas" / "ExerciseSchema.json"
+TASKFORMS = ROOT / "docs" / "new" / "taskvormen-canon.json"
+
+LEVEL_SPEC_CANON = {
+    "levels": {
+        "n2": {"allowedTaskForms": ["numeric_simple"], "disallowedTaskForms": ["error_analysis"]},
+        "n3": {"allowedTaskForms": ["select_single"]},
+    },
+    "taskFormDefinitions": {"guided_focus": {}},
+}
+
+
+def test_level_specs_do_not_restrict_taskform_error_lookups():
+    # validate_one / multidomain only check flat taskForm lists, as before the registry
+    assert extract_taskforms_from_canon(LEVEL_SPEC_CANON) == (None, None)
+
+
+def test_flat_level_lists_are_extracted():
+    all_tf, by_level = extract_taskforms_from_canon({"levels": {"n2": ["a", {"taskForm": "b"}]}})
+    assert all_tf == {"a", "b"}
+    assert by_level == {"n2": {"a", "b"}}
+
+
+def test_level_specs_for_validate_exercises(tmp_path):
+    path = tmp_path / "taskforms.json"
+    path.write_text(json.dumps(LEVEL_SPEC_CANON), encoding="utf-8")
+    reg = CanonRegistry(taskforms=str(path), domain_canons=None, cache_path=None)
+
+    assert reg.has_level("n2") and not reg.has_level("n4")
+    assert reg.allowed_taskforms("n3") == frozenset({"select_single"})
+    assert reg.disallowed_by_level["n2"] == frozenset({"error_analysis"})
+    assert reg.taskform_definitions == frozenset({"guided_focus"})
+    assert reg.by_level is None
+
+
+def test_cache_recompiles_edited_source(tmp_path):
+    path = tmp_path / "taskforms.json"
+    cache = tmp_path / "registry.pickle"
+    path.write_text('["a"]', encoding="utf-8")
+    first = CanonRegistry(taskforms=str(path), domain_canons=None, cache_path=str(cache))
+    assert first.cache_misses == 1 and first.all_taskforms == {"a"}
+
+    again = CanonRegistry(taskforms=str(path), domain_canons=None, cache_path=str(cache))
+    assert again.cache_hits == 1 and again.all_taskforms == {"a"}
+
+    path.write_text('["a", "b"]', encoding="utf-8")
+    edited = CanonRegistry(taskforms=str(path), domain_canons=None, cache_path=str(cache))
+    assert edited.cache_misses == 1 and edited.all_taskforms == {"a", "b"}
+
+
+def test_committed_pack_validates(tmp_path):
+    pytest.importorskip("jsonschema")
+    pytest.importorskip("referencing")
+    import validate_one_exercises_file as v1
+
+    registry = CanonRegistry(schema=str(SCHEMA), taskforms=str(TASKFORMS), cache_path=None)
+    pack = ROOT / "content/nl-NL/verhoudingen/groep-5/n3/topics/verhoudingstabellen-basis/exercises.json"
+    code, lines = v1.validate_file(str(pack), registry)
+    assert code == 0, lines[:5]
+
+
+def test_format_version_is_part_of_cache(tmp_path, monkeypatch):
+    path = tmp_path / "taskforms.json"
+    cache = tmp_path / "registry.pickle"
+    path.write_text('["a"]', encoding="utf-8")
+    CanonRegistry(taskforms=str(path), domain_canons=None, cache_path=str(cache))
+
+    monkeypatch.setattr(canon_registry, "REGISTRY_FORMAT_VERSION", canon_registry.REGISTRY_FORMAT_VERSION + 1)
+    reg = CanonRegistry(taskforms=str(path), domain_canons=None, cache_path=str(cache))
+    assert reg.cache_misses == 1
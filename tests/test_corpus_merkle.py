@@ -0,0 +1,54 @@
+"""corpus_merkle: diffs between trees must not trust a stale merkle.json"""
+
+import json
+import shutil
+
+import corpus_merkle
+
+
+def _write_pack(tree, items):
+    path = tree / "gb" / "gb_groep4_m4_core.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"metadata": {"id": "gb_groep4_m4"}, "items": items}), encoding="utf-8")
+    return path
+
+
+def test_diff_of_copied_tree_with_stale_manifest(tmp_path):
+    old = tmp_path / "old"
+    _write_pack(old, [{"id": 1, "q": "a"}, {"id": 2, "q": "b"}])
+    corpus_merkle.compute_manifest(old)
+
+    # a copy carries the old merkle.json along; then one item is edited
+    new = tmp_path / "new"
+    shutil.copytree(old, new)
+    _write_pack(new, [{"id": 1, "q": "a"}, {"id": 2, "q": "changed"}, {"id": 3, "q": "c"}])
+
+    changes = corpus_merkle.diff_trees(old, new)
+    assert changes["modified"] == ["gb/gb_groep4_m4_core.json#2"]
+    assert changes["added"] == ["gb/gb_groep4_m4_core.json#3"]
+    assert not changes["removed"]
+
+
+def test_diff_after_in_place_edit(tmp_path):
+    old = tmp_path / "old"
+    _write_pack(old, [{"id": 1, "q": "a"}])
+    corpus_merkle.compute_manifest(old)
+    new = tmp_path / "new"
+    shutil.copytree(old, new)
+    corpus_merkle.compute_manifest(new)
+
+    # edited after its manifest was written, manifest not refreshed
+    _write_pack(new, [{"id": 1, "q": "edited"}])
+    stored = (new / corpus_merkle.MANIFEST_FILE).read_bytes()
+    changes = corpus_merkle.diff_trees(old, new)
+    assert changes["modified"] == ["gb/gb_groep4_m4_core.json#1"]
+    # nothing is written into the trees
+    assert (new / corpus_merkle.MANIFEST_FILE).read_bytes() == stored
+
+
+def test_unchanged_tree_has_no_changes(tmp_path):
+    tree = tmp_path / "t"
+    _write_pack(tree, [{"id": 1, "q": "a"}])
+    corpus_merkle.compute_manifest(tree)
+    changes = corpus_merkle.diff_trees(tree, tree)
+    assert not any(changes[k] for k in ("added", "removed", "modified"))
@@ -0,0 +1,40 @@
+"""exercise_corpus: item layouts and shared vs private parses"""
+
+import json
+
+from exercise_corpus import KIND_LEGACY_BLOCKS, KIND_V2, iter_raw_items, load_pack
+
+
+def test_iter_raw_items_covers_all_v2_layouts():
+    flat = {"items": [{"id": 1}, {"id": 2}]}
+    bl = {"exercises": [{"id": 1, "items": [{"id": "1a"}, {"id": "1b"}]}, {"id": 2, "items": [{"id": "2a"}]}]}
+    vs = {"problems": [{"id": 1, "items": [{"id": "1_a"}]}]}
+    blocks = [{"id": 1, "theme": "geld", "questions": [{"question": "?"}, "not an item"]}]
+    assert [i["id"] for i in iter_raw_items(flat)] == [1, 2]
+    assert [i["id"] for i in iter_raw_items(bl)] == ["1a", "1b", "2a"]
+    assert [i["id"] for i in iter_raw_items(vs)] == ["1_a"]
+    assert len(list(iter_raw_items(blocks))) == 1
+
+
+def test_cached_pack_is_shared_and_private_parse_is_not(tmp_path):
+    path = tmp_path / "gb_groep4_m4_core.json"
+    path.write_text(json.dumps({"metadata": {"id": "gb_groep4_m4"}, "items": [{"id": 1}]}), encoding="utf-8")
+
+    shared = load_pack(path)
+    assert shared.kind == KIND_V2
+    assert load_pack(path) is shared
+
+    private = load_pack(path, use_cache=False)
+    assert private is not shared and private.raw is not shared.raw
+    private.raw["metadata"]["difficulty"] = "hard"
+    assert "difficulty" not in load_pack(path).raw["metadata"]
+
+
+def test_legacy_blocks_keep_their_theme(tmp_path):
+    path = tmp_path / "gb_groep4_m4.json"
+    path.write_text(json.dumps([{"id": 7, "theme": "geld", "questions": [
+        {"question": "Hoeveel?", "options": ["1", "2"], "correct": 1}]}]), encoding="utf-8")
+    pack = load_pack(path, use_cache=False)
+    assert pack.kind == KIND_LEGACY_BLOCKS
+    (item,) = pack.items
+    assert (item.id, item.theme, item.correct_option) == ("7.1", "geld", "2")
@@ -0,0 +1,24 @@
+"""prompt_assembly: the shared system prefix is opt-in"""
+
+from prompt_assembly import SYSTEM_INSTRUCTIONS, PromptAssembler
+
+
+def test_default_sends_instructions_only():
+    prompt = PromptAssembler().assemble("PACK", "n1", tail="fix X")
+    assert prompt.system == SYSTEM_INSTRUCTIONS
+    assert prompt.cache_key == ""
+    assert prompt.user == "PACK\n\nfix X"
+    assert "cache_control" not in prompt.anthropic_request()["system"][0]
+
+
+def test_shared_prefix_is_stable_per_level(tmp_path):
+    contract = tmp_path / "prompts" / "contracts" / "prompt-contract-nl.md"
+    contract.parent.mkdir(parents=True)
+    contract.write_bytes(b"Regel 1\r\nRegel 2\r\n")
+    assembler = PromptAssembler(root=str(tmp_path), shared_prefix=True)
+
+    a = assembler.assemble("PACK A", "n1")
+    b = assembler.assemble("PACK B", "n1", tail="repair")
+    assert a.system == b.system and a.cache_key == b.cache_key != ""
+    assert "Regel 1\nRegel 2" in a.system
+    assert a.openai_kwargs() == {"extra_body": {"prompt_cache_key": a.cache_key}}
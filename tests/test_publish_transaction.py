@@ -0,0 +1,71 @@
+"""publish_transaction: generations, the symlink switch and rollback"""
+
+import json
+
+import pytest
+
+from publish_transaction import GenerationStore, PublishTransaction, rollback
+
+
+CORE = "gb_groep4_m4_core.json"
+
+
+def _production(tmp_path):
+    prod = tmp_path / "data-v2" / "exercises"
+    (prod / "gb").mkdir(parents=True)
+    (prod / "index.json").write_text(json.dumps({"schema_version": "2.0.0", "exercises": []}), encoding="utf-8")
+    (prod / "gb" / CORE).write_text(json.dumps({"metadata": {"id": "gb_groep4_m4"}, "items": []}),
+                                    encoding="utf-8")
+    return prod
+
+
+def _publish(tmp_path, prod, version):
+    src = tmp_path / f"draft-{version}"
+    src.mkdir()
+    core = src / CORE
+    core.write_text(json.dumps({"metadata": {"id": "gb_groep4_m4", "version": version},
+                                "items": [{"id": 1, "q": version}]}), encoding="utf-8")
+    results = PublishTransaction(str(prod / "gb"), validate=False).run([core])
+    assert all(r["success"] for r in results)
+
+
+def _live_version(prod):
+    return json.loads((prod / "gb" / CORE).read_text(encoding="utf-8"))["metadata"].get("version")
+
+
+def test_publish_switches_symlink_and_patches_index(tmp_path):
+    prod = _production(tmp_path)
+    _publish(tmp_path, prod, "v1")
+
+    assert prod.is_symlink()
+    assert _live_version(prod) == "v1"
+    index = json.loads((prod / "index.json").read_text(encoding="utf-8"))
+    assert [e["paths"]["core"] for e in index["exercises"]] == [f"gb/{CORE}"]
+
+    store = GenerationStore(prod)
+    assert len(store.history["generations"]) == 2           # migrated tree + v1
+    assert store.history["previous"] == [store.history["generations"][0]["id"]]
+
+
+def test_rollback_after_republish_skips_the_bad_generation(tmp_path):
+    prod = _production(tmp_path)
+    _publish(tmp_path, prod, "good")
+    _publish(tmp_path, prod, "bad")
+    rollback(str(prod / "gb"))
+    assert _live_version(prod) == "good"
+
+    _publish(tmp_path, prod, "new")
+    rollback(str(prod / "gb"))
+    # history order would pick "bad", the generation published before "new"
+    assert _live_version(prod) == "good"
+
+    rollback(str(prod / "gb"))
+    assert _live_version(prod) is None                       # the migrated initial tree
+
+
+def test_rollback_without_earlier_generation(tmp_path):
+    prod = _production(tmp_path)
+    _publish(tmp_path, prod, "v1")
+    rollback(str(prod / "gb"))
+    with pytest.raises(ValueError):
+        rollback(str(prod / "gb"))
@@ -0,0 +1,42 @@
+"""run_prompt_packs: live model calls feed the router's token statistics"""
+
+import time
+from types import SimpleNamespace
+
+import run_prompt_packs as rpp
+from model_router import ModelRouter
+
+
+class _FakeCompletions:
+    def __init__(self, usages):
+        self.usages = list(usages)
+
+    def create(self, **kwargs):
+        usage = self.usages.pop(0)
+        choice = SimpleNamespace(finish_reason="stop", message=SimpleNamespace(content="[]"))
+        return SimpleNamespace(choices=[choice], usage=usage)
+
+
+def test_record_model_result_observes_live_token_usage(monkeypatch):
+    usages = [
+        {"prompt_tokens": 1000, "completion_tokens": 200, "prompt_tokens_details": {"cached_tokens": 600}},
+        {"prompt_tokens": 1100, "completion_tokens": 300, "prompt_tokens_details": {"cached_tokens": 0}},
+    ]
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=_FakeCompletions(usages)))
+    router = ModelRouter(None)
+    monkeypatch.setattr(rpp, "client", fake)
+    monkeypatch.setattr(rpp, "ROUTER", router)
+    rpp._take_block_tokens()
+
+    started = time.perf_counter()
+    rpp.call_model("PACK", "gpt-4o-mini", 500, 0.2, level="n1")
+    rpp.call_model("PACK", "gpt-4o-mini", 500, 0.2, level="n1")
+    rpp.record_model_result(1, "gpt-4o-mini", True, 2, started, "getal-en-bewerkingen", "n1", "breuken")
+
+    (stats,) = router.stats.values()
+    assert (stats["blocks"], stats["token_calls"]) == (1, 2)
+    assert (stats["prompt_tokens"], stats["completion_tokens"], stats["cached_tokens"]) == (2100, 500, 600)
+
+    # the tally was handed over: the next block starts from zero
+    rpp.record_model_result(1, "gpt-4o-mini", False, 1, started, "getal-en-bewerkingen", "n1", "breuken")
+    assert router.stats[next(iter(router.stats))]["token_calls"] == 2
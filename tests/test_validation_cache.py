@@ -0,0 +1,70 @@
+"""validation_cache + ExerciseValidator: what does and does not reuse a cached result"""
+
+import json
+
+import comprehensive_validation
+from comprehensive_validation import ExerciseValidator
+from validation_cache import ValidationCache
+
+
+def _core(tmp_path, question="Hoeveel is 2 + 3?"):
+    path = tmp_path / "gb_groep4_m4_core.json"
+    path.write_text(json.dumps({
+        "schema_version": "2.0.0",
+        "metadata": {"id": "gb_groep4_m4", "type": "multiple_choice", "category": "gb",
+                     "language": "nl-NL", "grade": 4},
+        "items": [{"id": 1, "question": {"text": question},
+                   "options": [{"text": "4"}, {"text": "5"}], "answer": {"correct_index": 1}}],
+    }), encoding="utf-8")
+    return str(path)
+
+
+def _validate(cache, core):
+    return ExerciseValidator(cache=cache).validate_file(core)
+
+
+def test_unchanged_file_is_a_hit_and_edit_is_a_miss(tmp_path):
+    cache = ValidationCache(str(tmp_path / "cache.json"))
+    core = _core(tmp_path)
+    first = _validate(cache, core)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    again = _validate(cache, core)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert again.to_dict() == first.to_dict()
+
+    _core(tmp_path, question="Hoeveel is 3 + 3?")
+    _validate(cache, core)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_cache_survives_save_and_reload(tmp_path):
+    cache_file = str(tmp_path / "cache.json")
+    core = _core(tmp_path)
+    cache = ValidationCache(cache_file)
+    _validate(cache, core)
+    cache.save()
+
+    reloaded = ValidationCache(cache_file)
+    _validate(reloaded, core)
+    assert (reloaded.hits, reloaded.misses) == (1, 0)
+
+
+def test_rule_change_invalidates_cached_results(tmp_path, monkeypatch):
+    cache = ValidationCache(str(tmp_path / "cache.json"))
+    core = _core(tmp_path)
+    _validate(cache, core)
+
+    # an edited validator source changes the key without a RULESET_VERSION bump
+    monkeypatch.setattr(comprehensive_validation, "_rules_hash", "0" * 12)
+    _validate(cache, core)
+    assert (cache.hits, cache.misses) == (0, 2)
+
+    monkeypatch.setattr(ExerciseValidator, "RULESET_VERSION", "test")
+    _validate(cache, core)
+    assert (cache.hits, cache.misses) == (0, 3)
+
+
+def test_ruleset_version_includes_source_hash():
+    version = ExerciseValidator().ruleset_version()
+    assert version.startswith(ExerciseValidator.RULESET_VERSION + "-" + comprehensive_validation.rules_source_hash())
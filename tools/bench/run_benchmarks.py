@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+run_benchmarks.py
+
+Time the content tooling against synthetic corpora at 1x/10x/100x the
+current size and record the results as JSON, so two commits can be
+compared and we can see which tool stops scaling first.
+
+Tools (each run as a subprocess with the current interpreter):
+- build_index               scripts/build-index.py
+- comprehensive_validation  scripts/comprehensive_validation.py (no cache)
+- validate_all_multidomain  tools/new/validate_all_exercises_multidomain.py
+- hard_duplicate_gate       tools/new/hard_duplicate_gate.py
+- quality_pack_checks       tools/new/quality_pack_checks.py
+- ref_getallen              docs/reference/getallen-validator-v3.py (all gb items merged into one core)
+- ref_meten_meetkunde       docs/reference/meten-meetkunde-validator-v3.py (all mk items, legacy item format)
+
+Usage:
+  py -3.13 tools/bench/run_benchmarks.py --scales 1 10
+  py -3.13 tools/bench/run_benchmarks.py --scales 1 --tools build_index hard_duplicate_gate --repeat 5
+  py -3.13 tools/bench/run_benchmarks.py --compare reports/bench/old.json reports/bench/new.json --fail-on-regression 1.2
+
+Corpora are cached under .cache/bench-corpus/x<scale> and only regenerated
+when the generator version or seed changes (or with --regenerate).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import synthetic_corpus  # noqa: E402
+
+ROOT = synthetic_corpus.ROOT
+CORPUS_CACHE = os.path.join(ROOT, ".cache", "bench-corpus")
+REPORT_DIR = os.path.join(ROOT, "reports", "bench")
+
+ALL_TOOLS = [
+    "build_index",
+    "comprehensive_validation",
+    "validate_all_multidomain",
+    "hard_duplicate_gate",
+    "quality_pack_checks",
+    "ref_getallen",
+    "ref_meten_meetkunde",
+]
+
+
+# ----------------------------
+# Corpus preparation
+# ----------------------------
+
+def ensure_corpus(scale: int, seed: int, regenerate: bool) -> Tuple[str, Dict[str, Any]]:
+    out_dir = os.path.join(CORPUS_CACHE, f"x{scale}")
+    manifest = synthetic_corpus.load_manifest(out_dir)
+    fresh = (
+        manifest is not None
+        and manifest.get("generator_version") == synthetic_corpus.GENERATOR_VERSION
+        and manifest.get("seed") == seed
+    )
+    if regenerate or not fresh:
+        if os.path.isdir(out_dir):
+            shutil.rmtree(out_dir)
+        print(f"Generating x{scale} corpus in {out_dir} ...")
+        t0 = time.perf_counter()
+        manifest = synthetic_corpus.generate(out_dir, scale, seed)
+        print(f"  done in {time.perf_counter() - t0:.1f}s: "
+              f"{manifest['content_items']} content items, {manifest['v2_items']} v2 items")
+    return out_dir, manifest
+
+
+def merged_core(corpus_dir: str, category: str, legacy: bool = False) -> str:
+    """
+    The reference validators take a single file; merge every core of a
+    category into one so their runtime scales with the corpus too.
+
+    legacy=True writes a flat list in the old item format (hoofdvraag,
+    correct_antwoord, afleiders, ...) for validators that do not convert
+    v2 cores themselves.
+    """
+    suffix = "legacy" if legacy else "core"
+    out_path = os.path.join(corpus_dir, "merged", f"{category}_all_{suffix}.json")
+    if os.path.exists(out_path):
+        return out_path
+
+    cat_dir = os.path.join(corpus_dir, "data-v2", "exercises", category)
+    items: List[Dict[str, Any]] = []
+    first: Optional[Dict[str, Any]] = None
+    for fn in sorted(os.listdir(cat_dir)) if os.path.isdir(cat_dir) else []:
+        if not fn.endswith("_core.json"):
+            continue
+        core = synthetic_corpus.read_json(os.path.join(cat_dir, fn))
+        first = first or core
+        meta = core.get("metadata", {})
+        for item in core.get("items", []):
+            if not legacy:
+                items.append(dict(item, id=len(items) + 1))
+                continue
+            options = [o.get("text", "") for o in item.get("options", [])]
+            correct = item.get("answer", {}).get("correct_index", 0)
+            items.append({
+                "id": f"{meta.get('id')}_{item.get('id')}",
+                "groep": meta.get("grade"),
+                "niveau": meta.get("level"),
+                "hoofdvraag": item.get("question", {}).get("text", ""),
+                "correct_antwoord": options[correct] if options else "",
+                "afleiders": [o for i, o in enumerate(options) if i != correct],
+                "toelichting": f"Thema: {item.get('theme', '')}.",
+            })
+
+    if legacy:
+        synthetic_corpus.write_json(out_path, items)
+        return out_path
+
+    merged = dict(first or {"schema_version": "2.0.0", "metadata": {"category": category}})
+    merged["metadata"] = dict(merged.get("metadata", {}), id=f"{category}_all")
+    merged["items"] = items
+    synthetic_corpus.write_json(out_path, merged)
+    return out_path
+
+
+def tool_command(tool: str, corpus_dir: str, work_dir: str) -> List[str]:
+    py = sys.executable
+    content = os.path.join(corpus_dir, "content")
+    exercises = os.path.join(corpus_dir, "data-v2", "exercises")
+
+    if tool == "build_index":
+        return [py, os.path.join(ROOT, "scripts", "build-index.py"),
+                "--directory", exercises, "--output", os.path.join(work_dir, "index.json")]
+    if tool == "comprehensive_validation":
+        return [py, os.path.join(ROOT, "scripts", "comprehensive_validation.py"),
+                "--directory", exercises, "--no-cache"]
+    if tool == "validate_all_multidomain":
+        return [py, os.path.join(ROOT, "tools", "new", "validate_all_exercises_multidomain.py"),
+                "--content-root", content,
+                "--schema", synthetic_corpus.SCHEMA_PATH,
+                "--taskforms", synthetic_corpus.TASKFORMS_PATH,
+                "--quiet"]
+    if tool == "hard_duplicate_gate":
+        return [py, os.path.join(ROOT, "tools", "new", "hard_duplicate_gate.py"), "--content-root", content]
+    if tool == "quality_pack_checks":
+        return [py, os.path.join(ROOT, "tools", "new", "quality_pack_checks.py"), "--content-root", content]
+    if tool == "ref_getallen":
+        return [py, os.path.join(ROOT, "docs", "reference", "getallen-validator-v3.py"),
+                merged_core(corpus_dir, "gb")]
+    if tool == "ref_meten_meetkunde":
+        return [py, os.path.join(ROOT, "docs", "reference", "meten-meetkunde-validator-v3.py"),
+                merged_core(corpus_dir, "mk", legacy=True)]
+    raise ValueError(f"unknown tool: {tool}")
+
+
+# ----------------------------
+# Timing
+# ----------------------------
+
+def run_once(cmd: List[str], log_path: str, timeout: float) -> Dict[str, Any]:
+    """Run cmd once; wall time, exit code and (on POSIX) peak RSS of the child."""
+    env = dict(os.environ, PYTHONIOENCODING="utf-8", PYTHONUTF8="1")
+    with open(log_path, "w", encoding="utf-8") as log:
+        t0 = time.perf_counter()
+        proc = subprocess.Popen(cmd, cwd=ROOT, stdout=log, stderr=subprocess.STDOUT, env=env)
+        peak_rss_mb: Optional[float] = None
+        if hasattr(os, "wait4"):
+            _, status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            # ru_maxrss is KiB on Linux, bytes on macOS
+            divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+            peak_rss_mb = round(usage.ru_maxrss / divisor, 1)
+        else:
+            try:
+                proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+        wall = time.perf_counter() - t0
+    return {"wall_s": wall, "returncode": proc.returncode, "peak_rss_mb": peak_rss_mb}
+
+
+def bench_tool(tool: str, corpus_dir: str, work_dir: str, repeat: int, timeout: float) -> Dict[str, Any]:
+    cmd = tool_command(tool, corpus_dir, work_dir)
+    log_path = os.path.join(work_dir, f"{tool}.log")
+    runs = [run_once(cmd, log_path, timeout) for _ in range(repeat)]
+    walls = [r["wall_s"] for r in runs]
+    rss = [r["peak_rss_mb"] for r in runs if r["peak_rss_mb"] is not None]
+    return {
+        "median_s": round(statistics.median(walls), 4),
+        "min_s": round(min(walls), 4),
+        "max_s": round(max(walls), 4),
+        "repeat": repeat,
+        "returncode": runs[-1]["returncode"],
+        "peak_rss_mb": max(rss) if rss else None,
+        "log": os.path.relpath(log_path, ROOT).replace("\\", "/"),
+    }
+
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+# ----------------------------
+# Comparison
+# ----------------------------
+
+def compare(old_path: str, new_path: str, threshold: float) -> int:
+    old = synthetic_corpus.read_json(old_path)
+    new = synthetic_corpus.read_json(new_path)
+    print(f"old: {old.get('commit')}  new: {new.get('commit')}")
+    print(f"{'scale':>6} {'tool':26} {'old_s':>9} {'new_s':>9} {'ratio':>7}")
+
+    regressions = 0
+    for scale, tools in sorted(new.get("results", {}).items(), key=lambda kv: int(kv[0])):
+        for tool, res in sorted(tools.items()):
+            prev = old.get("results", {}).get(scale, {}).get(tool)
+            if not prev or not prev.get("median_s"):
+                print(f"{scale:>6} {tool:26} {'-':>9} {res['median_s']:>9.3f} {'new':>7}")
+                continue
+            ratio = res["median_s"] / prev["median_s"]
+            flag = ""
+            if ratio > threshold:
+                regressions += 1
+                flag = "  REGRESSION"
+            print(f"{scale:>6} {tool:26} {prev['median_s']:>9.3f} {res['median_s']:>9.3f} {ratio:>7.2f}{flag}")
+
+    if regressions:
+        print(f"FAIL: {regressions} regression(s) above {threshold:.2f}x")
+        return 1
+    print("OK: no regressions")
+    return 0
+
+
+# ----------------------------
+# Main
+# ----------------------------
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Benchmark the content tooling on scaled synthetic corpora.")
+    ap.add_argument("--scales", type=int, nargs="+", default=[1, 10], help="Corpus multiples (default: 1 10)")
+    ap.add_argument("--tools", nargs="+", choices=ALL_TOOLS, default=ALL_TOOLS)
+    ap.add_argument("--repeat", type=int, default=3, help="Runs per tool per scale (median is reported)")
+    ap.add_argument("--timeout", type=float, default=3600.0, help="Per-run timeout where wait4 is unavailable")
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--regenerate", action="store_true", help="Regenerate cached corpora")
+    ap.add_argument("--out", default=None, help="Results JSON (default: reports/bench/bench-<commit>-<time>.json)")
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files and exit")
+    ap.add_argument("--fail-on-regression", type=float, default=None, metavar="RATIO",
+                    help="With --compare: exit 1 if any median is slower by more than RATIO (e.g. 1.2)")
+    args = ap.parse_args()
+
+    if args.compare:
+        threshold = args.fail_on_regression or 1.2
+        rc = compare(args.compare[0], args.compare[1], threshold)
+        return rc if args.fail_on_regression else 0
+
+    commit = git_commit()
+    report: Dict[str, Any] = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "corpus": {},
+        "results": {},
+    }
+
+    failed = 0
+    for scale in args.scales:
+        corpus_dir, manifest = ensure_corpus(scale, args.seed, args.regenerate)
+        work_dir = os.path.join(corpus_dir, "_work")
+        os.makedirs(work_dir, exist_ok=True)
+        report["corpus"][str(scale)] = manifest
+        report["results"][str(scale)] = {}
+
+        print(f"\n=== x{scale} ===")
+        for tool in args.tools:
+            res = bench_tool(tool, corpus_dir, work_dir, args.repeat, args.timeout)
+            report["results"][str(scale)][tool] = res
+            rss = f"{res['peak_rss_mb']:.0f} MB" if res["peak_rss_mb"] is not None else "n/a"
+            status = "ok" if res["returncode"] == 0 else f"exit {res['returncode']}"
+            if res["returncode"] not in (0, 1):
+                # exit 1 is a normal "validation found problems" verdict for most tools
+                failed += 1
+            print(f"  {tool:26} median {res['median_s']:8.3f}s  min {res['min_s']:8.3f}s  rss {rss:>8}  {status}")
+
+    out_path = args.out or os.path.join(REPORT_DIR, f"bench-{commit}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nWrote {out_path}")
+
+    if failed:
+        print(f"WARNING: {failed} tool run(s) crashed; see the logs under .cache/bench-corpus/")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+synthetic_corpus.py
+
+Generate a synthetic corpus with the same shape as the real one, scaled by
+an integer factor:
+
+- content/nl-NL/<domain>/groep-<g>/<level>/topics/<topic>/exercises.json
+  (items valid against ExerciseSchema.json, taskForms allowed per level
+  according to taskvormen-canon.json)
+- data-v2/exercises/<category>/<id>_core.json + _support.json
+  (v2 core/support shape: metadata/display/items + item_id keyed support)
+
+The shape (pack paths, items per pack, interaction mix, core files per
+category, items per core file) is measured from the real tree, so scale 1
+matches the current corpus size and scale 10/100 replicate it with
+"-rN" suffixed topics/ids. Generation is deterministic for a given seed.
+
+Usage:
+  py -3.13 tools/bench/synthetic_corpus.py --out .cache/bench-corpus/x10 --scale 10
+  py -3.13 tools/bench/synthetic_corpus.py --out /tmp/x1 --scale 1 --check
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+REAL_CONTENT = os.path.join(ROOT, "content", "nl-NL")
+REAL_V2 = os.path.join(ROOT, "data-v2", "exercises")
+SCHEMA_PATH = os.path.join(ROOT, "content", "nl-NL", "_shared", "schemas", "ExerciseSchema.json")
+TASKFORMS_PATH = os.path.join(ROOT, "docs", "new", "taskvormen-canon.json")
+
+# Bump when generated output changes, so cached corpora are regenerated
+GENERATOR_VERSION = "1"
+
+# Preferred taskForm per interaction type; falls back to the first allowed one
+PREFERRED_TASKFORMS = {
+    "numeric": ["numeric_simple", "context_single_step", "multi_step_context_problem"],
+    "mcq": ["select_single", "guided_focus", "strategy_comparison", "data_interpretation"],
+    "fill_blanks": ["fill_single_step", "numeric_simple", "reasoned_explanation"],
+    "n4": ["multi_step_context_problem", "data_interpretation", "reasoned_explanation"],
+}
+
+CONTEXTS = ["appels", "knikkers", "stickers", "boeken", "fietsen", "euro", "meter", "liter",
+            "taartjes", "kaartjes", "bussen", "stoelen", "potloden", "kilo", "minuten"]
+NAMES = ["Sara", "Daan", "Noor", "Milan", "Emma", "Sem", "Lotte", "Finn", "Julia", "Bram"]
+THEMES = ["optellen", "aftrekken", "vermenigvuldigen", "delen", "breuken", "meten", "tijd", "geld"]
+
+
+# ----------------------------
+# IO helpers
+# ----------------------------
+
+def read_json(path: str) -> Any:
+    with open(path, "r", encoding="utf-8-sig") as f:
+        return json.load(f)
+
+
+def write_json(path: str, data: Any) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+# ----------------------------
+# Shape of the real corpus
+# ----------------------------
+
+def count_v2_items(core: Any) -> int:
+    if not isinstance(core, dict):
+        return 0
+    if isinstance(core.get("items"), list):
+        return len(core["items"])
+    total = 0
+    for key in ("exercises", "problems"):
+        for block in core.get(key) or []:
+            if isinstance(block, dict):
+                total += len(block.get("items") or [])
+    return total
+
+
+def measure_real_corpus() -> Dict[str, Any]:
+    """Pack paths + item counts + interaction mix from content/, core sizes from data-v2/."""
+    packs: List[Dict[str, Any]] = []
+    interactions: Counter = Counter()
+
+    for root, _, files in os.walk(REAL_CONTENT):
+        if "exercises.json" not in files:
+            continue
+        rel = os.path.relpath(root, REAL_CONTENT).replace("\\", "/").split("/")
+        # <domain>/groep-<g>/<level>/topics/<topic>
+        if len(rel) != 5 or rel[3] != "topics":
+            continue
+        try:
+            data = read_json(os.path.join(root, "exercises.json"))
+        except Exception:
+            data = []
+        if not isinstance(data, list):
+            data = []
+        for ex in data:
+            if isinstance(ex, dict):
+                interactions[(ex.get("interaction") or {}).get("type") or "numeric"] += 1
+        packs.append({
+            "domain": rel[0],
+            "grade": int(rel[1].split("-")[1]),
+            "level": rel[2],
+            "topic": rel[4],
+            "count": len(data),
+        })
+
+    cores: List[Dict[str, Any]] = []
+    for root, _, files in os.walk(REAL_V2):
+        for fn in files:
+            if not fn.endswith("_core.json"):
+                continue
+            category = os.path.relpath(root, REAL_V2).replace("\\", "/").split("/")[0]
+            try:
+                count = count_v2_items(read_json(os.path.join(root, fn)))
+            except Exception:
+                count = 0
+            cores.append({"category": category, "name": fn[:-len("_core.json")], "count": count})
+
+    packs.sort(key=lambda p: (p["domain"], p["grade"], p["level"], p["topic"]))
+    cores.sort(key=lambda c: (c["category"], c["name"]))
+    return {"packs": packs, "cores": cores, "interactions": dict(interactions)}
+
+
+# ----------------------------
+# Item synthesis
+# ----------------------------
+
+def allowed_taskforms(canon: Dict[str, Any]) -> Dict[str, List[str]]:
+    out: Dict[str, List[str]] = {}
+    for level, spec in (canon.get("levels") or {}).items():
+        if isinstance(spec, dict) and isinstance(spec.get("allowedTaskForms"), list):
+            out[level] = spec["allowedTaskForms"]
+    return out
+
+
+def pick_taskform(interaction: str, level: str, allowed: Dict[str, List[str]]) -> str:
+    options = allowed.get(level) or []
+    for tf in PREFERRED_TASKFORMS.get(interaction, []):
+        if tf in options:
+            return tf
+    return options[0] if options else "numeric_simple"
+
+
+def pick_interaction(rng: random.Random, level: str, mix: List[Tuple[str, int]]) -> str:
+    if level == "n4":
+        return "n4"
+    kinds = [k for k, _ in mix if k != "n4"] or ["numeric"]
+    weights = [w for k, w in mix if k != "n4"] or [1]
+    return rng.choices(kinds, weights=weights)[0]
+
+
+def make_content_item(rng: random.Random, pack: Dict[str, Any], item_id: str, interaction: str,
+                      allowed: Dict[str, List[str]]) -> Dict[str, Any]:
+    a = rng.randint(2, 12 * pack["grade"] + 10)
+    b = rng.randint(2, 9 + pack["grade"])
+    name = rng.choice(NAMES)
+    ctx = rng.choice(CONTEXTS)
+    answer = a + b
+
+    if interaction == "mcq":
+        distractors = rng.sample([answer - 1, answer + 1, answer + 10, answer - 10, a * b, a - b], 3)
+        options = [str(answer)] + [str(d) for d in distractors]
+        rng.shuffle(options)
+        solution: Dict[str, Any] = {"index": options.index(str(answer))}
+        prompt = f"{name} heeft {a} {ctx} en krijgt er {b} bij. Hoeveel {ctx} zijn het samen?"
+    elif interaction == "fill_blanks":
+        options = None
+        solution = {"value": b}
+        prompt = f"Vul in: {a} + ___ = {answer}"
+    elif interaction == "n4":
+        options = None
+        solution = {"value": answer, "steps": [f"{a} + {b} = {answer}"]}
+        prompt = (f"{name} koopt {a} {ctx} op maandag en {b} {ctx} op dinsdag. "
+                  f"Hoeveel {ctx} zijn het samen? Laat je stappen zien.")
+    else:
+        options = None
+        solution = {"value": answer}
+        prompt = f"Bereken:\n\n{a} + {b} ="
+
+    ex: Dict[str, Any] = {
+        "schemaVersion": "1.0.0",
+        "id": item_id,
+        "domain": pack["domain"],
+        "grade": pack["grade"],
+        "level": pack["level"],
+        "topic": pack["topic"],
+        "interaction": {"type": interaction},
+        "prompt": prompt,
+        "solution": solution,
+        "feedback": {"correct": "Goed gedaan!", "incorrect": "Probeer het nog eens."},
+        "metadata": {
+            "strategy": "Synthetisch",
+            "taskForm": pick_taskform(interaction, pack["level"], allowed),
+            "misconceptKeys": [],
+        },
+    }
+    if options is not None:
+        ex["options"] = options
+    return ex
+
+
+def make_v2_pair(rng: random.Random, core_id: str, category: str, count: int) -> Tuple[Dict, Dict]:
+    grade = rng.randint(3, 8)
+    items: List[Dict[str, Any]] = []
+    support_items: List[Dict[str, Any]] = []
+
+    for i in range(1, count + 1):
+        a = rng.randint(2, 99)
+        b = rng.randint(2, 99)
+        answer = a + b
+        options = [answer, answer + 1, answer - 1, answer + 10]
+        rng.shuffle(options)
+        theme = rng.choice(THEMES)
+        items.append({
+            "id": i,
+            "type": "multiple_choice",
+            "theme": theme,
+            "question": {"text": f"{rng.choice(NAMES)} telt {a} {rng.choice(CONTEXTS)} en daarna nog {b}. Hoeveel samen?"},
+            "options": [{"text": str(o)} for o in options],
+            "answer": {"type": "single", "correct_index": options.index(answer)},
+        })
+        support_items.append({
+            "item_id": i,
+            "hints": [
+                {"level": 1, "text": "Lees de vraag nog eens rustig door."},
+                {"level": 2, "text": f"Begin met {a} en tel er {b} bij."},
+                {"level": 3, "text": "Splits het tweede getal in tientallen en eenheden."},
+            ],
+            "feedback": {
+                "explanation": f"Het juiste antwoord is: {answer}. Thema: {theme}.",
+                "correct": {"default": "Goed gedaan!"},
+                "incorrect": {"first_attempt": "Nog niet helemaal, kijk nog eens goed."},
+                "per_option": {str(o): ("Goed!" if o == answer else "Controleer je berekening.") for o in options},
+            },
+            "learning": {"math_strategies": ["splitsen"]},
+        })
+
+    core = {
+        "schema_version": "2.0.0",
+        "metadata": {
+            "id": core_id,
+            "type": "multiple_choice",
+            "category": category,
+            "grade": grade,
+            "level": rng.choice(["M", "E"]),
+            "language": "nl-NL",
+            "difficulty": rng.choice(["easy", "medium", "hard"]),
+        },
+        "display": {"title": f"Synthetisch {category} groep {grade}"},
+        "items": items,
+    }
+    support = {"schema_version": "2.0.0", "exercise_id": core_id, "items": support_items}
+    return core, support
+
+
+# ----------------------------
+# Generation
+# ----------------------------
+
+def generate(out_dir: str, scale: int, seed: int = 1234) -> Dict[str, Any]:
+    """Write the scaled corpus under out_dir; returns a manifest with its size."""
+    rng = random.Random(seed)
+    shape = measure_real_corpus()
+    allowed = allowed_taskforms(read_json(TASKFORMS_PATH))
+    mix = sorted(shape["interactions"].items())
+
+    content_root = os.path.join(out_dir, "content", "nl-NL")
+    v2_root = os.path.join(out_dir, "data-v2", "exercises")
+    n_packs = n_items = n_cores = n_core_items = 0
+
+    for r in range(scale):
+        suffix = "" if r == 0 else f"-r{r}"
+        for pack in shape["packs"]:
+            p = dict(pack, topic=pack["topic"] + suffix)
+            prefix = "".join(w[0] for w in p["topic"].split("-")).upper()
+            data = [
+                make_content_item(rng, p, f"{prefix}{p['grade']}-{r:03d}-{i:03d}",
+                                  pick_interaction(rng, p["level"], mix), allowed)
+                for i in range(1, p["count"] + 1)
+            ]
+            write_json(os.path.join(content_root, p["domain"], f"groep-{p['grade']}", p["level"],
+                                    "topics", p["topic"], "exercises.json"), data)
+            n_packs += 1
+            n_items += len(data)
+
+        for core_spec in shape["cores"]:
+            if not core_spec["count"]:
+                # unreadable/empty source file: nothing to mirror
+                continue
+            core_id = core_spec["name"] + suffix.replace("-", "_")
+            core, support = make_v2_pair(rng, core_id, core_spec["category"], core_spec["count"])
+            base = os.path.join(v2_root, core_spec["category"], core_id)
+            write_json(base + "_core.json", core)
+            write_json(base + "_support.json", support)
+            n_cores += 1
+            n_core_items += core_spec["count"]
+
+    manifest = {
+        "generator_version": GENERATOR_VERSION,
+        "scale": scale,
+        "seed": seed,
+        "content_packs": n_packs,
+        "content_items": n_items,
+        "v2_core_files": n_cores,
+        "v2_items": n_core_items,
+    }
+    write_json(os.path.join(out_dir, "corpus-manifest.json"), manifest)
+    return manifest
+
+
+def check_schema(out_dir: str) -> int:
+    """Validate every generated content item against ExerciseSchema.json; returns invalid count."""
+    try:
+        from jsonschema import Draft202012Validator
+    except Exception as e:
+        print("ERROR: jsonschema package missing or incompatible:", e)
+        return -1
+
+    schema = read_json(SCHEMA_PATH)
+    validator = Draft202012Validator(schema)
+    invalid = 0
+    for root, _, files in os.walk(os.path.join(out_dir, "content")):
+        if "exercises.json" in files:
+            data = read_json(os.path.join(root, "exercises.json"))
+            for err in validator.iter_errors(data):
+                invalid += 1
+                if invalid <= 5:
+                    print(f"INVALID {root}: {err.message[:160]}")
+    return invalid
+
+
+def load_manifest(out_dir: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(out_dir, "corpus-manifest.json")
+    if not os.path.exists(path):
+        return None
+    try:
+        return read_json(path)
+    except Exception:
+        return None
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Generate a scaled synthetic exercise corpus.")
+    ap.add_argument("--out", required=True, help="Output directory (receives content/ and data-v2/)")
+    ap.add_argument("--scale", type=int, default=1, help="Multiple of the current corpus size (default 1)")
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--check", action="store_true", help="Validate generated content against ExerciseSchema.json")
+    args = ap.parse_args()
+
+    manifest = generate(args.out, args.scale, args.seed)
+    print(json.dumps(manifest, indent=2))
+
+    if args.check:
+        invalid = check_schema(args.out)
+        if invalid:
+            print(f"FAIL: {invalid} schema error(s)")
+            return 1
+        print("OK: all generated content items are schema-valid")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
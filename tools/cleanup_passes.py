@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+cleanup_passes.py — the existing update_*/fix_* scripts as transform passes
+
+Registers their fix functions with transform_pipeline.py so a chain of them
+runs over a single load and a single write. The scripts themselves are
+unchanged and still work standalone; the passes import their functions.
+
+Chain "cleanup" (resolved order):
+  update:<theme> (13 themes)  -> hint, is_correct, error_type, reflectievraag, ...
+  consistency                 -> drop 'correct', verhoudingstabel -> berekening_tabel
+  decimal-notation            -> 1.5 -> 1,5 and €240.0 -> €240,00 in text fields
+  currency                    -> €28,0 -> €28,00 in options
+
+Not in a chain (select with --pass): rebalance (answer positions, must run
+before consistency removes 'correct'), remaining-tips (fixed tips for 228-230).
+
+  python tools/transform_pipeline.py list --chain cleanup
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+from typing import Any
+
+from transform_pipeline import (KIND_LEGACY, SCOPE_DOCUMENT, PassContext, QuestionRef,
+                                register, replace_in_place)
+
+import add_remaining_tips
+import fix_currency
+import fix_decimal_notation
+import fix_json_consistency
+import rebalance_answers
+
+# theme -> (script module, update_question also takes the block content)
+UPDATE_SCRIPTS = {
+    "breuken": ("update_breuken_vragen", False),
+    "gegevensverwerking": ("update_gegevensverwerking_vragen", False),
+    "geld": ("update_geld_vragen", False),
+    "gemiddelde": ("update_gemiddelde_vragen", False),
+    "meten & meetkunde": ("update_meten_meetkunde_vragen", True),
+    "metriek-stelsel": ("update_metriek_stelsel_vragen", True),
+    "oppervlakte": ("update_oppervlakte_vragen", False),
+    "procenten-rente": ("update_procenten_rente_vragen", True),
+    "procenten": ("update_procenten_vragen", False),
+    "schaal": ("update_schaal_vragen", False),
+    "snelheid-afstand-tijd": ("update_snelheid_afstand_tijd_vragen", False),
+    "tijd-snelheid": ("update_tijd_snelheid_vragen", False),
+}
+
+
+def _register_update(theme: str, module_name: str, with_content: bool) -> None:
+    module = __import__(module_name)
+
+    def update(q: QuestionRef, ctx: PassContext) -> None:
+        if with_content:
+            module.update_question(q.question, q.theme, q.content or "")
+        else:
+            module.update_question(q.question, q.theme)
+
+    update.__doc__ = f"{module_name}.py: hints, error types and reflectievragen for '{theme}'"
+    register(f"update:{theme}", themes=(theme,), kinds=(KIND_LEGACY,), chains=("cleanup",))(update)
+
+
+for _theme, (_module, _with_content) in UPDATE_SCRIPTS.items():
+    _register_update(_theme, _module, _with_content)
+
+
+@register("update:verhoudingen", themes=("verhoudingen",), kinds=(KIND_LEGACY,), chains=("cleanup",))
+def update_verhoudingen(q: QuestionRef, ctx: PassContext) -> None:
+    """update_verhoudingen_vragen.py: option objects and foutanalyses for 'verhoudingen'"""
+    import update_verhoudingen_vragen
+    if q.question.get("options") and "question" in q.question and "correct" in q.question:
+        update_verhoudingen_vragen.update_question(q.question, q.title)
+
+
+@register("rebalance", scope=SCOPE_DOCUMENT, kinds=(KIND_LEGACY,),
+          after=("update:*",), before=("consistency",))
+def rebalance(data: Any, ctx: PassContext) -> None:
+    """rebalance_answers.py: spread correct answers evenly over the positions (seed 42)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        rebalance_answers.rebalance_answers(data)
+
+
+@register("consistency", after=("update:*",), chains=("cleanup",))
+def consistency(q: QuestionRef, ctx: PassContext) -> Any:
+    """fix_json_consistency.py: drop 'correct' fields, verhoudingstabel -> berekening_tabel"""
+    return fix_json_consistency.fix_consistency([{"questions": [q.question]}])
+
+
+@register("decimal-notation", scope=SCOPE_DOCUMENT, after=("consistency",), chains=("cleanup",))
+def decimal_notation(data: Any, ctx: PassContext) -> None:
+    """fix_decimal_notation.py: decimal comma and money notation in text fields"""
+    replace_in_place(data, fix_decimal_notation.process_value(data))
+
+
+@register("currency", after=("decimal-notation",), chains=("cleanup",))
+def currency(q: QuestionRef, ctx: PassContext) -> None:
+    """fix_currency.py: two decimals for amounts in the options"""
+    options = q.question.get("options")
+    if not isinstance(options, list):
+        return
+    for i, option in enumerate(options):
+        # the script predates option objects; fix their text as well
+        if isinstance(option, str):
+            options[i] = fix_currency.fix_currency_format(option)
+        elif isinstance(option, dict) and isinstance(option.get("text"), str):
+            option["text"] = fix_currency.fix_currency_format(option["text"])
+
+
+@register("remaining-tips", scope=SCOPE_DOCUMENT, kinds=(KIND_LEGACY,))
+def remaining_tips(data: Any, ctx: PassContext) -> None:
+    """add_remaining_tips.py: extra_info tips for problems 228-230"""
+    add_remaining_tips.add_remaining_tips(data)
@@ -2,7 +2,10 @@
 # -*- coding: utf-8 -*-
 
 import argparse, json, os, re
-from typing import Any, Dict, List, Tuple, Optional
+from typing import Any, Dict, Tuple, Optional
+
+# Empty packs are found through the kerndoel coverage view (only changed packs are parsed)
+from kerndoel_view import DEFAULT_TOPIC_CANON_DIR, KerndoelView
 
 BASE_V12 = """Je bent een oefeningengenerator voor het Nederlandse basisonderwijs
 (rekenen-wiskunde), inspectie-proof, SLO-aligned en strikt schema-gedreven.
@@ -44,42 +47,6 @@ CONTROLE (HARD)
 GENEREER NU DE JSON-ARRAY.
 """
 
-def find_exercises_files(root: str) -> List[str]:
-    out=[]
-    for r,_,files in os.walk(root):
-        for fn in files:
-            if fn=="exercises.json":
-                out.append(os.path.join(r,fn))
-    return sorted(out)
-
-def load_json_safe(path: str) -> Tuple[str, Any]:
-    try:
-        with open(path,"r",encoding="utf-8") as f:
-            raw=f.read()
-        if raw.strip()=="":
-            return "empty_file", None
-        return "ok", json.loads(raw)
-    except Exception:
-        return "parse_error", None
-
-def parse_meta(path: str) -> Dict[str, Any]:
-    p = path.replace("\\","/")
-    parts = p.split("/")
-    meta={"domain":"","group":"","level":"","topic":"","grade":0}
-    if "nl-NL" in parts:
-        i=parts.index("nl-NL")
-        if i+1<len(parts): meta["domain"]=parts[i+1]
-    for part in parts:
-        if part.startswith("groep-"):
-            try: meta["grade"]=int(part.split("-")[1])
-            except: meta["grade"]=0
-        if part in ("n1","n2","n3","n4"):
-            meta["level"]=part
-    if "topics" in parts:
-        j=parts.index("topics")
-        if j+1<len(parts): meta["topic"]=parts[j+1]
-    return meta
-
 def suggest_id_prefix(domain: str, grade: int, topic: str) -> str:
     dom_map = {
         "getal-en-bewerkingen": "GB",
@@ -220,6 +187,7 @@ def main():
     ap.add_argument("--groups", default="4,5,6")
     ap.add_argument("--levels", default="n2,n3")
     ap.add_argument("--overrides", default="docs/new/prompt-overrides.json")
+    ap.add_argument("--topic-canon-dir", default=DEFAULT_TOPIC_CANON_DIR, help="Topic canon for the coverage view")
     args=ap.parse_args()
 
     groups=set(int(x.strip()) for x in args.groups.split(",") if x.strip())
@@ -227,17 +195,16 @@ def main():
 
     cfg = load_overrides(args.overrides)
 
-    files=find_exercises_files(args.content_root)
+    view=KerndoelView.open(args.content_root, args.topic_canon_dir)
     targets=[]
 
-    for p in files:
-        meta=parse_meta(p)
-        if meta["grade"] not in groups: 
+    for p,rec in view.records():
+        meta={"domain":rec["domain"],"grade":rec["grade"] or 0,"level":rec["level"],"topic":rec["topic"]}
+        if meta["grade"] not in groups:
             continue
         if meta["level"] not in levels:
             continue
-        st,data=load_json_safe(p)
-        if st=="ok" and isinstance(data,list) and len(data)==0:
+        if rec["status"]=="ok" and rec["n"]==0:
             targets.append((p,meta))
 
     os.makedirs(args.out_root, exist_ok=True)
@@ -96,7 +96,10 @@ def check_pack(path: str, max_context_ratio: float) -> List[str]:
         data = load_json(path)
     except Exception as e:
         return [f"parse error: {e}"]
+    return check_pack_data(data, max_context_ratio)
 
+def check_pack_data(data: Any, max_context_ratio: float) -> List[str]:
+    """check_pack on an already parsed pack (used by the watch daemon)"""
     if not isinstance(data, list) or len(data) == 0:
         # lege pack: geen duplicate fail (dit wordt elders als warning gerapporteerd)
         return []
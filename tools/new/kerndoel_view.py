@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+kerndoel_view.py
+
+Kerndoel coverage as a materialised view over content/**/exercises.json.
+
+Per pack the view stores its contribution (exercise count, interaction
+breakdown, kerndoelen from the topic canon) under the sha256 of the pack,
+plus running totals per groep × kerndoel, groep × domein × kerndoel and
+domein × kerndoel. refresh() stats every pack; only packs whose bytes
+changed are parsed again, and their old contribution is subtracted from
+the totals before the new one is added. The topic canon is re-read only
+when one of its files changed. The view lives in .cache/kerndoel-view.json.
+
+kerndoel_coverage_dashboard.py renders its JSON/Markdown from the view;
+priority_plan.py and generate_batch_prompts_for_empty_packs.py read pack
+counts from it instead of parsing every pack themselves.
+
+Usage:
+  from kerndoel_view import KerndoelView, load_group_gate
+  view = KerndoelView.open("content")
+  view.undercovered(load_group_gate("docs/new/kerndoelen-per-groep.json"), 30)
+  view.count(5, 26)                       # exercises for kerndoel 26 in groep 5
+
+  py -3.13 tools/new/kerndoel_view.py --content-root content --min-per-kerndoel 30 [--group 5]
+
+Exit codes:
+  0 = OK (also when kerndoelen are under the threshold)
+  1 = --verify: running totals differ from a recount
+  2 = CLI / IO error
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(HERE, "..", ".."))
+DEFAULT_CACHE_PATH = os.path.join(REPO_ROOT, ".cache", "kerndoel-view.json")
+DEFAULT_TOPIC_CANON_DIR = os.path.join("docs", "new")
+DEFAULT_GROUP_GATE = os.path.join("docs", "new", "kerndoelen-per-groep.json")
+
+VIEW_FORMAT_VERSION = 1
+
+
+# ----------------------------
+# Sources
+# ----------------------------
+
+def load_json(path: str) -> Any:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def find_files(root: str, filename: str) -> List[str]:
+    out = []
+    for r, _, files in os.walk(root):
+        if filename in files:
+            out.append(os.path.join(r, filename))
+    return sorted(out)
+
+
+def parse_pack_meta(path: str) -> Dict[str, Any]:
+    """domain / group ("groep-5") / grade (5, None if unparseable) / level / topic from a pack path"""
+    parts = path.replace("\\", "/").split("/")
+    meta: Dict[str, Any] = {"domain": "", "group": "", "grade": None, "level": "", "topic": ""}
+
+    if "nl-NL" in parts:
+        i = parts.index("nl-NL")
+        if i + 1 < len(parts):
+            meta["domain"] = parts[i + 1]
+
+    for part in parts:
+        if part.startswith("groep-"):
+            meta["group"] = part
+            try:
+                meta["grade"] = int(part.split("-")[1])
+            except Exception:
+                meta["grade"] = None
+        if part in ("n1", "n2", "n3", "n4"):
+            meta["level"] = part
+
+    if "topics" in parts:
+        j = parts.index("topics")
+        if j + 1 < len(parts):
+            meta["topic"] = parts[j + 1]
+
+    return meta
+
+
+def topic_canon_files(topic_canon_dir: str) -> List[str]:
+    out = []
+    for r, _, files in os.walk(topic_canon_dir):
+        for fn in files:
+            if fn.endswith(".json") and "topic-canon" in fn:
+                out.append(os.path.join(r, fn))
+    return sorted(out)
+
+
+def load_topic_canons(topic_canon_dir: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Returns mapping: domain -> topic_slug -> topic_entry
+    Expected canon file shape:
+      { "domain": "...", "version": "...", "topics": [ { "topic": "slug", "kerndoelen":[...], ... }, ... ] }
+    or a flat list of topic entries with a "domain" each (legacy topic-canon.json).
+    Files are read in path order; a later entry for the same slug wins.
+    """
+    domain_map: Dict[str, Dict[str, Any]] = defaultdict(dict)
+
+    for path in topic_canon_files(topic_canon_dir):
+        doc = load_json(path)
+
+        # Variant A: dict with domain+topics
+        if isinstance(doc, dict):
+            domain = doc.get("domain")
+            topics = doc.get("topics", [])
+            if domain and isinstance(topics, list):
+                for t in topics:
+                    slug = t.get("topic")
+                    if slug:
+                        domain_map[domain][slug] = t
+                continue
+
+        # Variant B: flat list of topic entries (legacy topic-canon.json)
+        if isinstance(doc, list):
+            for t in doc:
+                if not isinstance(t, dict):
+                    continue
+                domain = t.get("domain")
+                slug = t.get("topic")
+                if domain and slug:
+                    domain_map[domain][slug] = t
+
+    return domain_map
+
+
+def load_group_gate(group_gate_path: str) -> Dict[int, List[int]]:
+    """
+    { groupNum: [kerndoelen] } from kerndoelen-per-groep.json; accepts
+      { "groups": { "groep-1": { "kerndoelen": [23, 26, ...], ... }, ... } }
+      { "groups": [ { "group": 1, "kerndoelen": [23, 26, ...] }, ... ] }
+    """
+    groups = load_json(group_gate_path).get("groups", [])
+    if isinstance(groups, dict):
+        entries = [(key, g) for key, g in groups.items()]
+    else:
+        entries = [(None, g) for g in groups]
+
+    out: Dict[int, List[int]] = {}
+    for key, g in entries:
+        try:
+            if isinstance(g, dict) and "group" in g:
+                gn = int(g["group"])
+            else:
+                gn = int(str(key).split("-")[-1])
+            ks = g.get("kerndoelen", [])
+            if isinstance(ks, list):
+                out[gn] = [int(x) for x in ks]
+        except Exception:
+            continue
+    return out
+
+
+def scan_pack(raw: bytes) -> Tuple[str, int, Dict[str, int]]:
+    """
+    (status, n_exercises, interaction counts) of one exercises.json
+    status: ok | empty_file | parse_error | not_list (n is 0 unless ok)
+    """
+    try:
+        text = raw.decode("utf-8")
+        if text.strip() == "":
+            return "empty_file", 0, {}
+        data = json.loads(text)
+    except Exception:
+        return "parse_error", 0, {}
+    if not isinstance(data, list):
+        return "not_list", 0, {}
+
+    interactions: Counter = Counter()
+    for ex in data:
+        interaction = ex.get("interaction") if isinstance(ex, dict) else None
+        it = interaction.get("type") if isinstance(interaction, dict) else None
+        if it:
+            interactions[it] += 1
+    return "ok", len(data), dict(interactions)
+
+
+# ----------------------------
+# View
+# ----------------------------
+
+def _bump(table: Dict[Tuple, List[int]], key: Tuple, n: int, sign: int) -> None:
+    """table[key] = [exercises, contributing packs]; a key disappears with its last pack"""
+    cell = table.setdefault(key, [0, 0])
+    cell[0] += sign * n
+    cell[1] += sign
+    if cell[1] <= 0:
+        del table[key]
+
+
+class KerndoelView:
+    """Pack contributions + running totals; see the module docstring"""
+
+    def __init__(self, content_root: str, topic_canon_dir: str = DEFAULT_TOPIC_CANON_DIR,
+                 cache_path: Optional[str] = DEFAULT_CACHE_PATH):
+        self.content_root = content_root
+        self.topic_canon_dir = topic_canon_dir
+        self.cache_path = cache_path
+        self.refresh_stats: Dict[str, Any] = {}
+        self._reset()
+
+    def _reset(self) -> None:
+        self.canon_digest = ""
+        self.canon: Dict[str, Dict[str, List[Any]]] = {}   # domain -> topic -> kerndoelen
+        self.packs: Dict[str, Dict[str, Any]] = {}          # rel path -> record
+        self.gk: Dict[Tuple, List[int]] = {}                # (grade, kerndoel)
+        self.gdk: Dict[Tuple, List[int]] = {}               # (grade, domain, kerndoel)
+        self.dk: Dict[Tuple, List[int]] = {}                # (domain, kerndoel)
+        self.dirty = False
+
+    # ---- persistence
+
+    @classmethod
+    def open(cls, content_root: str, topic_canon_dir: str = DEFAULT_TOPIC_CANON_DIR,
+             cache_path: Optional[str] = DEFAULT_CACHE_PATH, refresh: bool = True) -> "KerndoelView":
+        """Load the stored view for this content root (if any) and bring it up to date"""
+        view = cls(content_root, topic_canon_dir, cache_path)
+        view._load()
+        if refresh:
+            view.refresh_stats = view.refresh()
+            view.save()
+        return view
+
+    def _roots(self) -> List[str]:
+        return [os.path.abspath(self.content_root), os.path.abspath(self.topic_canon_dir)]
+
+    def _load(self) -> None:
+        if not (self.cache_path and os.path.exists(self.cache_path)):
+            return
+        try:
+            data = load_json(self.cache_path)
+            if data.get("format_version") != VIEW_FORMAT_VERSION or data.get("roots") != self._roots():
+                return
+            self.canon_digest = data["canon_digest"]
+            self.canon = data["canon"]
+            self.packs = data["packs"]
+            for name in ("gk", "gdk", "dk"):
+                setattr(self, name, {tuple(row[:-2]): row[-2:] for row in data[name]})
+        except Exception:
+            self._reset()  # unreadable view: rebuilt by refresh()
+
+    def save(self) -> None:
+        if not (self.cache_path and self.dirty):
+            return
+        data = {
+            "format_version": VIEW_FORMAT_VERSION,
+            "roots": self._roots(),
+            "canon_digest": self.canon_digest,
+            "canon": self.canon,
+            "packs": self.packs,
+        }
+        for name in ("gk", "gdk", "dk"):
+            data[name] = [list(key) + cell for key, cell in sorted(getattr(self, name).items())]
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.cache_path)
+            self.dirty = False
+        except OSError:
+            pass  # read-only checkout: the view still works, just without the cache
+
+    # ---- maintenance
+
+    def _resolve_kerndoelen(self, rec: Dict[str, Any]) -> Optional[List[int]]:
+        """Kerndoelen a pack counts towards; None when it has no canon entry (or no meta)"""
+        if not rec["domain"] or not rec["grade"] or not rec["topic"]:
+            return None
+        entry = self.canon.get(rec["domain"], {}).get(rec["topic"])
+        if entry is None:
+            return None
+        out = []
+        for k in entry:
+            try:
+                out.append(int(k))
+            except Exception:
+                continue
+        return out
+
+    def _apply(self, rec: Optional[Dict[str, Any]], sign: int) -> None:
+        if not rec or not rec.get("kerndoelen"):
+            return
+        grade, domain, n = rec["grade"], rec["domain"], rec["n"]
+        for k in rec["kerndoelen"]:
+            _bump(self.gk, (grade, k), n, sign)
+            _bump(self.gdk, (grade, domain, k), n, sign)
+            _bump(self.dk, (domain, k), n, sign)
+
+    def _refresh_canon(self) -> bool:
+        h = hashlib.sha256()
+        for path in topic_canon_files(self.topic_canon_dir):
+            with open(path, "rb") as f:
+                h.update(os.path.relpath(path, self.topic_canon_dir).encode("utf-8") + b"\0" + f.read())
+        digest = h.hexdigest()
+        if digest == self.canon_digest:
+            return False
+        canon: Dict[str, Dict[str, List[Any]]] = {}
+        for domain, topics in load_topic_canons(self.topic_canon_dir).items():
+            canon[domain] = {}
+            for slug, entry in topics.items():
+                ks = entry.get("kerndoelen", [])
+                canon[domain][slug] = ks if isinstance(ks, list) else []
+        self.canon, self.canon_digest = canon, digest
+        return True
+
+    def refresh(self) -> Dict[str, Any]:
+        """Bring the view up to date; returns what it had to do"""
+        stats = {"packs": 0, "reused": 0, "rehashed": 0, "rescanned": 0, "removed": 0, "canon_changed": False}
+        canon_changed = self._refresh_canon()
+        stats["canon_changed"] = canon_changed
+
+        seen = set()
+        for path in find_files(self.content_root, "exercises.json"):
+            rel = os.path.relpath(path, self.content_root).replace("\\", "/")
+            seen.add(rel)
+            stats["packs"] += 1
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            sig = [st.st_size, st.st_mtime_ns]
+            rec = self.packs.get(rel)
+
+            if rec is not None and rec["stat"] == sig:
+                stats["reused"] += 1
+            else:
+                with open(path, "rb") as f:
+                    raw = f.read()
+                digest = hashlib.sha256(raw).hexdigest()
+                if rec is not None and rec["sha"] == digest:
+                    rec["stat"] = sig
+                    stats["rehashed"] += 1
+                else:
+                    status, n, interactions = scan_pack(raw)
+                    new = dict(parse_pack_meta(path), stat=sig, sha=digest, status=status, n=n,
+                               interactions=interactions)
+                    new["kerndoelen"] = self._resolve_kerndoelen(new)
+                    self._apply(rec, -1)
+                    self._apply(new, +1)
+                    self.packs[rel] = new
+                    stats["rescanned"] += 1
+                self.dirty = True
+                continue
+
+            if canon_changed:
+                kerndoelen = self._resolve_kerndoelen(rec)
+                if kerndoelen != rec["kerndoelen"]:
+                    self._apply(rec, -1)
+                    rec["kerndoelen"] = kerndoelen
+                    self._apply(rec, +1)
+
+        for rel in sorted(set(self.packs) - seen):
+            self._apply(self.packs.pop(rel), -1)
+            stats["removed"] += 1
+        if canon_changed or stats["removed"]:
+            self.dirty = True
+        return stats
+
+    def verify(self) -> List[str]:
+        """Differences between the running totals and a recount from the pack records"""
+        fresh = KerndoelView(self.content_root, self.topic_canon_dir, cache_path=None)
+        for rec in self.packs.values():
+            fresh._apply(rec, +1)
+        problems = []
+        for name in ("gk", "gdk", "dk"):
+            mine, theirs = getattr(self, name), getattr(fresh, name)
+            for key in sorted(set(mine) | set(theirs), key=str):
+                if mine.get(key) != theirs.get(key):
+                    problems.append(f"{name}{key}: view={mine.get(key)} recount={theirs.get(key)}")
+        return problems
+
+    # ---- queries
+
+    def records(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """(path under content_root, record) per pack, in path order"""
+        for rel in sorted(self.packs):
+            yield os.path.join(self.content_root, rel), self.packs[rel]
+
+    def count(self, grade: int, kerndoel: int, domain: Optional[str] = None) -> int:
+        if domain is None:
+            return self.gk.get((grade, kerndoel), [0])[0]
+        return self.gdk.get((grade, domain, kerndoel), [0])[0]
+
+    def coverage(self, group_gate: Dict[int, List[int]], min_per_kerndoel: int) -> List[Dict[str, Any]]:
+        """One row per (groep, allowed kerndoel) with its count and OK / LOW / NONE"""
+        rows = []
+        for group_num, allowed_ks in sorted(group_gate.items()):
+            for k in allowed_ks:
+                cnt = self.count(group_num, k)
+                status = "OK" if cnt >= min_per_kerndoel else ("LOW" if cnt > 0 else "NONE")
+                rows.append({
+                    "group": group_num,
+                    "kerndoel": k,
+                    "count": cnt,
+                    "status": status,
+                    "min_threshold": min_per_kerndoel
+                })
+        return rows
+
+    def undercovered(self, group_gate: Dict[int, List[int]], min_per_kerndoel: int,
+                     group: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Kerndoelen per groep under the threshold (LOW/NONE), optionally for one groep"""
+        under = [c for c in self.coverage(group_gate, min_per_kerndoel)
+                 if c["status"] != "OK" and (group is None or c["group"] == group)]
+        under.sort(key=lambda x: (x["group"], x["status"], x["count"]))
+        return under
+
+    def domain_kerndoel_counts(self) -> Dict[str, Dict[int, int]]:
+        out: Dict[str, Dict[int, int]] = defaultdict(dict)
+        for (domain, k), (cnt, _) in sorted(self.dk.items()):
+            out[domain][k] = cnt
+        return dict(out)
+
+    def trace(self) -> Dict[int, Dict[int, List[Dict[str, Any]]]]:
+        """groep -> kerndoel -> contributing packs (drill-down)"""
+        trace: Dict[int, Dict[int, List[Dict[str, Any]]]] = defaultdict(lambda: defaultdict(list))
+        for path, rec in self.records():
+            for k in rec["kerndoelen"] or []:
+                trace[rec["grade"]][k].append({
+                    "topic": rec["topic"],
+                    "domain": rec["domain"],
+                    "count": rec["n"],
+                    "path": path,
+                    "interaction_breakdown": rec["interactions"]
+                })
+        return {g: dict(sorted(ks.items())) for g, ks in sorted(trace.items())}
+
+    def missing_in_canon(self) -> List[str]:
+        return [path for path, rec in self.records()
+                if rec["domain"] and rec["grade"] and rec["topic"] and rec["kerndoelen"] is None]
+
+    def stats(self) -> Dict[str, int]:
+        recs = list(self.packs.values())
+        return {
+            "total_packs": len(recs),
+            "empty_packs": sum(1 for r in recs if r["n"] == 0),
+            "total_exercises": sum(r["n"] for r in recs),
+            "packs_missing_in_topic_canon": len(self.missing_in_canon())
+        }
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+
+def safe_print(s: str = "") -> None:
+    try:
+        print(s)
+    except UnicodeEncodeError:
+        print(s.encode("utf-8", errors="replace").decode("utf-8"))
+
+
+def parse_args() -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Kerndoelen per groep under the coverage threshold (from the view).")
+    ap.add_argument("--content-root", default="content")
+    ap.add_argument("--topic-canon-dir", default=DEFAULT_TOPIC_CANON_DIR)
+    ap.add_argument("--group-gate", default=DEFAULT_GROUP_GATE)
+    ap.add_argument("--min-per-kerndoel", type=int, default=30)
+    ap.add_argument("--group", type=int, default=None, help="Only this groep")
+    ap.add_argument("--json", action="store_true", help="Print rows as JSON")
+    ap.add_argument("--no-cache", action="store_true", help="Rebuild from scratch, do not store the view")
+    ap.add_argument("--verify", action="store_true", help="Check the running totals against a recount")
+    return ap.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if not os.path.isdir(args.content_root):
+        safe_print(f"ERROR: content-root not found: {args.content_root}")
+        return 2
+    try:
+        group_gate = load_group_gate(args.group_gate)
+        view = KerndoelView.open(args.content_root, args.topic_canon_dir,
+                                 cache_path=None if args.no_cache else DEFAULT_CACHE_PATH)
+    except (OSError, ValueError) as e:
+        safe_print(f"ERROR: {e}")
+        return 2
+
+    if args.verify:
+        problems = view.verify()
+        for p in problems:
+            safe_print(f"MISMATCH: {p}")
+        safe_print(f"{'FAIL' if problems else 'OK'}: {len(view.packs)} pack(s), {len(problems)} mismatch(es)")
+        return 1 if problems else 0
+
+    under = view.undercovered(group_gate, args.min_per_kerndoel, args.group)
+    if args.json:
+        safe_print(json.dumps(under, ensure_ascii=False, indent=2))
+        return 0
+
+    r = view.refresh_stats
+    safe_print(f"View: {r['packs']} pack(s), {r['rescanned']} rescanned, {r['removed']} removed"
+               f"{', canon changed' if r['canon_changed'] else ''}")
+    safe_print(f"Under {args.min_per_kerndoel} per kerndoel: {len(under)}")
+    for c in under:
+        safe_print(f"  groep {c['group']}  kerndoel {c['kerndoel']:>2}  {c['count']:>4}  {c['status']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,11 +1,21 @@
 from __future__ import annotations
 import argparse
+import hashlib
 import json
 import os
 import sys
-from typing import Any, Dict, List, Tuple
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
-from validators.content_rules import get_rules
+from validators.content_rules import RULESET_VERSION, get_scanner
+
+PROMPTS_ROOT = os.path.join("prompts", "packs", "nl-NL")
+DEFAULT_REPORT = os.path.join("state", "preflight.report.json")
+DEFAULT_CACHE = os.path.join(".cache", "preflight-cache.json")
+
+# Below this many uncached packs a process pool costs more than it saves
+MIN_PACKS_FOR_POOL = 16
 
 
 def infer_level_topic(text: str) -> Tuple[str | None, str | None]:
@@ -24,49 +34,191 @@ def infer_level_topic(text: str) -> Tuple[str | None, str | None]:
     return level, topic
 
 
-def main() -> int:
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--prompt-file", required=True, help="Path to a .txt file containing the batch prompt.")
-    args = ap.parse_args()
-
-    if not os.path.exists(args.prompt_file):
-        print(f"❌ prompt-file not found: {args.prompt_file}")
-        return 2
-
-    text = open(args.prompt_file, "r", encoding="utf-8").read()
+def check_prompt_text(text: str) -> Dict[str, Any]:
+    """Run the content rules over one batch prompt; verdict is "fail" on any FAIL rule."""
     level, topic = infer_level_topic(text)
-
-    rules = get_rules(level=level, topic=topic)
+    scanner = get_scanner(level, topic)
 
     fails: List[Dict[str, Any]] = []
     warns: List[Dict[str, Any]] = []
 
-    for r in rules:
-        hits = list(r.pattern.finditer(text))
-        if not hits:
-            continue
+    for r, count in scanner.scan(text):
         entry = {
             "code": r.code,
             "severity": r.severity,
             "description": r.description,
-            "count": len(hits),
+            "count": count,
         }
         if r.severity == "FAIL":
             fails.append(entry)
         else:
             warns.append(entry)
 
+    return {
+        "level": level,
+        "topic": topic,
+        "verdict": "fail" if fails else "ok",
+        "fails": fails,
+        "warns": warns,
+    }
+
+
+def sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def print_result(res: Dict[str, Any]) -> None:
     print("PRE-FLIGHT PROMPT CHECKS")
-    print(f"- inferred level: {level}")
-    print(f"- inferred topic: {topic}")
-    print(f"- FAILS: {len(fails)} | WARNS: {len(warns)}")
+    print(f"- inferred level: {res['level']}")
+    print(f"- inferred topic: {res['topic']}")
+    print(f"- FAILS: {len(res['fails'])} | WARNS: {len(res['warns'])}")
 
-    for e in fails:
+    for e in res["fails"]:
         print(f"❌ [{e['code']}] {e['description']} (hits={e['count']})")
-    for e in warns:
+    for e in res["warns"]:
         print(f"⚠️ [{e['code']}] {e['description']} (hits={e['count']})")
 
-    if fails:
+
+# ----------------------------
+# Bulk mode
+# ----------------------------
+
+def find_prompt_packs(prompts_root: str) -> List[str]:
+    paths: List[str] = []
+    for root, _, files in os.walk(prompts_root):
+        for fn in files:
+            if fn.endswith(".txt"):
+                paths.append(os.path.join(root, fn))
+    return sorted(paths)
+
+
+def report_key(path: str) -> str:
+    """Report key for a prompt file: repo-relative path with forward slashes."""
+    return os.path.relpath(os.path.abspath(path)).replace("\\", "/")
+
+
+def load_cache(path: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("ruleset_version") != RULESET_VERSION:
+        return {}
+    return data.get("entries", {})
+
+
+def save_cache(path: str, entries: Dict[str, Dict[str, Any]]) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"ruleset_version": RULESET_VERSION, "entries": entries}, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _check_text_worker(text: str) -> Dict[str, Any]:
+    # Process-pool entry point (must be importable at module level)
+    return check_prompt_text(text)
+
+
+def run_bulk(prompts_root: str, report_path: str, cache_path: Optional[str], jobs: int, quiet: bool) -> int:
+    paths = find_prompt_packs(prompts_root)
+    if not paths:
+        print(f"❌ no prompt packs found under: {prompts_root}")
+        return 2
+
+    cache = load_cache(cache_path) if cache_path else {}
+    texts: Dict[str, str] = {}
+    hashes: Dict[str, str] = {}
+    results: Dict[str, Dict[str, Any]] = {}
+    misses: List[str] = []
+
+    for p in paths:
+        with open(p, "r", encoding="utf-8") as f:
+            texts[p] = f.read()
+        hashes[p] = sha256_text(texts[p])
+        cached = cache.get(hashes[p])
+        if cached is not None:
+            results[p] = cached
+        else:
+            misses.append(p)
+
+    if misses:
+        if jobs > 1 and len(misses) >= MIN_PACKS_FOR_POOL:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                for p, res in zip(misses, pool.map(_check_text_worker, [texts[m] for m in misses], chunksize=4)):
+                    results[p] = res
+        else:
+            for p in misses:
+                results[p] = check_prompt_text(texts[p])
+        for p in misses:
+            cache[hashes[p]] = results[p]
+
+    packs: Dict[str, Dict[str, Any]] = {}
+    for p in paths:
+        packs[report_key(p)] = {"sha256": hashes[p], **results[p]}
+
+    failed = [k for k, v in packs.items() if v["verdict"] == "fail"]
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "ruleset_version": RULESET_VERSION,
+        "prompts_root": prompts_root.replace("\\", "/"),
+        "summary": {
+            "packs": len(packs),
+            "ok": len(packs) - len(failed),
+            "fail": len(failed),
+            "cached": len(paths) - len(misses),
+        },
+        "packs": packs,
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(report_path)) or ".", exist_ok=True)
+    tmp = report_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    os.replace(tmp, report_path)
+
+    if cache_path and misses:
+        save_cache(cache_path, cache)
+
+    print("PRE-FLIGHT PROMPT CHECKS (bulk)")
+    print(f"- packs: {len(packs)} | OK: {len(packs) - len(failed)} | FAIL: {len(failed)} "
+          f"| cached: {len(paths) - len(misses)}")
+    if not quiet:
+        for k in failed:
+            codes = ", ".join(e["code"] for e in packs[k]["fails"])
+            print(f"❌ {k} [{codes}]")
+    print(f"- report: {report_path}")
+
+    return 1 if failed else 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    mode = ap.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--prompt-file", help="Path to a .txt file containing the batch prompt.")
+    mode.add_argument("--all", action="store_true", help="Check every pack under --prompts-root and write a JSON report.")
+    ap.add_argument("--prompts-root", default=PROMPTS_ROOT, help=f"Bulk mode: prompt packs root (default: {PROMPTS_ROOT})")
+    ap.add_argument("--report", default=DEFAULT_REPORT, help=f"Bulk mode: report path (default: {DEFAULT_REPORT})")
+    ap.add_argument("--cache", default=DEFAULT_CACHE, help=f"Bulk mode: verdict cache (default: {DEFAULT_CACHE})")
+    ap.add_argument("--no-cache", action="store_true", help="Bulk mode: ignore and do not update the verdict cache")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Bulk mode: worker processes")
+    ap.add_argument("--quiet", action="store_true", help="Bulk mode: only print the summary")
+    args = ap.parse_args()
+
+    if args.all:
+        return run_bulk(args.prompts_root, args.report, None if args.no_cache else args.cache, args.jobs, args.quiet)
+
+    if not os.path.exists(args.prompt_file):
+        print(f"❌ prompt-file not found: {args.prompt_file}")
+        return 2
+
+    text = open(args.prompt_file, "r", encoding="utf-8").read()
+    res = check_prompt_text(text)
+    print_result(res)
+
+    if res["fails"]:
         return 1
     return 0
 
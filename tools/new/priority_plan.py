@@ -2,47 +2,17 @@
 # -*- coding: utf-8 -*-
 
 import argparse, json, os
-from typing import Any, Dict, List, Tuple
-
-def find_exercises_files(root: str) -> List[str]:
-    out = []
-    for r, _, files in os.walk(root):
-        for fn in files:
-            if fn == "exercises.json":
-                out.append(os.path.join(r, fn))
-    return sorted(out)
-
-def load_json_safe(path: str) -> Tuple[str, Any]:
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            raw = f.read()
-        if raw.strip() == "":
-            return "empty_file", None
-        return "ok", json.loads(raw)
-    except Exception:
-        return "parse_error", None
-
-def parse_meta(path: str) -> Dict[str, Any]:
-    p = path.replace("\\", "/")
-    parts = p.split("/")
-    meta = {"domain": "", "group": "", "level": "", "topic": "", "path": path}
-    if "nl-NL" in parts:
-        i = parts.index("nl-NL")
-        if i + 1 < len(parts): meta["domain"] = parts[i + 1]
-    for part in parts:
-        if part.startswith("groep-"):
-            meta["group"] = part
-            try:
-                meta["group_num"] = int(part.split("-")[1])
-            except Exception:
-                meta["group_num"] = 0
-        if part in ("n1","n2","n3","n4"):
-            meta["level"] = part
-    if "topics" in parts:
-        j = parts.index("topics")
-        if j + 1 < len(parts): meta["topic"] = parts[j + 1]
-    if "group_num" not in meta: meta["group_num"] = 0
-    return meta
+from typing import Any, Dict
+
+# Pack counts come from the kerndoel coverage view (only changed packs are parsed)
+from kerndoel_view import DEFAULT_TOPIC_CANON_DIR, KerndoelView
+
+# view status -> load status used by score()
+LOAD_STATUS = {"ok": "ok", "empty_file": "empty_file", "parse_error": "parse_error", "not_list": "parse_error"}
+
+def pack_meta(rec: Dict[str, Any], path: str) -> Dict[str, Any]:
+    return {"domain": rec["domain"], "group": rec["group"], "group_num": rec["grade"] or 0,
+            "level": rec["level"], "topic": rec["topic"], "path": path}
 
 def score(meta: Dict[str, Any], status: str, n_items: int) -> int:
     g = meta["group_num"]
@@ -84,19 +54,16 @@ def main():
     ap.add_argument("--min-target", type=int, default=30, help="Target exercises per pack")
     ap.add_argument("--out", default="docs/new/reports/priority_plan.json")
     ap.add_argument("--top", type=int, default=80)
+    ap.add_argument("--topic-canon-dir", default=DEFAULT_TOPIC_CANON_DIR, help="Topic canon for the coverage view")
     args = ap.parse_args()
 
-    files = find_exercises_files(args.content_root)
+    view = KerndoelView.open(args.content_root, args.topic_canon_dir)
     rows = []
 
-    for path in files:
-        meta = parse_meta(path)
-        st, data = load_json_safe(path)
-        n = 0
-        if st == "ok" and isinstance(data, list):
-            n = len(data)
-        elif st == "ok":
-            st = "parse_error"
+    for path, rec in view.records():
+        meta = pack_meta(rec, path)
+        st = LOAD_STATUS[rec["status"]]
+        n = rec["n"]
 
         if st == "ok" and n >= args.min_target:
             status = "OK"
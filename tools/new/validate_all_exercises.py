@@ -2,7 +2,9 @@ import argparse
 import json
 import sys
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List
+
+from validators.canon_registry import CanonRegistry, canon_key, get_registry, normalize_domain_for_canon
 #python tools/validate_all_exercises.py \
 #  --topic-canon docs/topic-canon.json \
 #  --taskforms docs/taskvormen-canon.json \
@@ -14,21 +16,6 @@ def load_json(path: str) -> Any:
     return json.loads(Path(path).read_text(encoding="utf-8"))
 
 
-def canon_key(domain: str, grade: int, topic: str) -> Tuple[str, int, str]:
-    return (domain, grade, topic)
-
-
-def normalize_domain_for_canon(domain_value: str) -> str:
-    """
-    Exercises currently use snake_case (e.g. getal_en_bewerkingen)
-    while canon uses kebab-case (e.g. getal-en-bewerkingen).
-    Normalize snake_case -> kebab-case so matching works.
-    """
-    if not isinstance(domain_value, str):
-        return domain_value
-    return domain_value.replace("_", "-")
-
-
 def infer_task_form(ex: Dict[str, Any]) -> str:
     """
     Prefer explicit metadata.taskForm.
@@ -48,30 +35,13 @@ def infer_task_form(ex: Dict[str, Any]) -> str:
     return "unknown"
 
 
-def validate_exercise_list(
-    exercises: List[Dict[str, Any]],
-    topic_canon: List[Dict[str, Any]],
-    taskforms: Dict[str, Any],
-    misconcepts: Dict[str, Any],
-    feedback: Dict[str, Any],
-) -> List[str]:
+def validate_exercise_list(exercises: List[Dict[str, Any]], registry: CanonRegistry) -> List[str]:
     errors: List[str] = []
 
-    # Build topic canon lookup
-    canon_lookup: Dict[Tuple[str, int, str], Dict[str, Any]] = {}
-    for item in topic_canon:
-        k = canon_key(item["domain"], int(item["grade"]), item["topic"])
-        canon_lookup[k] = item
-
-    # Misconcept keys set
-    mc_keys = set(m["key"] for m in misconcepts.get("misconcepts", []))
-
-    # Feedback keys set
-    fb = feedback.get("misconceptFeedback", {})
-    fb_keys = set(fb.keys())
-
-    levels = taskforms.get("levels", {})
-    task_def = taskforms.get("taskFormDefinitions", {})
+    # Topic canon, taskForm canon, misconcept and feedback keys: O(1) lookups in the registry
+    mc_keys = registry.misconcept_keys
+    fb_keys = registry.feedback_keys
+    task_def = registry.taskform_definitions
 
     def err(i: int, exid: str, msg: str) -> None:
         errors.append(f"[{i}] {exid}: {msg}")
@@ -102,14 +72,15 @@ def validate_exercise_list(
 
         # A. Topic & level check (hard)
         ck = canon_key(domain, grade, topic)
-        if ck not in canon_lookup:
+        allowed = registry.topic_levels(domain, grade, topic)
+        if allowed is None:
             err(
                 i,
                 exid,
                 f"Topic not in topic-canon: (domain={ck[0]}, grade={ck[1]}, topic={ck[2]})",
             )
         else:
-            allowed = canon_lookup[ck].get("allowedLevels", [])
+            allowed = list(allowed)
             if level not in allowed:
                 err(i, exid, f"Level '{level}' not allowed for this topic (allowed={allowed})")
 
@@ -118,11 +89,11 @@ def validate_exercise_list(
         if tf == "unknown":
             err(i, exid, "Cannot infer taskForm (add metadata.taskForm)")
         else:
-            if level not in levels:
+            if not registry.has_level(level):
                 err(i, exid, f"Level '{level}' not found in taskforms canon")
             else:
-                allowed_tf = set(levels[level].get("allowedTaskForms", []))
-                disallowed_tf = set(levels[level].get("disallowedTaskForms", []))
+                allowed_tf = registry.allowed_taskforms(level)
+                disallowed_tf = registry.disallowed_by_level.get(level, frozenset())
 
                 # If not explicitly defined anywhere, flag it
                 if tf not in allowed_tf and tf not in disallowed_tf and tf not in task_def:
@@ -184,10 +155,9 @@ def main() -> None:
     ap.add_argument("--content-root", default="content/nl-NL", help="Root folder to scan for exercises.json")
     args = ap.parse_args()
 
-    topic_canon = load_json(args.topic_canon)
-    taskforms = load_json(args.taskforms)
-    misconcepts = load_json(args.misconcepts)
-    feedback = load_json(args.feedback)
+    # Compiled once (and cached by source hash), shared by every file below
+    registry = get_registry(topic_canon=args.topic_canon, taskforms=args.taskforms,
+                            misconcepts=args.misconcepts, feedback=args.feedback)
 
     content_root = Path(args.content_root)
     if not content_root.exists():
@@ -218,7 +188,7 @@ def main() -> None:
             print(" - ERROR: exercises.json must be a JSON array of exercise objects")
             continue
 
-        errs = validate_exercise_list(data, topic_canon, taskforms, misconcepts, feedback)
+        errs = validate_exercise_list(data, registry)
 
         if errs:
             total_errors += len(errs)
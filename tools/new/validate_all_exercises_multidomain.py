@@ -6,6 +6,7 @@ validate_all_exercises_multidomain.py
 Validate all exercises.json files under a content root:
 - JSON Schema validation (Draft 2020-12)
 - taskForm validation against taskvormen-canon.json (best-effort)
+  (schema + canon loaded through validators/canon_registry.py)
 - Print ONE diff-style error per invalid item (not a wall)
 - Summaries per pack + overall
 
@@ -22,14 +23,21 @@ import json
 import os
 import sys
 from collections import Counter
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-try:
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "..", "scripts"))
+
+# jsonschema is imported on first validation, not at startup (see scripts/lazy_cli.py)
+from lazy_cli import lazy_module, module_available  # noqa: E402
+
+if TYPE_CHECKING:
     from jsonschema import Draft202012Validator
-    from jsonschema.exceptions import best_match
-except Exception as e:
-    print("ERROR: jsonschema package missing or incompatible:", e)
-    sys.exit(2)
+
+JSONSCHEMA_HINT = "pip install jsonschema referencing"
+jsonschema_exceptions = lazy_module("jsonschema.exceptions", JSONSCHEMA_HINT)
+
+from validators.canon_registry import get_registry, read_json  # noqa: E402
 
 
 # ----------------------------
@@ -47,11 +55,6 @@ def safe_print(s: str = "") -> None:
 # IO helpers
 # ----------------------------
 
-def read_json(path: str) -> Any:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
 def norm_slashes(p: str) -> str:
     return p.replace("\\", "/")
 
@@ -103,69 +106,9 @@ def format_value(v: Any, max_len: int = 180) -> str:
 
 
 # ----------------------------
-# taskForm canon parsing (best effort)
+# taskForm check (canon compiled by validators/canon_registry.py)
 # ----------------------------
 
-def extract_taskforms_from_canon(canon: Any) -> Tuple[Optional[set], Optional[Dict[str, set]]]:
-    all_taskforms: set = set()
-    by_level: Dict[str, set] = {}
-
-    if isinstance(canon, list):
-        for it in canon:
-            if isinstance(it, str):
-                all_taskforms.add(it)
-            elif isinstance(it, dict):
-                tf = it.get("taskForm") or it.get("id") or it.get("name")
-                if isinstance(tf, str):
-                    all_taskforms.add(tf)
-                lvl = it.get("level")
-                if isinstance(lvl, str) and isinstance(tf, str):
-                    by_level.setdefault(lvl, set()).add(tf)
-
-    elif isinstance(canon, dict):
-        if isinstance(canon.get("taskForms"), list):
-            for it in canon["taskForms"]:
-                if isinstance(it, str):
-                    all_taskforms.add(it)
-                elif isinstance(it, dict):
-                    tf = it.get("taskForm") or it.get("id") or it.get("name")
-                    if isinstance(tf, str):
-                        all_taskforms.add(tf)
-                    lvl = it.get("level")
-                    if isinstance(lvl, str) and isinstance(tf, str):
-                        by_level.setdefault(lvl, set()).add(tf)
-
-        levels = canon.get("levels") or canon.get("byLevel") or canon.get("levelTaskForms")
-        if isinstance(levels, dict):
-            for lvl, arr in levels.items():
-                if not isinstance(lvl, str) or not isinstance(arr, list):
-                    continue
-                for it in arr:
-                    if isinstance(it, str):
-                        all_taskforms.add(it)
-                        by_level.setdefault(lvl, set()).add(it)
-                    elif isinstance(it, dict):
-                        tf = it.get("taskForm") or it.get("id") or it.get("name")
-                        if isinstance(tf, str):
-                            all_taskforms.add(tf)
-                            by_level.setdefault(lvl, set()).add(tf)
-
-        if isinstance(canon.get("items"), list):
-            for it in canon["items"]:
-                if not isinstance(it, dict):
-                    continue
-                tf = it.get("taskForm") or it.get("id") or it.get("name")
-                if isinstance(tf, str):
-                    all_taskforms.add(tf)
-                lvl = it.get("level")
-                if isinstance(lvl, str) and isinstance(tf, str):
-                    by_level.setdefault(lvl, set()).add(tf)
-
-    all_out = all_taskforms if all_taskforms else None
-    by_level_out = by_level if by_level else None
-    return all_out, by_level_out
-
-
 def taskform_error(ex: Dict[str, Any], all_taskforms: Optional[set], by_level: Optional[Dict[str, set]]) -> Optional[Dict[str, Any]]:
     md = ex.get("metadata") if isinstance(ex.get("metadata"), dict) else {}
     tf = md.get("taskForm")
@@ -245,7 +188,7 @@ def schema_error_for_item(item_validator: Draft202012Validator, item: Any) -> Op
     errors = list(item_validator.iter_errors(item))
     if not errors:
         return None
-    bm = best_match(errors) or errors[0]
+    bm = jsonschema_exceptions.best_match(errors) or errors[0]
 
     path_list = list(getattr(bm, "absolute_path", []))
     schema_path_list = list(getattr(bm, "absolute_schema_path", []))
@@ -385,28 +328,21 @@ def main() -> int:
         safe_print(f"ERROR: taskforms not found: {args.taskforms}")
         return 2
 
-    try:
-        schema = read_json(args.schema)
-    except Exception as e:
-        safe_print(f"ERROR: cannot parse schema: {args.schema}\n  {e}")
-        return 2
-
-    item_schema = schema.get("items")
-    if not isinstance(item_schema, dict):
-        safe_print("ERROR: schema.items missing or not an object")
+    if not (module_available("jsonschema") and module_available("referencing")):
+        safe_print(f"ERROR: jsonschema package missing. Install with: {JSONSCHEMA_HINT}")
         return 2
 
+    # Schema + canon come compiled from the registry cache; the canon stays best-effort
     try:
-        item_validator = Draft202012Validator(item_schema, schema=schema)
-    except Exception:
-        item_validator = Draft202012Validator(schema)
-
-    # Load canon (best-effort)
-    try:
-        canon = read_json(args.taskforms)
-        all_taskforms, by_level = extract_taskforms_from_canon(canon)
-    except Exception:
-        all_taskforms, by_level = None, None
+        try:
+            registry = get_registry(schema=args.schema, taskforms=args.taskforms)
+        except Exception:
+            registry = get_registry(schema=args.schema)
+        item_validator = registry.item_validator
+    except Exception as e:
+        safe_print(f"ERROR: cannot load schema: {args.schema}\n  {e}")
+        return 2
+    all_taskforms, by_level = registry.all_taskforms, registry.by_level
 
     packs = find_exercises_json_files(args.content_root)
     if args.max_packs and args.max_packs > 0:
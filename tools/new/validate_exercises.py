@@ -2,7 +2,9 @@ import argparse
 import json
 import sys
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List
+
+from validators.canon_registry import CanonRegistry, canon_key, get_registry, normalize_domain_for_canon
 #py -3.13 tools/new/validate_exercises.py \
 #  --topic-canon docs/new/topic-canon.json \
 #  --taskforms docs/new/taskvormen-canon.json \
@@ -14,9 +16,6 @@ from typing import Any, Dict, List, Tuple
 def load_json(path: str) -> Any:
     return json.loads(Path(path).read_text(encoding="utf-8"))
 
-def canon_key(domain: str, grade: int, topic: str) -> Tuple[str, int, str]:
-    return (domain, grade, topic)
-
 def infer_task_form(ex: Dict[str, Any]) -> str:
     # Prefer explicit metadata.taskForm
     md = ex.get("metadata", {})
@@ -33,29 +32,14 @@ def infer_task_form(ex: Dict[str, Any]) -> str:
         return "fill_single_step"
     return "unknown"
 
-def validate(exercises: List[Dict[str, Any]],
-             topic_canon: List[Dict[str, Any]],
-             taskforms: Dict[str, Any],
-             misconcepts: Dict[str, Any],
-             feedback: Dict[str, Any]) -> List[str]:
+def validate(exercises: List[Dict[str, Any]], registry: CanonRegistry) -> List[str]:
 
     errors: List[str] = []
 
-    # Build topic canon lookup
-    canon_lookup: Dict[Tuple[str, int, str], Dict[str, Any]] = {}
-    for item in topic_canon:
-        k = canon_key(item["domain"], int(item["grade"]), item["topic"])
-        canon_lookup[k] = item
-
-    # Misconcept keys set
-    mc_keys = set(m["key"] for m in misconcepts.get("misconcepts", []))
-
-    # Feedback keys set
-    fb = feedback.get("misconceptFeedback", {})
-    fb_keys = set(fb.keys())
-
-    levels = taskforms.get("levels", {})
-    task_def = taskforms.get("taskFormDefinitions", {})
+    # Topic canon, taskForm canon, misconcept and feedback keys: O(1) lookups in the registry
+    mc_keys = registry.misconcept_keys
+    fb_keys = registry.feedback_keys
+    task_def = registry.taskform_definitions
 
     def err(i: int, exid: str, msg: str) -> None:
         errors.append(f"[{i}] {exid}: {msg}")
@@ -75,13 +59,14 @@ def validate(exercises: List[Dict[str, Any]],
         topic = ex.get("topic")
 
         # A. Topic & level check (hard)
-        ck = canon_key(domain.replace("_", "-") if domain else domain, grade, topic)
+        ck = canon_key(normalize_domain_for_canon(domain), grade, topic)
         # Note: your exercises use domain enum getal_en_bewerkingen; canon uses getal-en-bewerkingen.
-        # We normalize underscores->dashes for matching.
-        if ck not in canon_lookup:
+        # The registry normalizes underscores->dashes for matching.
+        allowed = registry.topic_levels(domain, grade, topic)
+        if allowed is None:
             err(i, exid, f"Topic not in topic-canon: (domain={ck[0]}, grade={ck[1]}, topic={ck[2]})")
         else:
-            allowed = canon_lookup[ck].get("allowedLevels", [])
+            allowed = list(allowed)
             if level not in allowed:
                 err(i, exid, f"Level '{level}' not allowed for this topic (allowed={allowed})")
 
@@ -90,11 +75,11 @@ def validate(exercises: List[Dict[str, Any]],
         if tf == "unknown":
             err(i, exid, "Cannot infer taskForm (add metadata.taskForm)")
         else:
-            if level not in levels:
+            if not registry.has_level(level):
                 err(i, exid, f"Level '{level}' not found in taskforms canon")
             else:
-                allowed_tf = set(levels[level].get("allowedTaskForms", []))
-                disallowed_tf = set(levels[level].get("disallowedTaskForms", []))
+                allowed_tf = registry.allowed_taskforms(level)
+                disallowed_tf = registry.disallowed_by_level.get(level, frozenset())
 
                 # If not explicitly defined anywhere, warn
                 if tf not in allowed_tf and tf not in disallowed_tf and tf not in task_def:
@@ -144,17 +129,15 @@ def main():
     ap.add_argument("--exercises", required=True)
     args = ap.parse_args()
 
-    topic_canon = load_json(args.topic_canon)
-    taskforms = load_json(args.taskforms)
-    misconcepts = load_json(args.misconcepts)
-    feedback = load_json(args.feedback)
+    registry = get_registry(topic_canon=args.topic_canon, taskforms=args.taskforms,
+                            misconcepts=args.misconcepts, feedback=args.feedback)
     exercises = load_json(args.exercises)
 
     if not isinstance(exercises, list):
         print("ERROR: exercises.json must be a JSON array", file=sys.stderr)
         sys.exit(2)
 
-    errs = validate(exercises, topic_canon, taskforms, misconcepts, feedback)
+    errs = validate(exercises, registry)
     if errs:
         print("VALIDATION FAILED:")
         for e in errs:
@@ -8,6 +8,9 @@ Validate a single exercises.json file:
 - taskForm validation against taskvormen-canon.json (best-effort)
 - Report ONE clear "diff-style" error per invalid item (instead of a wall of errors)
 
+Schema and canon are loaded through validators/canon_registry.py (compiled,
+cached by source hash); validate_file() is the in-process entry point.
+
 Usage:
   py -3.13 tools/new/validate_one_exercises_file.py path/to/exercises.json --schema path/to/ExerciseSchema.json --taskforms docs/new/taskvormen-canon.json
 
@@ -23,34 +26,29 @@ import argparse
 import json
 import os
 import sys
-from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "..", "scripts"))
 
-try:
+# jsonschema is imported on first validation, not at startup (see scripts/lazy_cli.py)
+from lazy_cli import lazy_module, module_available  # noqa: E402
+
+if TYPE_CHECKING:
     from jsonschema import Draft202012Validator
-    from jsonschema.exceptions import best_match
-except Exception as e:
-    print("ERROR: jsonschema package missing or incompatible:", e)
-    sys.exit(2)
 
-# NEW (no deprecated resolver)
-try:
-    from referencing import Registry, Resource
-    from referencing.jsonschema import DRAFT202012
-except Exception as e:
-    print("ERROR: referencing package missing or incompatible:", e)
-    print("Install/upgrade: pip install 'jsonschema[format]' referencing")
-    sys.exit(2)
+JSONSCHEMA_HINT = "pip install jsonschema referencing"
+jsonschema_exceptions = lazy_module("jsonschema.exceptions", JSONSCHEMA_HINT)
+
+from validators.canon_registry import CanonRegistry, get_registry, read_json  # noqa: E402
+from validators.content_rules import scan_exercise  # noqa: E402
 
 
 # ----------------------------
 # IO helpers
 # ----------------------------
 
-def read_json(path: str) -> Any:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
 def safe_print(s: str) -> None:
     """
     Avoid UnicodeEncodeError on Windows consoles.
@@ -101,69 +99,9 @@ def format_value(v: Any, max_len: int = 180) -> str:
 
 
 # ----------------------------
-# taskForm canon parsing (best effort)
+# taskForm check (canon compiled by validators/canon_registry.py)
 # ----------------------------
 
-def extract_taskforms_from_canon(canon: Any) -> Tuple[Optional[set], Optional[Dict[str, set]]]:
-    all_taskforms: set = set()
-    by_level: Dict[str, set] = {}
-
-    if isinstance(canon, list):
-        for it in canon:
-            if isinstance(it, str):
-                all_taskforms.add(it)
-            elif isinstance(it, dict):
-                tf = it.get("taskForm") or it.get("id") or it.get("name")
-                if isinstance(tf, str):
-                    all_taskforms.add(tf)
-                lvl = it.get("level")
-                if isinstance(lvl, str) and isinstance(tf, str):
-                    by_level.setdefault(lvl, set()).add(tf)
-
-    elif isinstance(canon, dict):
-        if isinstance(canon.get("taskForms"), list):
-            for it in canon["taskForms"]:
-                if isinstance(it, str):
-                    all_taskforms.add(it)
-                elif isinstance(it, dict):
-                    tf = it.get("taskForm") or it.get("id") or it.get("name")
-                    if isinstance(tf, str):
-                        all_taskforms.add(tf)
-                    lvl = it.get("level")
-                    if isinstance(lvl, str) and isinstance(tf, str):
-                        by_level.setdefault(lvl, set()).add(tf)
-
-        levels = canon.get("levels") or canon.get("byLevel") or canon.get("levelTaskForms")
-        if isinstance(levels, dict):
-            for lvl, arr in levels.items():
-                if not isinstance(lvl, str) or not isinstance(arr, list):
-                    continue
-                for it in arr:
-                    if isinstance(it, str):
-                        all_taskforms.add(it)
-                        by_level.setdefault(lvl, set()).add(it)
-                    elif isinstance(it, dict):
-                        tf = it.get("taskForm") or it.get("id") or it.get("name")
-                        if isinstance(tf, str):
-                            all_taskforms.add(tf)
-                            by_level.setdefault(lvl, set()).add(tf)
-
-        if isinstance(canon.get("items"), list):
-            for it in canon["items"]:
-                if not isinstance(it, dict):
-                    continue
-                tf = it.get("taskForm") or it.get("id") or it.get("name")
-                if isinstance(tf, str):
-                    all_taskforms.add(tf)
-                lvl = it.get("level")
-                if isinstance(lvl, str) and isinstance(tf, str):
-                    by_level.setdefault(lvl, set()).add(tf)
-
-    all_taskforms_out = all_taskforms if all_taskforms else None
-    by_level_out = by_level if by_level else None
-    return all_taskforms_out, by_level_out
-
-
 def taskform_error(ex: Dict[str, Any], all_taskforms: Optional[set], by_level: Optional[Dict[str, set]]) -> Optional[Dict[str, Any]]:
     md = ex.get("metadata") if isinstance(ex.get("metadata"), dict) else {}
     tf = md.get("taskForm")
@@ -245,7 +183,7 @@ def schema_error_for_item(validator: Draft202012Validator, item: Any) -> Optiona
     if not errors:
         return None
 
-    bm = best_match(errors) or errors[0]
+    bm = jsonschema_exceptions.best_match(errors) or errors[0]
 
     path_list = list(getattr(bm, "absolute_path", []))
     schema_path_list = list(getattr(bm, "absolute_schema_path", []))
@@ -264,55 +202,28 @@ def schema_error_for_item(validator: Draft202012Validator, item: Any) -> Optiona
 
 
 # ----------------------------
-# Registry-based schema setup (no deprecated resolver)
+# Content rules (shared with preflight)
 # ----------------------------
 
-def _file_uri(path: str) -> str:
-    # Minimal file:// URI that works on Windows + *nix
-    ap = os.path.abspath(path)
-    ap = ap.replace("\\", "/")
-    if not ap.startswith("/"):
-        # Windows drive letter "C:/..."
-        return "file:///" + ap
-    return "file://" + ap
+@dataclass
+class Issue:
+    kind: str  # "ERROR" or "WARN"
+    code: str
+    message: str
 
 
-def build_item_validator(schema: Dict[str, Any], schema_path: str) -> Draft202012Validator:
+def run_content_rules(ex: Dict[str, Any], source_label: str) -> List[Issue]:
     """
-    Build an item-level validator that can still resolve $ref to the root schema.
-    Uses referencing.Registry (jsonschema>=4.18+ recommended approach).
+    Apply validators/content_rules to one exercise (prompt, options, taskForm).
+    FAIL rules become ERROR issues, WARN rules stay warnings.
     """
-    item_schema = schema.get("items")
-    if not isinstance(item_schema, dict):
-        raise ValueError("Schema has no top-level 'items' object to validate array elements.")
-
-    schema_id = schema.get("$id")
-    if not isinstance(schema_id, str) or not schema_id.strip():
-        schema_id = _file_uri(schema_path)
-        schema["$id"] = schema_id
-
-    registry = Registry().with_resource(
-        schema_id,
-        Resource.from_contents(schema, default_specification=DRAFT202012),
-    )
-
-    # CRITICAL FIX:
-    # If items is a fragment-only $ref (e.g. "#/$defs/Exercise"),
-    # make it absolute against the root schema id so it resolves in the full schema.
-    if isinstance(item_schema.get("$ref"), str) and item_schema["$ref"].startswith("#"):
-        item_schema = {"$ref": f"{schema_id}{item_schema['$ref']}"}
-
-    # Safety: embed $defs locally so $ref fragments resolve even if registry lookup fails
-    if "$defs" in schema and "$defs" not in item_schema:
-        # copy to avoid mutating the original schema dict
-        item_schema = dict(item_schema)
-        item_schema["$defs"] = schema["$defs"]
-
-    return Draft202012Validator(item_schema, registry=registry)
+    ex_id = ex.get("id", "?")
+    issues: List[Issue] = []
+    for rule, count in scan_exercise(ex):
+        kind = "ERROR" if rule.severity == "FAIL" else "WARN"
+        issues.append(Issue(kind, rule.code, f"id={ex_id}: {rule.description} (hits={count})"))
+    return issues
 
-# ----------------------------
-# Main
-# ----------------------------
 
 def parse_args() -> argparse.Namespace:
     ap = argparse.ArgumentParser()
@@ -323,53 +234,30 @@ def parse_args() -> argparse.Namespace:
     return ap.parse_args()
 
 
-def main() -> int:
-    args = parse_args()
-
-    if not os.path.exists(args.file):
-        safe_print(f"ERROR: file not found: {args.file}")
-        return 2
-    if not os.path.exists(args.schema):
-        safe_print(f"ERROR: schema not found: {args.schema}")
-        return 2
-    if not os.path.exists(args.taskforms):
-        safe_print(f"ERROR: taskforms file not found: {args.taskforms}")
-        return 2
-
+def validate_file(path: str, registry: CanonRegistry, max_errors: int = 50) -> Tuple[int, List[str]]:
+    """
+    Validate one exercises.json against a loaded registry.
+    Returns (exit code, report lines); used in-process by run_prompt_packs.py.
+    """
     try:
-        data = read_json(args.file)
+        data = read_json(path)
     except Exception as e:
-        safe_print(f"ERROR: cannot parse JSON file: {args.file}\n  {e}")
-        return 2
+        return 2, [f"ERROR: cannot parse JSON file: {path}\n  {e}"]
 
     if not isinstance(data, list):
-        safe_print(f"FAIL: root must be a JSON array, got {type(data).__name__}")
-        return 1
+        return 1, [f"FAIL: root must be a JSON array, got {type(data).__name__}"]
 
     try:
-        schema = read_json(args.schema)
+        item_validator = registry.item_validator
     except Exception as e:
-        safe_print(f"ERROR: cannot parse schema JSON: {args.schema}\n  {e}")
-        return 2
-
-    try:
-        item_validator = build_item_validator(schema, args.schema)
-    except Exception as e:
-        safe_print(f"ERROR: cannot build validator:\n  {e}")
-        return 2
-
-    # Load canon (best-effort)
-    try:
-        canon = read_json(args.taskforms)
-        all_taskforms, by_level = extract_taskforms_from_canon(canon)
-    except Exception:
-        all_taskforms, by_level = None, None
+        return 2, [f"ERROR: cannot build validator:\n  {e}"]
 
+    lines: List[str] = []
     invalid_count = 0
     reported = 0
 
     for idx, ex in enumerate(data):
-        if reported >= args.max_errors:
+        if reported >= max_errors:
             break
 
         ex_id = ex.get("id") if isinstance(ex, dict) else None
@@ -377,29 +265,65 @@ def main() -> int:
         schema_err = schema_error_for_item(item_validator, ex)
         tf_err = None
         if isinstance(ex, dict):
-            tf_err = taskform_error(ex, all_taskforms, by_level)
+            tf_err = taskform_error(ex, registry.all_taskforms, registry.by_level)
 
         chosen = schema_err or tf_err
         if chosen:
             invalid_count += 1
             reported += 1
 
-            header = f"[ITEM {idx}] id={ex_id!r}" if ex_id is not None else f"[ITEM {idx}]"
-            safe_print(header)
-            safe_print(f"  path:     {chosen.get('path')}")
+            lines.append(f"[ITEM {idx}] id={ex_id!r}" if ex_id is not None else f"[ITEM {idx}]")
+            lines.append(f"  path:     {chosen.get('path')}")
             if chosen.get("schemaPath"):
-                safe_print(f"  schema:   {chosen.get('schemaPath')}")
-            safe_print(f"  message:  {chosen.get('message')}")
-            safe_print(f"  expected: {chosen.get('expected')}")
-            safe_print(f"  actual:   {chosen.get('actual')}")
-            safe_print("")
+                lines.append(f"  schema:   {chosen.get('schemaPath')}")
+            lines.append(f"  message:  {chosen.get('message')}")
+            lines.append(f"  expected: {chosen.get('expected')}")
+            lines.append(f"  actual:   {chosen.get('actual')}")
+            lines.append("")
 
     if invalid_count == 0:
-        safe_print(f"OK: validated {args.file} ({len(data)} item(s))")
-        return 0
+        lines.append(f"OK: validated {path} ({len(data)} item(s))")
+        return 0, lines
+
+    lines.append(f"FAIL: {invalid_count} item(s) invalid in {path} (showing up to {max_errors})")
+    return 1, lines
+
+
+def load_registry(schema_path: str, taskforms_path: str) -> CanonRegistry:
+    """Registry for schema + canon; the canon stays best-effort, the schema does not"""
+    try:
+        return get_registry(schema=schema_path, taskforms=taskforms_path)
+    except Exception:
+        return get_registry(schema=schema_path)
+
+
+def main() -> int:
+    args = parse_args()
+
+    if not os.path.exists(args.file):
+        safe_print(f"ERROR: file not found: {args.file}")
+        return 2
+    if not os.path.exists(args.schema):
+        safe_print(f"ERROR: schema not found: {args.schema}")
+        return 2
+    if not os.path.exists(args.taskforms):
+        safe_print(f"ERROR: taskforms file not found: {args.taskforms}")
+        return 2
+
+    if not (module_available("jsonschema") and module_available("referencing")):
+        safe_print(f"ERROR: jsonschema package missing. Install with: {JSONSCHEMA_HINT}")
+        return 2
+
+    try:
+        registry = load_registry(args.schema, args.taskforms)
+    except Exception as e:
+        safe_print(f"ERROR: cannot load schema: {args.schema}\n  {e}")
+        return 2
 
-    safe_print(f"FAIL: {invalid_count} item(s) invalid in {args.file} (showing up to {args.max_errors})")
-    return 1
+    code, lines = validate_file(args.file, registry, args.max_errors)
+    for line in lines:
+        safe_print(line)
+    return code
 
 
 if __name__ == "__main__":
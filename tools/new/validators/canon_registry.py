@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+canon_registry.py
+
+Shared, compiled view of everything the exercise validators check against:
+- ExerciseSchema.json          -> item-level Draft 2020-12 validator (simple $refs inlined)
+- taskvormen-canon.json        -> all taskForms, allowed/disallowed per level, definitions
+- topic-canon.json             -> (domain, grade, topic) -> allowed levels
+- topic-canon.<domain>.json    -> topic -> kerndoelen / recommended groups
+- misconcepts + feedback packs -> key sets
+
+Each source is compiled once into plain sets/dicts and stored in
+.cache/canon-registry.pickle under its path and the sha256 of its bytes, so
+a run only re-reads the (small) source files to hash them; an edited source
+is recompiled, the rest comes from the cache. The jsonschema validator is
+built from the cached schema on first use, and get_registry() hands out one
+instance per set of paths per process, so a loop that validates after every
+repair attempt pays the setup once.
+
+Usage:
+  from validators.canon_registry import get_registry
+  reg = get_registry(schema="content/nl-NL/_shared/schemas/ExerciseSchema.json",
+                     taskforms="docs/new/taskvormen-canon.json")
+  reg.item_validator.iter_errors(item)
+  reg.taskform_allowed("n2", "numeric_simple")     # True / False / None (level unknown)
+  reg.topic_levels("getal-en-bewerkingen", 5, "breuken")
+"""
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import os
+import pickle
+import threading
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(HERE, "..", "..", ".."))
+DEFAULT_CACHE_PATH = os.path.join(REPO_ROOT, ".cache", "canon-registry.pickle")
+DEFAULT_DOMAIN_CANONS = os.path.join(REPO_ROOT, "docs", "new", "topic-canon.*.json")
+
+# Bump when a compiler below changes what it produces
+REGISTRY_FORMAT_VERSION = 2
+
+
+# ----------------------------
+# Helpers shared by the validators
+# ----------------------------
+
+def read_json(path: str) -> Any:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def canon_key(domain: str, grade: int, topic: str) -> Tuple[str, int, str]:
+    return (domain, grade, topic)
+
+
+def normalize_domain_for_canon(domain_value: str) -> str:
+    """
+    Exercises currently use snake_case (e.g. getal_en_bewerkingen)
+    while canon uses kebab-case (e.g. getal-en-bewerkingen).
+    """
+    if not isinstance(domain_value, str):
+        return domain_value
+    return domain_value.replace("_", "-")
+
+
+def _file_uri(path: str) -> str:
+    # Minimal file:// URI that works on Windows + *nix
+    ap = os.path.abspath(path).replace("\\", "/")
+    if not ap.startswith("/"):
+        # Windows drive letter "C:/..."
+        return "file:///" + ap
+    return "file://" + ap
+
+
+# ----------------------------
+# Compilers (source JSON -> plain data)
+# ----------------------------
+
+def _taskform_name(it: Any) -> Optional[str]:
+    if isinstance(it, str):
+        return it
+    if isinstance(it, dict):
+        tf = it.get("taskForm") or it.get("id") or it.get("name")
+        if isinstance(tf, str):
+            return tf
+    return None
+
+
+def extract_taskforms_from_canon(canon: Any) -> Tuple[Optional[set], Optional[Dict[str, set]]]:
+    """
+    (all taskForms, taskForms per level) as taskform_error() checks them, or
+    None for either when the canon does not provide it. Understands flat
+    lists, {"taskForms": [...]}, {"items": [...]} and {"levels": {lvl: [...]}};
+    per-level specs ({"allowedTaskForms": ...}) are compiled separately, see
+    compile_taskforms().
+    """
+    all_taskforms: set = set()
+    by_level: Dict[str, set] = {}
+
+    def add_entries(entries: Any) -> None:
+        if not isinstance(entries, list):
+            return
+        for it in entries:
+            tf = _taskform_name(it)
+            if tf is None:
+                continue
+            all_taskforms.add(tf)
+            lvl = it.get("level") if isinstance(it, dict) else None
+            if isinstance(lvl, str):
+                by_level.setdefault(lvl, set()).add(tf)
+
+    if isinstance(canon, list):
+        add_entries(canon)
+
+    elif isinstance(canon, dict):
+        add_entries(canon.get("taskForms"))
+
+        levels = canon.get("levels") or canon.get("byLevel") or canon.get("levelTaskForms")
+        if isinstance(levels, dict):
+            for lvl, arr in levels.items():
+                if not isinstance(lvl, str) or not isinstance(arr, list):
+                    continue
+                for it in arr:
+                    tf = _taskform_name(it)
+                    if tf is not None:
+                        all_taskforms.add(tf)
+                        by_level.setdefault(lvl, set()).add(tf)
+
+        add_entries(canon.get("items"))
+
+    return (all_taskforms or None), (by_level or None)
+
+
+def compile_taskforms(canon: Any) -> Dict[str, Any]:
+    """
+    all / by_level: extract_taskforms_from_canon() (validate_one, multidomain, watch daemon)
+    levels / allowed_by_level / disallowed_by_level / definitions: the
+    levels.<lvl>.allowedTaskForms / disallowedTaskForms and taskFormDefinitions
+    specs checked by validate_exercises.py and validate_all_exercises.py
+    """
+    all_taskforms, by_level = extract_taskforms_from_canon(canon)
+    level_names: FrozenSet[str] = frozenset()
+    allowed: Dict[str, FrozenSet[str]] = {}
+    disallowed: Dict[str, FrozenSet[str]] = {}
+    definitions: FrozenSet[str] = frozenset()
+    if isinstance(canon, dict):
+        levels = canon.get("levels")
+        if isinstance(levels, dict):
+            level_names = frozenset(levels)
+            for lvl, spec in levels.items():
+                if isinstance(spec, dict):
+                    allowed[lvl] = frozenset(spec.get("allowedTaskForms") or [])
+                    disallowed[lvl] = frozenset(spec.get("disallowedTaskForms") or [])
+        if isinstance(canon.get("taskFormDefinitions"), dict):
+            definitions = frozenset(canon["taskFormDefinitions"])
+    return {
+        "all": frozenset(all_taskforms) if all_taskforms else None,
+        "by_level": {k: frozenset(v) for k, v in by_level.items()} if by_level else None,
+        "levels": level_names,
+        "allowed_by_level": allowed,
+        "disallowed_by_level": disallowed,
+        "definitions": definitions,
+    }
+
+
+def compile_topic_canon(canon: Any) -> Dict[Tuple[str, int, str], Tuple[str, ...]]:
+    """(domain, grade, topic) -> allowed levels; entries without those keys (e.g. a version record) are skipped"""
+    out: Dict[Tuple[str, int, str], Tuple[str, ...]] = {}
+    for item in canon if isinstance(canon, list) else []:
+        if not isinstance(item, dict) or not all(k in item for k in ("domain", "grade", "topic")):
+            continue
+        try:
+            key = canon_key(item["domain"], int(item["grade"]), item["topic"])
+        except (TypeError, ValueError):
+            continue
+        out[key] = tuple(item.get("allowedLevels", []))
+    return out
+
+
+def compile_domain_canon(canon: Any) -> Dict[str, Any]:
+    topics = {}
+    for t in canon.get("topics", []) if isinstance(canon, dict) else []:
+        if isinstance(t, dict) and isinstance(t.get("topic"), str):
+            topics[t["topic"]] = {
+                "kerndoelen": tuple(t.get("kerndoelen") or ()),
+                "recommendedGroups": tuple(t.get("recommendedGroups") or ()),
+            }
+    return {"domain": canon.get("domain") if isinstance(canon, dict) else None, "topics": topics}
+
+
+def compile_misconcepts(doc: Any) -> FrozenSet[str]:
+    entries = doc.get("misconcepts", []) if isinstance(doc, dict) else []
+    return frozenset(m["key"] for m in entries if isinstance(m, dict) and "key" in m)
+
+
+def compile_feedback(doc: Any) -> FrozenSet[str]:
+    fb = doc.get("misconceptFeedback", {}) if isinstance(doc, dict) else {}
+    return frozenset(fb.keys()) if isinstance(fb, dict) else frozenset()
+
+
+def _is_leaf(node: Any) -> bool:
+    """No $ref or oneOf/anyOf below: inlining it cannot change what an error message shows"""
+    if isinstance(node, list):
+        return all(_is_leaf(x) for x in node)
+    if isinstance(node, dict):
+        return not ({"$ref", "oneOf", "anyOf"} & node.keys()) and all(_is_leaf(v) for v in node.values())
+    return True
+
+
+def _inline_leaf_refs(node: Any, defs: Dict[str, Any]) -> Any:
+    if isinstance(node, list):
+        return [_inline_leaf_refs(x, defs) for x in node]
+    if not isinstance(node, dict):
+        return node
+    ref = node.get("$ref")
+    if isinstance(ref, str) and ref.startswith("#/$defs/"):
+        target = defs.get(ref[len("#/$defs/"):])
+        if target is not None and _is_leaf(target):
+            rest = {k: _inline_leaf_refs(v, defs) for k, v in node.items() if k != "$ref"}
+            # $ref next to other keywords applies both (2020-12), i.e. allOf
+            return {"allOf": [target], **rest} if rest else target
+    return {k: (v if k == "$defs" else _inline_leaf_refs(v, defs)) for k, v in node.items()}
+
+
+def compile_schema(schema: Any, schema_path: str) -> Dict[str, Any]:
+    """Root schema with a resolvable $id, and the item schema to validate array elements with"""
+    if not isinstance(schema, dict):
+        raise ValueError("Schema root must be an object.")
+    item_schema = schema.get("items")
+    if not isinstance(item_schema, dict):
+        raise ValueError("Schema has no top-level 'items' object to validate array elements.")
+
+    # Refs to simple $defs (strings, enums, ...) are inlined once here, which saves a
+    # reference lookup per property per item; refs to composite defs stay refs, so
+    # validation errors and their "expected" text are unchanged
+    defs = schema.get("$defs") if isinstance(schema.get("$defs"), dict) else {}
+    schema = dict(schema)
+    if defs:
+        schema["$defs"] = {k: _inline_leaf_refs(v, defs) for k, v in defs.items()}
+        item_schema = _inline_leaf_refs(item_schema, defs)
+
+    schema_id = schema.get("$id")
+    if not isinstance(schema_id, str) or not schema_id.strip():
+        schema_id = _file_uri(schema_path)
+        schema["$id"] = schema_id
+
+    # If items is a fragment-only $ref (e.g. "#/$defs/Exercise"),
+    # make it absolute against the root schema id so it resolves in the full schema.
+    if isinstance(item_schema.get("$ref"), str) and item_schema["$ref"].startswith("#"):
+        item_schema = {"$ref": f"{schema_id}{item_schema['$ref']}"}
+
+    # Safety: embed $defs locally so $ref fragments resolve even if registry lookup fails
+    if "$defs" in schema and "$defs" not in item_schema:
+        item_schema = dict(item_schema)
+        item_schema["$defs"] = schema["$defs"]
+
+    return {"root": schema, "id": schema_id, "item": item_schema}
+
+
+def validator_from_compiled(compiled: Dict[str, Any]):
+    """Draft 2020-12 item validator that can still resolve $ref to the root schema"""
+    from jsonschema import Draft202012Validator
+    from referencing import Registry, Resource
+    from referencing.jsonschema import DRAFT202012
+
+    registry = Registry().with_resource(
+        compiled["id"],
+        Resource.from_contents(compiled["root"], default_specification=DRAFT202012),
+    )
+    return Draft202012Validator(compiled["item"], registry=registry)
+
+
+def build_item_validator(schema: Dict[str, Any], schema_path: str):
+    """
+    Build an item-level validator that can still resolve $ref to the root schema.
+    Uses referencing.Registry (jsonschema>=4.18+ recommended approach).
+    """
+    return validator_from_compiled(compile_schema(schema, schema_path))
+
+
+# ----------------------------
+# Cache
+# ----------------------------
+
+class _SourceCache:
+    """(kind, path) -> (sha256, compiled) pickled to one file; written only when something was compiled"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.entries: Dict[Tuple[str, str], Tuple[str, Any]] = {}
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    data = pickle.load(f)
+                if data.get("format_version") == REGISTRY_FORMAT_VERSION:
+                    self.entries = data["entries"]
+            except Exception:
+                self.entries = {}
+
+    def get(self, kind: str, path: str, compiler: Callable[[Any, str], Any]) -> Any:
+        with open(path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        key = (kind, os.path.abspath(path))
+        hit = self.entries.get(key)
+        if hit is not None and hit[0] == digest:
+            self.hits += 1
+            return hit[1]
+        compiled = compiler(json.loads(raw.decode("utf-8")), path)
+        self.entries[key] = (digest, compiled)
+        self.misses += 1
+        self.dirty = True
+        return compiled
+
+    def save(self) -> None:
+        if not (self.path and self.dirty):
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump({"format_version": REGISTRY_FORMAT_VERSION, "entries": self.entries}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.path)
+            self.dirty = False
+        except OSError:
+            pass  # read-only checkout: the registry still works, just without the cache
+
+
+# ----------------------------
+# Registry
+# ----------------------------
+
+class CanonRegistry:
+    """Compiled validation inputs with O(1) lookups; every source is optional"""
+
+    def __init__(
+        self,
+        schema: Optional[str] = None,
+        taskforms: Optional[str] = None,
+        topic_canon: Optional[str] = None,
+        misconcepts: Optional[str] = None,
+        feedback: Optional[str] = None,
+        domain_canons: Optional[str] = DEFAULT_DOMAIN_CANONS,
+        cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+    ):
+        self.paths = {"schema": schema, "taskforms": taskforms, "topic_canon": topic_canon,
+                      "misconcepts": misconcepts, "feedback": feedback}
+        self.domain_canon_paths = sorted(glob.glob(domain_canons)) if domain_canons else []
+        cache = _SourceCache(cache_path)
+
+        self._schema = cache.get("schema", schema, compile_schema) if schema else None
+        tf = cache.get("taskforms", taskforms, lambda d, _: compile_taskforms(d)) if taskforms else None
+        self.all_taskforms: Optional[FrozenSet[str]] = tf["all"] if tf else None
+        self.by_level: Optional[Dict[str, FrozenSet[str]]] = tf["by_level"] if tf else None
+        self.levels: FrozenSet[str] = tf["levels"] if tf else frozenset()
+        self.allowed_by_level: Dict[str, FrozenSet[str]] = tf["allowed_by_level"] if tf else {}
+        self.disallowed_by_level: Dict[str, FrozenSet[str]] = tf["disallowed_by_level"] if tf else {}
+        self.taskform_definitions: FrozenSet[str] = tf["definitions"] if tf else frozenset()
+        self.topics: Dict[Tuple[str, int, str], Tuple[str, ...]] = (
+            cache.get("topic_canon", topic_canon, lambda d, _: compile_topic_canon(d)) if topic_canon else {})
+        self.misconcept_keys: FrozenSet[str] = (
+            cache.get("misconcepts", misconcepts, lambda d, _: compile_misconcepts(d)) if misconcepts else frozenset())
+        self.feedback_keys: FrozenSet[str] = (
+            cache.get("feedback", feedback, lambda d, _: compile_feedback(d)) if feedback else frozenset())
+        self.domain_topics: Dict[str, Dict[str, Any]] = {}
+        for path in self.domain_canon_paths:
+            try:
+                compiled = cache.get("domain_canon", path, lambda d, _: compile_domain_canon(d))
+            except (OSError, ValueError):
+                continue
+            if compiled["domain"]:
+                self.domain_topics[compiled["domain"]] = compiled["topics"]
+
+        cache.save()
+        self.cache_hits, self.cache_misses = cache.hits, cache.misses
+        self._validator = None
+        self._validator_lock = threading.Lock()
+        self._signature = self._current_signature()
+
+    # ---- schema
+
+    @property
+    def item_validator(self):
+        """jsonschema validator for one exercise (built on first use)"""
+        if self._validator is None:
+            if self._schema is None:
+                raise ValueError("CanonRegistry was created without a schema")
+            with self._validator_lock:
+                if self._validator is None:
+                    self._validator = validator_from_compiled(self._schema)
+        return self._validator
+
+    # ---- lookups
+
+    def taskform_allowed(self, level: str, taskform: str) -> Optional[bool]:
+        """Whether taskform is allowed at level; None when the canon has no list for that level"""
+        if not self.by_level or level not in self.by_level:
+            return None
+        return taskform in self.by_level[level]
+
+    def taskform_disallowed(self, level: str, taskform: str) -> bool:
+        return taskform in self.disallowed_by_level.get(level, ())
+
+    def is_known_taskform(self, taskform: str) -> bool:
+        return bool(self.all_taskforms) and taskform in self.all_taskforms
+
+    def has_level(self, level: str) -> bool:
+        """level has an entry under "levels" in the taskForm canon"""
+        return level in self.levels
+
+    def allowed_taskforms(self, level: str) -> FrozenSet[str]:
+        """levels.<level>.allowedTaskForms"""
+        return self.allowed_by_level.get(level, frozenset())
+
+    def topic_levels(self, domain: str, grade: int, topic: str) -> Optional[Tuple[str, ...]]:
+        """Allowed levels for a topic, or None when the topic is not in topic-canon.json"""
+        return self.topics.get(canon_key(normalize_domain_for_canon(domain), grade, topic))
+
+    def topic_info(self, domain: str, topic: str) -> Optional[Dict[str, Any]]:
+        """Kerndoelen / recommended groups of a topic from topic-canon.<domain>.json"""
+        return self.domain_topics.get(normalize_domain_for_canon(domain), {}).get(topic)
+
+    # ---- freshness
+
+    def _current_signature(self) -> Tuple:
+        sig = []
+        for p in [p for p in self.paths.values() if p] + self.domain_canon_paths:
+            try:
+                st = os.stat(p)
+                sig.append((p, st.st_mtime_ns, st.st_size))
+            except OSError:
+                sig.append((p, 0, 0))
+        return tuple(sig)
+
+    def stale(self) -> bool:
+        return self._current_signature() != self._signature
+
+
+_REGISTRIES: Dict[Tuple, CanonRegistry] = {}
+_REGISTRIES_LOCK = threading.Lock()
+
+
+def get_registry(**paths: Optional[str]) -> CanonRegistry:
+    """Process-wide CanonRegistry for these paths, rebuilt when a source file changed"""
+    key = tuple(sorted(paths.items()))
+    with _REGISTRIES_LOCK:
+        reg = _REGISTRIES.get(key)
+        if reg is None or reg.stale():
+            reg = _REGISTRIES[key] = CanonRegistry(**paths)
+        return reg
@@ -1,8 +1,19 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+import json
 import re
 
+try:
+    import re._parser as _sre  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import sre_parse as _sre
+
+# Bump whenever a rule is added, removed or changed (used as a cache key by preflight)
+RULESET_VERSION = "2026.10.1"
+
 
 @dataclass(frozen=True)
 class Rule:
@@ -80,11 +91,177 @@ LEVEL_RULES: Dict[str, List[Rule]] = {
 }
 
 
-def get_rules(level: Optional[str], topic: Optional[str]) -> List[Rule]:
+@lru_cache(maxsize=None)
+def _rules_for(level: Optional[str], topic: Optional[str]) -> Tuple[Rule, ...]:
     rules: List[Rule] = []
     rules.extend(GENERIC_RULES)
     if level and level in LEVEL_RULES:
         rules.extend(LEVEL_RULES[level])
     if topic and topic in TOPIC_RULES:
         rules.extend(TOPIC_RULES[topic])
-    return rules
+    return tuple(rules)
+
+
+def get_rules(level: Optional[str], topic: Optional[str]) -> List[Rule]:
+    return list(_rules_for(level, topic))
+
+
+# ----------------------------
+# Single-pass scanner
+# ----------------------------
+
+def _required_literals(nodes: List[Tuple[Any, Any]]) -> Optional[FrozenSet[str]]:
+    """
+    A set of literal strings such that every match of the parsed regex
+    contains at least one of them (None when no such set can be derived).
+    Picks the candidate whose shortest literal is longest, to keep false
+    positives rare.
+    """
+    best: Optional[FrozenSet[str]] = None
+    run: List[str] = []
+
+    def consider(cand: Optional[FrozenSet[str]]) -> None:
+        nonlocal best
+        if cand and all(cand) and (best is None or min(map(len, cand)) > min(map(len, best))):
+            best = cand
+
+    for op, av in nodes:
+        if op is _sre.LITERAL:
+            run.append(chr(av).lower())
+            continue
+        if op is _sre.AT:
+            # zero-width (\b, ^, $): neighbouring literals stay adjacent
+            continue
+        consider(frozenset(["".join(run)]) if run else None)
+        run = []
+        if op is _sre.SUBPATTERN:
+            consider(_required_literals(list(av[-1])))
+        elif op is _sre.BRANCH:
+            alternatives = [_required_literals(list(branch)) for branch in av[1]]
+            if all(alternatives):
+                consider(frozenset().union(*alternatives))
+        elif op in (_sre.MAX_REPEAT, _sre.MIN_REPEAT) and av[0] >= 1:
+            consider(_required_literals(list(av[2])))
+    consider(frozenset(["".join(run)]) if run else None)
+    return best
+
+
+def rule_triggers(rule: Rule) -> Optional[FrozenSet[str]]:
+    """Lower-cased literals of which any rule hit must contain one (None = always check)."""
+    try:
+        return _required_literals(list(_sre.parse(rule.pattern.pattern, rule.pattern.flags)))
+    except Exception:
+        return None
+
+
+class _Automaton:
+    """Aho-Corasick automaton: finds which of many literals occur in one pass."""
+
+    def __init__(self, literals: List[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.out: List[FrozenSet[str]] = [frozenset()]
+        for lit in literals:
+            state = 0
+            for ch in lit:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    self.goto.append({})
+                    self.out.append(frozenset())
+                    nxt = len(self.goto) - 1
+                    self.goto[state][ch] = nxt
+                state = nxt
+            self.out[state] = self.out[state] | {lit}
+
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0) if self.goto[f].get(ch, 0) != nxt else 0
+                self.out[nxt] = self.out[nxt] | self.out[self.fail[nxt]]
+
+    def present(self, text: str) -> Set[str]:
+        goto, fail, out = self.goto, self.fail, self.out
+        found: Set[str] = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+
+class RuleScanner:
+    """
+    All rules for one (level, topic) behind a single Aho-Corasick pass.
+
+    Each rule's regex is reduced to the literals any hit must contain; one
+    pass over the lower-cased text tells which rules can match at all, and
+    only those run their regex. Cost is linear in text size plus the work
+    for rules that actually hit, instead of rules x text. Hit counts are
+    identical to running every rule's finditer separately.
+    """
+
+    def __init__(self, rules: Tuple[Rule, ...]):
+        self.rules = rules
+        self._always: List[int] = []
+        self._by_literal: Dict[str, List[int]] = {}
+        for i, r in enumerate(rules):
+            triggers = rule_triggers(r)
+            if not triggers:
+                self._always.append(i)
+                continue
+            for lit in triggers:
+                self._by_literal.setdefault(lit, []).append(i)
+        self._automaton = _Automaton(sorted(self._by_literal))
+
+    def candidates(self, text: str) -> List[int]:
+        """Indices of rules that can match text (superset of the rules that do)."""
+        idx = set(self._always)
+        for lit in self._automaton.present(text.lower()):
+            idx.update(self._by_literal[lit])
+        return sorted(idx)
+
+    def scan(self, text: str) -> List[Tuple[Rule, int]]:
+        """(rule, hit count) for every rule that matches, in rule order."""
+        hits: List[Tuple[Rule, int]] = []
+        for i in self.candidates(text):
+            count = sum(1 for _ in self.rules[i].pattern.finditer(text))
+            if count:
+                hits.append((self.rules[i], count))
+        return hits
+
+
+@lru_cache(maxsize=None)
+def get_scanner(level: Optional[str], topic: Optional[str]) -> RuleScanner:
+    return RuleScanner(_rules_for(level, topic))
+
+
+def exercise_scan_text(ex: Dict[str, Any]) -> str:
+    """
+    The part of a generated exercise the prompt rules apply to: prompt,
+    options and the declared taskForm (in the same JSON form batch prompts use).
+    """
+    parts: List[str] = []
+    prompt = ex.get("prompt", ex.get("question"))
+    if isinstance(prompt, str):
+        parts.append(prompt)
+    options = ex.get("options")
+    if isinstance(options, list):
+        parts.append(json.dumps([o for o in options if isinstance(o, (str, int, float))], ensure_ascii=False))
+    meta = ex.get("metadata")
+    task_form = (meta.get("taskForm") if isinstance(meta, dict) else None) or ex.get("taskForm")
+    if isinstance(task_form, str):
+        parts.append(f'"taskForm": "{task_form}"')
+    return "\n".join(parts)
+
+
+def scan_exercise(ex: Dict[str, Any]) -> List[Tuple[Rule, int]]:
+    """Scan one exercises.json item with the scanner for its own level/topic."""
+    return get_scanner(ex.get("level"), ex.get("topic")).scan(exercise_scan_text(ex))
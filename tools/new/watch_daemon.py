@@ -0,0 +1,883 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+watch_daemon.py
+
+Long-running checker for the trees authors and the generation runner write to:
+- content/nl-NL      exercises.json packs
+- staging/nl-NL      exercises.raw.json / exercises.quality.json packs
+- data-v2-draft      *_core.json / *_support.json pairs
+
+Everything a cold CLI run rebuilds is held in memory: the compiled
+ExerciseSchema item validator and taskvormen canon (reloaded when either file
+changes), the content-rule scanners, duplicate baseline/overrides, a
+cross-pack duplicate index, the pack catalogue and the comprehensive
+validator (with the shared validation cache) for v2 files.
+
+Changes arrive via inotify (Linux, through ctypes) or, elsewhere, by polling
+mtimes. A change revalidates only the affected pack; within a pack only items
+whose content changed are rechecked (per-item results are kept by hash), the
+pack-level gates (hard duplicate gate, quality checks, cross-pack duplicates)
+rerun on the parsed pack. For v2 roots that have an index.json, the entry of
+the changed core file is patched in place. reports/watch/status.json is
+rewritten after every batch.
+
+Clients talk to the daemon over a local TCP socket (one JSON line per
+request and reply):
+
+  py -3.13 tools/new/watch_daemon.py serve
+  py -3.13 tools/new/watch_daemon.py status
+  py -3.13 tools/new/watch_daemon.py issues --severity ERROR
+  py -3.13 tools/new/watch_daemon.py pack content/nl-NL/.../exercises.json
+  py -3.13 tools/new/watch_daemon.py follow          (print results as files are saved)
+  py -3.13 tools/new/watch_daemon.py recheck PATH | stop
+
+Exit codes (client commands):
+  0 = OK
+  1 = the queried pack(s) have errors
+  2 = daemon not reachable / CLI error
+"""
+
+from __future__ import annotations
+
+import argparse
+import collections
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import select
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(HERE, "..", ".."))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(REPO_ROOT, "scripts"))
+
+import hard_duplicate_gate as dup_gate  # noqa: E402
+import quality_pack_checks as quality  # noqa: E402
+from validate_one_exercises_file import (  # noqa: E402
+    load_registry, run_content_rules, schema_error_for_item, taskform_error,
+)
+
+DEFAULT_ROOTS = ["content/nl-NL", "staging/nl-NL", "data-v2-draft/exercises"]
+DEFAULT_SCHEMA = "content/nl-NL/_shared/schemas/ExerciseSchema.json"
+DEFAULT_TASKFORMS = "docs/new/taskvormen-canon.json"
+DEFAULT_BASELINE = "docs/new/duplicate_baseline.json"
+DEFAULT_OVERRIDES = "docs/new/duplicate_gate_overrides.json"
+DEFAULT_REPORT = "reports/watch/status.json"
+DEFAULT_PORT = 8766
+DEFAULT_MAX_CONTEXT_RATIO = 0.40
+
+# Collect events this long after the first one before checking (editors write in bursts)
+DEBOUNCE_SECONDS = 0.05
+POLL_INTERVAL = 0.5
+EVENT_HISTORY = 1000
+
+
+# ----------------------------
+# Console-safe printing
+# ----------------------------
+
+def safe_print(s: str = "") -> None:
+    try:
+        print(s, flush=True)
+    except UnicodeEncodeError:
+        print(s.encode("utf-8", errors="replace").decode("utf-8"), flush=True)
+
+
+def norm_slashes(p: str) -> str:
+    return p.replace("\\", "/")
+
+
+def rel_path(path: str) -> str:
+    ap = os.path.abspath(path)
+    if ap.startswith(REPO_ROOT + os.sep):
+        return norm_slashes(os.path.relpath(ap, REPO_ROOT))
+    return norm_slashes(path)
+
+
+def is_content_pack(path: str) -> bool:
+    """exercises.json and the staging variants (exercises.raw.json, ...); not _shared templates"""
+    name = os.path.basename(path)
+    return (name.startswith("exercises") and name.endswith(".json")
+            and "/_shared/" not in norm_slashes(path))
+
+
+def is_v2_file(path: str) -> bool:
+    return path.endswith("_core.json") or path.endswith("_support.json")
+
+
+def is_watched_file(path: str) -> bool:
+    return is_content_pack(path) or is_v2_file(path)
+
+
+def item_hash(item: Any) -> str:
+    return hashlib.sha256(json.dumps(item, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def issue(severity: str, code: str, message: str, item: Any = None) -> Dict[str, Any]:
+    return {"severity": severity, "code": code, "message": message, "item": item}
+
+
+# ----------------------------
+# File watchers
+# ----------------------------
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+# callback(changed paths, full_rescan)
+ChangeCallback = Callable[[Set[str], bool], None]
+
+
+class InotifyWatcher:
+    """Recursive inotify watches through libc (no extra package needed)"""
+
+    def __init__(self, roots: List[str]):
+        self.roots = roots
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs: Dict[int, str] = {}
+        for root in roots:
+            self._add_tree(root)
+
+    @staticmethod
+    def available() -> bool:
+        return sys.platform.startswith("linux") and bool(ctypes.util.find_library("c"))
+
+    def _add_dir(self, path: str) -> None:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd >= 0:
+            self.dirs[wd] = path
+
+    def _add_tree(self, root: str) -> Set[str]:
+        """Watch root and all subdirectories; returns files already inside (for new dirs)"""
+        found: Set[str] = set()
+        for dirpath, _, files in os.walk(root):
+            self._add_dir(dirpath)
+            found.update(os.path.join(dirpath, f) for f in files)
+        return found
+
+    def run(self, stop: threading.Event, callback: ChangeCallback) -> None:
+        while not stop.is_set():
+            ready, _, _ = select.select([self.fd], [], [], 0.5)
+            if not ready:
+                continue
+            changed: Set[str] = set()
+            rescan = False
+            deadline = time.monotonic() + DEBOUNCE_SECONDS
+            while True:
+                try:
+                    buf = os.read(self.fd, 64 * 1024)
+                except BlockingIOError:
+                    buf = b""
+                rescan |= self._parse(buf, changed)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not select.select([self.fd], [], [], remaining)[0]:
+                    break
+            if changed or rescan:
+                callback(changed, rescan)
+        os.close(self.fd)
+
+    def _parse(self, buf: bytes, changed: Set[str]) -> bool:
+        rescan = False
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buf):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buf, offset)
+            name = buf[offset + EVENT_HEADER.size: offset + EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                rescan = True
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            parent = self.dirs.get(wd)
+            if parent is None or not name:
+                continue
+            path = os.path.join(parent, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    changed.update(self._add_tree(path))
+                elif mask & IN_MOVED_FROM:
+                    # a directory moved away: simplest to rescan
+                    rescan = True
+                continue
+            changed.add(path)
+        return rescan
+
+
+class PollingWatcher:
+    """mtime/size snapshots of the watched files, diffed every interval"""
+
+    def __init__(self, roots: List[str], interval: float = POLL_INTERVAL):
+        self.roots = roots
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snap: Dict[str, Tuple[int, int]] = {}
+        for root in self.roots:
+            for dirpath, _, files in os.walk(root):
+                for fn in files:
+                    path = os.path.join(dirpath, fn)
+                    if not is_watched_file(path):
+                        continue
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    snap[path] = (st.st_mtime_ns, st.st_size)
+        return snap
+
+    def run(self, stop: threading.Event, callback: ChangeCallback) -> None:
+        while not stop.wait(self.interval):
+            current = self._scan()
+            changed = {p for p, sig in current.items() if self.snapshot.get(p) != sig}
+            changed.update(p for p in self.snapshot if p not in current)
+            self.snapshot = current
+            if changed:
+                callback(changed, False)
+
+
+# ----------------------------
+# Checkers (held warm)
+# ----------------------------
+
+class ContentChecker:
+    """Schema + taskForm canon + content rules + gates for exercises.json packs"""
+
+    def __init__(self, schema_path: str, taskforms_path: str, baseline_path: str,
+                 overrides_path: str, max_context_ratio: float):
+        self.schema_path = schema_path
+        self.taskforms_path = taskforms_path
+        self.baseline_path = baseline_path
+        self.overrides_path = overrides_path
+        self.max_context_ratio = max_context_ratio
+        self.generation = 0
+        self._signature: Tuple = ()
+        self.reload()
+
+    def _file_sig(self, path: str) -> Tuple[int, int]:
+        try:
+            st = os.stat(path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return 0, 0
+
+    def _current_signature(self) -> Tuple:
+        return tuple(self._file_sig(p) for p in
+                     (self.schema_path, self.taskforms_path, self.baseline_path, self.overrides_path))
+
+    def stale(self) -> bool:
+        return self._current_signature() != self._signature
+
+    def reload(self) -> None:
+        """(Re)build the item validator, canon sets and gate config"""
+        registry = load_registry(self.schema_path, self.taskforms_path)
+        self.validator = registry.item_validator
+        self.all_taskforms, self.by_level = registry.all_taskforms, registry.by_level
+        self.baseline = dup_gate.load_baseline(self.baseline_path)
+        self.overrides = dup_gate.load_overrides(self.overrides_path)
+        self._signature = self._current_signature()
+        self.generation += 1
+
+    def check_item(self, ex: Any) -> List[Dict[str, Any]]:
+        ex_id = ex.get("id") if isinstance(ex, dict) else None
+        # messages start with "id=<id>: " like those of run_content_rules
+        prefix = f"id={ex.get('id', '?')}: " if isinstance(ex, dict) else "id=?: "
+        out: List[Dict[str, Any]] = []
+        err = schema_error_for_item(self.validator, ex)
+        if err:
+            out.append(issue("ERROR", "SCHEMA", f"{prefix}{err['path']}: {err['message']}", ex_id))
+        if isinstance(ex, dict):
+            tf = taskform_error(ex, self.all_taskforms, self.by_level)
+            if tf and not err:
+                out.append(issue("ERROR", "TASKFORM", f"{prefix}{tf['message']} (actual {tf['actual']})", ex_id))
+            for iss in run_content_rules(ex, ""):
+                out.append(issue(iss.kind, iss.code, iss.message, ex_id))
+        return out
+
+    def check_pack(self, path: str, data: List[Any], sha: str) -> List[Dict[str, Any]]:
+        """Pack-level gates on an already parsed pack"""
+        out: List[Dict[str, Any]] = []
+        topic = dup_gate.parse_pack_meta(path).get("topic") or ""
+        ratio = dup_gate.get_topic_override_ratio(self.overrides, topic, self.max_context_ratio)
+        dup_errors = dup_gate.check_pack_data(data, ratio)
+        if dup_errors:
+            # same baseline semantics as hard_duplicate_gate.py
+            entry = dup_gate.baseline_entry(self.baseline, path, os.path.join(REPO_ROOT, "content"))
+            if entry is None:
+                severity, code = "ERROR", "DUP-FAIL-NEW"
+            elif not entry.get("sha256"):
+                severity, code = "WARN", "DUP-WARN-BASELINE-NOHASH"
+            elif entry["sha256"] == sha:
+                severity, code = "WARN", "DUP-WARN-BASELINE"
+            else:
+                severity, code = "ERROR", "DUP-FAIL-CHANGED"
+            out.extend(issue(severity, code, e) for e in dup_errors)
+
+        label = rel_path(path)
+        for w in (quality.check_pack_size(data, label) + quality.check_duplicates(data, label)
+                  + quality.check_distribution(data, label)):
+            code, _, message = w[1:].partition("] ") if w.startswith("[") else ("QUALITY-WARN", "", w)
+            out.append(issue("WARN", code, message))
+        return out
+
+
+class DuplicateIndex:
+    """Normalised prompt+options -> packs that contain it, maintained per pack"""
+
+    def __init__(self):
+        self.by_key: Dict[str, Set[str]] = collections.defaultdict(set)
+        self.keys_of: Dict[str, Set[str]] = {}
+
+    @staticmethod
+    def key(ex: Any) -> Optional[str]:
+        if not isinstance(ex, dict):
+            return None
+        prompt = " ".join(str(ex.get("prompt", "")).lower().split())
+        if not prompt:
+            return None
+        opts = ex.get("options") or []
+        return hashlib.sha1(json.dumps([prompt, opts], ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def update(self, pack: str, items: Iterable[Any]) -> None:
+        self.remove(pack)
+        keys = {k for k in (self.key(ex) for ex in items) if k}
+        for k in keys:
+            self.by_key[k].add(pack)
+        self.keys_of[pack] = keys
+
+    def remove(self, pack: str) -> None:
+        for k in self.keys_of.pop(pack, set()):
+            packs = self.by_key.get(k)
+            if packs:
+                packs.discard(pack)
+                if not packs:
+                    del self.by_key[k]
+
+    def shared_with(self, pack: str) -> Dict[str, int]:
+        """Other packs -> number of prompts they share with `pack`"""
+        counts: Dict[str, int] = collections.Counter()
+        for k in self.keys_of.get(pack, ()):
+            for other in self.by_key.get(k, ()):
+                if other != pack:
+                    counts[other] += 1
+        return dict(counts)
+
+
+# ----------------------------
+# Daemon state
+# ----------------------------
+
+class WatchDaemon:
+    """Pack catalogue + incremental checks; all state guarded by one lock"""
+
+    def __init__(self, roots: List[str], checker: ContentChecker, report_path: str,
+                 use_cache: bool = True):
+        self.roots = [r for r in roots if os.path.isdir(r)]
+        self.checker = checker
+        self.report_path = report_path
+        self.lock = threading.RLock()
+        self.changed_cond = threading.Condition(self.lock)
+        self.packs: Dict[str, Dict[str, Any]] = {}
+        self.item_results: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        self.dup_index = DuplicateIndex()
+        self.events: collections.deque = collections.deque(maxlen=EVENT_HISTORY)
+        self.seq = 0
+        self.started = time.time()
+        self.stop_event = threading.Event()
+        self.use_cache = use_cache
+        self._v2_validator = None
+
+    # --- v2 (comprehensive_validation) ---
+
+    def v2_validator(self):
+        if self._v2_validator is None:
+            from comprehensive_validation import ExerciseValidator
+            from validation_cache import ValidationCache
+            self._v2_validator = ExerciseValidator(cache=ValidationCache() if self.use_cache else None)
+        return self._v2_validator
+
+    def _check_v2(self, core: str) -> Dict[str, Any]:
+        support = core[: -len("_core.json")] + "_support.json"
+        result = self.v2_validator().validate_file(core, support if os.path.exists(support) else None)
+        issues = []
+        for i in result.issues:
+            sev = i.severity.value
+            if sev == "info":
+                continue
+            issues.append(issue("ERROR" if sev in ("critical", "error") else "WARN",
+                                i.category, f"{i.message} ({i.location})" if i.location else i.message))
+        if self.v2_validator().cache is not None:
+            self.v2_validator().cache.save()
+        n_items = 0
+        try:
+            from exercise_corpus import load_pack
+            n_items = len(load_pack(core).items)
+        except Exception:
+            pass
+        self._patch_v2_index(core, support)
+        return {"kind": "v2", "items": n_items, "issues": issues,
+                "quality_score": result.quality_score, "items_rechecked": n_items}
+
+    def _v2_root(self, path: str) -> Optional[str]:
+        ap = os.path.abspath(path)
+        for root in self.roots:
+            r = os.path.abspath(root)
+            if ap.startswith(r + os.sep) and os.path.exists(os.path.join(r, "index.json")):
+                return r
+        return None
+
+    def _patch_v2_index(self, core: str, support: str, removed: bool = False) -> None:
+        root = self._v2_root(core)
+        if root is None:
+            return
+        from publish_transaction import build_index_entry, patch_index
+        rel = norm_slashes(os.path.relpath(os.path.abspath(core), root))
+        if removed:
+            patch_index(Path(root) / "index.json", [], removed=[rel])
+            return
+        with open(core, "r", encoding="utf-8-sig") as f:
+            core_data = json.load(f)
+        entry = build_index_entry(core_data, rel)
+        entry["has_support"] = os.path.exists(support)
+        if not entry["has_support"]:
+            entry["paths"]["support"] = None
+        from exercise_corpus import load_pack
+        entry["item_count"] = len(load_pack(core).items)
+        patch_index(Path(root) / "index.json", [entry])
+
+    # --- content packs ---
+
+    def _check_content(self, path: str, rel: str) -> Dict[str, Any]:
+        with open(path, "rb") as f:
+            raw = f.read()
+        sha = hashlib.sha256(raw).hexdigest()
+        try:
+            data = json.loads(raw.decode("utf-8-sig")) if raw.strip() else []
+        except ValueError as e:
+            self.dup_index.remove(rel)
+            return {"kind": "content", "items": 0, "sha256": sha, "items_rechecked": 0,
+                    "issues": [issue("ERROR", "PARSE", f"parse error: {e}")]}
+        if not isinstance(data, list):
+            self.dup_index.remove(rel)
+            return {"kind": "content", "items": 0, "sha256": sha, "items_rechecked": 0,
+                    "issues": [issue("ERROR", "ROOT", f"root must be a JSON array, got {type(data).__name__}")]}
+
+        gen = self.checker.generation
+        old = self.item_results.get(rel, {})
+        fresh: Dict[str, List[Dict[str, Any]]] = {}
+        issues: List[Dict[str, Any]] = []
+        rechecked = 0
+        for ex in data:
+            h = f"{gen}:{item_hash(ex)}"
+            res = old.get(h)
+            if res is None:
+                res = fresh.get(h)
+            if res is None:
+                res = self.checker.check_item(ex)
+                rechecked += 1
+            fresh[h] = res
+            issues.extend(res)
+        self.item_results[rel] = fresh
+
+        issues.extend(self.checker.check_pack(path, data, sha))
+        sharers = set(self.dup_index.shared_with(rel))
+        self.dup_index.update(rel, data)
+        issues.extend(self._cross_issues(rel))
+        # packs that shared prompts with the old or new version see a different overlap now
+        for other in sharers | set(self.dup_index.shared_with(rel)):
+            self._refresh_cross(other)
+        return {"kind": "content", "items": len(data), "sha256": sha, "items_rechecked": rechecked,
+                "issues": issues}
+
+    def _cross_issues(self, rel: str) -> List[Dict[str, Any]]:
+        return [issue("WARN", "CROSS-DUP-WARN", f"{n} prompt(s) also in {other}")
+                for other, n in sorted(self.dup_index.shared_with(rel).items())]
+
+    def _refresh_cross(self, rel: str) -> None:
+        state = self.packs.get(rel)
+        if state is None:
+            return
+        state["issues"] = [i for i in state["issues"] if i["code"] != "CROSS-DUP-WARN"] + self._cross_issues(rel)
+        state["warnings"] = sum(1 for i in state["issues"] if i["severity"] != "ERROR")
+
+    # --- change handling ---
+
+    def check_path(self, path: str) -> Optional[Dict[str, Any]]:
+        """Revalidate one changed file; returns the event recorded for it"""
+        if path.endswith("_support.json"):
+            path = path[: -len("_support.json")] + "_core.json"
+        rel = rel_path(path)
+        t0 = time.perf_counter()
+        with self.lock:
+            if not os.path.exists(path):
+                if rel not in self.packs:
+                    return None
+                del self.packs[rel]
+                self.item_results.pop(rel, None)
+                sharers = self.dup_index.shared_with(rel)
+                self.dup_index.remove(rel)
+                for other in sharers:
+                    self._refresh_cross(other)
+                if is_v2_file(path):
+                    self._patch_v2_index(path, "", removed=True)
+                return self._record(rel, {"status": "removed", "issues": []}, t0)
+            try:
+                state = self._check_v2(path) if is_v2_file(path) else self._check_content(path, rel)
+            except Exception as e:
+                state = {"kind": "v2" if is_v2_file(path) else "content", "items": 0, "items_rechecked": 0,
+                         "issues": [issue("ERROR", "CHECK", f"{type(e).__name__}: {e}")]}
+            errors = sum(1 for i in state["issues"] if i["severity"] == "ERROR")
+            state.update({
+                "path": rel,
+                "status": "FAIL" if errors else "OK",
+                "errors": errors,
+                "warnings": len(state["issues"]) - errors,
+                "checked_at": time.time(),
+            })
+            self.packs[rel] = state
+            return self._record(rel, state, t0)
+
+    def _record(self, rel: str, state: Dict[str, Any], t0: float) -> Dict[str, Any]:
+        self.seq += 1
+        event = {
+            "seq": self.seq,
+            "time": time.time(),
+            "path": rel,
+            "status": state["status"],
+            "errors": state.get("errors", 0),
+            "warnings": state.get("warnings", 0),
+            "items_rechecked": state.get("items_rechecked", 0),
+            "ms": round((time.perf_counter() - t0) * 1000, 1),
+            "issues": [i for i in state["issues"] if i["severity"] == "ERROR"][:20],
+        }
+        self.events.append(event)
+        self.changed_cond.notify_all()
+        return event
+
+    def on_change(self, paths: Set[str], rescan: bool) -> None:
+        if self.checker.stale():
+            # schema / canon / baseline changed: every content pack is affected
+            with self.lock:
+                self.checker.reload()
+            rescan = True
+        if rescan:
+            paths = set(paths) | set(self._all_files())
+            paths |= {os.path.join(REPO_ROOT, rel) for rel in list(self.packs)}
+        for path in sorted(p for p in paths if is_watched_file(p)):
+            event = self.check_path(path)
+            if event:
+                mark = "✅" if event["status"] == "OK" else ("🗑️" if event["status"] == "removed" else "❌")
+                safe_print(f"{mark} {event['path']}  {event['errors']} error(s), {event['warnings']} warn(s)"
+                           f"  [{event['items_rechecked']} item(s) rechecked, {event['ms']} ms]")
+        self.write_report()
+
+    def _all_files(self) -> List[str]:
+        out = []
+        for root in self.roots:
+            for dirpath, _, files in os.walk(root):
+                out.extend(os.path.join(dirpath, f) for f in files if is_watched_file(os.path.join(dirpath, f)))
+        return sorted(out)
+
+    def warm(self) -> None:
+        t0 = time.perf_counter()
+        files = self._all_files()
+        for path in files:
+            if path.endswith("_support.json"):
+                continue
+            self.check_path(path)
+        self.write_report()
+        summary = self.summary()
+        safe_print(f"🔥 Warm: {summary['packs']} pack(s), {summary['failing']} failing, "
+                   f"{summary['errors']} error(s) in {time.perf_counter() - t0:.1f}s")
+
+    # --- queries ---
+
+    def summary(self) -> Dict[str, Any]:
+        with self.lock:
+            packs = list(self.packs.values())
+            return {
+                "roots": [rel_path(r) for r in self.roots],
+                "packs": len(packs),
+                "items": sum(p.get("items", 0) for p in packs),
+                "failing": sum(1 for p in packs if p["status"] == "FAIL"),
+                "errors": sum(p.get("errors", 0) for p in packs),
+                "warnings": sum(p.get("warnings", 0) for p in packs),
+                "seq": self.seq,
+                "schema_generation": self.checker.generation,
+                "uptime_s": round(time.time() - self.started, 1),
+            }
+
+    def write_report(self) -> None:
+        with self.lock:
+            payload = {
+                "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "summary": self.summary(),
+                "packs": [{k: v for k, v in p.items() if k != "issues"} | {
+                    "issues": p["issues"][:50]} for _, p in sorted(self.packs.items())],
+            }
+        os.makedirs(os.path.dirname(self.report_path) or ".", exist_ok=True)
+        tmp = self.report_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.report_path)
+
+    def handle(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        cmd = req.get("cmd")
+        if cmd == "ping":
+            return {"ok": True}
+        if cmd == "status":
+            return {"ok": True, "summary": self.summary()}
+        if cmd == "pack":
+            rel = rel_path(req.get("path", ""))
+            with self.lock:
+                pack = self.packs.get(rel)
+            return {"ok": pack is not None, "pack": pack, "error": None if pack else f"unknown pack: {rel}"}
+        if cmd == "issues":
+            severity = req.get("severity")
+            limit = int(req.get("limit", 200))
+            out = []
+            with self.lock:
+                for rel, p in sorted(self.packs.items()):
+                    for i in p["issues"]:
+                        if severity and i["severity"] != severity:
+                            continue
+                        out.append({"path": rel, **i})
+            return {"ok": True, "total": len(out), "issues": out[:limit]}
+        if cmd == "recheck":
+            path = req.get("path", "")
+            if not os.path.isabs(path):
+                path = os.path.join(REPO_ROOT, path)
+            event = self.check_path(path)
+            self.write_report()
+            return {"ok": event is not None, "event": event}
+        if cmd == "events":
+            since = int(req.get("since", 0))
+            timeout = min(float(req.get("timeout", 30)), 300.0)
+            with self.changed_cond:
+                self.changed_cond.wait_for(lambda: self.seq > since or self.stop_event.is_set(), timeout)
+                events = [e for e in self.events if e["seq"] > since]
+            return {"ok": True, "seq": self.seq, "events": events}
+        if cmd == "stop":
+            self.stop_event.set()
+            with self.changed_cond:
+                self.changed_cond.notify_all()
+            return {"ok": True}
+        return {"ok": False, "error": f"unknown command: {cmd}"}
+
+
+# ----------------------------
+# Socket API
+# ----------------------------
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                reply = self.server.daemon_state.handle(json.loads(line))
+            except Exception as e:
+                reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            self.wfile.write((json.dumps(reply, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+class ApiServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int, state: WatchDaemon):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.daemon_state = state
+
+
+def request(port: int, payload: Dict[str, Any], timeout: float = 10.0) -> Dict[str, Any]:
+    """Send one request to a running daemon"""
+    with socket.create_connection(("127.0.0.1", port), timeout=timeout) as sock:
+        sock.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError("daemon closed the connection")
+    return json.loads(line)
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+
+def serve(args: argparse.Namespace) -> int:
+    # defaults are repo-relative, explicit paths relative to the caller's cwd
+    def resolve(p: str, default: str) -> str:
+        return os.path.join(REPO_ROOT, p) if p == default else os.path.abspath(p)
+
+    args.schema = resolve(args.schema, DEFAULT_SCHEMA)
+    args.taskforms = resolve(args.taskforms, DEFAULT_TASKFORMS)
+    args.baseline = resolve(args.baseline, DEFAULT_BASELINE)
+    args.overrides = resolve(args.overrides, DEFAULT_OVERRIDES)
+    args.report = resolve(args.report, DEFAULT_REPORT)
+    args.root = [os.path.abspath(r) for r in args.root] if args.root else [os.path.join(REPO_ROOT, r) for r in DEFAULT_ROOTS]
+    if not os.path.exists(args.schema):
+        safe_print(f"ERROR: schema not found: {args.schema}")
+        return 2
+    checker = ContentChecker(args.schema, args.taskforms, args.baseline, args.overrides, args.max_context_ratio)
+    state = WatchDaemon(args.root, checker, args.report, use_cache=not args.no_cache)
+    if not state.roots:
+        safe_print("ERROR: none of the watch roots exist")
+        return 2
+
+    try:
+        server = ApiServer(args.port, state)
+    except OSError as e:
+        safe_print(f"ERROR: cannot listen on 127.0.0.1:{args.port}: {e} (daemon already running?)")
+        return 2
+
+    state.warm()
+    watcher: Any
+    if not args.poll and InotifyWatcher.available():
+        try:
+            watcher = InotifyWatcher(state.roots)
+            mode = "inotify"
+        except OSError:
+            watcher, mode = PollingWatcher(state.roots, args.interval), "polling"
+    else:
+        watcher, mode = PollingWatcher(state.roots, args.interval), "polling"
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    safe_print(f"👀 Watching {', '.join(rel_path(r) for r in state.roots)} ({mode}); "
+               f"API on 127.0.0.1:{args.port}; report {args.report}")
+    watch_thread = threading.Thread(target=watcher.run, args=(state.stop_event, state.on_change), daemon=True)
+    watch_thread.start()
+    try:
+        while not state.stop_event.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        state.stop_event.set()
+    server.shutdown()
+    watch_thread.join(timeout=2)
+    safe_print("👋 Stopped")
+    return 0
+
+
+def print_event(e: Dict[str, Any]) -> None:
+    mark = "✅" if e["status"] == "OK" else ("🗑️" if e["status"] == "removed" else "❌")
+    safe_print(f"{mark} {e['path']}  {e['errors']} error(s), {e['warnings']} warn(s)  ({e['ms']} ms)")
+    for i in e.get("issues", []):
+        safe_print(f"    [{i['code']}] {i['message']}")
+
+
+def client(args: argparse.Namespace) -> int:
+    try:
+        if args.cmd == "status":
+            s = request(args.port, {"cmd": "status"})["summary"]
+            safe_print(f"Packs: {s['packs']} ({s['items']} items) — {s['failing']} failing, "
+                       f"{s['errors']} error(s), {s['warnings']} warning(s); uptime {s['uptime_s']}s")
+            return 1 if s["failing"] else 0
+        if args.cmd == "pack":
+            r = request(args.port, {"cmd": "pack", "path": os.path.abspath(args.path)})
+            if not r["ok"]:
+                safe_print(f"ERROR: {r['error']}")
+                return 2
+            p = r["pack"]
+            safe_print(f"{p['status']} {p['path']}: {p['items']} item(s), {p['errors']} error(s), {p['warnings']} warn(s)")
+            for i in p["issues"]:
+                safe_print(f"  {i['severity']:<5} [{i['code']}] {i['message']}")
+            return 1 if p["errors"] else 0
+        if args.cmd == "issues":
+            r = request(args.port, {"cmd": "issues", "severity": args.severity, "limit": args.limit})
+            for i in r["issues"]:
+                safe_print(f"{i['severity']:<5} {i['path']} [{i['code']}] {i['message']}")
+            safe_print(f"{r['total']} issue(s)")
+            return 1 if any(i["severity"] == "ERROR" for i in r["issues"]) else 0
+        if args.cmd == "recheck":
+            r = request(args.port, {"cmd": "recheck", "path": os.path.abspath(args.path)}, timeout=120)
+            if r.get("event"):
+                print_event(r["event"])
+                return 1 if r["event"]["errors"] else 0
+            safe_print("Nothing to check")
+            return 0
+        if args.cmd == "follow":
+            since = request(args.port, {"cmd": "status"})["summary"]["seq"]
+            safe_print("Waiting for changes (Ctrl+C to quit)...")
+            while True:
+                r = request(args.port, {"cmd": "events", "since": since, "timeout": 30}, timeout=40)
+                for e in r["events"]:
+                    print_event(e)
+                since = r["seq"]
+        if args.cmd == "stop":
+            request(args.port, {"cmd": "stop"})
+            safe_print("Stop requested")
+            return 0
+    except (ConnectionError, OSError) as e:
+        safe_print(f"ERROR: daemon not reachable on 127.0.0.1:{args.port} ({e}). Start it with: watch_daemon.py serve")
+        return 2
+    except KeyboardInterrupt:
+        return 0
+    return 2
+
+
+def parse_args() -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Watch daemon for validators, gates and index")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Local API port (default {DEFAULT_PORT})")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sp = sub.add_parser("serve", help="Run the daemon")
+    sp.add_argument("--root", action="append", help=f"Tree to watch (repeatable; default {', '.join(DEFAULT_ROOTS)})")
+    sp.add_argument("--schema", default=DEFAULT_SCHEMA)
+    sp.add_argument("--taskforms", default=DEFAULT_TASKFORMS)
+    sp.add_argument("--baseline", default=DEFAULT_BASELINE)
+    sp.add_argument("--overrides", default=DEFAULT_OVERRIDES)
+    sp.add_argument("--max-context-ratio", type=float, default=DEFAULT_MAX_CONTEXT_RATIO)
+    sp.add_argument("--report", default=DEFAULT_REPORT, help="Status report path (rewritten after every change)")
+    sp.add_argument("--poll", action="store_true", help="Force polling instead of inotify")
+    sp.add_argument("--interval", type=float, default=POLL_INTERVAL, help="Polling interval in seconds")
+    sp.add_argument("--no-cache", action="store_true", help="Do not use the validation cache for v2 files")
+
+    sub.add_parser("status", help="Summary of the catalogue")
+    pp = sub.add_parser("pack", help="Issues of one pack")
+    pp.add_argument("path")
+    ip = sub.add_parser("issues", help="All current issues")
+    ip.add_argument("--severity", choices=["ERROR", "WARN"])
+    ip.add_argument("--limit", type=int, default=200)
+    rp = sub.add_parser("recheck", help="Revalidate one file now")
+    rp.add_argument("path")
+    sub.add_parser("follow", help="Print results as files change")
+    sub.add_parser("stop", help="Stop the daemon")
+    return ap.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.cmd == "serve":
+        return serve(args)
+    return client(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
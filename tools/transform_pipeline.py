@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+transform_pipeline.py — run many fix/update passes over one load of a template file
+
+The tools/update_* and tools/fix_* scripts each load "verhaaltjessommen -
+Template.json" (2+ MB), walk the questions, mutate them and write the whole
+file back. Running the usual cleanup means a dozen parse/serialise cycles of
+the same file. Here every fix is a registered pass:
+
+  @register("consistency", scope="question", after=("update:*",), chains=("cleanup",))
+  def consistency(q: QuestionRef, ctx: PassContext) -> None:
+      ...
+
+- scope="question": called once per question of the item stream (QuestionRef
+  = block + question + theme); consecutive question passes share one walk
+- scope="document": called once with the whole parsed file
+- after/before: ordering constraints (names, "prefix:*" patterns allowed),
+  resolved into one chain; registration order breaks ties
+- themes / kinds: only run on questions of these themes / files of these shapes
+
+The runner loads the file once, runs the chain, counts per pass how many
+questions (or blocks) it changed plus any counters the pass reports with
+ctx.count(), and writes the result once, atomically (tmp + os.replace).
+--dry-run writes nothing; --diff prints a unified diff per changed block.
+
+The passes that wrap the existing scripts live in cleanup_passes.py.
+
+  python tools/transform_pipeline.py list
+  python tools/transform_pipeline.py run "verhaaltjessommen - Template.json" --chain cleanup --dry-run --diff
+  python tools/transform_pipeline.py run template.json --pass decimal-notation --pass currency -o fixed.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import collections
+import dataclasses
+import difflib
+import fnmatch
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# File shapes the item stream understands
+KIND_LEGACY = "legacy-blocks"   # [{id, theme, title, content, questions[]}]
+KIND_V2 = "v2-problems"         # {problems: [{id, theme, content, items[]}]}
+
+SCOPE_QUESTION = "question"
+SCOPE_DOCUMENT = "document"
+
+
+# ----------------------------
+# Item stream
+# ----------------------------
+
+@dataclasses.dataclass
+class QuestionRef:
+    """One question plus the block it belongs to; question is the live dict"""
+    block: Dict[str, Any]
+    question: Dict[str, Any]
+    index: int
+    kind: str
+
+    @property
+    def theme(self) -> str:
+        return self.block.get("theme", "") or ""
+
+    @property
+    def title(self) -> str:
+        return self.block.get("title", "") or ""
+
+    @property
+    def content(self) -> Any:
+        return self.block.get("content", "")
+
+    @property
+    def block_id(self) -> Any:
+        return self.block.get("id")
+
+
+def detect_kind(data: Any) -> Optional[str]:
+    if isinstance(data, list):
+        return KIND_LEGACY
+    if isinstance(data, dict) and isinstance(data.get("problems"), list):
+        return KIND_V2
+    return None
+
+
+def blocks(data: Any) -> List[Dict[str, Any]]:
+    """Top-level blocks (problems) of either shape, in file order"""
+    if isinstance(data, list):
+        return [b for b in data if isinstance(b, dict)]
+    if isinstance(data, dict):
+        return [b for b in data.get("problems", []) if isinstance(b, dict)]
+    return []
+
+
+def iter_questions(data: Any) -> Iterator[QuestionRef]:
+    kind = detect_kind(data)
+    for block in blocks(data):
+        questions = block.get("questions" if kind == KIND_LEGACY else "items", [])
+        for idx, question in enumerate(questions):
+            if isinstance(question, dict):
+                yield QuestionRef(block=block, question=question, index=idx, kind=kind)
+
+
+def replace_in_place(target: Any, new: Any) -> None:
+    """Swap the contents of a dict/list for those of `new` (for non-mutating fix functions)"""
+    if target is new:
+        return
+    if isinstance(target, dict):
+        target.clear()
+        target.update(new)
+    elif isinstance(target, list):
+        target[:] = new
+    else:
+        raise TypeError(f"Cannot replace {type(target).__name__} in place")
+
+
+def _fingerprint(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+# ----------------------------
+# Registry
+# ----------------------------
+
+@dataclasses.dataclass
+class TransformPass:
+    name: str
+    func: Callable[..., Any]
+    scope: str
+    description: str = ""
+    after: Tuple[str, ...] = ()
+    before: Tuple[str, ...] = ()
+    chains: Tuple[str, ...] = ()
+    themes: Tuple[str, ...] = ()
+    kinds: Tuple[str, ...] = ()
+    order: int = 0
+
+    def applies_to(self, kind: Optional[str]) -> bool:
+        return not self.kinds or kind in self.kinds
+
+
+REGISTRY: Dict[str, TransformPass] = {}
+
+
+def register(name: str, scope: str = SCOPE_QUESTION, after: Sequence[str] = (),
+             before: Sequence[str] = (), chains: Sequence[str] = (),
+             themes: Sequence[str] = (), kinds: Sequence[str] = ()) -> Callable:
+    """
+    Decorator: register `func` as a transform pass.
+
+    Args:
+        name: Unique pass name (e.g. "update:breuken", "decimal-notation")
+        scope: "question" (func(q, ctx)) or "document" (func(data, ctx))
+        after: Passes/patterns this one must run after (if they are in the chain)
+        before: Passes/patterns this one must run before
+        chains: Named chains this pass belongs to (e.g. "cleanup")
+        themes: Only call for questions whose block has one of these themes
+        kinds: Only run on files of these shapes (KIND_LEGACY / KIND_V2)
+
+    Raises:
+        ValueError: Duplicate name or unknown scope
+    """
+    if scope not in (SCOPE_QUESTION, SCOPE_DOCUMENT):
+        raise ValueError(f"Unknown scope: {scope}")
+
+    def decorate(func: Callable) -> Callable:
+        if name in REGISTRY:
+            raise ValueError(f"Pass already registered: {name}")
+        doc = (func.__doc__ or "").strip().splitlines()
+        REGISTRY[name] = TransformPass(
+            name=name, func=func, scope=scope, description=doc[0] if doc else "",
+            after=tuple(after), before=tuple(before), chains=tuple(chains),
+            themes=tuple(themes), kinds=tuple(kinds), order=len(REGISTRY),
+        )
+        return func
+    return decorate
+
+
+def _matches(pattern: str, names: Sequence[str]) -> List[str]:
+    return [n for n in names if fnmatch.fnmatchcase(n, pattern)]
+
+
+def resolve_chain(chains: Sequence[str] = (), names: Sequence[str] = (),
+                  skip: Sequence[str] = ()) -> List[TransformPass]:
+    """
+    Select passes (by chain membership and/or name pattern) and order them.
+
+    Ordering is a topological sort over the after/before constraints between
+    the selected passes; ties go to registration order.
+
+    Raises:
+        KeyError: A name/chain selects nothing
+        ValueError: Ordering constraints form a cycle
+    """
+    all_names = list(REGISTRY)
+    selected: Dict[str, TransformPass] = {}
+    for chain in chains:
+        members = [p for p in REGISTRY.values() if chain in p.chains]
+        if not members:
+            raise KeyError(f"Unknown chain: {chain}")
+        selected.update((p.name, p) for p in members)
+    for pattern in names:
+        hits = _matches(pattern, all_names)
+        if not hits:
+            raise KeyError(f"Unknown pass: {pattern}")
+        selected.update((n, REGISTRY[n]) for n in hits)
+    for pattern in skip:
+        for n in _matches(pattern, list(selected)):
+            del selected[n]
+
+    chosen = list(selected)
+    edges: Dict[str, set] = {n: set() for n in chosen}   # n -> passes that must come later
+    for p in selected.values():
+        for pattern in p.after:
+            for dep in _matches(pattern, chosen):
+                if dep != p.name:
+                    edges[dep].add(p.name)
+        for pattern in p.before:
+            for dep in _matches(pattern, chosen):
+                if dep != p.name:
+                    edges[p.name].add(dep)
+
+    indegree = collections.Counter()
+    for targets in edges.values():
+        indegree.update(targets)
+    ready = sorted((n for n in chosen if indegree[n] == 0), key=lambda n: REGISTRY[n].order)
+    ordered: List[TransformPass] = []
+    while ready:
+        name = ready.pop(0)
+        ordered.append(REGISTRY[name])
+        for nxt in edges[name]:
+            indegree[nxt] -= 1
+            if indegree[nxt] == 0:
+                ready.append(nxt)
+        ready.sort(key=lambda n: REGISTRY[n].order)
+    if len(ordered) != len(chosen):
+        stuck = sorted(set(chosen) - {p.name for p in ordered})
+        raise ValueError(f"Ordering cycle between passes: {', '.join(stuck)}")
+    return ordered
+
+
+# ----------------------------
+# Runner
+# ----------------------------
+
+@dataclasses.dataclass
+class PassStats:
+    name: str
+    scope: str
+    seen: int = 0
+    changed: int = 0
+    seconds: float = 0.0
+    counters: Dict[str, int] = dataclasses.field(default_factory=dict)
+
+
+class PassContext:
+    """Handed to every pass call; count() adds to the pass's own counters"""
+
+    def __init__(self, path: str, kind: Optional[str]):
+        self.path = path
+        self.kind = kind
+        self.stats: Optional[PassStats] = None
+
+    def count(self, key: str, n: int = 1) -> None:
+        if self.stats is not None and n:
+            self.stats.counters[key] = self.stats.counters.get(key, 0) + n
+
+
+def _merge_counters(stats: PassStats, result: Any) -> None:
+    """Fix functions that return {counter: n} (like fix_consistency) feed the counters"""
+    if isinstance(result, dict):
+        for key, value in result.items():
+            if isinstance(value, int) and not isinstance(value, bool) and value:
+                stats.counters[key] = stats.counters.get(key, 0) + value
+
+
+def _run_question_group(data: Any, group: List[TransformPass], ctx: PassContext,
+                        stats: Dict[str, PassStats]) -> None:
+    """Consecutive question passes: one walk, each question goes through all of them in order"""
+    for ref in iter_questions(data):
+        before: Optional[str] = None
+        for p in group:
+            if p.themes and ref.theme not in p.themes:
+                continue
+            st = stats[p.name]
+            if before is None:
+                before = _fingerprint(ref.question)
+            ctx.stats = st
+            t0 = time.perf_counter()
+            result = p.func(ref, ctx)
+            st.seconds += time.perf_counter() - t0
+            st.seen += 1
+            _merge_counters(st, result)
+            after = _fingerprint(ref.question)
+            if after != before:
+                st.changed += 1
+                before = after
+
+
+def _run_document_pass(data: Any, p: TransformPass, ctx: PassContext, st: PassStats) -> None:
+    snapshot = [_fingerprint(b) for b in blocks(data)]
+    ctx.stats = st
+    t0 = time.perf_counter()
+    result = p.func(data, ctx)
+    st.seconds += time.perf_counter() - t0
+    _merge_counters(st, result)
+    after = [_fingerprint(b) for b in blocks(data)]
+    st.seen = len(after)
+    st.changed = sum(1 for a, b in zip(snapshot, after) if a != b) + abs(len(after) - len(snapshot))
+
+
+def load_document(path: str) -> Any:
+    with open(path, "r", encoding="utf-8-sig") as f:
+        return json.load(f)
+
+
+def dump_document(data: Any) -> str:
+    # same layout as the individual scripts write
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+def write_atomic(path: str, text: str) -> None:
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def block_diff(before: Sequence[str], after: Sequence[str], data_after: Any) -> Iterator[str]:
+    """Unified diff lines for every block whose serialisation changed"""
+    after_blocks = blocks(data_after)
+    for idx, new in enumerate(after):
+        old = before[idx] if idx < len(before) else ""
+        if old == new:
+            continue
+        label = f"block {after_blocks[idx].get('id', idx)}"
+        yield from difflib.unified_diff(old.splitlines(), new.splitlines(),
+                                        f"a/{label}", f"b/{label}", lineterm="", n=2)
+    for idx in range(len(after), len(before)):
+        yield from difflib.unified_diff(before[idx].splitlines(), [],
+                                        f"a/block #{idx}", "b/(removed)", lineterm="", n=0)
+
+
+def run_chain(path: str, passes: Sequence[TransformPass], output: Optional[str] = None,
+              dry_run: bool = False, diff: bool = False) -> Dict[str, Any]:
+    """
+    Load `path` once, run `passes` in order, write once.
+
+    Args:
+        path: Template / v2 problems file
+        passes: Ordered passes (see resolve_chain)
+        output: Write here instead of over `path`
+        dry_run: Do not write anything
+        diff: Collect a per-block unified diff (report["diff"])
+
+    Returns:
+        Report dict: kind, per-pass stats, changed, written, timings
+    """
+    t0 = time.perf_counter()
+    data = load_document(path)
+    t_load = time.perf_counter() - t0
+    kind = detect_kind(data)
+    ctx = PassContext(path, kind)
+
+    before_blocks = [dump_document(b) for b in blocks(data)] if diff else []
+    original = _fingerprint(data)
+
+    stats: Dict[str, PassStats] = {p.name: PassStats(p.name, p.scope) for p in passes}
+    skipped: List[str] = []
+    t1 = time.perf_counter()
+    group: List[TransformPass] = []
+    for p in passes:
+        if not p.applies_to(kind):
+            skipped.append(p.name)
+            continue
+        if p.scope == SCOPE_QUESTION:
+            group.append(p)
+            continue
+        if group:
+            _run_question_group(data, group, ctx, stats)
+            group = []
+        _run_document_pass(data, p, ctx, stats[p.name])
+    if group:
+        _run_question_group(data, group, ctx, stats)
+    t_passes = time.perf_counter() - t1
+
+    changed = _fingerprint(data) != original
+    written = None
+    t_write = 0.0
+    if changed and not dry_run:
+        t2 = time.perf_counter()
+        written = output or path
+        write_atomic(written, dump_document(data))
+        t_write = time.perf_counter() - t2
+    elif output and not dry_run:
+        # unchanged but an explicit output was requested: still produce it
+        written = output
+        write_atomic(output, dump_document(data))
+
+    report: Dict[str, Any] = {
+        "path": path,
+        "kind": kind,
+        "passes": [dataclasses.asdict(stats[p.name]) for p in passes if p.name not in skipped],
+        "skipped": skipped,
+        "changed": changed,
+        "written": written,
+        "seconds": {"load": round(t_load, 3), "passes": round(t_passes, 3), "write": round(t_write, 3)},
+    }
+    if diff:
+        report["diff"] = list(block_diff(before_blocks, [dump_document(b) for b in blocks(data)], data))
+    return report
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+
+def _load_pass_modules(modules: Sequence[str]) -> None:
+    here = os.path.dirname(os.path.abspath(__file__))
+    if here not in sys.path:
+        sys.path.insert(0, here)
+    # run as a script: pass modules must register into this module, not a second copy
+    sys.modules.setdefault("transform_pipeline", sys.modules[__name__])
+    import importlib
+    for mod in modules:
+        importlib.import_module(mod)
+
+
+def print_report(report: Dict[str, Any], dry_run: bool) -> None:
+    print(f"📄 {report['path']} ({report['kind'] or 'unknown shape'})")
+    for st in report["passes"]:
+        extra = ", ".join(f"{k}={v}" for k, v in sorted(st["counters"].items()))
+        unit = "questions" if st["scope"] == SCOPE_QUESTION else "blocks"
+        print(f"  {st['name']:<32} {st['changed']:>5}/{st['seen']:<5} {unit} changed"
+              f"  {st['seconds'] * 1000:7.1f} ms" + (f"  ({extra})" if extra else ""))
+    for name in report["skipped"]:
+        print(f"  {name:<32} skipped (not for this file shape)")
+    secs = report["seconds"]
+    print(f"⏱️  load {secs['load']:.2f}s, passes {secs['passes']:.2f}s, write {secs['write']:.2f}s")
+    if not report["changed"]:
+        print("✅ No changes")
+    elif dry_run:
+        print("🔍 Dry run: nothing written")
+    else:
+        print(f"💾 Written: {report['written']}")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Run fix/update passes over one load of a template file")
+    ap.add_argument("--modules", nargs="*", default=["cleanup_passes"],
+                    help="Modules that register passes (default: cleanup_passes)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    lp = sub.add_parser("list", help="Registered passes and chains")
+    lp.add_argument("--chain", action="append", default=[], help="Show the resolved order of a chain")
+
+    rp = sub.add_parser("run", help="Run a chain / passes over a file")
+    rp.add_argument("file", help="Template JSON (legacy blocks or v2 problems)")
+    rp.add_argument("--chain", action="append", default=[], help="Named chain (repeatable)")
+    rp.add_argument("--pass", dest="passes", action="append", default=[],
+                    help="Pass name or pattern, e.g. 'update:*' (repeatable)")
+    rp.add_argument("--skip", action="append", default=[], help="Leave out a pass/pattern")
+    rp.add_argument("-o", "--output", help="Write here instead of overwriting the input")
+    rp.add_argument("--dry-run", action="store_true", help="Do not write")
+    rp.add_argument("--diff", action="store_true", help="Print a unified diff per changed block")
+    rp.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    args = ap.parse_args()
+    _load_pass_modules(args.modules)
+
+    if args.cmd == "list":
+        if args.chain:
+            for chain in args.chain:
+                print(f"{chain}: " + " -> ".join(p.name for p in resolve_chain(chains=[chain])))
+            return 0
+        for p in REGISTRY.values():
+            tags = ",".join(p.chains) or "-"
+            print(f"  {p.name:<32} {p.scope:<9} [{tags}] {p.description}")
+        return 0
+
+    if not args.chain and not args.passes:
+        ap.error("run needs --chain and/or --pass")
+    try:
+        passes = resolve_chain(args.chain, args.passes, args.skip)
+    except (KeyError, ValueError) as e:
+        print(f"❌ {e.args[0]}")
+        return 2
+    if not os.path.exists(args.file):
+        print(f"❌ File not found: {args.file}")
+        return 1
+
+    print("🔗 " + " -> ".join(p.name for p in passes))
+    report = run_chain(args.file, passes, output=args.output, dry_run=args.dry_run, diff=args.diff)
+    if args.json:
+        print(json.dumps({k: v for k, v in report.items() if k != "diff"}, ensure_ascii=False, indent=2))
+    else:
+        print_report(report, args.dry_run)
+    if args.diff:
+        for line in report["diff"]:
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
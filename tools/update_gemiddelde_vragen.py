@@ -6,6 +6,10 @@ Voegt toe: hint, error_type, is_correct, reflectievragen, visual_aid_query, reme
 
 import json
 import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from exercise_corpus import KIND_LEGACY_BLOCKS, load_pack
 
 def add_reflection_question(foutanalyse, error_type):
     """Voeg reflectievraag toe aan foutanalyse op basis van error type"""
@@ -144,11 +148,15 @@ def main():
     print(f"📖 Lezen van {input_file}...")
 
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # eigen (niet gedeelde) parse, want de vragen worden hierin bijgewerkt
+        pack = load_pack(input_file, use_cache=False)
     except Exception as e:
         print(f"❌ Fout bij het lezen: {e}")
         sys.exit(1)
+    if pack.kind != KIND_LEGACY_BLOCKS:
+        print(f"❌ Geen quizbestand met questions-blokken: {input_file} ({pack.kind})")
+        sys.exit(1)
+    data = pack.raw
 
     print(f"✅ {len(data)} vragen geladen")
 
@@ -6,6 +6,11 @@ in basisvaardigheden - Template.json
 
 import json
 import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from exercise_corpus import KIND_LEGACY_BLOCKS, load_pack
 
 
 def determine_error_type(option_index, correct_index, question_text, option_text):
@@ -200,8 +205,12 @@ def main():
     filename = "basisvaardigheden - Template.json"
 
     print(f"Reading {filename}...")
-    with open(filename, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # private (uncached) parse: the questions are edited in place
+    pack = load_pack(filename, use_cache=False)
+    if pack.kind != KIND_LEGACY_BLOCKS:
+        print(f"❌ {filename} has no quiz blocks with questions ({pack.kind})")
+        sys.exit(1)
+    data = pack.raw
 
     updated_count = 0
     question_count = 0